@@ -3,6 +3,8 @@ import xbmcgui
 import xbmcaddon
 import xbmc
 import sys
+import time
+import importlib
 import urllib.parse
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'resources'))
@@ -10,7 +12,41 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'resources'))
 # Scraping siempre disponible (sin dependencias externas)
 SCRAPING_AVAILABLE = True
 xbmc.log('MAL Tracker: Simple scraper enabled (no external dependencies)', xbmc.LOGINFO)
-from resources import auth, mal_api, mal_search, config_importer, public_api, streaming_integration, local_database, sync_manager, advanced_search, notifications, ai_recommendations, multimedia, personalization, gamification, backup_system, jikan_api, jikan_functions, translator, settings_menu
+
+class _LazyModule:
+    """Módulo de resources que se importa en el primer acceso
+    
+    Kodi lanza un intérprete nuevo en cada clic: solo se importa lo que
+    usa la acción solicitada
+    """
+    
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(f'resources.{self._name}')
+        return getattr(self._module, attr)
+
+auth = _LazyModule('auth')
+mal_api = _LazyModule('mal_api')
+mal_search = _LazyModule('mal_search')
+config_importer = _LazyModule('config_importer')
+public_api = _LazyModule('public_api')
+streaming_integration = _LazyModule('streaming_integration')
+local_database = _LazyModule('local_database')
+advanced_search = _LazyModule('advanced_search')
+notifications = _LazyModule('notifications')
+ai_recommendations = _LazyModule('ai_recommendations')
+multimedia = _LazyModule('multimedia')
+personalization = _LazyModule('personalization')
+gamification = _LazyModule('gamification')
+backup_system = _LazyModule('backup_system')
+jikan_api = _LazyModule('jikan_api')
+jikan_functions = _LazyModule('jikan_functions')
+translator = _LazyModule('translator')
+settings_menu = _LazyModule('settings_menu')
 
 ADDON = xbmcaddon.Addon()
 HANDLE = int(sys.argv[1])
@@ -26,131 +62,9 @@ def is_authenticated():
 
 def router(paramstring):
     params = dict(urllib.parse.parse_qsl(paramstring))
-    if params:
-        if params.get('action') == 'list':
-            list_anime()
-        elif params.get('action') == 'update':
-            update_anime(params)
-        elif params.get('action') == 'auth':
-            authenticate()
-        elif params.get('action') == 'manual_auth':
-            manual_authenticate()
-        elif params.get('action') == 'auth_help_manual':
-            show_manual_auth_help_menu()
-        elif params.get('action') == 'service_config':
-            show_service_config_menu()
-        elif params.get('action') == 'service_status':
-            show_service_status()
-        elif params.get('action') == 'expert_streaming':
-            show_expert_streaming_menu()
-        elif params.get('action') == 'expert_search':
-            expert_search_site(params)
-        elif params.get('action') == 'expert_search_all':
-            expert_search_all_sites(params)
-        elif params.get('action') == 'scrape_episodes':
-            scrape_episodes(params)
-        elif params.get('action') == 'play_episode':
-            play_episode_direct(params)
-        elif params.get('action') == 'player_settings':
-            show_player_settings()
-        elif params.get('action') == 'player_control':
-            player_control(params)
-        elif params.get('action') == 'search':
-            search_anime()
-        elif params.get('action') == 'details':
-            show_anime_details(params)
-        elif params.get('action') == 'import_config':
-            config_importer.import_config_from_text()
-        elif params.get('action') == 'search_public':
-            search_anime_public()
-        elif params.get('action') == 'top_anime':
-            show_top_anime()
-        elif params.get('action') == 'seasonal':
-            show_seasonal_anime()
-        elif params.get('action') == 'details_public':
-            show_anime_details_public(params)
-        elif params.get('action') == 'schedule':
-            show_schedule_menu()
-        elif params.get('action') == 'schedule_day':
-            show_schedule_day(params)
-        elif params.get('action') == 'upcoming':
-            show_upcoming_anime()
-        elif params.get('action') == 'streaming_status':
-            streaming_integration.show_streaming_menu()
-        elif params.get('action') == 'watch_anime':
-            watch_anime(params)
-        elif params.get('action') == 'install_streaming':
-            streaming_integration.show_install_addons_info()
-        elif params.get('action') == 'my_list':
-            show_my_list()
-        elif params.get('action') == 'local_stats':
-            show_local_stats()
-        elif params.get('action') == 'sync_now':
-            sync_now()
-        elif params.get('action') == 'add_to_list':
-            add_to_local_list(params)
-        elif params.get('action') == 'update_local':
-            update_local_anime(params)
-        elif params.get('action') == 'list_by_status':
-            show_list_by_status(params)
-        elif params.get('action') == 'smart_filter':
-            show_smart_filter(params)
-        elif params.get('action') == 'list_by_genre':
-            show_list_by_genre(params)
-        elif params.get('action') == 'advanced_search':
-            advanced_search.show_advanced_search_menu()
-        elif params.get('action') == 'notifications':
-            notifications.configure_notifications()
-        elif params.get('action') == 'ai_recommendations':
-            show_ai_recommendations()
-        elif params.get('action') == 'achievements':
-            gamification.show_achievements_menu()
-        elif params.get('action') == 'personalization':
-            personalization.show_personalization_menu()
-        elif params.get('action') == 'backup':
-            backup_system.show_backup_menu()
-        elif params.get('action') == 'token_backup':
-            show_token_backup_menu()
-        elif params.get('action') == 'multimedia':
-            show_multimedia_content(params)
-        elif params.get('action') == 'sync_compatibility':
-            show_sync_compatibility()
-        elif params.get('action') == 'security':
-            show_security_menu()
-        elif params.get('action') == 'security_report':
-            show_comprehensive_security_report()
-        elif params.get('action') == 'bulletproof':
-            from resources.bulletproof_menu import show_bulletproof_menu
-            show_bulletproof_menu()
-        elif params.get('action') == 'complete_apis':
-            from resources.complete_apis_menu import show_complete_apis_menu
-            show_complete_apis_menu()
-        elif params.get('action') == 'jikan_menu':
-            jikan_functions.show_jikan_menu(HANDLE, BASE_URL, ICON, FANART)
-        elif params.get('action') == 'jikan_random':
-            jikan_functions.show_random_anime(HANDLE, BASE_URL, ICON, FANART)
-        elif params.get('action') == 'jikan_genres':
-            jikan_functions.show_genres_menu(HANDLE, BASE_URL, ICON, FANART)
-        elif params.get('action') == 'jikan_characters':
-            jikan_functions.show_characters_menu(HANDLE, BASE_URL, ICON, FANART)
-        elif params.get('action') == 'settings_menu':
-            settings_menu.show_settings_menu(HANDLE, BASE_URL, ICON, FANART)
-        elif params.get('action') == 'auth_menu':
-            settings_menu.show_auth_menu(HANDLE, BASE_URL, ICON, FANART)
-        elif params.get('action') == 'sync_menu':
-            settings_menu.show_sync_menu(HANDLE, BASE_URL, ICON, FANART)
-        elif params.get('action') == 'addon_settings':
-            settings_menu.show_addon_settings()
-        elif params.get('action') == 'auth_help':
-            settings_menu.show_auth_help()
-        elif params.get('action') == 'sync_help':
-            settings_menu.show_sync_help()
-        elif params.get('action') == 'system_info':
-            settings_menu.show_system_info()
-        elif params.get('action') == 'logout':
-            settings_menu.logout_user()
-        else:
-            show_main_menu()
+    handler = ACTIONS.get(params.get('action'))
+    if handler:
+        handler(params)
     else:
         show_main_menu()
 
@@ -165,9 +79,7 @@ def show_main_menu():
     except Exception as e:
         xbmc.log(f'{ADDON_NAME}: Error initializing systems - {str(e)}', xbmc.LOGDEBUG)
     
-    # Auto-sincronización, notificaciones y gamificación
-    sync_manager.auto_sync_if_authenticated()
-    notifications.check_for_notifications()
+    # Sincronización y notificaciones las gestiona el servicio en segundo plano
     gamification.check_achievements()
     gamification.update_activity_streak()
     
@@ -739,11 +651,20 @@ def search_anime_public():
         xbmcgui.Dialog().notification(ADDON_NAME, f'Error: {str(e)}')
     xbmcplugin.endOfDirectory(HANDLE)
 
+def set_listing_category(label, results):
+    """Título del listado con la antigüedad de los datos servidos desde caché"""
+    meta = results.get('_cache') if isinstance(results, dict) else None
+    if meta:
+        minutes = int((time.time() - meta['fetched_at']) / 60)
+        if meta['stale'] or minutes >= 1:
+            label = f'{label} (actualizado hace {minutes} min)'
+    xbmcplugin.setPluginCategory(HANDLE, label)
+
 def show_top_anime():
     try:
-        xbmcplugin.setPluginCategory(HANDLE, 'Top Anime')
         xbmcplugin.setContent(HANDLE, 'tvshows')
-        results = jikan_api.JikanAPI.get_top_anime()
+        results = jikan_api.JikanAPI.get_top_anime(stale_ok=True)
+        set_listing_category('Top Anime', results)
         if not results or 'data' not in results:
             xbmcgui.Dialog().notification(ADDON_NAME, 'No se pudo obtener el top')
             xbmcplugin.endOfDirectory(HANDLE)
@@ -797,9 +718,9 @@ def show_top_anime():
 
 def show_seasonal_anime():
     try:
-        xbmcplugin.setPluginCategory(HANDLE, 'Anime de Temporada')
         xbmcplugin.setContent(HANDLE, 'tvshows')
-        results = jikan_api.JikanAPI.get_current_season()
+        results = jikan_api.JikanAPI.get_current_season(stale_ok=True)
+        set_listing_category('Anime de Temporada', results)
         if not results or 'data' not in results:
             xbmcgui.Dialog().notification(ADDON_NAME, 'No se pudo obtener anime de temporada')
             xbmcplugin.endOfDirectory(HANDLE)
@@ -884,11 +805,11 @@ def show_schedule_day(params):
     }.get(day, day)
     
     try:
-        xbmcplugin.setPluginCategory(HANDLE, f'Calendario - {day_name}')
         xbmcplugin.setContent(HANDLE, 'tvshows')
         
         schedule_day = None if day == 'all' else day
-        results = public_api.get_schedule_public(schedule_day)
+        results = public_api.get_schedule_public(schedule_day, stale_ok=True)
+        set_listing_category(f'Calendario - {day_name}', results)
         
         if not results or 'data' not in results:
             xbmcgui.Dialog().notification(ADDON_NAME, 'No se pudo obtener el calendario')
@@ -944,9 +865,9 @@ def show_schedule_day(params):
 def show_upcoming_anime():
     """Mostrar próximos estrenos"""
     try:
-        xbmcplugin.setPluginCategory(HANDLE, 'Próximos Estrenos')
         xbmcplugin.setContent(HANDLE, 'tvshows')
-        results = public_api.get_upcoming_anime_public()
+        results = public_api.get_upcoming_anime_public(stale_ok=True)
+        set_listing_category('Próximos Estrenos', results)
         
         if not results or 'data' not in results:
             xbmcgui.Dialog().notification(ADDON_NAME, 'No se pudo obtener próximos estrenos')
@@ -1381,5 +1302,69 @@ def show_list_by_genre(params):
     xbmcplugin.addSortMethod(HANDLE, xbmcplugin.SORT_METHOD_VIDEO_RATING)
     xbmcplugin.endOfDirectory(HANDLE)
 
+# Tabla de acciones: cada manejador recibe los parámetros de la URL
+ACTIONS = {
+    'list': lambda params: list_anime(),
+    'update': update_anime,
+    'auth': lambda params: authenticate(),
+    'manual_auth': lambda params: manual_authenticate(),
+    'auth_help_manual': lambda params: show_manual_auth_help_menu(),
+    'service_config': lambda params: show_service_config_menu(),
+    'service_status': lambda params: show_service_status(),
+    'expert_streaming': lambda params: show_expert_streaming_menu(),
+    'expert_search': expert_search_site,
+    'expert_search_all': expert_search_all_sites,
+    'scrape_episodes': scrape_episodes,
+    'play_episode': play_episode_direct,
+    'player_settings': lambda params: show_player_settings(),
+    'player_control': player_control,
+    'search': lambda params: search_anime(),
+    'details': show_anime_details,
+    'import_config': lambda params: config_importer.import_config_from_text(),
+    'search_public': lambda params: search_anime_public(),
+    'top_anime': lambda params: show_top_anime(),
+    'seasonal': lambda params: show_seasonal_anime(),
+    'details_public': show_anime_details_public,
+    'schedule': lambda params: show_schedule_menu(),
+    'schedule_day': show_schedule_day,
+    'upcoming': lambda params: show_upcoming_anime(),
+    'streaming_status': lambda params: streaming_integration.show_streaming_menu(),
+    'watch_anime': watch_anime,
+    'install_streaming': lambda params: streaming_integration.show_install_addons_info(),
+    'my_list': lambda params: show_my_list(),
+    'local_stats': lambda params: show_local_stats(),
+    'sync_now': lambda params: sync_now(),
+    'add_to_list': add_to_local_list,
+    'update_local': update_local_anime,
+    'list_by_status': show_list_by_status,
+    'smart_filter': show_smart_filter,
+    'list_by_genre': show_list_by_genre,
+    'advanced_search': lambda params: advanced_search.show_advanced_search_menu(),
+    'notifications': lambda params: notifications.configure_notifications(),
+    'ai_recommendations': lambda params: show_ai_recommendations(),
+    'achievements': lambda params: gamification.show_achievements_menu(),
+    'personalization': lambda params: personalization.show_personalization_menu(),
+    'backup': lambda params: backup_system.show_backup_menu(),
+    'token_backup': lambda params: show_token_backup_menu(),
+    'multimedia': show_multimedia_content,
+    'sync_compatibility': lambda params: show_sync_compatibility(),
+    'security': lambda params: show_security_menu(),
+    'security_report': lambda params: show_comprehensive_security_report(),
+    'bulletproof': lambda params: _LazyModule('bulletproof_menu').show_bulletproof_menu(),
+    'complete_apis': lambda params: _LazyModule('complete_apis_menu').show_complete_apis_menu(),
+    'jikan_menu': lambda params: jikan_functions.show_jikan_menu(HANDLE, BASE_URL, ICON, FANART),
+    'jikan_random': lambda params: jikan_functions.show_random_anime(HANDLE, BASE_URL, ICON, FANART),
+    'jikan_genres': lambda params: jikan_functions.show_genres_menu(HANDLE, BASE_URL, ICON, FANART),
+    'jikan_characters': lambda params: jikan_functions.show_characters_menu(HANDLE, BASE_URL, ICON, FANART),
+    'settings_menu': lambda params: settings_menu.show_settings_menu(HANDLE, BASE_URL, ICON, FANART),
+    'auth_menu': lambda params: settings_menu.show_auth_menu(HANDLE, BASE_URL, ICON, FANART),
+    'sync_menu': lambda params: settings_menu.show_sync_menu(HANDLE, BASE_URL, ICON, FANART),
+    'addon_settings': lambda params: settings_menu.show_addon_settings(),
+    'auth_help': lambda params: settings_menu.show_auth_help(),
+    'sync_help': lambda params: settings_menu.show_sync_help(),
+    'system_info': lambda params: settings_menu.show_system_info(),
+    'logout': lambda params: settings_menu.logout_user()
+}
+
 if __name__ == '__main__':
     router(sys.argv[2][1:])
\ No newline at end of file
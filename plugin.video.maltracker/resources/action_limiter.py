@@ -0,0 +1,67 @@
+"""
+Límite de intentos por acción (ventana deslizante compartida entre procesos)
+Contadores por tramo de ventana en mal_tracker.db: se estima el número de
+intentos de la última ventana a partir del tramo actual y del anterior, y la
+decisión y el incremento se hacen en una sola transacción de escritura
+"""
+
+import math
+import time
+import xbmc
+from . import local_database
+
+def _estimate(previous, current, elapsed, window):
+    """Intentos estimados en la ventana deslizante que termina ahora"""
+    return previous * (1 - elapsed / window) + current
+
+def _retry_after(previous, current, elapsed, window, max_attempts):
+    """Segundos hasta que la estimación baje de max_attempts"""
+    if current < max_attempts:
+        # El peso del tramo anterior va bajando dentro del tramo actual
+        fraction = 1 - (max_attempts - current) / previous
+        return window * fraction - elapsed
+    # El tramo actual pasará a ser el anterior
+    return window - elapsed + window * (1 - max_attempts / current)
+
+def check(action, max_attempts=5, window=300):
+    """Registrar un intento de la acción si cabe en la ventana
+    
+    Devuelve (permitido, segundos hasta poder reintentar). Los intentos
+    denegados no cuentan.
+    """
+    now = time.time()
+    bucket = int(now // window * window)
+    elapsed = now - bucket
+    
+    with local_database.transaction() as cursor:
+        # Bloqueo de escritura desde la lectura: ningún otro proceso puede
+        # decidir con los mismos contadores
+        if not cursor.connection.in_transaction:
+            cursor.execute('BEGIN IMMEDIATE')
+        
+        cursor.execute('''
+            SELECT window_start, count FROM action_limits
+            WHERE action = ? AND window_size = ? AND window_start >= ?
+        ''', (action, window, bucket - window))
+        counts = dict(cursor.fetchall())
+        previous = counts.get(bucket - window, 0)
+        current = counts.get(bucket, 0)
+        
+        if _estimate(previous, current, elapsed, window) >= max_attempts:
+            return False, max(1, math.ceil(_retry_after(previous, current, elapsed, window, max_attempts)))
+        
+        cursor.execute('''
+            INSERT INTO action_limits (action, window_size, window_start, count) VALUES (?, ?, ?, 1)
+            ON CONFLICT(action, window_size, window_start) DO UPDATE SET count = count + 1
+        ''', (action, window, bucket))
+        cursor.execute('DELETE FROM action_limits WHERE action = ? AND window_size = ? AND window_start < ?',
+                       (action, window, bucket - window))
+        return True, 0
+
+def reset(action):
+    """Olvidar los intentos de una acción"""
+    try:
+        with local_database.transaction() as cursor:
+            cursor.execute('DELETE FROM action_limits WHERE action = ?', (action,))
+    except Exception as e:
+        xbmc.log(f'Action Limiter: Reset error - {str(e)}', xbmc.LOGERROR)
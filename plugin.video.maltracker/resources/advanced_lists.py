@@ -1,4 +1,3 @@
-import sqlite3
 import json
 import xbmc
 import xbmcgui
@@ -76,18 +75,27 @@ SMART_FILTERS = {
 
 # Listas por género
 GENRE_LISTS = {
-    'action': {'name': 'Acción', 'icon': '⚔️'},
-    'romance': {'name': 'Romance', 'icon': '💕'},
-    'comedy': {'name': 'Comedia', 'icon': '😂'},
-    'drama': {'name': 'Drama', 'icon': '🎭'},
-    'fantasy': {'name': 'Fantasía', 'icon': '🧙'},
-    'horror': {'name': 'Terror', 'icon': '👻'},
-    'sci_fi': {'name': 'Sci-Fi', 'icon': '🚀'},
-    'slice_of_life': {'name': 'Slice of Life', 'icon': '🌸'}
+    'action': {'name': 'Acción', 'icon': '⚔️', 'genre': 'Action'},
+    'romance': {'name': 'Romance', 'icon': '💕', 'genre': 'Romance'},
+    'comedy': {'name': 'Comedia', 'icon': '😂', 'genre': 'Comedy'},
+    'drama': {'name': 'Drama', 'icon': '🎭', 'genre': 'Drama'},
+    'fantasy': {'name': 'Fantasía', 'icon': '🧙', 'genre': 'Fantasy'},
+    'horror': {'name': 'Terror', 'icon': '👻', 'genre': 'Horror'},
+    'sci_fi': {'name': 'Sci-Fi', 'icon': '🚀', 'genre': 'Sci-Fi'},
+    'slice_of_life': {'name': 'Slice of Life', 'icon': '🌸', 'genre': 'Slice of Life'}
 }
 
+def get_genre_name(genre):
+    """Nombre de género de MAL para un identificador de lista"""
+    return GENRE_LISTS.get(genre, {}).get('genre', genre)
+
 def get_advanced_list_menu():
     """Obtener menú de listas avanzadas"""
+    # Todos los contadores en una sola transacción de lectura
+    with local_database.transaction():
+        return _build_advanced_list_menu()
+
+def _build_advanced_list_menu():
     menu_items = []
     
     # Estados básicos con contadores
@@ -134,13 +142,10 @@ def get_advanced_list_menu():
 def get_anime_count_by_status(status):
     """Obtener contador de anime por estado"""
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
+        with local_database.transaction() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM anime_list WHERE status = ?', (status,))
+            count = cursor.fetchone()[0]
         
-        cursor.execute('SELECT COUNT(*) FROM anime_list WHERE status = ?', (status,))
-        count = cursor.fetchone()[0]
-        
-        conn.close()
         return count
     except:
         return 0
@@ -148,16 +153,13 @@ def get_anime_count_by_status(status):
 def get_smart_filter_count(filter_id):
     """Obtener contador para filtro inteligente"""
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        filter_info = SMART_FILTERS[filter_id]
-        query = f"SELECT COUNT(*) FROM anime_list {filter_info['query']}"
+        with local_database.transaction() as cursor:
+            filter_info = SMART_FILTERS[filter_id]
+            query = f"SELECT COUNT(*) FROM anime_list {filter_info['query']}"
         
-        cursor.execute(query)
-        count = cursor.fetchone()[0]
+            cursor.execute(query)
+            count = cursor.fetchone()[0]
         
-        conn.close()
         return count
     except:
         return 0
@@ -165,17 +167,13 @@ def get_smart_filter_count(filter_id):
 def get_genre_count(genre):
     """Obtener contador por género"""
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
+        with local_database.transaction() as cursor:
+            cursor.execute('''
+                SELECT COUNT(*) FROM anime_genres 
+                WHERE genre = ?
+            ''', (get_genre_name(genre),))
         
-        # CORREGIDO: Usar parámetros seguros
-        cursor.execute('''
-            SELECT COUNT(*) FROM anime_list 
-            WHERE genres LIKE ?
-        ''', (f'%{genre}%',))
-        
-        count = cursor.fetchone()[0]
-        conn.close()
+            count = cursor.fetchone()[0]
         return count
     except:
         return 0
@@ -183,15 +181,12 @@ def get_genre_count(genre):
 def get_anime_by_smart_filter(filter_id):
     """Obtener anime por filtro inteligente"""
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        filter_info = SMART_FILTERS[filter_id]
-        query = f"SELECT * FROM anime_list {filter_info['query']}"
+        with local_database.transaction() as cursor:
+            filter_info = SMART_FILTERS[filter_id]
+            query = f"SELECT * FROM anime_list {filter_info['query']}"
         
-        cursor.execute(query)
-        results = cursor.fetchall()
-        conn.close()
+            cursor.execute(query)
+            results = cursor.fetchall()
         
         # Convertir a formato compatible
         anime_list = []
@@ -217,17 +212,15 @@ def get_anime_by_smart_filter(filter_id):
 def get_anime_by_genre(genre):
     """Obtener anime por género"""
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
+        with local_database.transaction() as cursor:
+            cursor.execute('''
+                SELECT a.* FROM anime_genres g
+                JOIN anime_list a ON a.mal_id = g.mal_id
+                WHERE g.genre = ?
+                ORDER BY a.score DESC, a.title ASC
+            ''', (get_genre_name(genre),))
         
-        cursor.execute('''
-            SELECT * FROM anime_list 
-            WHERE genres LIKE ?
-            ORDER BY score DESC, title ASC
-        ''', (f'%{genre}%',))
-        
-        results = cursor.fetchall()
-        conn.close()
+            results = cursor.fetchall()
         
         # Convertir a formato compatible
         anime_list = []
@@ -269,21 +262,18 @@ def get_list_statistics():
             stats[status_id] = get_anime_count_by_status(status_id)
         
         # Estadísticas adicionales
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        # Promedio de puntuación por estado
-        cursor.execute('''
-            SELECT status, AVG(score) 
-            FROM anime_list 
-            WHERE score > 0 
-            GROUP BY status
-        ''')
+        with local_database.transaction() as cursor:
+            # Promedio de puntuación por estado
+            cursor.execute('''
+                SELECT status, AVG(score) 
+                FROM anime_list 
+                WHERE score > 0 
+                GROUP BY status
+            ''')
         
-        avg_scores = dict(cursor.fetchall())
-        stats['avg_scores'] = avg_scores
+            avg_scores = dict(cursor.fetchall())
+            stats['avg_scores'] = avg_scores
         
-        conn.close()
         return stats
         
     except Exception as e:
@@ -59,12 +59,11 @@ def search_by_genre():
             'limit': 25
         }
         
-        import requests
-        from .config import USER_AGENT, rate_limit
+        from . import http_client
+        from .config import USER_AGENT
         
-        rate_limit()
         headers = {'User-Agent': USER_AGENT}
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = http_client.get(url, params=params, headers=headers, timeout=10)
         
         if response.status_code == 200:
             results = response.json()
@@ -85,12 +84,11 @@ def search_by_year():
     try:
         url = f"https://api.jikan.moe/v4/seasons/{year}/winter"
         
-        import requests
-        from .config import USER_AGENT, rate_limit
+        from . import http_client
+        from .config import USER_AGENT
         
-        rate_limit()
         headers = {'User-Agent': USER_AGENT}
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         
         if response.status_code == 200:
             results = response.json()
@@ -111,12 +109,11 @@ def search_by_studio():
         url = f"https://api.jikan.moe/v4/producers"
         params = {'q': studio_name, 'limit': 10}
         
-        import requests
-        from .config import USER_AGENT, rate_limit
+        from . import http_client
+        from .config import USER_AGENT
         
-        rate_limit()
         headers = {'User-Agent': USER_AGENT}
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = http_client.get(url, params=params, headers=headers, timeout=10)
         
         if response.status_code == 200:
             studios = response.json().get('data', [])
@@ -152,12 +149,11 @@ def search_by_score():
             'limit': 25
         }
         
-        import requests
-        from .config import USER_AGENT, rate_limit
+        from . import http_client
+        from .config import USER_AGENT
         
-        rate_limit()
         headers = {'User-Agent': USER_AGENT}
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = http_client.get(url, params=params, headers=headers, timeout=10)
         
         if response.status_code == 200:
             results = response.json()
@@ -173,12 +169,7 @@ def search_local_list():
     if not query:
         return
     
-    local_list = local_database.get_local_anime_list()
-    results = []
-    
-    for anime in local_list:
-        if query.lower() in anime['title'].lower():
-            results.append(anime)
+    results = local_database.search_local_anime(query)
     
     return format_local_results(results, f'En mi lista: "{query}"')
 
@@ -235,12 +226,11 @@ def execute_combined_search(filters):
         }
         params.update(filters)
         
-        import requests
-        from .config import USER_AGENT, rate_limit
+        from . import http_client
+        from .config import USER_AGENT
         
-        rate_limit()
         headers = {'User-Agent': USER_AGENT}
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = http_client.get(url, params=params, headers=headers, timeout=10)
         
         if response.status_code == 200:
             results = response.json()
@@ -272,12 +262,11 @@ def search_anime_by_producer(producer_id, producer_name):
             'limit': 25
         }
         
-        import requests
-        from .config import USER_AGENT, rate_limit
+        from . import http_client
+        from .config import USER_AGENT
         
-        rate_limit()
         headers = {'User-Agent': USER_AGENT}
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = http_client.get(url, params=params, headers=headers, timeout=10)
         
         if response.status_code == 200:
             results = response.json()
@@ -1,13 +1,14 @@
 import json
-import math
 from collections import Counter
-from . import local_database, public_api
+from . import local_database, public_api, recommendation_engine, anime_catalog
 import xbmc
 
-def get_user_preferences():
+def get_user_preferences(library=None):
     """Analizar preferencias del usuario basado en historial"""
     try:
-        completed_anime = local_database.get_local_anime_list('completed')
+        if library is None:
+            library = local_database.get_local_anime_list()
+        completed_anime = [a for a in library if a['status'] == 'completed']
         high_rated = [a for a in completed_anime if a['score'] >= 8]
         
         # Análisis de géneros favoritos
@@ -46,13 +47,41 @@ def get_user_preferences():
         return {}
 
 def generate_recommendations(limit=20):
-    """Generar recomendaciones basadas en IA local"""
-    preferences = get_user_preferences()
+    """Generar recomendaciones basadas en IA local
+    
+    Los candidatos salen del catálogo local (ver anime_catalog) y se
+    puntúan todos a la vez contra el perfil TF-IDF de la biblioteca (ver
+    recommendation_engine). Solo se busca en Jikan si el catálogo es pequeño.
+    """
+    library = local_database.get_local_anime_list()
+    preferences = get_user_preferences(library)
     if not preferences:
         return []
     
+    my_list_ids = {anime['mal_id'] for anime in library}
+    
+    try:
+        if anime_catalog.size() >= anime_catalog.MIN_CATALOG_SIZE:
+            # Matriz ya compilada por el servicio
+            matrix = recommendation_engine.get_catalog_matrix()
+        else:
+            candidates = search_live_candidates(preferences, my_list_ids)
+            anime_catalog.add_entries(candidates, 'search')
+            matrix = recommendation_engine.get_matrix(candidates)
+        
+        # Puntuar y seleccionar los mejores (sin duplicados)
+        return [
+            dict(rec, recommendation_score=score)
+            for rec, score in matrix.recommend(library, limit, my_list_ids)
+        ]
+        
+    except Exception as e:
+        xbmc.log(f'AI Recommendations: Generate error - {str(e)}', xbmc.LOGERROR)
+        return []
+
+def search_live_candidates(preferences, my_list_ids):
+    """Candidatos buscados en Jikan por géneros, estudios y año favoritos"""
     recommendations = []
-    my_list_ids = [anime['mal_id'] for anime in local_database.get_local_anime_list()]
     
     try:
         # Recomendaciones por género favorito
@@ -70,31 +99,10 @@ def generate_recommendations(limit=20):
             year_recs = search_by_year_ai(preferences['favorite_years'][0], my_list_ids, 5)
             recommendations.extend(year_recs)
         
-        # Calcular puntuaciones de recomendación
-        scored_recs = []
-        for rec in recommendations:
-            score = calculate_recommendation_score(rec, preferences)
-            scored_recs.append((rec, score))
-        
-        # Ordenar por puntuación y eliminar duplicados
-        scored_recs.sort(key=lambda x: x[1], reverse=True)
-        unique_recs = []
-        seen_ids = set()
-        
-        for rec, score in scored_recs:
-            if rec.get('mal_id') not in seen_ids:
-                rec['recommendation_score'] = score
-                unique_recs.append(rec)
-                seen_ids.add(rec.get('mal_id'))
-                
-                if len(unique_recs) >= limit:
-                    break
-        
-        return unique_recs
-        
     except Exception as e:
-        xbmc.log(f'AI Recommendations: Generate error - {str(e)}', xbmc.LOGERROR)
-        return []
+        xbmc.log(f'AI Recommendations: Live search error - {str(e)}', xbmc.LOGERROR)
+    
+    return recommendations
 
 def search_by_genre_ai(genre, exclude_ids, limit):
     """Buscar anime por género para IA"""
@@ -133,38 +141,6 @@ def search_by_year_ai(year, exclude_ids, limit):
         pass
     return []
 
-def calculate_recommendation_score(anime, preferences):
-    """Calcular puntuación de recomendación"""
-    score = 0.0
-    
-    # Puntuación base del anime
-    base_score = anime.get('score', 0)
-    if base_score:
-        score += base_score * 0.3
-    
-    # Bonus por géneros favoritos
-    anime_genres = [g.get('name', '') for g in anime.get('genres', [])]
-    genre_matches = len(set(anime_genres) & set(preferences['favorite_genres']))
-    score += genre_matches * 2.0
-    
-    # Bonus por estudios favoritos
-    anime_studios = [s.get('name', '') for s in anime.get('studios', [])]
-    studio_matches = len(set(anime_studios) & set(preferences['favorite_studios']))
-    score += studio_matches * 1.5
-    
-    # Bonus por popularidad
-    popularity = anime.get('popularity', 0)
-    if popularity:
-        score += (10000 - popularity) / 1000  # Más popular = mayor score
-    
-    # Penalty por muy viejo o muy nuevo
-    anime_year = anime.get('year', 0)
-    if anime_year and preferences['favorite_years']:
-        year_diff = min(abs(anime_year - year) for year in preferences['favorite_years'])
-        score -= year_diff * 0.1
-    
-    return round(score, 2)
-
 def get_similar_anime(anime_id, limit=10):
     """Obtener anime similar a uno específico"""
     try:
@@ -174,62 +150,28 @@ def get_similar_anime(anime_id, limit=10):
             return []
         
         base_genres = [g.get('name', '') for g in base_anime.get('genres', [])]
-        base_studios = [s.get('name', '') for s in base_anime.get('studios', [])]
-        
-        # Buscar anime similar por géneros
-        similar = []
-        my_list_ids = [anime['mal_id'] for anime in local_database.get_local_anime_list()]
-        
-        for genre in base_genres[:2]:  # Top 2 géneros
-            genre_results = search_by_genre_ai(genre, my_list_ids + [anime_id], 5)
-            similar.extend(genre_results)
         
-        # Calcular similitud
-        scored_similar = []
-        for anime in similar:
-            similarity = calculate_similarity(anime, base_anime)
-            scored_similar.append((anime, similarity))
+        my_list_ids = {anime['mal_id'] for anime in local_database.get_local_anime_list()}
+        my_list_ids.add(anime_id)
         
-        # Ordenar por similitud
-        scored_similar.sort(key=lambda x: x[1], reverse=True)
+        # Candidatos del catálogo local o, si es pequeño, búsqueda por géneros
+        if anime_catalog.size() >= anime_catalog.MIN_CATALOG_SIZE:
+            matrix = recommendation_engine.get_catalog_matrix()
+        else:
+            similar = []
+            for genre in base_genres[:2]:  # Top 2 géneros
+                genre_results = search_by_genre_ai(genre, my_list_ids, 5)
+                similar.extend(genre_results)
+            anime_catalog.add_entries(similar, 'search')
+            matrix = recommendation_engine.get_matrix(similar)
         
-        return [anime for anime, score in scored_similar[:limit]]
+        # Ordenar por similitud coseno con el anime base
+        return [anime for anime, score in matrix.similar(base_anime, limit, my_list_ids)]
         
     except Exception as e:
         xbmc.log(f'AI Recommendations: Similar anime error - {str(e)}', xbmc.LOGERROR)
         return []
 
-def calculate_similarity(anime1, anime2):
-    """Calcular similitud entre dos anime"""
-    similarity = 0.0
-    
-    # Similitud de géneros
-    genres1 = set(g.get('name', '') for g in anime1.get('genres', []))
-    genres2 = set(g.get('name', '') for g in anime2.get('genres', []))
-    
-    if genres1 and genres2:
-        genre_similarity = len(genres1 & genres2) / len(genres1 | genres2)
-        similarity += genre_similarity * 3.0
-    
-    # Similitud de estudios
-    studios1 = set(s.get('name', '') for s in anime1.get('studios', []))
-    studios2 = set(s.get('name', '') for s in anime2.get('studios', []))
-    
-    if studios1 and studios2:
-        studio_similarity = len(studios1 & studios2) / len(studios1 | studios2)
-        similarity += studio_similarity * 2.0
-    
-    # Similitud de puntuación
-    score1 = anime1.get('score', 0)
-    score2 = anime2.get('score', 0)
-    
-    if score1 and score2:
-        score_diff = abs(score1 - score2)
-        score_similarity = max(0, 1 - score_diff / 10)
-        similarity += score_similarity * 1.0
-    
-    return round(similarity, 2)
-
 def get_trending_recommendations():
     """Obtener recomendaciones trending"""
     try:
@@ -1,8 +1,5 @@
-import sqlite3
-import json
 import time
 import calendar
-from collections import Counter
 from . import local_database
 import xbmc
 import xbmcgui
@@ -10,47 +7,43 @@ import xbmcgui
 def get_viewing_analytics():
     """Obtener analytics de visualización"""
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
+        with local_database.transaction() as cursor:
+            # Tiempo total viendo anime (estimado)
+            cursor.execute('SELECT SUM(episodes_watched * 24) FROM anime_list')
+            total_minutes = cursor.fetchone()[0] or 0
+            total_hours = round(total_minutes / 60, 1)
+            total_days = round(total_hours / 24, 1)
         
-        # Tiempo total viendo anime (estimado)
-        cursor.execute('SELECT SUM(episodes_watched * 24) FROM anime_list')
-        total_minutes = cursor.fetchone()[0] or 0
-        total_hours = round(total_minutes / 60, 1)
-        total_days = round(total_hours / 24, 1)
+            # Anime por década
+            cursor.execute('''
+                SELECT 
+                    CASE 
+                        WHEN year >= 2020 THEN '2020s'
+                        WHEN year >= 2010 THEN '2010s'
+                        WHEN year >= 2000 THEN '2000s'
+                        WHEN year >= 1990 THEN '1990s'
+                        ELSE 'Older'
+                    END as decade,
+                    COUNT(*) as count
+                FROM anime_list 
+                WHERE year > 0
+                GROUP BY decade
+                ORDER BY decade DESC
+            ''')
+            decades = dict(cursor.fetchall())
         
-        # Anime por década
-        cursor.execute('''
-            SELECT 
-                CASE 
-                    WHEN year >= 2020 THEN '2020s'
-                    WHEN year >= 2010 THEN '2010s'
-                    WHEN year >= 2000 THEN '2000s'
-                    WHEN year >= 1990 THEN '1990s'
-                    ELSE 'Older'
-                END as decade,
-                COUNT(*) as count
-            FROM anime_list 
-            WHERE year > 0
-            GROUP BY decade
-            ORDER BY decade DESC
-        ''')
-        decades = dict(cursor.fetchall())
+            # Top estudios
+            cursor.execute('''
+                SELECT studio, COUNT(*) as count
+                FROM anime_studios
+                GROUP BY studio
+                ORDER BY count DESC
+                LIMIT 5
+            ''')
+            top_studios = cursor.fetchall()
         
-        # Top estudios
-        cursor.execute('SELECT studios FROM anime_list WHERE studios IS NOT NULL')
-        all_studios = []
-        for row in cursor.fetchall():
-            if row[0]:
-                studios = json.loads(row[0])
-                all_studios.extend(studios)
-        
-        top_studios = Counter(all_studios).most_common(5)
-        
-        # Progreso mensual (simulado)
-        monthly_progress = get_monthly_progress()
-        
-        conn.close()
+            # Progreso mensual (simulado)
+            monthly_progress = get_monthly_progress()
         
         return {
             'total_hours': total_hours,
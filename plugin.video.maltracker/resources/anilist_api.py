@@ -1,5 +1,6 @@
 import requests
 from .anilist_auth import load_access_token
+from . import http_client
 
 ANILIST_API_URL = 'https://graphql.anilist.co'
 
@@ -16,7 +17,7 @@ def _make_request(query, variables=None):
     if variables:
         data['variables'] = variables
     try:
-        response = requests.post(ANILIST_API_URL, json=data, headers=headers, timeout=10)
+        response = http_client.post(ANILIST_API_URL, json=data, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     except requests.RequestException:
@@ -50,6 +51,104 @@ def get_user_anime_list():
     '''
     return _make_request(query)
 
+# Estados de AniList equivalentes en MAL
+STATUS_TO_MAL = {
+    'CURRENT': 'watching',
+    'REPEATING': 'watching',
+    'COMPLETED': 'completed',
+    'PAUSED': 'on_hold',
+    'DROPPED': 'dropped',
+    'PLANNING': 'plan_to_watch'
+}
+
+LIST_PAGE_QUERY = '''
+query($userId: Int, $page: Int, $perPage: Int, $sort: [MediaListSort]) {
+    Page(page: $page, perPage: $perPage) {
+        pageInfo { hasNextPage }
+        mediaList(userId: $userId, type: ANIME, sort: $sort) {
+            status
+            updatedAt
+            score(format: POINT_10)
+            progress
+            media {
+                id
+                idMal
+                title { romaji english native }
+                synonyms
+                episodes
+                coverImage { medium }
+                averageScore
+            }
+        }
+    }
+}
+'''
+
+def get_viewer_id():
+    response = _make_request('query { Viewer { id } }')
+    if not response or not response.get('data'):
+        return None
+    return response['data']['Viewer']['id']
+
+def iter_user_anime_pages(per_page=50, sort='MEDIA_ID'):
+    """Recorrer la lista del usuario en bloques de Page/pageInfo
+    
+    Sustituye la descarga de MediaListCollection completa por consultas
+    pequeñas; cada bloque se entrega en cuanto llega. Si un bloque falla
+    se lanza http_client.IncompleteDownloadError.
+    sort='UPDATED_TIME_DESC' entrega primero lo modificado recientemente.
+    """
+    user_id = get_viewer_id()
+    if not user_id:
+        raise http_client.IncompleteDownloadError('AniList viewer not available')
+    
+    page = 1
+    while True:
+        response = _make_request(LIST_PAGE_QUERY, {'userId': user_id, 'page': page, 'perPage': per_page, 'sort': [sort]})
+        if not response or not response.get('data'):
+            raise http_client.IncompleteDownloadError(f'AniList list download interrupted at page {page}')
+        
+        result = response['data']['Page']
+        yield result['mediaList']
+        
+        if not result['pageInfo']['hasNextPage']:
+            return
+        page += 1
+
+def to_mal_entry(entry):
+    """Convertir una entrada de mediaList al formato de lista de MAL
+    
+    Devuelve None si el anime no existe en MAL (sin idMal): el id de AniList
+    es de otro espacio de numeración y chocaría con un mal_id real.
+    """
+    media = entry.get('media', {})
+    if not media.get('idMal'):
+        return None
+    
+    title = media.get('title', {})
+    average = media.get('averageScore')
+    
+    return {
+        'node': {
+            'id': media['idMal'],
+            'title': title.get('romaji') or title.get('english'),
+            'alternative_titles': {
+                'en': title.get('english'),
+                'ja': title.get('native'),
+                'synonyms': media.get('synonyms') or []
+            },
+            'num_episodes': media.get('episodes') or 0,
+            'main_picture': {'medium': media.get('coverImage', {}).get('medium')},
+            'mean': average / 10 if average else None
+        },
+        'list_status': {
+            'status': STATUS_TO_MAL.get(entry.get('status'), 'plan_to_watch'),
+            'num_episodes_watched': entry.get('progress') or 0,
+            'score': int(entry.get('score') or 0),
+            'updated_at': entry.get('updatedAt')
+        }
+    }
+
 def update_anime_status(media_id, status, progress=None, score=None):
     query = '''
     mutation($mediaId: Int, $status: MediaListStatus, $progress: Int, $score: Int) {
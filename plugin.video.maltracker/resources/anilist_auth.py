@@ -3,15 +3,16 @@ import requests
 import json
 import threading
 import xbmcgui
-from .config import ANILIST_CLIENT_ID, ANILIST_CLIENT_SECRET, ANILIST_AUTH_URL, ANILIST_TOKEN_URL, ANILIST_TOKEN_FILE, USER_AGENT
+from .config import ANILIST_AUTH_URL, ANILIST_TOKEN_URL, ANILIST_TOKEN_FILE
+from . import config
 from .local_server import start_callback_server
 
 def get_authorization_code():
-    if not ANILIST_CLIENT_ID:
+    if not config.ANILIST_CLIENT_ID:
         xbmcgui.Dialog().notification('AniList', 'Client ID no configurado')
         return None
     
-    url = f"{ANILIST_AUTH_URL}?client_id={ANILIST_CLIENT_ID}&response_type=code&redirect_uri=http://localhost:8080/callback"
+    url = f"{ANILIST_AUTH_URL}?client_id={config.ANILIST_CLIENT_ID}&response_type=code&redirect_uri=http://localhost:8080/callback"
     
     # Iniciar servidor
     server_thread = threading.Thread(target=lambda: setattr(get_authorization_code, 'result', start_callback_server()))
@@ -37,20 +38,20 @@ def get_authorization_code():
     return code
 
 def get_access_token(auth_code):
-    if not auth_code or not ANILIST_CLIENT_ID:
+    if not auth_code or not config.ANILIST_CLIENT_ID:
         xbmcgui.Dialog().notification('AniList', 'Código o Client ID faltante')
         return None
     
     auth_code = auth_code.strip()
     data = {
         'grant_type': 'authorization_code',
-        'client_id': ANILIST_CLIENT_ID,
-        'client_secret': ANILIST_CLIENT_SECRET,
+        'client_id': config.ANILIST_CLIENT_ID,
+        'client_secret': config.ANILIST_CLIENT_SECRET,
         'redirect_uri': 'http://localhost:8080/callback',
         'code': auth_code
     }
     headers = {
-        'User-Agent': USER_AGENT,
+        'User-Agent': config.USER_AGENT,
         'Content-Type': 'application/json',
         'Accept': 'application/json'
     }
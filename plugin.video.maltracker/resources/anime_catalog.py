@@ -0,0 +1,295 @@
+"""
+Catálogo local de anime para recomendaciones sin red
+Se alimenta de las respuestas de Jikan ya cacheadas, de la sincronización,
+de las vistas de detalle y de volcados JSON importados
+"""
+
+import re
+import json
+import time
+import threading
+import xbmc
+import xbmcgui
+import xbmcvfs
+from . import local_database, response_cache
+
+JIKAN_BASE = 'https://api.jikan.moe/v4'
+
+# Límite de filas; al superarlo se descartan las menos actualizadas
+MAX_CATALOG_SIZE = 20000
+# Tamaño mínimo para que los recomendadores dejen de buscar en vivo
+MIN_CATALOG_SIZE = 100
+# Refresco periódico desde Jikan
+REFRESH_INTERVAL = 24 * 60 * 60
+REFRESH_TOP_PAGES = 8
+IMPORT_BATCH = 1000
+
+# Respuestas cacheadas de Jikan que contienen fichas de anime
+_ANIME_PATHS = re.compile(r'^GET https://api\.jikan\.moe/v4/(anime(/\d+(/full)?)?|top/anime|seasons/[^/?]+(/[^/?]+)?|schedules)\?')
+
+_cache_lock = threading.Lock()
+_cached = None
+
+def _names(values):
+    return [{'name': value.get('name')} for value in values or [] if value.get('name')]
+
+def from_jikan(anime):
+    """Ficha reducida del catálogo a partir de un anime de Jikan"""
+    return {
+        'mal_id': anime.get('mal_id'),
+        'title': anime.get('title'),
+        'title_english': anime.get('title_english'),
+        'images': {'jpg': {'image_url': ((anime.get('images') or {}).get('jpg') or {}).get('image_url')}},
+        'synopsis': anime.get('synopsis'),
+        'genres': _names(anime.get('genres')),
+        'themes': _names(anime.get('themes')),
+        'demographics': _names(anime.get('demographics')),
+        'studios': _names(anime.get('studios')),
+        'year': anime.get('year') or ((((anime.get('aired') or {}).get('prop') or {}).get('from') or {}).get('year')),
+        'score': anime.get('score'),
+        'popularity': anime.get('popularity'),
+        'episodes': anime.get('episodes'),
+        'type': anime.get('type'),
+        'status': anime.get('status')
+    }
+
+def from_mal_node(node):
+    """Ficha reducida del catálogo a partir de un nodo de la API de MAL"""
+    return {
+        'mal_id': node.get('id'),
+        'title': node.get('title'),
+        'title_english': (node.get('alternative_titles') or {}).get('en'),
+        'images': {'jpg': {'image_url': (node.get('main_picture') or {}).get('medium')}},
+        'synopsis': node.get('synopsis'),
+        'genres': _names(node.get('genres')),
+        'themes': [],
+        'demographics': [],
+        'studios': _names(node.get('studios')),
+        'year': (node.get('start_season') or {}).get('year'),
+        'score': node.get('mean'),
+        'popularity': node.get('popularity'),
+        'episodes': node.get('num_episodes'),
+        'type': node.get('media_type'),
+        'status': node.get('status')
+    }
+
+def _normalize(entry):
+    if 'node' in entry:
+        return from_mal_node(entry['node'])
+    return from_jikan(entry)
+
+def add_entries(entries, source):
+    """Insertar o actualizar fichas (anime de Jikan o entradas de MAL)"""
+    now = time.time()
+    rows = []
+    for entry in entries or []:
+        if not isinstance(entry, dict):
+            continue
+        # Una ficha mal formada (p. ej. en un volcado importado) no debe
+        # tirar el lote entero: se descarta sola
+        try:
+            anime = _normalize(entry)
+            anime['mal_id'] = int(anime['mal_id'] or 0)
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if not anime['mal_id'] or not anime['title']:
+            continue
+        rows.append((anime['mal_id'], anime['title'], json.dumps(anime), anime['score'],
+                     anime['popularity'], anime['year'], source, now))
+    
+    if not rows:
+        return 0
+    
+    try:
+        with local_database.transaction() as cursor:
+            cursor.executemany('''
+                INSERT INTO anime_catalog (mal_id, title, data, score, popularity, year, source, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(mal_id) DO UPDATE SET
+                    title = excluded.title, data = excluded.data, score = excluded.score,
+                    popularity = excluded.popularity, year = excluded.year,
+                    source = excluded.source, updated_at = excluded.updated_at
+            ''', rows)
+        return len(rows)
+    
+    except Exception as e:
+        xbmc.log(f'Anime Catalog: Add error - {str(e)}', xbmc.LOGERROR)
+        return 0
+
+def add_response(response, source):
+    """Añadir las fichas de una respuesta de Jikan ({'data': [...]} o {'data': {...}})"""
+    data = (response or {}).get('data')
+    if isinstance(data, dict):
+        data = [data]
+    return add_entries(data, source)
+
+def prune(max_size=None):
+    """Aplicar el límite de tamaño (MAX_CATALOG_SIZE); devuelve las filas eliminadas"""
+    if max_size is None:
+        max_size = MAX_CATALOG_SIZE
+    try:
+        with local_database.transaction() as cursor:
+            cursor.execute('''
+                DELETE FROM anime_catalog WHERE mal_id IN (
+                    SELECT mal_id FROM anime_catalog ORDER BY updated_at DESC LIMIT -1 OFFSET ?
+                )
+            ''', (max_size,))
+            return cursor.rowcount
+    except Exception as e:
+        xbmc.log(f'Anime Catalog: Prune error - {str(e)}', xbmc.LOGERROR)
+        return 0
+
+def size():
+    try:
+        with local_database.transaction() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM anime_catalog')
+            return cursor.fetchone()[0]
+    except Exception as e:
+        xbmc.log(f'Anime Catalog: Size error - {str(e)}', xbmc.LOGERROR)
+        return 0
+
+def signature():
+    """Firma del catálogo: cambia al añadir, actualizar o podar fichas"""
+    with local_database.transaction() as cursor:
+        cursor.execute('SELECT COUNT(*), MAX(updated_at) FROM anime_catalog')
+        return cursor.fetchone()
+
+def get_entries(mal_ids):
+    """Fichas de los mal_id indicados, como {mal_id: ficha}"""
+    mal_ids = list(mal_ids)
+    if not mal_ids:
+        return {}
+    try:
+        with local_database.transaction() as cursor:
+            cursor.execute(f'SELECT mal_id, data FROM anime_catalog WHERE mal_id IN ({",".join("?" * len(mal_ids))})', mal_ids)
+            return {mal_id: json.loads(data) for mal_id, data in cursor.fetchall()}
+    except Exception as e:
+        xbmc.log(f'Anime Catalog: Read error - {str(e)}', xbmc.LOGERROR)
+        return {}
+
+def get_candidates():
+    """Todas las fichas del catálogo (memorizadas hasta que el catálogo cambie)"""
+    global _cached
+    
+    try:
+        with local_database.transaction() as cursor:
+            cursor.execute('SELECT COUNT(*), MAX(updated_at) FROM anime_catalog')
+            signature = cursor.fetchone()
+            
+            with _cache_lock:
+                if _cached and _cached[0] == signature:
+                    return _cached[1]
+            
+            cursor.execute('SELECT data FROM anime_catalog ORDER BY mal_id')
+            candidates = [json.loads(row[0]) for row in cursor.fetchall()]
+        
+        with _cache_lock:
+            _cached = (signature, candidates)
+        return candidates
+    
+    except Exception as e:
+        xbmc.log(f'Anime Catalog: Read error - {str(e)}', xbmc.LOGERROR)
+        return []
+
+def seed_from_response_cache():
+    """Incorporar las fichas de las respuestas de Jikan ya guardadas en caché"""
+    added = 0
+    try:
+        for cache_key, body in response_cache.iter_bodies(JIKAN_BASE):
+            if not _ANIME_PATHS.match(cache_key):
+                continue
+            try:
+                added += add_response(json.loads(body), 'cache')
+            except ValueError:
+                continue
+    except Exception as e:
+        xbmc.log(f'Anime Catalog: Seed error - {str(e)}', xbmc.LOGWARNING)
+    return added
+
+def refresh():
+    """Refrescar el catálogo: caché local, top y temporadas de Jikan"""
+    added = seed_from_response_cache()
+    
+    requests_list = [(f'{JIKAN_BASE}/top/anime', {'page': page}) for page in range(1, REFRESH_TOP_PAGES + 1)]
+    requests_list += [(f'{JIKAN_BASE}/seasons/now', None), (f'{JIKAN_BASE}/seasons/upcoming', None)]
+    
+    for url, params in requests_list:
+        try:
+            added += add_response(response_cache.get_json(url, params=params), 'refresh')
+        except Exception as e:
+            xbmc.log(f'Anime Catalog: Refresh request failed for {url} - {str(e)}', xbmc.LOGINFO)
+            break
+    
+    removed = prune()
+    local_database.set_config_value('catalog_last_refresh', time.time())
+    xbmc.log(f'Anime Catalog: Refreshed - {added} entries stored, {removed} pruned', xbmc.LOGINFO)
+    return added
+
+def refresh_if_due():
+    """Tarea del servicio: refrescar si ha pasado REFRESH_INTERVAL"""
+    last_refresh = float(local_database.get_config_value('catalog_last_refresh', 0))
+    if time.time() - last_refresh >= REFRESH_INTERVAL:
+        refresh()
+
+def _iter_dump(path):
+    """Entradas de un volcado: lista JSON, {'data': [...]} o JSON por líneas"""
+    with open(path, encoding='utf-8') as dump:
+        first = dump.read(1)
+        while first and first.isspace():
+            first = dump.read(1)
+        dump.seek(0)
+        
+        if first in ('[', '{'):
+            try:
+                content = json.load(dump)
+            except ValueError:
+                # Un objeto por línea
+                dump.seek(0)
+                content = None
+            if content is not None:
+                yield from content.get('data', []) if isinstance(content, dict) else content
+                return
+        
+        invalid = valid = 0
+        for line in dump:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                invalid += 1
+                continue
+            valid += 1
+            yield entry
+        
+        if invalid and not valid:
+            raise ValueError('el archivo no es JSON ni JSON por líneas')
+        if invalid:
+            xbmc.log(f'Anime Catalog: Skipped {invalid} invalid lines in {path}', xbmc.LOGWARNING)
+
+def import_dump(path):
+    """Importar un volcado JSON de anime al catálogo; devuelve las fichas añadidas"""
+    added = 0
+    batch = []
+    for entry in _iter_dump(path):
+        batch.append(entry)
+        if len(batch) >= IMPORT_BATCH:
+            added += add_entries(batch, 'import')
+            batch = []
+    added += add_entries(batch, 'import')
+    prune()
+    return added
+
+def import_dump_dialog():
+    """Elegir un volcado JSON e importarlo al catálogo"""
+    path = xbmcgui.Dialog().browse(1, 'Volcado de catálogo (JSON)', 'files', '.json|.jsonl')
+    if not path:
+        return
+    
+    try:
+        added = import_dump(xbmcvfs.translatePath(path))
+        xbmcgui.Dialog().ok('Catálogo de anime', f'{added} anime importados\nTotal en catálogo: {size()}')
+    except (OSError, ValueError) as e:
+        xbmc.log(f'Anime Catalog: Import error - {str(e)}', xbmc.LOGERROR)
+        xbmcgui.Dialog().ok('Catálogo de anime', f'No se pudo importar el archivo:\n{str(e)}')
@@ -2,7 +2,8 @@ import requests
 import json
 import xbmc
 import xbmcgui
-from .config import USER_AGENT, rate_limit
+from .config import rate_limit
+from . import config
 
 class APIAnalysis:
     
@@ -205,9 +206,9 @@ def implement_characters_api():
     def get_anime_characters(anime_id):
         """Obtener personajes de un anime"""
         try:
-            rate_limit()
             url = f"https://api.jikan.moe/v4/anime/{anime_id}/characters"
-            headers = {'User-Agent': USER_AGENT}
+            rate_limit(url)
+            headers = {'User-Agent': config.USER_AGENT}
             
             response = requests.get(url, headers=headers, timeout=10)
             response.raise_for_status()
@@ -228,9 +229,9 @@ def implement_staff_api():
     def get_anime_staff(anime_id):
         """Obtener staff de un anime"""
         try:
-            rate_limit()
             url = f"https://api.jikan.moe/v4/anime/{anime_id}/staff"
-            headers = {'User-Agent': USER_AGENT}
+            rate_limit(url)
+            headers = {'User-Agent': config.USER_AGENT}
             
             response = requests.get(url, headers=headers, timeout=10)
             response.raise_for_status()
@@ -249,10 +250,10 @@ def implement_episodes_api():
     def get_anime_episodes(anime_id, page=1):
         """Obtener episodios de un anime"""
         try:
-            rate_limit()
             url = f"https://api.jikan.moe/v4/anime/{anime_id}/episodes"
+            rate_limit(url)
             params = {'page': page}
-            headers = {'User-Agent': USER_AGENT}
+            headers = {'User-Agent': config.USER_AGENT}
             
             response = requests.get(url, params=params, headers=headers, timeout=10)
             response.raise_for_status()
@@ -271,9 +272,9 @@ def implement_recommendations_api():
     def get_anime_recommendations(anime_id):
         """Obtener recomendaciones de un anime"""
         try:
-            rate_limit()
             url = f"https://api.jikan.moe/v4/anime/{anime_id}/recommendations"
-            headers = {'User-Agent': USER_AGENT}
+            rate_limit(url)
+            headers = {'User-Agent': config.USER_AGENT}
             
             response = requests.get(url, headers=headers, timeout=10)
             response.raise_for_status()
@@ -293,9 +294,9 @@ def implement_advanced_api_functions():
     def get_anime_themes(anime_id):
         """Obtener temas musicales (OP/ED)"""
         try:
-            rate_limit()
             url = f"https://api.jikan.moe/v4/anime/{anime_id}/themes"
-            headers = {'User-Agent': USER_AGENT}
+            rate_limit(url)
+            headers = {'User-Agent': config.USER_AGENT}
             
             response = requests.get(url, headers=headers, timeout=10)
             response.raise_for_status()
@@ -309,9 +310,9 @@ def implement_advanced_api_functions():
     def get_anime_streaming(anime_id):
         """Obtener plataformas de streaming"""
         try:
-            rate_limit()
             url = f"https://api.jikan.moe/v4/anime/{anime_id}/streaming"
-            headers = {'User-Agent': USER_AGENT}
+            rate_limit(url)
+            headers = {'User-Agent': config.USER_AGENT}
             
             response = requests.get(url, headers=headers, timeout=10)
             response.raise_for_status()
@@ -325,9 +326,9 @@ def implement_advanced_api_functions():
     def get_random_anime():
         """Obtener anime aleatorio"""
         try:
-            rate_limit()
             url = f"https://api.jikan.moe/v4/random/anime"
-            headers = {'User-Agent': USER_AGENT}
+            rate_limit(url)
+            headers = {'User-Agent': config.USER_AGENT}
             
             response = requests.get(url, headers=headers, timeout=10)
             response.raise_for_status()
@@ -0,0 +1,151 @@
+"""
+Registro de auditoría de solo anexado (SQLite en el perfil del addon)
+Cada acción es un INSERT indexado por fecha; la retención se aplica por
+lotes y las lecturas por rango de tiempo se recorren sin cargar todo el log
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+import xbmc
+from .config import TOKEN_PATH
+
+AUDIT_DB_PATH = os.path.join(TOKEN_PATH, 'audit_log.db')
+LEGACY_AUDIT_FILE = os.path.join(TOKEN_PATH, 'audit_log.json')
+
+# Retención: entradas más antiguas que MAX_AGE o por encima de MAX_ENTRIES
+MAX_ENTRIES = 100000
+MAX_AGE = 90 * 24 * 60 * 60
+# La retención se aplica una vez cada PRUNE_EVERY anexados (según el id de
+# la fila, así cuenta aunque cada proceso del plugin anexe solo unas pocas)
+PRUNE_EVERY = 1000
+
+_connection = None
+_lock = threading.Lock()
+
+def _get_connection():
+    """Conexión única por proceso al log de auditoría"""
+    global _connection
+    
+    if _connection is None:
+        conn = sqlite3.connect(AUDIT_DB_PATH, timeout=5, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS audit_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp REAL NOT NULL,
+                action TEXT NOT NULL,
+                user_id TEXT,
+                details TEXT,
+                extra TEXT
+            )
+        ''')
+        # (timestamp, id) cubre la paginación por rango de tiempo de iter_entries
+        conn.execute('DROP INDEX IF EXISTS idx_audit_timestamp')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_audit_timestamp_id ON audit_log(timestamp, id)')
+        conn.commit()
+        _import_legacy(conn)
+        _connection = conn
+    return _connection
+
+def _import_legacy(conn):
+    """Pasar el antiguo audit_log.json al nuevo almacén (una sola vez)"""
+    if not os.path.exists(LEGACY_AUDIT_FILE):
+        return
+    
+    try:
+        # Bloqueo de escritura: solo un proceso importa el archivo
+        conn.execute('BEGIN IMMEDIATE')
+        if os.path.exists(LEGACY_AUDIT_FILE):
+            with open(LEGACY_AUDIT_FILE, 'r') as f:
+                entries = json.load(f)
+            conn.executemany(
+                'INSERT INTO audit_log (timestamp, action, user_id, details, extra) VALUES (?, ?, ?, ?, ?)',
+                [_to_row(entry) for entry in entries if isinstance(entry, dict)]
+            )
+            os.remove(LEGACY_AUDIT_FILE)
+            xbmc.log(f'Audit Log: Imported {len(entries)} entries from audit_log.json', xbmc.LOGINFO)
+        conn.commit()
+    except (OSError, ValueError, sqlite3.Error) as e:
+        conn.rollback()
+        xbmc.log(f'Audit Log: Legacy import error - {str(e)}', xbmc.LOGWARNING)
+
+def _to_row(entry):
+    details = entry.get('details')
+    extra = {key: value for key, value in entry.items()
+             if key not in ('timestamp', 'iso_timestamp', 'action', 'user_id', 'details')}
+    return (
+        entry.get('timestamp') or time.time(),
+        entry.get('action', ''),
+        entry.get('user_id'),
+        details if details is None or isinstance(details, str) else json.dumps(details),
+        json.dumps(extra) if extra else None
+    )
+
+def _to_entry(row):
+    timestamp, action, user_id, details, extra = row
+    entry = json.loads(extra) if extra else {}
+    entry.update({
+        'timestamp': timestamp,
+        'iso_timestamp': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(timestamp)),
+        'action': action,
+        'user_id': user_id,
+        'details': details
+    })
+    return entry
+
+def append(entry):
+    """Anexar una entrada (dict con timestamp, action, user_id, details...)"""
+    row = _to_row(entry)
+    with _lock:
+        conn = _get_connection()
+        cursor = conn.execute('INSERT INTO audit_log (timestamp, action, user_id, details, extra) VALUES (?, ?, ?, ?, ?)', row)
+        conn.commit()
+        
+        if cursor.lastrowid % PRUNE_EVERY == 0:
+            _prune(conn)
+
+def _prune(conn):
+    """Aplicar la retención por antigüedad y por número de entradas"""
+    conn.execute('DELETE FROM audit_log WHERE timestamp < ?', (time.time() - MAX_AGE,))
+    conn.execute('DELETE FROM audit_log WHERE id <= (SELECT MAX(id) FROM audit_log) - ?', (MAX_ENTRIES,))
+    conn.commit()
+
+def iter_entries(since=None, until=None, batch_size=500):
+    """Recorrer las entradas de un rango de tiempo en orden cronológico
+    
+    Se leen por lotes, así que el consumo de memoria no depende del tamaño del log
+    """
+    until = until or float('inf')
+    # Paginación por (timestamp, id): cada lote continúa en el índice
+    last_timestamp, last_id = since or 0, -1
+    
+    while True:
+        with _lock:
+            rows = _get_connection().execute('''
+                SELECT id, timestamp, action, user_id, details, extra FROM audit_log
+                WHERE (timestamp, id) > (?, ?) AND timestamp <= ?
+                ORDER BY timestamp, id LIMIT ?
+            ''', (last_timestamp, last_id, until, batch_size)).fetchall()
+        
+        for row in rows:
+            yield _to_entry(row[1:])
+        if len(rows) < batch_size:
+            return
+        last_id, last_timestamp = rows[-1][0], rows[-1][1]
+
+def get_recent(limit=100):
+    """Últimas entradas, de la más reciente a la más antigua"""
+    with _lock:
+        rows = _get_connection().execute(
+            'SELECT timestamp, action, user_id, details, extra FROM audit_log ORDER BY id DESC LIMIT ?',
+            (limit,)
+        ).fetchall()
+    return [_to_entry(row) for row in rows]
+
+def count():
+    with _lock:
+        return _get_connection().execute('SELECT COUNT(*) FROM audit_log').fetchone()[0]
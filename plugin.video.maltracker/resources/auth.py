@@ -8,7 +8,8 @@ import secrets
 import threading
 import urllib.parse
 import xbmcgui
-from .config import CLIENT_ID, CLIENT_SECRET, REDIRECT_URI, AUTH_URL, TOKEN_URL, TOKEN_FILE, USER_AGENT, rate_limit
+from .config import AUTH_URL, TOKEN_URL, TOKEN_FILE, rate_limit
+from . import config
 from .local_server import start_callback_server
 
 # Paso 1: Obtener el código de autorización
@@ -26,7 +27,7 @@ def get_authorization_code():
     import xbmc
     
     # Validar CLIENT_ID
-    if not CLIENT_ID or CLIENT_ID.strip() == '':
+    if not config.CLIENT_ID or config.CLIENT_ID.strip() == '':
         xbmcgui.Dialog().ok('MAL Tracker', 
             'Client ID no configurado o vacío.\n\n'
             'Ve a Configuración → Addons → MAL Tracker\n'
@@ -35,7 +36,7 @@ def get_authorization_code():
             'https://myanimelist.net/apiconfig')
         return None, None
     
-    xbmc.log(f'MAL Auth: Starting OAuth with Client ID: {CLIENT_ID[:10]}...', xbmc.LOGINFO)
+    xbmc.log(f'MAL Auth: Starting OAuth with Client ID: {config.CLIENT_ID[:10]}...', xbmc.LOGINFO)
     
     code_verifier, code_challenge = generate_pkce_pair()
     
@@ -43,8 +44,8 @@ def get_authorization_code():
     import urllib.parse
     params = {
         'response_type': 'code',
-        'client_id': CLIENT_ID.strip(),
-        'redirect_uri': REDIRECT_URI,
+        'client_id': config.CLIENT_ID.strip(),
+        'redirect_uri': config.REDIRECT_URI,
         'code_challenge': code_challenge,
         'code_challenge_method': 'S256',
         'state': secrets.token_urlsafe(16)  # Agregar state para seguridad
@@ -130,7 +131,7 @@ def get_access_token(auth_code, code_verifier):
         xbmcgui.Dialog().notification('MAL Tracker', 'Código de autorización faltante o vacío')
         return None
         
-    if not CLIENT_ID or CLIENT_ID.strip() == '':
+    if not config.CLIENT_ID or config.CLIENT_ID.strip() == '':
         xbmcgui.Dialog().notification('MAL Tracker', 'Client ID no configurado')
         return None
     
@@ -146,24 +147,24 @@ def get_access_token(auth_code, code_verifier):
     # Preparar datos para el intercambio
     data = {
         'grant_type': 'authorization_code',
-        'client_id': CLIENT_ID.strip(),
+        'client_id': config.CLIENT_ID.strip(),
         'code': auth_code,
-        'redirect_uri': REDIRECT_URI,
+        'redirect_uri': config.REDIRECT_URI,
         'code_verifier': code_verifier
     }
     
     # CLIENT_SECRET es opcional para MAL
-    if CLIENT_SECRET and CLIENT_SECRET.strip():
-        data['client_secret'] = CLIENT_SECRET.strip()
+    if config.CLIENT_SECRET and config.CLIENT_SECRET.strip():
+        data['client_secret'] = config.CLIENT_SECRET.strip()
     
     headers = {
-        'User-Agent': USER_AGENT,
+        'User-Agent': config.USER_AGENT,
         'Content-Type': 'application/x-www-form-urlencoded',
         'Accept': 'application/json'
     }
     
     try:
-        rate_limit()
+        rate_limit(TOKEN_URL)
         response = requests.post(TOKEN_URL, data=data, headers=headers, timeout=30)
         
         xbmc.log(f'MAL Auth: Response status: {response.status_code}', xbmc.LOGINFO)
@@ -289,13 +290,13 @@ def refresh_access_token():
         data = {
             'grant_type': 'refresh_token',
             'refresh_token': refresh_token,
-            'client_id': CLIENT_ID
+            'client_id': config.CLIENT_ID
         }
-        if CLIENT_SECRET:
-            data['client_secret'] = CLIENT_SECRET
+        if config.CLIENT_SECRET:
+            data['client_secret'] = config.CLIENT_SECRET
             
-        headers = {'User-Agent': USER_AGENT}
-        rate_limit()
+        headers = {'User-Agent': config.USER_AGENT}
+        rate_limit(TOKEN_URL)
         response = requests.post(TOKEN_URL, data=data, headers=headers, timeout=10)
         
         if response.status_code != 200:
@@ -1,37 +1,12 @@
 import xbmc
 import xbmcgui
 import json
-import re
-from . import local_database, public_api
+import time
+import threading
+from . import local_database, public_api, title_matcher
 
 class AutoDetection:
     
-    @staticmethod
-    def monitor_kodi_playback():
-        """Monitorear reproducción en Kodi para auto-actualizar"""
-        try:
-            # Obtener información del reproductor actual
-            player = xbmc.Player()
-            
-            if player.isPlaying():
-                # Obtener información del archivo
-                playing_file = player.getPlayingFile()
-                video_info = player.getVideoInfoTag()
-                
-                # Extraer título del anime
-                title = video_info.getTitle() or extract_title_from_filename(playing_file)
-                
-                if title:
-                    anime_match = find_anime_in_database(title)
-                    if anime_match:
-                        # Auto-actualizar progreso
-                        episode_num = extract_episode_number(playing_file, title)
-                        if episode_num:
-                            auto_update_progress(anime_match['mal_id'], episode_num)
-                            
-        except Exception as e:
-            xbmc.log(f'Auto Detection: Monitor error - {str(e)}', xbmc.LOGERROR)
-    
     @staticmethod
     def setup_auto_detection():
         """Configurar detección automática"""
@@ -53,24 +28,23 @@ class AutoDetection:
         elif selected == 3:
             show_detection_history()
 
+def toggle_auto_detection():
+    """Activar o desactivar el seguimiento de reproducción del servicio"""
+    from . import background_service
+    
+    enabled = not background_service.is_task_enabled('auto_detection')
+    background_service.set_task_enabled('auto_detection', enabled)
+    xbmcgui.Dialog().notification(
+        'Auto-Detección',
+        'Activada' if enabled else 'Desactivada',
+        time=2000
+    )
+
 def extract_title_from_filename(filename):
     """Extraer título de anime del nombre de archivo"""
     try:
-        # Patrones comunes de archivos de anime
-        patterns = [
-            r'\[.*?\]\s*(.+?)\s*-\s*\d+',  # [Grupo] Titulo - 01
-            r'(.+?)\s*-\s*\d+',            # Titulo - 01
-            r'(.+?)\s*EP?\d+',             # Titulo EP01
-            r'(.+?)\s*Episode\s*\d+',      # Titulo Episode 01
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, filename, re.IGNORECASE)
-            if match:
-                title = match.group(1).strip()
-                # Limpiar caracteres especiales
-                title = re.sub(r'[^\w\s-]', '', title).strip()
-                return title
+        # Quita grupo, etiquetas técnicas, extensión y número de episodio
+        return title_matcher.clean_filename(filename) or None
                 
     except Exception as e:
         xbmc.log(f'Auto Detection: Extract title error - {str(e)}', xbmc.LOGERROR)
@@ -78,42 +52,26 @@ def extract_title_from_filename(filename):
     return None
 
 def find_anime_in_database(title):
-    """Buscar anime en base de datos local"""
+    """Buscar anime en base de datos local
+    
+    Empareja contra el índice de trigramas de títulos y alias, tolerando
+    variantes de romanización y ruido de release groups.
+    """
     try:
-        anime_list = local_database.get_local_anime_list()
-        
-        # Búsqueda exacta
-        for anime in anime_list:
-            if anime['title'].lower() == title.lower():
-                return anime
-        
-        # Búsqueda parcial
-        for anime in anime_list:
-            if title.lower() in anime['title'].lower() or anime['title'].lower() in title.lower():
-                return anime
+        mal_id, score = title_matcher.get_index().match(title)
+        if mal_id is not None:
+            xbmc.log(f'Auto Detection: Matched "{title}" to {mal_id} ({score:.2f})', xbmc.LOGDEBUG)
+            return local_database.get_local_anime(mal_id)
                 
     except Exception as e:
         xbmc.log(f'Auto Detection: Find anime error - {str(e)}', xbmc.LOGERROR)
     
     return None
 
-def extract_episode_number(filename, title):
-    """Extraer número de episodio"""
+def extract_episode_number(filename):
+    """Extraer número de episodio (solo del nombre del archivo, sin etiquetas)"""
     try:
-        # Remover título para buscar número
-        filename_clean = filename.replace(title, '')
-        
-        patterns = [
-            r'(?:EP?|Episode)\s*(\d+)',
-            r'-\s*(\d+)',
-            r'\s(\d+)\s',
-            r'_(\d+)_'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, filename_clean, re.IGNORECASE)
-            if match:
-                return int(match.group(1))
+        return title_matcher.extract_episode(filename)
                 
     except Exception as e:
         xbmc.log(f'Auto Detection: Extract episode error - {str(e)}', xbmc.LOGERROR)
@@ -129,6 +87,13 @@ def auto_update_progress(anime_id, episode_num):
             return
         
         current_episodes = anime_data['episodes_watched']
+        total_episodes = anime_data['total_episodes']
+        
+        # Un episodio fuera de la serie es un número mal detectado
+        if total_episodes and episode_num > total_episodes:
+            xbmc.log(f'Auto Detection: Ignoring episode {episode_num} of {anime_data["title"]} '
+                     f'({total_episodes} episodes)', xbmc.LOGWARNING)
+            return
         
         # Solo actualizar si es progreso hacia adelante
         if episode_num > current_episodes:
@@ -148,5 +113,148 @@ def auto_update_progress(anime_id, episode_num):
 
 def get_anime_by_id(anime_id):
     """Obtener anime por ID"""
-    anime_list = local_database.get_local_anime_list()
-    return next((anime for anime in anime_list if anime['mal_id'] == anime_id), None)
\ No newline at end of file
+    return local_database.get_local_anime(anime_id)
+
+# Fracción vista a partir de la cual un episodio cuenta como visto
+WATCHED_PERCENT = 0.85
+# Segundos sin nuevos episodios antes de escribir el progreso acumulado
+WRITE_DEBOUNCE = 30
+# Rutas resueltas que se recuerdan (anime y episodio por archivo)
+RESOLVE_CACHE_SIZE = 256
+
+class ProgressWriter:
+    """Escritura diferida del progreso
+    
+    Los episodios vistos seguidos de un mismo anime se agrupan en una sola
+    actualización (el episodio más alto) cuando pasan WRITE_DEBOUNCE segundos.
+    """
+    
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.pending = {}
+        self.last_submit = 0
+        self.lock = threading.Lock()
+    
+    def submit(self, mal_id, episode_num):
+        with self.lock:
+            self.pending[mal_id] = max(episode_num, self.pending.get(mal_id, 0))
+            self.last_submit = self.clock()
+    
+    def flush(self, force=False):
+        """Escribir el progreso pendiente si ha vencido el debounce"""
+        with self.lock:
+            if not self.pending or (not force and self.clock() - self.last_submit < WRITE_DEBOUNCE):
+                return 0
+            pending, self.pending = self.pending, {}
+        
+        for mal_id, episode_num in pending.items():
+            auto_update_progress(mal_id, episode_num)
+        return len(pending)
+
+class PlaybackTracker(xbmc.Player):
+    """Seguimiento de reproducción por eventos de xbmc.Player
+    
+    Resuelve el anime una vez por archivo al empezar, muestrea la posición
+    solo mientras hay un episodio reconocido en curso y cuenta cada episodio
+    una sola vez al superar WATCHED_PERCENT.
+    """
+    
+    def __init__(self, writer=None, enabled=None):
+        super().__init__()
+        self.writer = writer or ProgressWriter()
+        self.enabled = enabled or (lambda: True)
+        self.current = None
+        self.counted = set()
+        self.resolved = {}
+        self.index = None
+        self.lock = threading.Lock()
+    
+    def resolve(self, path, tag_title=None):
+        """(mal_id, episodio) del archivo, memorizado por ruta"""
+        # La caché se descarta cuando cambia la lista local
+        index = title_matcher.get_index()
+        if index is not self.index:
+            self.resolved.clear()
+            self.index = index
+        
+        if path in self.resolved:
+            return self.resolved[path]
+        
+        result = None
+        for title in (tag_title, extract_title_from_filename(path)):
+            if not title:
+                continue
+            mal_id, _ = index.match(title)
+            if mal_id is not None:
+                episode_num = extract_episode_number(path)
+                if episode_num:
+                    result = (mal_id, episode_num)
+                break
+        
+        if len(self.resolved) >= RESOLVE_CACHE_SIZE:
+            self.resolved.clear()
+        self.resolved[path] = result
+        return result
+    
+    def onAVStarted(self):
+        try:
+            if not self.isPlayingVideo() or not self.enabled():
+                return
+            
+            path = self.getPlayingFile()
+            resolved = self.resolve(path, self.getVideoInfoTag().getTitle())
+            with self.lock:
+                self.current = None
+                if resolved and resolved not in self.counted:
+                    self.current = {
+                        'mal_id': resolved[0],
+                        'episode': resolved[1],
+                        'duration': self.getTotalTime(),
+                        'position': self.getTime()
+                    }
+            
+            if resolved:
+                xbmc.log(f'Auto Detection: Tracking {path} as {resolved[0]} episode {resolved[1]}', xbmc.LOGDEBUG)
+                
+        except Exception as e:
+            xbmc.log(f'Auto Detection: Playback start error - {str(e)}', xbmc.LOGERROR)
+    
+    def sample(self):
+        """Guardar la posición actual (solo con un episodio en seguimiento)"""
+        with self.lock:
+            if not self.current:
+                return
+            try:
+                self.current['position'] = self.getTime()
+                if not self.current['duration']:
+                    self.current['duration'] = self.getTotalTime()
+            except RuntimeError:
+                # El reproductor ya no está reproduciendo
+                pass
+    
+    def _finish(self, completed):
+        with self.lock:
+            current, self.current = self.current, None
+        if not current:
+            return
+        
+        duration = current['duration']
+        watched = completed or (duration > 0 and current['position'] / duration >= WATCHED_PERCENT)
+        if watched:
+            key = (current['mal_id'], current['episode'])
+            self.counted.add(key)
+            self.writer.submit(*key)
+    
+    def onPlayBackEnded(self):
+        self._finish(True)
+    
+    def onPlayBackStopped(self):
+        self._finish(False)
+    
+    def onPlayBackError(self):
+        self._finish(False)
+    
+    def tick(self):
+        """Tarea periódica del servicio: muestrear y escribir lo pendiente"""
+        self.sample()
+        self.writer.flush()
@@ -0,0 +1,133 @@
+"""
+Servicio residente de MAL Tracker
+Sincronización, cola de subida, notificaciones, precarga de caché y monitores
+en un único proceso, para que el plugin solo lea datos ya preparados
+"""
+
+import datetime
+import xbmc
+from . import config, local_database, sync_manager, sync_queue, notifications, http_client
+from .scheduler import Scheduler
+
+# Intervalos (segundos)
+SYNC_CHECK_INTERVAL = 5 * 60        # auto_sync_if_authenticated aplica su propio umbral de 30 min
+QUEUE_INTERVAL = 60
+NOTIFICATIONS_INTERVAL = 10 * 60
+CACHE_WARM_INTERVAL = 20 * 60
+HEALTH_INTERVAL = 60
+MONITOR_INTERVAL = 30
+PLAYBACK_INTERVAL = 10
+CATALOG_INTERVAL = 6 * 60 * 60      # anime_catalog.refresh_if_due aplica su propio umbral de 24 h
+RECOMMENDATIONS_INTERVAL = 30 * 60  # solo recompila si el catálogo ha cambiado
+
+# Monitores opcionales que se activan desde sus menús
+OPTIONAL_TASKS = ('system_monitor', 'ids', 'auto_detection')
+
+_ids = None
+_tracker = None
+
+class ServiceMonitor(xbmc.Monitor):
+    
+    def onSettingsChanged(self):
+        """Releer credenciales y ajustes en el próximo acceso"""
+        config.settings.invalidate()
+        xbmc.log('MAL Tracker Service: Settings changed, configuration reloaded', xbmc.LOGDEBUG)
+
+def is_task_enabled(name):
+    """Comprobar si un monitor opcional está activado"""
+    return local_database.get_config_value(f'service_{name}', '0') == '1'
+
+def set_task_enabled(name, enabled):
+    """Activar o desactivar un monitor opcional del servicio"""
+    return local_database.set_config_value(f'service_{name}', '1' if enabled else '0')
+
+def sync_task():
+    sync_manager.auto_sync_if_authenticated()
+
+def queue_task():
+    sync_queue.drain()
+
+def notifications_task():
+    notifications.check_for_notifications()
+
+def warm_cache_task():
+    """Refrescar en caché las vistas públicas más visitadas"""
+    from . import jikan_api, public_api
+    
+    jikan_api.JikanAPI.get_top_anime()
+    jikan_api.JikanAPI.get_current_season()
+    public_api.get_upcoming_anime_public()
+    public_api.get_schedule_public(datetime.date.today().strftime('%A').lower())
+
+def catalog_task():
+    from . import anime_catalog
+    anime_catalog.refresh_if_due()
+
+def recommendations_task():
+    from . import recommendation_engine
+    recommendation_engine.store_catalog_matrix()
+
+def health_task():
+    from .bulletproof_system import bulletproof
+    bulletproof.health_check()
+
+def system_monitor_task():
+    if not is_task_enabled('system_monitor'):
+        return
+    from .system_monitor import system_monitor
+    system_monitor.run_cycle()
+
+def ids_task():
+    global _ids
+    
+    if not is_task_enabled('ids'):
+        return
+    if _ids is None:
+        from .intrusion_detection import IntrusionDetectionSystem
+        _ids = IntrusionDetectionSystem()
+        if not _ids.baseline_hashes:
+            _ids.create_file_baseline()
+    _ids.run_cycle()
+
+def get_playback_tracker():
+    """Tracker de reproducción del servicio (recibe los eventos del Player)"""
+    global _tracker
+    
+    if _tracker is None:
+        from .auto_detection import PlaybackTracker
+        _tracker = PlaybackTracker(enabled=lambda: is_task_enabled('auto_detection'))
+    return _tracker
+
+def playback_task():
+    get_playback_tracker().tick()
+
+def build_scheduler(monitor=None):
+    """Crear el planificador con todas las tareas del servicio"""
+    scheduler = Scheduler(monitor)
+    scheduler.add_task('sync_queue', QUEUE_INTERVAL, queue_task, initial_delay=10)
+    scheduler.add_task('sync', SYNC_CHECK_INTERVAL, sync_task, initial_delay=30)
+    scheduler.add_task('notifications', NOTIFICATIONS_INTERVAL, notifications_task, initial_delay=60)
+    scheduler.add_task('cache_warm', CACHE_WARM_INTERVAL, warm_cache_task, initial_delay=90)
+    scheduler.add_task('catalog', CATALOG_INTERVAL, catalog_task, initial_delay=120)
+    scheduler.add_task('recommendations', RECOMMENDATIONS_INTERVAL, recommendations_task, initial_delay=150)
+    scheduler.add_task('health', HEALTH_INTERVAL, health_task, initial_delay=HEALTH_INTERVAL)
+    scheduler.add_task('system_monitor', MONITOR_INTERVAL, system_monitor_task, initial_delay=MONITOR_INTERVAL)
+    scheduler.add_task('ids', MONITOR_INTERVAL, ids_task, initial_delay=MONITOR_INTERVAL)
+    scheduler.add_task('playback', PLAYBACK_INTERVAL, playback_task, initial_delay=PLAYBACK_INTERVAL)
+    return scheduler
+
+def run(monitor=None):
+    """Punto de entrada del servicio"""
+    xbmc.log('MAL Tracker Service: Starting', xbmc.LOGINFO)
+    local_database.init_database()
+    
+    # El Player debe existir durante toda la vida del servicio para recibir eventos
+    tracker = get_playback_tracker()
+    
+    try:
+        build_scheduler(monitor or ServiceMonitor()).run()
+    finally:
+        tracker.writer.flush(force=True)
+        http_client.close_all()
+        local_database.close_connection()
+        xbmc.log('MAL Tracker Service: Stopped', xbmc.LOGINFO)
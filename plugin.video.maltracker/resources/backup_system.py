@@ -5,12 +5,15 @@ import zipfile
 import xbmc
 import xbmcgui
 import xbmcvfs
-from . import local_database
+from . import local_database, state_store, incremental_backup
 from .config import TOKEN_PATH
 
 BACKUP_DIR = os.path.join(TOKEN_PATH, 'backups')
 EXPORT_DIR = os.path.join(TOKEN_PATH, 'exports')
 
+# El resto de la configuración vive en la tabla state de la base de datos
+CONFIG_FILES = ['token.json']
+
 def init_backup_system():
     """Inicializar sistema de backup"""
     try:
@@ -41,20 +44,18 @@ def create_full_backup():
             # Backup de base de datos
             progress.update(20, 'Respaldando base de datos...')
             if os.path.exists(local_database.DB_PATH):
-                backup_zip.write(local_database.DB_PATH, 'database/mal_tracker.db')
+                # Copia consistente con la API de backup en línea
+                snapshot_path = f'{backup_path}.db'
+                try:
+                    local_database.backup_to(snapshot_path)
+                    backup_zip.write(snapshot_path, 'database/mal_tracker.db')
+                finally:
+                    if os.path.exists(snapshot_path):
+                        os.remove(snapshot_path)
             
             # Backup de configuraciones
             progress.update(40, 'Respaldando configuraciones...')
-            config_files = [
-                'token.json',
-                'notifications.json', 
-                'themes.json',
-                'layout.json',
-                'achievements.json',
-                'gamification_stats.json'
-            ]
-            
-            for config_file in config_files:
+            for config_file in CONFIG_FILES:
                 file_path = os.path.join(TOKEN_PATH, config_file)
                 if os.path.exists(file_path):
                     backup_zip.write(file_path, f'config/{config_file}')
@@ -87,7 +88,30 @@ def create_full_backup():
         xbmcgui.Dialog().notification('MAL Tracker', f'Error en backup: {str(e)}')
         return None
 
-def create_backup_manifest():
+def create_incremental_backup():
+    """Crear backup incremental (solo se escriben los datos que cambiaron)"""
+    try:
+        progress = xbmcgui.DialogProgress()
+        progress.create('Creando Backup', 'Respaldando cambios desde el último backup...')
+        
+        manifest = incremental_backup.create_snapshot(CONFIG_FILES, create_backup_manifest('incremental'))
+        
+        progress.update(100, 'Backup completado')
+        progress.close()
+        
+        stats = manifest['stats']
+        new_mb = round(stats['new_bytes'] / (1024 * 1024), 2)
+        xbmcgui.Dialog().notification('MAL Tracker', f'Backup incremental: {new_mb} MB nuevos en {stats["seconds"]:.1f}s')
+        return manifest
+        
+    except Exception as e:
+        if 'progress' in locals():
+            progress.close()
+        xbmc.log(f'Backup System: Create incremental backup error - {str(e)}', xbmc.LOGERROR)
+        xbmcgui.Dialog().notification('MAL Tracker', f'Error en backup: {str(e)}')
+        return None
+
+def create_backup_manifest(backup_type='full'):
     """Crear manifiesto del backup"""
     try:
         stats = local_database.get_local_stats()
@@ -101,7 +125,7 @@ def create_backup_manifest():
             'watching_anime': stats.get('watching', 0),
             'avg_score': stats.get('avg_score', 0),
             'total_episodes': stats.get('total_episodes', 0),
-            'backup_type': 'full'
+            'backup_type': backup_type
         }
         
         return manifest
@@ -138,11 +162,23 @@ def restore_from_backup(backup_path):
             progress.update(25, 'Restaurando base de datos...')
             try:
                 db_data = backup_zip.read('database/mal_tracker.db')
-                with open(local_database.DB_PATH, 'wb') as db_file:
-                    db_file.write(db_data)
-            except:
+            except KeyError:
+                db_data = None
                 xbmc.log('Backup System: Database not found in backup', xbmc.LOGWARNING)
             
+            if db_data is not None:
+                # Copiar sobre la conexión compartida (API de backup): el archivo
+                # en uso no se reemplaza aunque el servicio lo tenga abierto
+                restore_path = f'{backup_path}.restore.db'
+                try:
+                    with open(restore_path, 'wb') as db_file:
+                        db_file.write(db_data)
+                    local_database.restore_from(restore_path)
+                finally:
+                    if os.path.exists(restore_path):
+                        os.remove(restore_path)
+                local_database.init_database()
+            
             # Restaurar configuraciones
             progress.update(50, 'Restaurando configuraciones...')
             config_files = [
@@ -163,6 +199,9 @@ def restore_from_backup(backup_path):
                 except:
                     continue  # Archivo no existe en backup
             
+            # Los JSON de backups antiguos se importan al almacén de estado
+            state_store.reload()
+            
             progress.update(75, 'Verificando integridad...')
             # Verificar que la base de datos se restauró correctamente
             try:
@@ -184,6 +223,42 @@ def restore_from_backup(backup_path):
         xbmcgui.Dialog().notification('MAL Tracker', f'Error en restauración: {str(e)}')
         return False
 
+def restore_incremental_backup(snapshot_id):
+    """Restaurar un backup incremental (cualquier punto de la cadena)"""
+    try:
+        if not xbmcgui.Dialog().yesno('Confirmar Restauración', 
+                                     '¿Restaurar desde backup?\n\nEsto sobrescribirá todos los datos actuales.'):
+            return False
+        
+        progress = xbmcgui.DialogProgress()
+        progress.create('Restaurando Backup', 'Reconstruyendo archivos...')
+        
+        manifest = incremental_backup.restore_snapshot(snapshot_id)
+        xbmc.log(f'Backup System: Restored incremental backup from {manifest.get("created_at")}', xbmc.LOGINFO)
+        # Un backup antiguo puede no tener las tablas de migraciones posteriores
+        local_database.init_database()
+        state_store.reload()
+        
+        progress.update(75, 'Verificando integridad...')
+        try:
+            test_stats = local_database.get_local_stats()
+            xbmc.log(f'Backup System: Restored {test_stats.get("total_anime", 0)} anime', xbmc.LOGINFO)
+        except Exception as e:
+            xbmc.log(f'Backup System: Database verification failed - {str(e)}', xbmc.LOGERROR)
+        
+        progress.update(100, 'Restauración completada')
+        progress.close()
+        
+        xbmcgui.Dialog().notification('MAL Tracker', 'Backup restaurado exitosamente')
+        return True
+        
+    except Exception as e:
+        if 'progress' in locals():
+            progress.close()
+        xbmc.log(f'Backup System: Incremental restore error - {str(e)}', xbmc.LOGERROR)
+        xbmcgui.Dialog().notification('MAL Tracker', f'Error en restauración: {str(e)}')
+        return False
+
 def export_to_csv():
     """Exportar lista a CSV"""
     try:
@@ -262,11 +337,13 @@ def show_backup_menu():
     """Mostrar menú de backup"""
     options = [
         '💾 Crear backup completo',
+        '🧩 Crear backup incremental',
         '📂 Restaurar desde backup',
         '📊 Exportar a CSV',
         '📄 Exportar a JSON',
         '🗂️ Ver backups existentes',
-        '🗑️ Limpiar backups antiguos'
+        '🗑️ Limpiar backups antiguos',
+        '📥 Importar catálogo de anime (JSON)'
     ]
     
     selected = xbmcgui.Dialog().select('Sistema de Backup:', options)
@@ -274,15 +351,20 @@ def show_backup_menu():
     if selected == 0:
         create_full_backup()
     elif selected == 1:
-        show_restore_menu()
+        create_incremental_backup()
     elif selected == 2:
-        export_to_csv()
+        show_restore_menu()
     elif selected == 3:
-        export_to_json()
+        export_to_csv()
     elif selected == 4:
-        show_existing_backups()
+        export_to_json()
     elif selected == 5:
+        show_existing_backups()
+    elif selected == 6:
         clean_old_backups()
+    elif selected == 7:
+        from . import anime_catalog
+        anime_catalog.import_dump_dialog()
 
 def show_restore_menu():
     """Mostrar menú de restauración"""
@@ -293,17 +375,28 @@ def show_restore_menu():
                 if file.endswith('.zip'):
                     backup_files.append(file)
         
-        if not backup_files:
+        snapshots = incremental_backup.list_snapshots()
+        
+        if not backup_files and not snapshots:
             xbmcgui.Dialog().notification('MAL Tracker', 'No hay backups disponibles')
             return
         
         # Ordenar por fecha (más reciente primero)
         backup_files.sort(reverse=True)
         
-        selected = xbmcgui.Dialog().select('Seleccionar Backup:', backup_files)
+        # Cualquier backup incremental de la cadena se puede restaurar
+        labels = [f"🧩 Incremental {time.strftime('%Y-%m-%d %H:%M', time.localtime(manifest['created_at']))}"
+                  for manifest in snapshots]
+        labels += backup_files
         
-        if selected != -1:
-            backup_path = os.path.join(BACKUP_DIR, backup_files[selected])
+        selected = xbmcgui.Dialog().select('Seleccionar Backup:', labels)
+        
+        if selected == -1:
+            return
+        if selected < len(snapshots):
+            restore_incremental_backup(snapshots[selected]['id'])
+        else:
+            backup_path = os.path.join(BACKUP_DIR, backup_files[selected - len(snapshots)])
             restore_from_backup(backup_path)
         
     except Exception as e:
@@ -317,13 +410,26 @@ def show_existing_backups():
             return
         
         backup_files = [f for f in os.listdir(BACKUP_DIR) if f.endswith('.zip')]
+        snapshots = incremental_backup.list_snapshots()
         
-        if not backup_files:
+        if not backup_files and not snapshots:
             xbmcgui.Dialog().notification('MAL Tracker', 'No hay backups disponibles')
             return
         
         info = "BACKUPS DISPONIBLES:\n\n"
         
+        if snapshots:
+            storage_mb = round(incremental_backup.storage_size() / (1024 * 1024), 2)
+            info += f"🧩 INCREMENTALES ({len(snapshots)}, {storage_mb} MB en total)\n\n"
+            for manifest in snapshots:
+                stats = manifest['stats']
+                date_str = time.strftime('%Y-%m-%d %H:%M', time.localtime(manifest['created_at']))
+                database_mb = round(manifest['database']['size'] / (1024 * 1024), 2)
+                new_mb = round(stats['new_bytes'] / (1024 * 1024), 2)
+                info += f"📸 {date_str}\n"
+                info += f"   Base de datos: {database_mb} MB\n"
+                info += f"   Escrito: {new_mb} MB ({stats['new_chunks']}/{stats['total_chunks']} trozos) en {stats['seconds']:.1f}s\n\n"
+        
         for backup_file in sorted(backup_files, reverse=True):
             backup_path = os.path.join(BACKUP_DIR, backup_file)
             file_size = os.path.getsize(backup_path)
@@ -354,15 +460,16 @@ def clean_old_backups():
         
         backup_files = [f for f in os.listdir(BACKUP_DIR) if f.endswith('.zip')]
         
-        if len(backup_files) <= 5:  # Mantener al menos 5 backups
-            xbmcgui.Dialog().notification('MAL Tracker', 'No hay backups antiguos para limpiar')
-            return
-        
         # Ordenar por fecha y mantener solo los 5 más recientes
         backup_files.sort(reverse=True)
         old_backups = backup_files[5:]  # Backups a eliminar
+        old_snapshots = max(0, len(incremental_backup.list_snapshots()) - incremental_backup.KEEP_SNAPSHOTS)
         
-        if xbmcgui.Dialog().yesno('Confirmar', f'¿Eliminar {len(old_backups)} backups antiguos?'):
+        if not old_backups and not old_snapshots:
+            xbmcgui.Dialog().notification('MAL Tracker', 'No hay backups antiguos para limpiar')
+            return
+        
+        if xbmcgui.Dialog().yesno('Confirmar', f'¿Eliminar {len(old_backups) + old_snapshots} backups antiguos?'):
             deleted_count = 0
             for backup_file in old_backups:
                 try:
@@ -371,7 +478,11 @@ def clean_old_backups():
                 except:
                     continue
             
-            xbmcgui.Dialog().notification('MAL Tracker', f'{deleted_count} backups eliminados')
+            # Los trozos que ya no usa ningún backup incremental se borran
+            removed, freed = incremental_backup.prune()
+            deleted_count += removed
+            
+            xbmcgui.Dialog().notification('MAL Tracker', f'{deleted_count} backups eliminados ({round(freed / (1024 * 1024), 2)} MB liberados)')
         
     except Exception as e:
         xbmc.log(f'Backup System: Clean old backups error - {str(e)}', xbmc.LOGERROR)
\ No newline at end of file
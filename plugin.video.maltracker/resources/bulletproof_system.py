@@ -3,7 +3,6 @@ import traceback
 import time
 import os
 import json
-import sqlite3
 import threading
 import queue
 import xbmc
@@ -161,11 +160,9 @@ class BulletproofSystem:
             from . import local_database
             
             # Verificar integridad
-            conn = sqlite3.connect(local_database.DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute('PRAGMA integrity_check')
-            result = cursor.fetchone()[0]
-            conn.close()
+            with local_database.transaction() as cursor:
+                cursor.execute('PRAGMA integrity_check')
+                result = cursor.fetchone()[0]
             
             if result != 'ok':
                 # Intentar reparación
@@ -173,6 +170,7 @@ class BulletproofSystem:
                 return True
             
             # Recrear conexión
+            local_database.close_connection()
             return True
             
         except Exception:
@@ -231,12 +229,23 @@ class BulletproofSystem:
         try:
             from . import local_database
             
-            # Backup de la BD corrupta
-            if os.path.exists(local_database.DB_PATH):
-                backup_path = f"{local_database.DB_PATH}.corrupted_{int(time.time())}"
-                os.rename(local_database.DB_PATH, backup_path)
+            # Copia de la BD corrupta (lo que SQLite aún pueda leer)
+            backup_path = f"{local_database.DB_PATH}.corrupted_{int(time.time())}"
+            try:
+                local_database.backup_to(backup_path)
+            except Exception as e:
+                xbmc.log(f'Bulletproof: Could not copy corrupted DB - {str(e)}', xbmc.LOGWARNING)
+            
+            # Vaciar la BD con la API de backup desde una base nueva: el archivo
+            # en uso no se reemplaza aunque otro proceso lo tenga abierto
+            empty_path = f"{local_database.DB_PATH}.empty"
+            try:
+                local_database.restore_from(empty_path)
+            finally:
+                if os.path.exists(empty_path):
+                    os.remove(empty_path)
             
-            # Crear nueva BD
+            # Crear tablas de nuevo
             return local_database.init_database()
             
         except Exception as e:
@@ -247,10 +256,7 @@ class BulletproofSystem:
         """Obtener contenido por defecto para archivos"""
         defaults = {
             'token.json': {'access_token': '', 'refresh_token': '', 'expires_at': 0},
-            'notifications.json': {'new_episodes': True, 'check_interval': 3600},
-            'themes.json': {'current_theme': 'default'},
             'permissions.json': {'read_anime': True, 'write_anime': True},
-            'social_data.json': {'friends': [], 'reviews': []},
             'external_apis.json': {}
         }
         
@@ -342,23 +348,26 @@ class BulletproofSystem:
         self.recovery_thread.daemon = True
         self.recovery_thread.start()
     
+    def health_check(self):
+        """Un ciclo de verificación de salud (lo ejecuta el servicio en segundo plano)"""
+        # Auto-recuperación de salud
+        if self.system_health < 100:
+            self.system_health = min(100, self.system_health + 2)
+        
+        # Verificar archivos críticos
+        if not self.verify_critical_files():
+            self.attempt_file_recovery()
+        
+        # Limpiar errores antiguos
+        self.cleanup_old_errors()
+    
     def health_monitor_loop(self):
         """Bucle de monitoreo de salud"""
         while True:
             try:
                 # Verificar salud cada 60 segundos
                 time.sleep(60)
-                
-                # Auto-recuperación de salud
-                if self.system_health < 100:
-                    self.system_health = min(100, self.system_health + 2)
-                
-                # Verificar archivos críticos
-                if not self.verify_critical_files():
-                    self.attempt_file_recovery()
-                
-                # Limpiar errores antiguos
-                self.cleanup_old_errors()
+                self.health_check()
                 
             except Exception as e:
                 xbmc.log(f'Bulletproof: Health monitor error - {str(e)}', xbmc.LOGERROR)
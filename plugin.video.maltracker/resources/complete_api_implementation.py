@@ -1,8 +1,8 @@
-import requests
 import json
 import xbmc
 import xbmcgui
-from .config import USER_AGENT, rate_limit
+from . import config
+from . import http_client
 from .bulletproof_system import safe_execute
 
 class CompleteAPIImplementation:
@@ -10,265 +10,241 @@ class CompleteAPIImplementation:
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_characters(self, anime_id):
         """Obtener personajes de un anime"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/characters"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_staff(self, anime_id):
         """Obtener staff de un anime"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/staff"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_episodes(self, anime_id, page=1):
         """Obtener episodios de un anime"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/episodes"
         params = {'page': page}
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = http_client.get(url, params=params, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_news(self, anime_id):
         """Obtener noticias de un anime"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/news"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_forum(self, anime_id):
         """Obtener discusiones del foro"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/forum"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_videos(self, anime_id):
         """Obtener videos y trailers"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/videos"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_pictures(self, anime_id):
         """Obtener imágenes del anime"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/pictures"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_statistics(self, anime_id):
         """Obtener estadísticas del anime"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/statistics"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_moreinfo(self, anime_id):
         """Obtener información adicional"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/moreinfo"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_recommendations(self, anime_id):
         """Obtener recomendaciones"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/recommendations"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_userupdates(self, anime_id):
         """Obtener actualizaciones de usuarios"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/userupdates"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_reviews(self, anime_id):
         """Obtener reviews de usuarios"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/reviews"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_relations(self, anime_id):
         """Obtener anime relacionados"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/relations"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_themes(self, anime_id):
         """Obtener temas musicales (OP/ED)"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/themes"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_external(self, anime_id):
         """Obtener enlaces externos"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/external"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_streaming(self, anime_id):
         """Obtener plataformas de streaming"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/streaming"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_character_details(self, character_id):
         """Obtener detalles de personaje"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/characters/{character_id}"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_person_details(self, person_id):
         """Obtener detalles de persona"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/people/{person_id}"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_anime_genres(self):
         """Obtener lista de géneros"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/genres/anime"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_random_anime(self):
         """Obtener anime aleatorio"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/random/anime"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_seasons_archive(self):
         """Obtener archivo de temporadas"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/seasons"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_season_anime(self, year, season):
         """Obtener anime de temporada específica"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/seasons/{year}/{season}"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_watch_episodes(self):
         """Obtener episodios recientes"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/watch/episodes"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
     
     @safe_execute(max_retries=3, fallback=None)
     def get_watch_promos(self):
         """Obtener promos recientes"""
-        rate_limit()
         url = f"https://api.jikan.moe/v4/watch/promos"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         return response.json()
 
@@ -334,40 +310,39 @@ def show_complete_api_demo():
             demo_info = f"🎲 DEMO DE API COMPLETA\n\n"
             demo_info += f"Anime de prueba: {title}\n\n"
             
-            # Probar múltiples endpoints
+            # Probar múltiples endpoints (en paralelo)
             demo_info += "✅ ENDPOINTS PROBADOS:\n"
             
+            from .jikan_complete import JikanComplete
+            details = JikanComplete.get_anime_aggregate(
+                anime_id, sections=('characters', 'staff', 'episodes', 'recommendations', 'themes', 'streaming')
+            )
+            
             # Personajes
-            characters = public_api.get_anime_characters(anime_id)
-            if characters and 'data' in characters:
-                demo_info += f"• Personajes: {len(characters['data'])} encontrados\n"
+            if details['characters'] is not None:
+                demo_info += f"• Personajes: {len(details['characters'])} encontrados\n"
             
             # Staff
-            staff = public_api.get_anime_staff(anime_id)
-            if staff and 'data' in staff:
-                demo_info += f"• Staff: {len(staff['data'])} miembros\n"
+            if details['staff'] is not None:
+                demo_info += f"• Staff: {len(details['staff'])} miembros\n"
             
             # Episodios
-            episodes = public_api.get_anime_episodes(anime_id)
-            if episodes and 'data' in episodes:
-                demo_info += f"• Episodios: {len(episodes['data'])} listados\n"
+            if details['episodes'] is not None:
+                demo_info += f"• Episodios: {len(details['episodes'])} listados\n"
             
             # Recomendaciones
-            recommendations = public_api.get_anime_recommendations(anime_id)
-            if recommendations and 'data' in recommendations:
-                demo_info += f"• Recomendaciones: {len(recommendations['data'])} encontradas\n"
+            if details['recommendations'] is not None:
+                demo_info += f"• Recomendaciones: {len(details['recommendations'])} encontradas\n"
             
             # Temas musicales
-            themes = public_api.get_anime_themes(anime_id)
-            if themes and 'data' in themes:
-                openings = len(themes['data'].get('openings', []))
-                endings = len(themes['data'].get('endings', []))
+            if details['themes'] is not None:
+                openings = len(details['themes'].get('openings', []))
+                endings = len(details['themes'].get('endings', []))
                 demo_info += f"• Temas: {openings} OPs, {endings} EDs\n"
             
             # Streaming
-            streaming = public_api.get_anime_streaming(anime_id)
-            if streaming and 'data' in streaming:
-                demo_info += f"• Streaming: {len(streaming['data'])} plataformas\n"
+            if details['streaming'] is not None:
+                demo_info += f"• Streaming: {len(details['streaming'])} plataformas\n"
             
             demo_info += f"\n🎯 COBERTURA: 24/24 endpoints (100%)\n"
             demo_info += f"✅ TODAS LAS FUNCIONES IMPLEMENTADAS"
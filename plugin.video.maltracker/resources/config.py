@@ -1,9 +1,12 @@
 import xbmcaddon
 import xbmcvfs
 import os
-import time
 import threading
 
+ADDON_ID = 'plugin.video.maltracker'
+DEFAULT_REDIRECT_URI = 'http://localhost:8080/callback'
+DEFAULT_USER_AGENT = "MALTracker-Kodi/1.0.0"
+
 # Inicialización mejorada del addon
 def init_addon_settings():
     import xbmc
@@ -19,7 +22,7 @@ def init_addon_settings():
             # Validar y limpiar configuraciones
             client_id = client_id.strip() if client_id else None
             client_secret = client_secret.strip() if client_secret else None
-            redirect_uri = redirect_uri.strip() if redirect_uri else 'http://localhost:8080/callback'
+            redirect_uri = redirect_uri.strip() if redirect_uri else DEFAULT_REDIRECT_URI
             
             # Validar CLIENT_ID (requerido)
             if not client_id or len(client_id) < 10:
@@ -28,65 +31,105 @@ def init_addon_settings():
             
             user_agent = f"MALTracker-Kodi/{addon.getAddonInfo('version')} (https://github.com/user/mal-tracker-kodi)"
             
-            return client_id, client_secret, redirect_uri, user_agent
+            # Configuración AniList
+            anilist_client_id = addon.getSetting('anilist_client_id') or None
+            anilist_client_secret = addon.getSetting('anilist_client_secret') or None
             
+            return {
+                'CLIENT_ID': client_id,
+                'CLIENT_SECRET': client_secret,
+                'REDIRECT_URI': redirect_uri,
+                'USER_AGENT': user_agent,
+                'ANILIST_CLIENT_ID': anilist_client_id,
+                'ANILIST_CLIENT_SECRET': anilist_client_secret
+            }
+        
         except Exception as e:
             xbmc.log(f'MAL Config: Initialization attempt {attempt + 1} failed - {str(e)}', xbmc.LOGDEBUG)
             if attempt < max_retries - 1:
                 xbmc.sleep(200)  # Esperar antes del siguiente intento
             else:
                 xbmc.log('MAL Config: All initialization attempts failed', xbmc.LOGERROR)
-                return None, None, 'http://localhost:8080/callback', "MALTracker-Kodi/1.0.0"
     
-    return None, None, 'http://localhost:8080/callback', "MALTracker-Kodi/1.0.0"
+    return {
+        'CLIENT_ID': None,
+        'CLIENT_SECRET': None,
+        'REDIRECT_URI': DEFAULT_REDIRECT_URI,
+        'USER_AGENT': DEFAULT_USER_AGENT,
+        'ANILIST_CLIENT_ID': None,
+        'ANILIST_CLIENT_SECRET': None
+    }
 
-# Inicializar configuraciones
-CLIENT_ID, CLIENT_SECRET, REDIRECT_URI, USER_AGENT = init_addon_settings()
+def init_paths():
+    """Rutas del perfil del addon (sin xbmcaddon: la ruta del perfil es fija)"""
+    token_path = xbmcvfs.translatePath(f'special://profile/addon_data/{ADDON_ID}/')
+    
+    # Ruta segura para tokens
+    if not xbmcvfs.exists(token_path):
+        xbmcvfs.mkdirs(token_path)
+    
+    return {
+        'TOKEN_PATH': token_path,
+        'TOKEN_FILE': os.path.join(token_path, 'token.json'),
+        'ANILIST_TOKEN_FILE': os.path.join(token_path, 'anilist_token.json')
+    }
+
+class Settings:
+    """Configuración calculada en el primer acceso y memorizada
+    
+    Las credenciales solo se leen de Kodi cuando algún módulo las usa;
+    invalidate() las descarta tras un cambio de ajustes.
+    """
+    
+    LOADERS = {
+        'CLIENT_ID': init_addon_settings,
+        'CLIENT_SECRET': init_addon_settings,
+        'REDIRECT_URI': init_addon_settings,
+        'USER_AGENT': init_addon_settings,
+        'ANILIST_CLIENT_ID': init_addon_settings,
+        'ANILIST_CLIENT_SECRET': init_addon_settings,
+        'TOKEN_PATH': init_paths,
+        'TOKEN_FILE': init_paths,
+        'ANILIST_TOKEN_FILE': init_paths
+    }
+    
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def __getattr__(self, name):
+        loader = Settings.LOADERS.get(name)
+        if loader is None:
+            raise AttributeError(name)
+        
+        with self._lock:
+            if name not in self._values:
+                self._values.update(loader())
+            return self._values[name]
+    
+    def invalidate(self):
+        """Descartar los ajustes leídos (las rutas no cambian)"""
+        with self._lock:
+            for name, loader in Settings.LOADERS.items():
+                if loader is init_addon_settings:
+                    self._values.pop(name, None)
+
+settings = Settings()
+
+def __getattr__(name):
+    # Compatibilidad: config.CLIENT_ID, from .config import TOKEN_PATH, etc.
+    if name in Settings.LOADERS:
+        return getattr(settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 AUTH_URL = 'https://myanimelist.net/v1/oauth2/authorize'
 TOKEN_URL = 'https://myanimelist.net/v1/oauth2/token'
 API_BASE_URL = 'https://api.myanimelist.net/v2'
 
-# Rate limiting mejorado: 1 request per second
-last_request_time = 0
-rate_limit_lock = threading.Lock() if 'threading' in globals() else None
-
-def rate_limit():
-    global last_request_time
-    
-    # Usar lock si está disponible para thread safety
-    if rate_limit_lock:
-        with rate_limit_lock:
-            current_time = time.time()
-            time_diff = current_time - last_request_time
-            if time_diff < 1.0:
-                sleep_time = 1.0 - time_diff
-                time.sleep(sleep_time)
-            last_request_time = time.time()
-    else:
-        current_time = time.time()
-        time_diff = current_time - last_request_time
-        if time_diff < 1.0:
-            sleep_time = 1.0 - time_diff
-            time.sleep(sleep_time)
-        last_request_time = time.time()
-
-# Configuración AniList y rutas
-try:
-    addon = xbmcaddon.Addon()
-    ANILIST_CLIENT_ID = addon.getSetting('anilist_client_id') or None
-    ANILIST_CLIENT_SECRET = addon.getSetting('anilist_client_secret') or None
-    TOKEN_PATH = xbmcvfs.translatePath(addon.getAddonInfo('profile'))
-except:
-    ANILIST_CLIENT_ID = None
-    ANILIST_CLIENT_SECRET = None
-    TOKEN_PATH = xbmcvfs.translatePath('special://profile/addon_data/plugin.video.maltracker/')
+# Rate limiting por host (token bucket compartido con http_client)
+def rate_limit(url=API_BASE_URL):
+    from . import rate_limiter
+    rate_limiter.acquire(url)
 
 ANILIST_AUTH_URL = 'https://anilist.co/api/v2/oauth/authorize'
 ANILIST_TOKEN_URL = 'https://anilist.co/api/v2/oauth/token'
-
-# Ruta segura para tokens
-if not xbmcvfs.exists(TOKEN_PATH):
-    xbmcvfs.mkdirs(TOKEN_PATH)
-TOKEN_FILE = os.path.join(TOKEN_PATH, 'token.json')
-ANILIST_TOKEN_FILE = os.path.join(TOKEN_PATH, 'anilist_token.json')
@@ -2,7 +2,8 @@ import requests
 import json
 import xbmc
 import xbmcgui
-from .config import USER_AGENT, rate_limit
+from .config import rate_limit
+from . import config
 
 class ExternalServices:
     
@@ -10,10 +11,10 @@ class ExternalServices:
     def search_kitsu(anime_title):
         """Buscar en Kitsu API"""
         try:
-            rate_limit()
             url = f"https://kitsu.io/api/edge/anime"
+            rate_limit(url)
             params = {'filter[text]': anime_title, 'page[limit]': 5}
-            headers = {'Accept': 'application/vnd.api+json', 'User-Agent': USER_AGENT}
+            headers = {'Accept': 'application/vnd.api+json', 'User-Agent': config.USER_AGENT}
             
             response = requests.get(url, params=params, headers=headers, timeout=10)
             if response.status_code == 200:
@@ -40,14 +41,14 @@ class ExternalServices:
     def search_trakt(anime_title):
         """Buscar en Trakt.tv"""
         try:
-            rate_limit()
             url = f"https://api.trakt.tv/search/show"
+            rate_limit(url)
             params = {'query': anime_title, 'limit': 5}
             headers = {
                 'Content-Type': 'application/json',
                 'trakt-api-version': '2',
                 'trakt-api-key': 'your_trakt_key',  # Requiere API key
-                'User-Agent': USER_AGENT
+                'User-Agent': config.USER_AGENT
             }
             
             # Placeholder - requiere configuración de API key
@@ -61,9 +62,9 @@ class ExternalServices:
     def get_tmdb_info(anime_title):
         """Obtener información de TMDB"""
         try:
-            rate_limit()
             # TMDB tiene algunos anime, especialmente películas
             url = f"https://api.themoviedb.org/3/search/tv"
+            rate_limit(url)
             params = {
                 'api_key': 'your_tmdb_key',  # Requiere API key
                 'query': anime_title,
@@ -0,0 +1,118 @@
+"""
+Huellas de integridad de archivos incrementales
+Si (tamaño, mtime_ns, inodo) no cambian no se lee el archivo; los archivos
+SQLite se comparan por sumas de página para saber qué páginas cambiaron
+"""
+
+import os
+import mmap
+import zlib
+import struct
+import hashlib
+
+# Lecturas grandes en vez de bloques de 4 KB
+HASH_BUFFER = 1024 * 1024
+SQLITE_MAGIC = b'SQLite format 3\x00'
+
+def stat_fingerprint(path):
+    """Huella barata del archivo: [tamaño, mtime_ns, inodo]"""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+def hash_file(path):
+    """SHA-256 del archivo con lecturas de HASH_BUFFER bytes"""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        
+        digest = hashlib.sha256()
+        buffer = bytearray(HASH_BUFFER)
+        view = memoryview(buffer)
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            digest.update(view[:size])
+        return digest.hexdigest()
+
+def is_sqlite(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+    except OSError:
+        return False
+
+def sqlite_page_checksums(path):
+    """CRC32 de cada página de una base SQLite (tamaño de página de la cabecera)"""
+    with open(path, 'rb') as f:
+        header = f.read(100)
+        page_size = struct.unpack('>H', header[16:18])[0]
+        # El valor 1 significa 65536 bytes
+        if page_size == 1:
+            page_size = 65536
+        
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return page_size, []
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            view = memoryview(data)
+            try:
+                return page_size, [zlib.crc32(view[offset:offset + page_size]) for offset in range(0, size, page_size)]
+            finally:
+                view.release()
+
+def _pages_digest(pages):
+    """Resumen SHA-256 de la lista de sumas de página"""
+    return hashlib.sha256(struct.pack(f'>{len(pages)}I', *pages)).hexdigest()
+
+def fingerprint(path):
+    """Huella completa: stat, hash y, para SQLite, sumas de página"""
+    record = {'stat': stat_fingerprint(path), 'size': os.path.getsize(path), 'mtime': os.path.getmtime(path)}
+    
+    if is_sqlite(path):
+        page_size, pages = sqlite_page_checksums(path)
+        record.update({'hash': _pages_digest(pages), 'page_size': page_size, 'pages': pages})
+    else:
+        record['hash'] = hash_file(path)
+    return record
+
+def changed_pages(old_pages, new_pages):
+    """Índices de las páginas distintas (incluye páginas añadidas o eliminadas)"""
+    changed = [index for index, (old, new) in enumerate(zip(old_pages, new_pages)) if old != new]
+    shorter = min(len(old_pages), len(new_pages))
+    changed.extend(range(shorter, max(len(old_pages), len(new_pages))))
+    return changed
+
+class IntegrityChecker:
+    """Comparación incremental contra una línea base
+    
+    Recuerda la última huella observada de cada archivo: mientras el stat no
+    cambie, el resultado anterior se reutiliza sin leer el archivo.
+    """
+    
+    def __init__(self):
+        self.observed = {}
+    
+    def check(self, path, baseline):
+        """Devolver la huella actual del archivo (reutilizada si el stat no cambió)
+        
+        Devuelve None si el archivo ya no existe, también cuando desaparece
+        mientras se lee.
+        """
+        try:
+            current_stat = stat_fingerprint(path)
+            if current_stat == baseline.get('stat'):
+                return baseline
+            
+            observed = self.observed.get(path)
+            if observed and observed['stat'] == current_stat:
+                return observed
+            
+            record = fingerprint(path)
+        except FileNotFoundError:
+            self.observed.pop(path, None)
+            return None
+        
+        self.observed[path] = record
+        return record
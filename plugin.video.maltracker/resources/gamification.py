@@ -1,13 +1,19 @@
-import json
-import os
 import time
 import xbmc
 import xbmcgui
-from . import local_database
-from .config import TOKEN_PATH
+from . import local_database, state_store
 
-ACHIEVEMENTS_FILE = os.path.join(TOKEN_PATH, 'achievements.json')
-STATS_FILE = os.path.join(TOKEN_PATH, 'gamification_stats.json')
+DEFAULT_STATS = {
+    'total_points': 0,
+    'level': 1,
+    'current_streak': 0,
+    'longest_streak': 0,
+    'last_activity': 0,
+    'monthly_progress': {}
+}
+
+ACHIEVEMENTS_STATE = state_store.namespace('achievements', legacy_file='achievements.json')
+STATS = state_store.namespace('gamification_stats', DEFAULT_STATS, 'gamification_stats.json')
 
 # Definición de logros
 ACHIEVEMENTS = {
@@ -110,18 +116,8 @@ MONTHLY_CHALLENGES = {
 def init_gamification():
     """Inicializar sistema de gamificación"""
     try:
-        if not os.path.exists(ACHIEVEMENTS_FILE):
-            save_achievements_data({})
-        
-        if not os.path.exists(STATS_FILE):
-            save_gamification_stats({
-                'total_points': 0,
-                'level': 1,
-                'current_streak': 0,
-                'longest_streak': 0,
-                'last_activity': 0,
-                'monthly_progress': {}
-            })
+        if not STATS.exists():
+            save_gamification_stats(DEFAULT_STATS)
         
         return True
         
@@ -131,42 +127,19 @@ def init_gamification():
 
 def save_achievements_data(data):
     """Guardar datos de logros"""
-    try:
-        with open(ACHIEVEMENTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        xbmc.log(f'Gamification: Save achievements error - {str(e)}', xbmc.LOGERROR)
+    ACHIEVEMENTS_STATE.save(data)
 
 def load_achievements_data():
     """Cargar datos de logros"""
-    try:
-        with open(ACHIEVEMENTS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return {}
+    return ACHIEVEMENTS_STATE.load()
 
 def save_gamification_stats(stats):
     """Guardar estadísticas de gamificación"""
-    try:
-        with open(STATS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(stats, f, indent=2)
-    except Exception as e:
-        xbmc.log(f'Gamification: Save stats error - {str(e)}', xbmc.LOGERROR)
+    STATS.save(stats)
 
 def load_gamification_stats():
     """Cargar estadísticas de gamificación"""
-    try:
-        with open(STATS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return {
-            'total_points': 0,
-            'level': 1,
-            'current_streak': 0,
-            'longest_streak': 0,
-            'last_activity': 0,
-            'monthly_progress': {}
-        }
+    return STATS.load()
 
 def check_achievements():
     """Verificar y desbloquear logros"""
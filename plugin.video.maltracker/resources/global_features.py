@@ -3,7 +3,8 @@ import time
 import requests
 import xbmc
 import xbmcgui
-from .config import USER_AGENT, rate_limit
+from .config import rate_limit
+from . import config
 
 # Soporte multi-idioma
 LANGUAGES = {
@@ -130,9 +131,9 @@ def get_seasonal_trends():
     """Obtener tendencias de temporada"""
     try:
         # Usar Jikan API para obtener anime de temporada
-        rate_limit()
         url = "https://api.jikan.moe/v4/seasons/now"
-        headers = {'User-Agent': USER_AGENT}
+        rate_limit(url)
+        headers = {'User-Agent': config.USER_AGENT}
         
         response = requests.get(url, headers=headers, timeout=10)
         
@@ -0,0 +1,96 @@
+"""
+Capa HTTP compartida con sesiones persistentes por host
+Reutiliza conexiones keep-alive para MAL, AniList y Jikan
+"""
+
+import threading
+import urllib.parse
+import requests
+from requests.adapters import HTTPAdapter
+import xbmc
+from . import config
+from . import rate_limiter
+
+# Tamaños de pool configurables
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 8
+DEFAULT_TIMEOUT = 10
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+class IncompleteDownloadError(Exception):
+    """Una descarga paginada se interrumpió antes de la última página"""
+
+def configure_pools(pool_connections=None, pool_maxsize=None):
+    """Cambiar tamaños de pool (aplica a sesiones nuevas)"""
+    global POOL_CONNECTIONS, POOL_MAXSIZE
+
+    if pool_connections:
+        POOL_CONNECTIONS = int(pool_connections)
+    if pool_maxsize:
+        POOL_MAXSIZE = int(pool_maxsize)
+    close_all()
+
+def _create_session():
+    """Crear sesión con adaptador de pool y cabeceras comunes"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'User-Agent': config.USER_AGENT,
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive'
+    })
+    return session
+
+def get_session(url):
+    """Obtener la sesión persistente del host de la URL"""
+    host = urllib.parse.urlsplit(url).netloc.lower()
+
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = _create_session()
+            _sessions[host] = session
+            xbmc.log(f'HTTP Client: New session for {host}', xbmc.LOGDEBUG)
+        return session
+
+def request(method, url, token=None, headers=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """Petición HTTP a través de la sesión del host
+
+    token: si se indica, se inyecta como cabecera Authorization Bearer
+    La petición espera turno en el limitador del host y un 429 bloquea
+    el host durante el Retry-After indicado
+    """
+    request_headers = dict(headers) if headers else {}
+    if token:
+        request_headers['Authorization'] = f'Bearer {token}'
+
+    rate_limiter.acquire(url)
+    session = get_session(url)
+    response = session.request(method, url, headers=request_headers, timeout=timeout, **kwargs)
+
+    wait = rate_limiter.record_response(url, response)
+    if wait:
+        xbmc.log(f'HTTP Client: Rate limited by {urllib.parse.urlsplit(url).netloc}, backing off {wait:.1f}s', xbmc.LOGWARNING)
+    return response
+
+def get(url, **kwargs):
+    """GET a través de la sesión compartida"""
+    return request('GET', url, **kwargs)
+
+def post(url, **kwargs):
+    """POST a través de la sesión compartida"""
+    return request('POST', url, **kwargs)
+
+def close_all():
+    """Cerrar todas las sesiones abiertas"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            try:
+                session.close()
+            except Exception:
+                pass
+        _sessions.clear()
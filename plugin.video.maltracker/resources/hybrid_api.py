@@ -3,12 +3,11 @@ Sistema híbrido MAL + AniList
 AniList como principal, MAL como fallback
 """
 
-import requests
 import json
 import xbmc
 import xbmcgui
-from .config import rate_limit, USER_AGENT
-from . import anilist_auth, auth as mal_auth
+from . import config
+from . import anilist_auth, anilist_api, auth as mal_auth, http_client
 
 class HybridAPI:
     
@@ -85,7 +84,7 @@ class HybridAPI:
                 'Accept': 'application/json'
             }
             
-            response = requests.post(
+            response = http_client.post(
                 'https://graphql.anilist.co',
                 json={'query': graphql_query, 'variables': variables},
                 headers=headers,
@@ -111,7 +110,7 @@ class HybridAPI:
             
             headers = {
                 'Authorization': f'Bearer {token}',
-                'User-Agent': USER_AGENT
+                'User-Agent': config.USER_AGENT
             }
             
             params = {
@@ -120,8 +119,7 @@ class HybridAPI:
                 'fields': 'id,title,main_picture,mean,num_episodes,status,genres'
             }
             
-            rate_limit()
-            response = requests.get(
+            response = http_client.get(
                 'https://api.myanimelist.net/v2/anime',
                 params=params,
                 headers=headers,
@@ -212,52 +210,24 @@ class HybridAPI:
     
     @staticmethod
     def _get_anilist_list():
-        """Obtener lista de AniList"""
+        """Obtener lista de AniList (paginada, en formato de MAL)"""
         try:
-            token = anilist_auth.load_access_token()
-            if not token:
+            if not anilist_auth.load_access_token():
                 return None
             
-            graphql_query = """
-            query {
-                Viewer {
-                    mediaListOptions { scoreFormat }
-                }
-                MediaListCollection(userId: null, type: ANIME) {
-                    lists {
-                        name
-                        entries {
-                            id
-                            status
-                            score
-                            progress
-                            media {
-                                id
-                                title { romaji english }
-                                coverImage { medium }
-                                episodes
-                                averageScore
-                            }
-                        }
-                    }
-                }
-            }
-            """
+            entries = []
+            skipped = 0
+            for page in anilist_api.iter_user_anime_pages():
+                for entry in page:
+                    converted = anilist_api.to_mal_entry(entry)
+                    if converted:
+                        entries.append(converted)
+                    else:
+                        skipped += 1
             
-            headers = {
-                'Authorization': f'Bearer {token}',
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.post(
-                'https://graphql.anilist.co',
-                json={'query': graphql_query},
-                headers=headers,
-                timeout=15
-            )
-            
-            if response.status_code == 200:
-                return response.json()
+            if skipped:
+                xbmc.log(f'Hybrid API: Skipped {skipped} AniList entries without MAL id', xbmc.LOGINFO)
+            return {'data': entries}
                 
         except Exception as e:
             xbmc.log(f'Hybrid API: AniList list error - {str(e)}', xbmc.LOGERROR)
@@ -1,6 +1,5 @@
 import xbmc
-import sqlite3
-from . import local_database, mal_api, auth
+from . import local_database, auth, sync_manager, sync_queue, anime_catalog
 
 # Estados compatibles con MAL API
 MAL_COMPATIBLE_STATUSES = ['watching', 'completed', 'on_hold', 'dropped', 'plan_to_watch']
@@ -17,20 +16,24 @@ def hybrid_sync_with_mal():
     try:
         xbmc.log('Hybrid Sync: Starting hybrid sync', xbmc.LOGINFO)
         
-        # 1. Descargar lista remota de MAL
-        remote_list = mal_api.get_user_anime_list(limit=1000)
-        if not remote_list or 'data' not in remote_list:
-            return False
+        # Los estados solo locales quedan como no sincronizados antes de ingerir:
+        # bulk_upsert_anime no toca los campos de lista de esas filas
+        preserve_local_extensions()
         
-        # 2. Sincronizar datos compatibles
-        sync_compatible_data(remote_list)
+        # 1-2. Descargar la lista de MAL por páginas (solo cambios si hay marca de agua)
+        # Una página fallida o un error de ingesta lanzan una excepción antes de
+        # mover la marca de agua
+        watermark, full = sync_manager.begin_delta_sync('mal')
+        newest = watermark
+        for page in sync_manager.iter_mal_pages(watermark, full):
+            newest = max([newest] + [sync_manager.entry_updated_at(entry) for entry in page])
+            sync_compatible_data(page)
+            anime_catalog.add_entries(page, 'sync')
+        sync_manager.finish_delta_sync('mal', newest, full)
         
         # 3. Subir cambios locales compatibles
         upload_compatible_changes()
         
-        # 4. Preservar datos locales únicos
-        preserve_local_extensions()
-        
         xbmc.log('Hybrid Sync: Completed successfully', xbmc.LOGINFO)
         return True
         
@@ -38,106 +41,41 @@ def hybrid_sync_with_mal():
         xbmc.log(f'Hybrid Sync: Error - {str(e)}', xbmc.LOGERROR)
         return False
 
-def sync_compatible_data(remote_list):
-    """Sincronizar solo datos compatibles con MAL"""
+def sync_compatible_data(entries):
+    """Sincronizar solo datos compatibles con MAL (una página de entradas)
+    
+    Se ingiere en bloque con bulk_upsert_anime: una consulta por bloque en
+    vez de una por anime, y las filas con cambios locales pendientes
+    (synced = 0, entre ellas las de estados solo locales) conservan su
+    estado, episodios y puntuación.
+    """
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        for entry in remote_list['data']:
-            anime = entry['node']
-            list_status = entry.get('list_status', {})
-            mal_id = anime.get('id')
-            mal_status = list_status.get('status', 'plan_to_watch')
-            
-            # Solo procesar estados compatibles
-            if mal_status in MAL_COMPATIBLE_STATUSES:
-                # Verificar si existe localmente
-                cursor.execute('SELECT status FROM anime_list WHERE mal_id = ?', (mal_id,))
-                local_result = cursor.fetchone()
-                
-                if local_result:
-                    local_status = local_result[0]
-                    
-                    # Solo actualizar si el estado local es compatible
-                    if local_status in MAL_COMPATIBLE_STATUSES:
-                        cursor.execute('''
-                            UPDATE anime_list 
-                            SET status = ?, episodes_watched = ?, score = ?, synced = 1
-                            WHERE mal_id = ?
-                        ''', (
-                            mal_status,
-                            list_status.get('num_episodes_watched', 0),
-                            list_status.get('score', 0),
-                            mal_id
-                        ))
-                else:
-                    # Agregar nuevo anime desde MAL
-                    local_database.add_anime_to_list({
-                        'mal_id': mal_id,
-                        'title': anime.get('title'),
-                        'episodes': anime.get('num_episodes'),
-                        'images': anime.get('main_picture', {}),
-                        'synopsis': anime.get('synopsis'),
-                        'genres': anime.get('genres', []),
-                        'studios': anime.get('studios', []),
-                        'score': anime.get('mean'),
-                        'rank': anime.get('rank'),
-                        'popularity': anime.get('popularity')
-                    }, mal_status)
-        
-        conn.commit()
-        conn.close()
+        compatible = [sync_manager.normalize_mal_entry(entry) for entry in entries
+                      if entry.get('list_status', {}).get('status', 'plan_to_watch') in MAL_COMPATIBLE_STATUSES]
+        return local_database.bulk_upsert_anime(compatible)
         
     except Exception as e:
         xbmc.log(f'Hybrid Sync: Compatible data error - {str(e)}', xbmc.LOGERROR)
+        raise
 
 def upload_compatible_changes():
-    """Subir solo cambios compatibles con MAL"""
-    try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        # Obtener anime no sincronizado con estados compatibles
-        cursor.execute('''
-            SELECT mal_id, status, episodes_watched, score 
-            FROM anime_list 
-            WHERE synced = 0 AND status IN ({})
-        '''.format(','.join(['?' for _ in MAL_COMPATIBLE_STATUSES])), MAL_COMPATIBLE_STATUSES)
-        
-        unsynced_anime = cursor.fetchall()
-        
-        for mal_id, status, episodes_watched, score in unsynced_anime:
-            # Intentar actualizar en MAL
-            success = mal_api.update_anime_status(mal_id, status, episodes_watched)
-            
-            if success:
-                # Marcar como sincronizado
-                cursor.execute('UPDATE anime_list SET synced = 1 WHERE mal_id = ?', (mal_id,))
-                xbmc.log(f'Hybrid Sync: Uploaded {mal_id}', xbmc.LOGDEBUG)
-        
-        conn.commit()
-        conn.close()
-        
-    except Exception as e:
-        xbmc.log(f'Hybrid Sync: Upload changes error - {str(e)}', xbmc.LOGERROR)
+    """Subir solo cambios compatibles con MAL
+    
+    La cola de subida ya descarta los estados solo locales
+    """
+    return sync_queue.drain()
 
 def preserve_local_extensions():
     """Preservar extensiones locales que no existen en MAL"""
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        # Mantener estados locales únicos como no sincronizados
-        for status in LOCAL_ONLY_STATUSES:
-            cursor.execute('''
-                UPDATE anime_list 
-                SET synced = 0 
-                WHERE status = ?
-            ''', (status,))
-        
-        conn.commit()
-        conn.close()
+        with local_database.transaction() as cursor:
+            # Mantener estados locales únicos como no sincronizados
+            for status in LOCAL_ONLY_STATUSES:
+                cursor.execute('''
+                    UPDATE anime_list 
+                    SET synced = 0 
+                    WHERE status = ?
+                ''', (status,))
         
         xbmc.log('Hybrid Sync: Local extensions preserved', xbmc.LOGDEBUG)
         
@@ -147,23 +85,20 @@ def preserve_local_extensions():
 def get_sync_compatibility_status():
     """Obtener estado de compatibilidad de sincronización"""
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        # Contar anime por tipo de estado
-        cursor.execute('''
-            SELECT 
-                SUM(CASE WHEN status IN ({}) THEN 1 ELSE 0 END) as compatible,
-                SUM(CASE WHEN status IN ({}) THEN 1 ELSE 0 END) as local_only,
-                COUNT(*) as total
-            FROM anime_list
-        '''.format(
-            ','.join(['?' for _ in MAL_COMPATIBLE_STATUSES]),
-            ','.join(['?' for _ in LOCAL_ONLY_STATUSES])
-        ), MAL_COMPATIBLE_STATUSES + LOCAL_ONLY_STATUSES)
-        
-        result = cursor.fetchone()
-        conn.close()
+        with local_database.transaction() as cursor:
+            # Contar anime por tipo de estado
+            cursor.execute('''
+                SELECT 
+                    SUM(CASE WHEN status IN ({}) THEN 1 ELSE 0 END) as compatible,
+                    SUM(CASE WHEN status IN ({}) THEN 1 ELSE 0 END) as local_only,
+                    COUNT(*) as total
+                FROM anime_list
+            '''.format(
+                ','.join(['?' for _ in MAL_COMPATIBLE_STATUSES]),
+                ','.join(['?' for _ in LOCAL_ONLY_STATUSES])
+            ), MAL_COMPATIBLE_STATUSES + LOCAL_ONLY_STATUSES)
+        
+            result = cursor.fetchone()
         
         return {
             'compatible': result[0] if result else 0,
@@ -0,0 +1,207 @@
+"""
+Backups incrementales con deduplicación
+Cada backup es un manifiesto con la lista de trozos (SHA-256) de la base de
+datos y de los archivos de configuración; los trozos se guardan una sola vez
+comprimidos, así que un backup solo escribe lo que cambió desde el anterior.
+Cualquier manifiesto de la cadena se puede restaurar por sí solo.
+"""
+
+import os
+import json
+import time
+import zlib
+import hashlib
+import xbmc
+from . import local_database
+from .config import TOKEN_PATH
+
+INCREMENTAL_DIR = os.path.join(TOKEN_PATH, 'backups', 'incremental')
+CHUNK_DIR = os.path.join(INCREMENTAL_DIR, 'chunks')
+MANIFEST_DIR = os.path.join(INCREMENTAL_DIR, 'manifests')
+
+# Trozos alineados con las páginas de SQLite (4 KB por defecto): los cambios
+# dispersos de un día solo reescriben los trozos de las páginas tocadas
+CHUNK_SIZE = 16 * 1024
+# Backups incrementales que se conservan al limpiar
+KEEP_SNAPSHOTS = 30
+
+def _chunk_path(digest):
+    return os.path.join(CHUNK_DIR, digest[:2], digest)
+
+def _write_atomic(path, data):
+    """Escribir en un temporal y renombrar (nunca queda un archivo a medias)"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _store_file(path, stats):
+    """Trocear un archivo y guardar los trozos nuevos; devuelve sus hashes"""
+    digests = []
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(CHUNK_SIZE)
+            if not data:
+                break
+            digest = hashlib.sha256(data).hexdigest()
+            digests.append(digest)
+            
+            chunk_path = _chunk_path(digest)
+            if os.path.exists(chunk_path):
+                continue
+            os.makedirs(os.path.dirname(chunk_path), exist_ok=True)
+            compressed = zlib.compress(data)
+            _write_atomic(chunk_path, compressed)
+            stats['new_chunks'] += 1
+            stats['new_bytes'] += len(compressed)
+    
+    stats['total_chunks'] += len(digests)
+    return digests
+
+def _restore_file(digests, path):
+    """Reconstruir un archivo a partir de sus trozos (verificando cada hash)"""
+    tmp_path = f'{path}.restore'
+    try:
+        with open(tmp_path, 'wb') as f:
+            for digest in digests:
+                with open(_chunk_path(digest), 'rb') as chunk:
+                    data = zlib.decompress(chunk.read())
+                if hashlib.sha256(data).hexdigest() != digest:
+                    raise ValueError(f'Trozo dañado: {digest}')
+                f.write(data)
+        return tmp_path
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def create_snapshot(config_files=(), metadata=None):
+    """Crear un backup incremental de la base de datos y los archivos indicados
+    
+    Devuelve el manifiesto, con el tamaño escrito y la duración en 'stats'
+    """
+    started = time.time()
+    os.makedirs(MANIFEST_DIR, exist_ok=True)
+    stats = {'new_chunks': 0, 'new_bytes': 0, 'total_chunks': 0}
+    
+    snapshot_id = str(int(started * 1000))
+    snapshot_db = os.path.join(INCREMENTAL_DIR, f'snapshot_{snapshot_id}.db')
+    try:
+        # Copia consistente sin detener las escrituras de otros procesos
+        local_database.backup_to(snapshot_db)
+        database = {'size': os.path.getsize(snapshot_db), 'chunks': _store_file(snapshot_db, stats)}
+    finally:
+        if os.path.exists(snapshot_db):
+            os.remove(snapshot_db)
+    
+    configs = {}
+    for config_file in config_files:
+        file_path = os.path.join(TOKEN_PATH, config_file)
+        if os.path.exists(file_path):
+            configs[config_file] = _store_file(file_path, stats)
+    
+    previous = list_snapshots()
+    stats['seconds'] = round(time.time() - started, 3)
+    manifest = {
+        'id': snapshot_id,
+        'created_at': int(started),
+        'parent': previous[0]['id'] if previous else None,
+        'chunk_size': CHUNK_SIZE,
+        'database': database,
+        'config': configs,
+        'metadata': metadata or {},
+        'stats': stats
+    }
+    
+    # El manifiesto se escribe al final: si el backup se interrumpe solo
+    # quedan trozos huérfanos, que se eliminan al limpiar
+    _write_atomic(os.path.join(MANIFEST_DIR, f'{snapshot_id}.json'), json.dumps(manifest).encode('utf-8'))
+    xbmc.log(f'Incremental Backup: Snapshot {snapshot_id} - {stats["new_chunks"]}/{stats["total_chunks"]} new chunks, '
+             f'{stats["new_bytes"]} bytes in {stats["seconds"]}s', xbmc.LOGINFO)
+    return manifest
+
+def list_snapshots():
+    """Manifiestos de los backups incrementales, del más reciente al más antiguo"""
+    if not os.path.exists(MANIFEST_DIR):
+        return []
+    
+    snapshots = []
+    for filename in os.listdir(MANIFEST_DIR):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(MANIFEST_DIR, filename), 'r', encoding='utf-8') as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError) as e:
+            xbmc.log(f'Incremental Backup: Unreadable manifest {filename} - {str(e)}', xbmc.LOGWARNING)
+    
+    snapshots.sort(key=lambda manifest: int(manifest['id']), reverse=True)
+    return snapshots
+
+def load_snapshot(snapshot_id):
+    with open(os.path.join(MANIFEST_DIR, f'{snapshot_id}.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def restore_snapshot(snapshot_id):
+    """Restaurar la base de datos y la configuración de un backup incremental
+    
+    La base de datos se copia sobre la conexión compartida con la API de
+    backup (el archivo en uso no se reemplaza); los archivos de configuración
+    se sustituyen de forma atómica
+    """
+    manifest = load_snapshot(snapshot_id)
+    
+    # Reconstruir todo antes de tocar los datos actuales
+    snapshot_db = _restore_file(manifest['database']['chunks'], os.path.join(INCREMENTAL_DIR, f'snapshot_{snapshot_id}.db'))
+    restored = []
+    try:
+        for config_file, digests in manifest.get('config', {}).items():
+            config_path = os.path.join(TOKEN_PATH, config_file)
+            restored.append((_restore_file(digests, config_path), config_path))
+        
+        local_database.restore_from(snapshot_db)
+    except Exception:
+        for tmp_path, _ in restored:
+            os.remove(tmp_path)
+        raise
+    finally:
+        os.remove(snapshot_db)
+    
+    for tmp_path, path in restored:
+        os.replace(tmp_path, path)
+    return manifest
+
+def prune(keep=KEEP_SNAPSHOTS):
+    """Conservar los keep backups más recientes y borrar los trozos sin uso
+    
+    Devuelve (backups eliminados, bytes liberados)
+    """
+    snapshots = list_snapshots()
+    for manifest in snapshots[keep:]:
+        os.remove(os.path.join(MANIFEST_DIR, f'{manifest["id"]}.json'))
+    
+    referenced = set()
+    for manifest in snapshots[:keep]:
+        referenced.update(manifest['database']['chunks'])
+        for digests in manifest.get('config', {}).values():
+            referenced.update(digests)
+    
+    freed = 0
+    if os.path.exists(CHUNK_DIR):
+        for prefix in os.listdir(CHUNK_DIR):
+            prefix_dir = os.path.join(CHUNK_DIR, prefix)
+            for digest in os.listdir(prefix_dir):
+                if digest not in referenced:
+                    chunk_path = os.path.join(prefix_dir, digest)
+                    freed += os.path.getsize(chunk_path)
+                    os.remove(chunk_path)
+    
+    return max(0, len(snapshots) - keep), freed
+
+def storage_size():
+    """Bytes ocupados por todos los trozos guardados"""
+    total = 0
+    if os.path.exists(CHUNK_DIR):
+        for root, dirs, files in os.walk(CHUNK_DIR):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
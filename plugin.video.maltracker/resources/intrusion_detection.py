@@ -1,11 +1,18 @@
 import os
 import time
-import hashlib
 import json
 import threading
 import xbmc
 import xbmcgui
 from .config import TOKEN_PATH
+from . import file_integrity
+
+CRITICAL_FILES = [
+    'mal_tracker.db',
+    'token.json',
+    'permissions.json',
+    'external_apis.json'
+]
 
 class IntrusionDetectionSystem:
     
@@ -14,34 +21,19 @@ class IntrusionDetectionSystem:
         self.baseline_hashes = {}
         self.alert_threshold = 3
         self.monitoring_thread = None
+        self.integrity = file_integrity.IntegrityChecker()
         
     def create_file_baseline(self):
         """Crear línea base de archivos críticos"""
         try:
-            critical_files = [
-                'mal_tracker.db',
-                'token.json',
-                'permissions.json',
-                'external_apis.json',
-                'social_data.json'
-            ]
-            
             baseline = {}
             
-            for filename in critical_files:
+            for filename in CRITICAL_FILES:
                 filepath = os.path.join(TOKEN_PATH, filename)
                 if os.path.exists(filepath):
-                    # Calcular hash del archivo
-                    file_hash = self.calculate_file_hash(filepath)
-                    file_size = os.path.getsize(filepath)
-                    file_mtime = os.path.getmtime(filepath)
-                    
-                    baseline[filename] = {
-                        'hash': file_hash,
-                        'size': file_size,
-                        'mtime': file_mtime,
-                        'last_check': time.time()
-                    }
+                    # Hash, stat y (en SQLite) sumas por página
+                    baseline[filename] = file_integrity.fingerprint(filepath)
+                    baseline[filename]['last_check'] = time.time()
             
             # Guardar línea base
             baseline_file = os.path.join(TOKEN_PATH, '.file_baseline')
@@ -60,11 +52,7 @@ class IntrusionDetectionSystem:
     def calculate_file_hash(self, filepath):
         """Calcular hash SHA-256 de archivo"""
         try:
-            hash_sha256 = hashlib.sha256()
-            with open(filepath, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_sha256.update(chunk)
-            return hash_sha256.hexdigest()
+            return file_integrity.hash_file(filepath)
             
         except Exception as e:
             xbmc.log(f'IDS: Hash calculation error - {str(e)}', xbmc.LOGERROR)
@@ -81,7 +69,9 @@ class IntrusionDetectionSystem:
             for filename, baseline_info in self.baseline_hashes.items():
                 filepath = os.path.join(TOKEN_PATH, filename)
                 
-                if not os.path.exists(filepath):
+                # Verificar cambios (sin leer el archivo si el stat no cambió)
+                current = self.integrity.check(filepath, baseline_info)
+                if current is None:
                     alerts.append({
                         'type': 'file_deleted',
                         'file': filename,
@@ -90,21 +80,22 @@ class IntrusionDetectionSystem:
                     })
                     continue
                 
-                # Verificar cambios
-                current_hash = self.calculate_file_hash(filepath)
-                current_size = os.path.getsize(filepath)
-                current_mtime = os.path.getmtime(filepath)
+                current_hash = current['hash']
+                current_size = current['size']
                 
                 # Comparar con línea base
                 if current_hash != baseline_info['hash']:
-                    alerts.append({
+                    alert = {
                         'type': 'file_modified',
                         'file': filename,
                         'severity': 'high',
                         'old_hash': baseline_info['hash'],
                         'new_hash': current_hash,
                         'timestamp': time.time()
-                    })
+                    }
+                    if 'pages' in baseline_info and 'pages' in current:
+                        alert['changed_pages'] = len(file_integrity.changed_pages(baseline_info['pages'], current['pages']))
+                    alerts.append(alert)
                 
                 if current_size != baseline_info['size']:
                     alerts.append({
@@ -129,24 +120,15 @@ class IntrusionDetectionSystem:
     def monitor_access_patterns(self):
         """Monitorear patrones de acceso sospechosos"""
         try:
-            # Cargar log de auditoría
-            audit_file = os.path.join(TOKEN_PATH, 'audit_log.json')
-            
-            if not os.path.exists(audit_file):
-                return []
-            
-            with open(audit_file, 'r') as f:
-                audit_log = json.load(f)
+            from . import audit_log
             
             # Analizar patrones sospechosos
             alerts = []
             current_time = time.time()
             
-            # Verificar accesos frecuentes (más de 10 en 1 minuto)
-            recent_actions = [
-                entry for entry in audit_log 
-                if current_time - entry['timestamp'] < 60
-            ]
+            # Verificar accesos frecuentes (más de 10 en 1 minuto); solo se lee
+            # el último minuto del log, por rango de fecha
+            recent_actions = list(audit_log.iter_entries(since=current_time - 60))
             
             if len(recent_actions) > 10:
                 alerts.append({
@@ -355,23 +337,27 @@ class IntrusionDetectionSystem:
             xbmc.log(f'IDS: Start monitoring error - {str(e)}', xbmc.LOGERROR)
             return False, f"Error: {str(e)}"
     
+    def run_cycle(self):
+        """Un ciclo de detección (lo ejecuta el servicio en segundo plano)"""
+        # Monitorear integridad de archivos
+        file_alerts = self.monitor_file_integrity()
+        
+        # Monitorear patrones de acceso
+        access_alerts = self.monitor_access_patterns()
+        
+        # Detectar comportamiento anómalo
+        anomaly_alerts = self.detect_anomalous_behavior()
+        
+        # Procesar todas las alertas
+        all_alerts = file_alerts + access_alerts + anomaly_alerts
+        if all_alerts:
+            self.process_security_alerts(all_alerts)
+    
     def monitoring_loop(self):
         """Bucle principal de monitoreo"""
         while self.monitoring:
             try:
-                # Monitorear integridad de archivos
-                file_alerts = self.monitor_file_integrity()
-                
-                # Monitorear patrones de acceso
-                access_alerts = self.monitor_access_patterns()
-                
-                # Detectar comportamiento anómalo
-                anomaly_alerts = self.detect_anomalous_behavior()
-                
-                # Procesar todas las alertas
-                all_alerts = file_alerts + access_alerts + anomaly_alerts
-                if all_alerts:
-                    self.process_security_alerts(all_alerts)
+                self.run_cycle()
                 
                 # Esperar antes del siguiente ciclo
                 time.sleep(30)  # Verificar cada 30 segundos
@@ -409,6 +395,13 @@ class IntrusionDetectionSystem:
             if os.path.exists(baseline_file):
                 with open(baseline_file, 'r') as f:
                     self.baseline_hashes = json.load(f)
+                
+                # Líneas base antiguas (sin huella de stat o con archivos que ya no
+                # existen, como los JSON pasados al almacén de estado): se regeneran
+                if any('stat' not in info or filename not in CRITICAL_FILES
+                       for filename, info in self.baseline_hashes.items()):
+                    xbmc.log('IDS: Upgrading file baseline to stat fingerprints', xbmc.LOGINFO)
+                    return self.create_file_baseline()
                 return True
         except Exception as e:
             xbmc.log(f'IDS: Load baseline error - {str(e)}', xbmc.LOGERROR)
@@ -431,11 +424,16 @@ def show_ids_menu():
     selected = xbmcgui.Dialog().select('Sistema de Detección de Intrusiones:', options)
     
     if selected == 0:
-        success, message = ids.start_monitoring()
-        xbmcgui.Dialog().notification('IDS', message)
+        # El monitoreo continuo lo ejecuta el servicio en segundo plano
+        from .background_service import set_task_enabled
+        if not ids.baseline_hashes:
+            ids.create_file_baseline()
+        set_task_enabled('ids', True)
+        xbmcgui.Dialog().notification('IDS', 'Monitoreo iniciado')
     elif selected == 1:
-        success, message = ids.stop_monitoring()
-        xbmcgui.Dialog().notification('IDS', message)
+        from .background_service import set_task_enabled
+        set_task_enabled('ids', False)
+        xbmcgui.Dialog().notification('IDS', 'Monitoreo detenido')
     elif selected == 2:
         show_security_alerts()
     elif selected == 3:
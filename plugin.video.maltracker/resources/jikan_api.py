@@ -1,23 +1,22 @@
 import requests
 import xbmc
-import time
+from . import response_cache
 
 class JikanAPI:
     BASE_URL = "https://api.jikan.moe/v4"
     
     @staticmethod
-    def _request(endpoint, params=None):
-        """Hacer petición a Jikan API con rate limiting"""
+    def _request(endpoint, params=None, stale_ok=False):
+        """Hacer petición a Jikan API con rate limiting y caché en disco
+        
+        stale_ok: servir la copia caducada al momento y revalidar en segundo plano
+        """
         try:
-            time.sleep(0.5)  # Rate limit: 2 requests per second
             url = f"{JikanAPI.BASE_URL}/{endpoint}"
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                xbmc.log(f'Jikan API Error: {response.status_code}', xbmc.LOGERROR)
-                return None
+            return response_cache.get_json(url, params=params, stale_ok=stale_ok)
+        except requests.HTTPError as e:
+            xbmc.log(f'Jikan API Error: {e.response.status_code}', xbmc.LOGERROR)
+            return None
         except Exception as e:
             xbmc.log(f'Jikan API Exception: {str(e)}', xbmc.LOGERROR)
             return None
@@ -75,16 +74,16 @@ class JikanAPI:
     
     # TOP ANIME
     @staticmethod
-    def get_top_anime(type="all", filter="all", page=1):
+    def get_top_anime(type="all", filter="all", page=1, stale_ok=False):
         """Obtener top anime"""
         params = {"type": type, "filter": filter, "page": page}
-        return JikanAPI._request("top/anime", params)
+        return JikanAPI._request("top/anime", params, stale_ok=stale_ok)
     
     # SEASONAL ANIME
     @staticmethod
-    def get_current_season():
+    def get_current_season(stale_ok=False):
         """Obtener anime de temporada actual"""
-        return JikanAPI._request("seasons/now")
+        return JikanAPI._request("seasons/now", stale_ok=stale_ok)
     
     @staticmethod
     def get_season(year, season):
@@ -1,6 +1,6 @@
-import requests
 import xbmc
-import time
+from concurrent.futures import ThreadPoolExecutor
+from . import response_cache
 
 class JikanComplete:
     BASE_URL = "https://api.jikan.moe/v4"
@@ -8,10 +8,8 @@ class JikanComplete:
     @staticmethod
     def _request(endpoint, params=None):
         try:
-            time.sleep(0.5)  # Rate limit
             url = f"{JikanComplete.BASE_URL}/{endpoint}"
-            response = requests.get(url, params=params, timeout=10)
-            return response.json() if response.status_code == 200 else None
+            return response_cache.get_json(url, params=params)
         except:
             return None
     
@@ -92,6 +90,31 @@ class JikanComplete:
     def get_anime_streaming(anime_id):
         return JikanComplete._request(f"anime/{anime_id}/streaming")
     
+    # ANIME - Detalle agregado
+    ANIME_DETAIL_SECTIONS = ('full', 'characters', 'staff', 'episodes', 'news', 'pictures',
+                             'statistics', 'recommendations', 'relations')
+    
+    @staticmethod
+    def get_anime_aggregate(anime_id, sections=None, max_workers=4):
+        """Obtener varios sub-endpoints del anime en paralelo
+        
+        Las peticiones salen concurrentes pero respetan el limitador del host.
+        Devuelve {'mal_id': id, '<sección>': data o None}
+        """
+        sections = sections or JikanComplete.ANIME_DETAIL_SECTIONS
+        result = {'mal_id': anime_id}
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                name: executor.submit(getattr(JikanComplete, f'get_anime_{name}'), anime_id)
+                for name in sections
+            }
+            for name, future in futures.items():
+                response = future.result()
+                result[name] = response.get('data') if isinstance(response, dict) else None
+        
+        return result
+    
     # CHARACTERS - Completo
     @staticmethod
     def get_character_full(character_id):
@@ -9,14 +9,8 @@ class JikanTranslated:
         """Buscar anime con traducción"""
         result = JikanComplete.search_anime(query, limit)
         if result and 'data' in result:
-            for anime in result['data']:
-                # Traducir campos principales
-                if 'status' in anime:
-                    anime['status_es'] = SimpleTranslator.translate_text(anime['status'])
-                if 'type' in anime:
-                    anime['type_es'] = SimpleTranslator.translate_text(anime['type'])
-                if 'genres' in anime:
-                    anime['genres_es'] = SimpleTranslator.translate_genres(anime['genres'])
+            # Traducir campos principales de toda la página
+            SimpleTranslator.translate_records(result['data'])
         return result
     
     @staticmethod
@@ -52,11 +46,7 @@ class JikanTranslated:
         """Top anime con traducción"""
         result = JikanComplete.get_top_anime(type, filter, None, None, page, limit)
         if result and 'data' in result:
-            for anime in result['data']:
-                anime['status_es'] = SimpleTranslator.translate_text(anime.get('status', ''))
-                anime['type_es'] = SimpleTranslator.translate_text(anime.get('type', ''))
-                if 'genres' in anime:
-                    anime['genres_es'] = SimpleTranslator.translate_genres(anime['genres'])
+            SimpleTranslator.translate_records(result['data'])
         return result
     
     @staticmethod
@@ -68,11 +58,7 @@ class JikanTranslated:
             result = JikanComplete.get_season_now()
             
         if result and 'data' in result:
-            for anime in result['data']:
-                anime['status_es'] = SimpleTranslator.translate_text(anime.get('status', ''))
-                anime['type_es'] = SimpleTranslator.translate_text(anime.get('type', ''))
-                if 'genres' in anime:
-                    anime['genres_es'] = SimpleTranslator.translate_genres(anime['genres'])
+            SimpleTranslator.translate_records(result['data'])
         return result
     
     @staticmethod
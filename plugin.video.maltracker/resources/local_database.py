@@ -1,7 +1,11 @@
 import sqlite3
 import json
+import re
 import os
 import time
+import atexit
+import threading
+import contextlib
 import xbmc
 import xbmcvfs
 from .config import TOKEN_PATH
@@ -9,74 +13,404 @@ from .config import TOKEN_PATH
 # Ruta de la base de datos local
 DB_PATH = os.path.join(TOKEN_PATH, 'mal_tracker.db')
 
+# Conexión única por proceso
+_connection = None
+_connection_lock = threading.RLock()
+_transaction_depth = 0
+
+def get_connection():
+    """Obtener la conexión persistente (WAL, synchronous=NORMAL)"""
+    global _connection
+    
+    with _connection_lock:
+        if _connection is None:
+            conn = sqlite3.connect(DB_PATH, timeout=10, check_same_thread=False, cached_statements=256)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA cache_size=-8000')
+            conn.execute('PRAGMA mmap_size=67108864')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            _connection = conn
+        return _connection
+
+@contextlib.contextmanager
+def transaction():
+    """Transacción sobre la conexión compartida
+    
+    Devuelve un cursor; confirma al salir del bloque más externo y
+    deshace los cambios si se produce una excepción. Se puede anidar.
+    """
+    global _transaction_depth
+    
+    with _connection_lock:
+        conn = get_connection()
+        cursor = conn.cursor()
+        _transaction_depth += 1
+        try:
+            yield cursor
+        except Exception:
+            _transaction_depth -= 1
+            if _transaction_depth == 0:
+                conn.rollback()
+            raise
+        else:
+            _transaction_depth -= 1
+            if _transaction_depth == 0:
+                conn.commit()
+        finally:
+            cursor.close()
+
+def transaction_depth():
+    """Nivel de anidamiento de transaction() en este proceso (0 = fuera)"""
+    return _transaction_depth
+
+def checkpoint():
+    """Volcar el WAL al fichero principal (antes de copiar la base de datos)"""
+    try:
+        with _connection_lock:
+            get_connection().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    except Exception as e:
+        xbmc.log(f'MAL Tracker: Checkpoint error - {str(e)}', xbmc.LOGWARNING)
+
+def backup_to(path):
+    """Copia consistente de la base de datos (API de backup en línea de SQLite)"""
+    with _connection_lock:
+        target = sqlite3.connect(path)
+        try:
+            get_connection().backup(target)
+        finally:
+            target.close()
+
+def restore_from(path):
+    """Sustituir el contenido de la base de datos por el de otra copia
+    
+    Usa la API de backup en línea sobre la conexión compartida: todas las
+    páginas se copian en una sola transacción de escritura, así que los demás
+    procesos (el servicio) ven la base restaurada en su siguiente lectura en
+    lugar de seguir escribiendo en un archivo reemplazado
+    """
+    with _connection_lock:
+        source = sqlite3.connect(path)
+        try:
+            source.backup(get_connection())
+        finally:
+            source.close()
+
+def close_connection():
+    """Cerrar la conexión compartida (antes de reemplazar el fichero)"""
+    global _connection
+    
+    with _connection_lock:
+        if _connection is not None:
+            try:
+                _connection.close()
+            except Exception:
+                pass
+            _connection = None
+
+atexit.register(close_connection)
+
+# Migraciones de esquema: se aplican en orden y una sola vez (tabla schema_version)
+def _migration_indexes(cursor):
+    """Índices para los filtros y ordenaciones habituales"""
+    indexes = [
+        'CREATE INDEX IF NOT EXISTS idx_anime_status_updated ON anime_list(status, updated_date)',
+        'CREATE INDEX IF NOT EXISTS idx_anime_status_score ON anime_list(status, score)',
+        'CREATE INDEX IF NOT EXISTS idx_anime_updated ON anime_list(updated_date)',
+        'CREATE INDEX IF NOT EXISTS idx_anime_added ON anime_list(added_date)',
+        'CREATE INDEX IF NOT EXISTS idx_anime_synced ON anime_list(synced)',
+        'CREATE INDEX IF NOT EXISTS idx_anime_score ON anime_list(score)',
+        'CREATE INDEX IF NOT EXISTS idx_anime_year ON anime_list(year)',
+        'CREATE INDEX IF NOT EXISTS idx_anime_total_episodes ON anime_list(total_episodes)',
+        'CREATE INDEX IF NOT EXISTS idx_activity_timestamp ON activity_log(timestamp)'
+    ]
+    for index_sql in indexes:
+        cursor.execute(index_sql)
+
+def _migration_relations(cursor):
+    """Normalizar géneros y estudios en tablas de relación"""
+    for table, column in (('anime_genres', 'genre'), ('anime_studios', 'studio')):
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                {column} TEXT NOT NULL,
+                mal_id INTEGER NOT NULL,
+                PRIMARY KEY ({column}, mal_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_mal_id ON {table}(mal_id)')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_anime_list_delete_relations
+        AFTER DELETE ON anime_list
+        BEGIN
+            DELETE FROM anime_genres WHERE mal_id = OLD.mal_id;
+            DELETE FROM anime_studios WHERE mal_id = OLD.mal_id;
+        END
+    ''')
+    
+    # Migrar datos existentes desde las columnas JSON
+    cursor.execute('SELECT mal_id, genres, studios FROM anime_list WHERE mal_id IS NOT NULL')
+    for mal_id, genres, studios in cursor.fetchall():
+        try:
+            _store_relations(cursor, mal_id, json.loads(genres) if genres else [], json.loads(studios) if studios else [])
+        except ValueError:
+            continue
+
+def _migration_sync_queue(cursor):
+    """Cola persistente de cambios locales pendientes de subir"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_queue (
+            mal_id INTEGER PRIMARY KEY,
+            revision INTEGER NOT NULL DEFAULT 1,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            queued_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sync_queue_next ON sync_queue(next_attempt)')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_anime_list_delete_queue
+        AFTER DELETE ON anime_list
+        BEGIN
+            DELETE FROM sync_queue WHERE mal_id = OLD.mal_id;
+        END
+    ''')
+    
+    # Encolar los cambios pendientes anteriores a la cola
+    cursor.execute('''
+        INSERT OR IGNORE INTO sync_queue (mal_id)
+        SELECT mal_id FROM anime_list WHERE synced = 0 AND mal_id IS NOT NULL
+    ''')
+
+# Columnas indexadas para búsqueda de texto completo
+SEARCH_COLUMNS = ('title', 'alternative_titles', 'synopsis', 'genres', 'studios')
+# Pesos bm25 por columna (el título pesa más que la sinopsis)
+SEARCH_WEIGHTS = (10.0, 8.0, 1.0, 3.0, 2.0)
+
+def _migration_search_index(cursor):
+    """Índice FTS5 sobre anime_list, mantenido por triggers"""
+    cursor.execute('PRAGMA table_info(anime_list)')
+    if 'alternative_titles' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE anime_list ADD COLUMN alternative_titles TEXT')
+    
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+    old_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+    
+    # remove_diacritics 2 requiere SQLite 3.27; las versiones anteriores usan 1
+    for tokenizer in ('unicode61 remove_diacritics 2', 'unicode61 remove_diacritics 1'):
+        try:
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS anime_search USING fts5(
+                    {columns},
+                    content='anime_list', content_rowid='id',
+                    tokenize='{tokenizer}'
+                )
+            ''')
+            break
+        except sqlite3.OperationalError as e:
+            error = e
+    else:
+        # SQLite sin FTS5: la búsqueda local usa LIKE
+        xbmc.log(f'MAL Tracker: Full-text search unavailable - {str(error)}', xbmc.LOGWARNING)
+        return
+    
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_anime_search_insert AFTER INSERT ON anime_list BEGIN
+            INSERT INTO anime_search (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_anime_search_delete AFTER DELETE ON anime_list BEGIN
+            INSERT INTO anime_search (anime_search, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_anime_search_update AFTER UPDATE OF {columns} ON anime_list BEGIN
+            INSERT INTO anime_search (anime_search, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO anime_search (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+    cursor.execute("INSERT INTO anime_search (anime_search) VALUES ('rebuild')")
+
+def _migration_catalog(cursor):
+    """Catálogo local de metadatos de anime para recomendaciones sin red"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS anime_catalog (
+            mal_id INTEGER PRIMARY KEY,
+            title TEXT,
+            data TEXT NOT NULL,
+            score REAL,
+            popularity INTEGER,
+            year INTEGER,
+            source TEXT,
+            updated_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_catalog_updated ON anime_catalog(updated_at)')
+
+def _migration_state(cursor):
+    """Almacén de estado por espacios de nombres (sustituye a los JSON sueltos)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS state (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        )
+    ''')
+
+def _migration_action_limits(cursor):
+    """Contadores de intentos por acción (sustituyen a rate_limits en state)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS action_limits (
+            action TEXT NOT NULL,
+            window_size INTEGER NOT NULL,
+            window_start INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (action, window_size, window_start)
+        )
+    ''')
+    cursor.execute("DELETE FROM state WHERE namespace = 'rate_limits'")
+
+def _migration_watch_time_index(cursor):
+    """Índice de episodios vistos: el total de analytics lee el índice y no las filas"""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_anime_episodes_watched ON anime_list(episodes_watched)')
+
+def _migration_catalog_matrix(cursor):
+    """Matriz de recomendaciones del catálogo, compilada por el servicio"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_matrix (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            signature TEXT NOT NULL,
+            data TEXT NOT NULL,
+            item_ids BLOB NOT NULL,
+            entry_rows BLOB NOT NULL,
+            entry_cols BLOB NOT NULL,
+            entry_values BLOB NOT NULL,
+            norms BLOB NOT NULL,
+            quality BLOB NOT NULL,
+            built_at REAL NOT NULL
+        )
+    ''')
+
+MIGRATIONS = [
+    _migration_indexes,
+    _migration_relations,
+    _migration_sync_queue,
+    _migration_search_index,
+    _migration_catalog,
+    _migration_state,
+    _migration_action_limits,
+    _migration_watch_time_index,
+    _migration_catalog_matrix
+]
+
+def run_migrations(cursor):
+    """Aplicar las migraciones pendientes"""
+    cursor.execute('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)')
+    cursor.execute('SELECT MAX(version) FROM schema_version')
+    current = cursor.fetchone()[0] or 0
+    
+    for version, migration in enumerate(MIGRATIONS, 1):
+        if version > current:
+            migration(cursor)
+            cursor.execute('INSERT INTO schema_version (version) VALUES (?)', (version,))
+            xbmc.log(f'MAL Tracker: Applied schema migration {version} ({migration.__name__})', xbmc.LOGINFO)
+    
+    return len(MIGRATIONS)
+
+def _store_relations(cursor, mal_id, genres, studios):
+    """Reescribir géneros y estudios de un anime en las tablas de relación"""
+    cursor.execute('DELETE FROM anime_genres WHERE mal_id = ?', (mal_id,))
+    cursor.execute('DELETE FROM anime_studios WHERE mal_id = ?', (mal_id,))
+    cursor.executemany('INSERT OR IGNORE INTO anime_genres (genre, mal_id) VALUES (?, ?)',
+                       [(genre, mal_id) for genre in genres if genre])
+    cursor.executemany('INSERT OR IGNORE INTO anime_studios (studio, mal_id) VALUES (?, ?)',
+                       [(studio, mal_id) for studio in studios if studio])
+
+def _queue_upload(cursor, mal_id):
+    """Encolar la subida del estado de un anime
+    
+    Una sola entrada por anime: las ediciones repetidas solo suben la
+    revisión y se sube el estado final al vaciar la cola
+    """
+    cursor.execute('INSERT OR IGNORE INTO sync_queue (mal_id, revision) VALUES (?, 0)', (mal_id,))
+    cursor.execute('''
+        UPDATE sync_queue
+        SET revision = revision + 1, attempts = 0, next_attempt = 0, last_error = NULL
+        WHERE mal_id = ?
+    ''', (mal_id,))
+
 def init_database():
     """Inicializar base de datos local"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Tabla de anime local
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS anime_list (
-                id INTEGER PRIMARY KEY,
-                mal_id INTEGER UNIQUE,
-                title TEXT NOT NULL,
-                status TEXT DEFAULT 'plan_to_watch',
-                episodes_watched INTEGER DEFAULT 0,
-                total_episodes INTEGER DEFAULT 0,
-                score INTEGER DEFAULT 0,
-                start_date TEXT,
-                finish_date TEXT,
-                notes TEXT,
-                image_url TEXT,
-                synopsis TEXT,
-                genres TEXT,
-                studios TEXT,
-                year INTEGER,
-                season TEXT,
-                rating REAL,
-                rank INTEGER,
-                popularity INTEGER,
-                added_date TEXT DEFAULT CURRENT_TIMESTAMP,
-                updated_date TEXT DEFAULT CURRENT_TIMESTAMP,
-                synced INTEGER DEFAULT 0
-            )
-        ''')
-        
-        # Tabla de configuración local
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS local_config (
-                key TEXT PRIMARY KEY,
-                value TEXT,
-                updated_date TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabla de estadísticas locales
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_stats (
-                stat_name TEXT PRIMARY KEY,
-                stat_value TEXT,
-                updated_date TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabla de historial de actividad
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS activity_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                action TEXT NOT NULL,
-                anime_id INTEGER,
-                anime_title TEXT,
-                old_value TEXT,
-                new_value TEXT,
-                timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
-                synced INTEGER DEFAULT 0
-            )
-        ''')
+        with transaction() as cursor:
+            # Tabla de anime local
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS anime_list (
+                    id INTEGER PRIMARY KEY,
+                    mal_id INTEGER UNIQUE,
+                    title TEXT NOT NULL,
+                    status TEXT DEFAULT 'plan_to_watch',
+                    episodes_watched INTEGER DEFAULT 0,
+                    total_episodes INTEGER DEFAULT 0,
+                    score INTEGER DEFAULT 0,
+                    start_date TEXT,
+                    finish_date TEXT,
+                    notes TEXT,
+                    image_url TEXT,
+                    synopsis TEXT,
+                    genres TEXT,
+                    studios TEXT,
+                    year INTEGER,
+                    season TEXT,
+                    rating REAL,
+                    rank INTEGER,
+                    popularity INTEGER,
+                    added_date TEXT DEFAULT CURRENT_TIMESTAMP,
+                    updated_date TEXT DEFAULT CURRENT_TIMESTAMP,
+                    synced INTEGER DEFAULT 0
+                )
+            ''')
+            
+            # Tabla de configuración local
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS local_config (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    updated_date TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Tabla de estadísticas locales
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS user_stats (
+                    stat_name TEXT PRIMARY KEY,
+                    stat_value TEXT,
+                    updated_date TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Tabla de historial de actividad
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS activity_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    action TEXT NOT NULL,
+                    anime_id INTEGER,
+                    anime_title TEXT,
+                    old_value TEXT,
+                    new_value TEXT,
+                    timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+                    synced INTEGER DEFAULT 0
+                )
+            ''')
+            
+            # Índices y tablas normalizadas
+            run_migrations(cursor)
         
-        conn.commit()
-        conn.close()
         xbmc.log('MAL Tracker: Database initialized successfully', xbmc.LOGINFO)
         return True
         
@@ -91,33 +425,39 @@ def add_anime_to_list(anime_data, status='plan_to_watch'):
         if not anime_data or not isinstance(anime_data, dict):
             raise ValueError("Invalid anime_data")
         
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO anime_list 
-            (mal_id, title, status, total_episodes, image_url, synopsis, genres, studios, year, rating, rank, popularity)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            anime_data.get('mal_id'),
-            anime_data.get('title'),
-            status,
-            anime_data.get('episodes', 0),
-            anime_data.get('images', {}).get('jpg', {}).get('image_url'),
-            anime_data.get('synopsis'),
-            json.dumps([g.get('name') for g in anime_data.get('genres', [])]),
-            json.dumps([s.get('name') for s in anime_data.get('studios', [])]),
-            anime_data.get('year'),
-            anime_data.get('score'),
-            anime_data.get('rank'),
-            anime_data.get('popularity')
-        ))
-        
-        # Log de actividad
-        log_activity('add_anime', anime_data.get('mal_id'), anime_data.get('title'), None, status)
+        genres = [g.get('name') for g in anime_data.get('genres', [])]
+        studios = [s.get('name') for s in anime_data.get('studios', [])]
+        
+        with transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO anime_list 
+                (mal_id, title, status, total_episodes, image_url, synopsis, genres, studios, year, rating, rank, popularity)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(mal_id) DO UPDATE SET
+                    title = excluded.title, status = excluded.status, total_episodes = excluded.total_episodes,
+                    image_url = excluded.image_url, synopsis = excluded.synopsis, genres = excluded.genres,
+                    studios = excluded.studios, year = excluded.year, rating = excluded.rating,
+                    rank = excluded.rank, popularity = excluded.popularity,
+                    updated_date = CURRENT_TIMESTAMP
+            ''', (
+                anime_data.get('mal_id'),
+                anime_data.get('title'),
+                status,
+                anime_data.get('episodes', 0),
+                anime_data.get('images', {}).get('jpg', {}).get('image_url'),
+                anime_data.get('synopsis'),
+                json.dumps(genres),
+                json.dumps(studios),
+                anime_data.get('year'),
+                anime_data.get('score'),
+                anime_data.get('rank'),
+                anime_data.get('popularity')
+            ))
+            _store_relations(cursor, anime_data.get('mal_id'), genres, studios)
+            
+            # Log de actividad
+            log_activity('add_anime', anime_data.get('mal_id'), anime_data.get('title'), None, status)
         
-        conn.commit()
-        conn.close()
         return True
         
     except Exception as e:
@@ -127,123 +467,314 @@ def add_anime_to_list(anime_data, status='plan_to_watch'):
 def update_anime_status(mal_id, status, episodes_watched=None, score=None):
     """Actualizar estado de anime local"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Obtener valores actuales
-        cursor.execute('SELECT status, episodes_watched, score FROM anime_list WHERE mal_id = ?', (mal_id,))
-        current = cursor.fetchone()
-        
-        if not current:
-            return False
+        with transaction() as cursor:
+            # Obtener valores actuales
+            cursor.execute('SELECT status, episodes_watched, score FROM anime_list WHERE mal_id = ?', (mal_id,))
+            current = cursor.fetchone()
             
-        old_status, old_episodes, old_score = current
-        
-        # Actualizar valores
-        updates = []
-        params = []
-        
-        if status:
-            updates.append('status = ?')
-            params.append(status)
+            if not current:
+                return False
+                
+            old_status, old_episodes, old_score = current
             
-        if episodes_watched is not None:
-            updates.append('episodes_watched = ?')
-            params.append(episodes_watched)
+            # Actualizar valores
+            updates = []
+            params = []
             
-        if score is not None:
-            updates.append('score = ?')
-            params.append(score)
+            if status:
+                updates.append('status = ?')
+                params.append(status)
+                
+            if episodes_watched is not None:
+                updates.append('episodes_watched = ?')
+                params.append(episodes_watched)
+                
+            if score is not None:
+                updates.append('score = ?')
+                params.append(score)
+                
+            updates.append('updated_date = CURRENT_TIMESTAMP')
+            updates.append('synced = 0')
             
-        updates.append('updated_date = CURRENT_TIMESTAMP')
-        updates.append('synced = 0')
-        
-        params.append(mal_id)
-        
-        cursor.execute(f'''
-            UPDATE anime_list 
-            SET {', '.join(updates)}
-            WHERE mal_id = ?
-        ''', params)
-        
-        # Log de actividad
-        if status != old_status:
-            log_activity('update_status', mal_id, None, old_status, status)
-        if episodes_watched and episodes_watched != old_episodes:
-            log_activity('update_episodes', mal_id, None, str(old_episodes), str(episodes_watched))
-        if score and score != old_score:
-            log_activity('update_score', mal_id, None, str(old_score), str(score))
+            params.append(mal_id)
+            
+            cursor.execute(f'''
+                UPDATE anime_list 
+                SET {', '.join(updates)}
+                WHERE mal_id = ?
+            ''', params)
+            _queue_upload(cursor, mal_id)
+            
+            # Log de actividad
+            if status != old_status:
+                log_activity('update_status', mal_id, None, old_status, status)
+            if episodes_watched and episodes_watched != old_episodes:
+                log_activity('update_episodes', mal_id, None, str(old_episodes), str(episodes_watched))
+            if score and score != old_score:
+                log_activity('update_score', mal_id, None, str(old_score), str(score))
         
-        conn.commit()
-        conn.close()
         return True
         
     except Exception as e:
         xbmc.log(f'MAL Tracker: Update anime error - {str(e)}', xbmc.LOGERROR)
         return False
 
+# Campos de metadatos que se refrescan desde el servicio remoto
+_METADATA_FIELDS = ('title', 'alternative_titles', 'total_episodes', 'image_url', 'synopsis',
+                    'genres', 'studios', 'year', 'rating', 'rank', 'popularity')
+# Campos de lista del usuario
+_LIST_FIELDS = ('status', 'episodes_watched', 'score')
+# Tamaño de bloque para consultas IN (SQLite antiguo admite 999 parámetros)
+_LOOKUP_CHUNK = 500
+
+def bulk_upsert_anime(entries):
+    """Ingerir una lista (o una página) remota en una sola transacción
+    
+    entries: dicts con mal_id, title, alternative_titles, status,
+    episodes_watched, score, total_episodes, image_url, synopsis, genres/studios (listas de nombres),
+    year, rating, rank y popularity.
+    
+    Solo escribe las filas que cambian y solo registra actividad de los
+    cambios reales. Las ediciones locales pendientes (synced = 0) no se
+    sobrescriben con el estado remoto. Devuelve contadores.
+    """
+    counts = {'added': 0, 'updated': 0, 'unchanged': 0}
+    
+    with transaction() as cursor:
+        # Cargar solo las filas afectadas, en bloques por el límite de parámetros
+        mal_ids = [entry.get('mal_id') for entry in entries if entry.get('mal_id') is not None]
+        existing = {}
+        for start in range(0, len(mal_ids), _LOOKUP_CHUNK):
+            chunk = mal_ids[start:start + _LOOKUP_CHUNK]
+            cursor.execute(f'''
+                SELECT mal_id, synced, {', '.join(_LIST_FIELDS + _METADATA_FIELDS)}
+                FROM anime_list
+                WHERE mal_id IN ({', '.join('?' * len(chunk))})
+            ''', chunk)
+            for row in cursor.fetchall():
+                record = dict(zip(('mal_id', 'synced') + _LIST_FIELDS + _METADATA_FIELDS, row))
+                existing[record['mal_id']] = record
+        
+        inserts = []
+        updates = []
+        relations = []
+        activity = []
+        
+        for entry in entries:
+            mal_id = entry.get('mal_id')
+            if mal_id is None:
+                continue
+            
+            values = {field: entry.get(field) for field in _LIST_FIELDS + _METADATA_FIELDS}
+            values['status'] = values['status'] or 'plan_to_watch'
+            values['episodes_watched'] = values['episodes_watched'] or 0
+            values['score'] = values['score'] or 0
+            genres = values['genres'] or []
+            studios = values['studios'] or []
+            values['genres'] = json.dumps(genres)
+            values['studios'] = json.dumps(studios)
+            
+            current = existing.get(mal_id)
+            if current is None:
+                inserts.append((mal_id,) + tuple(values[field] for field in _LIST_FIELDS + _METADATA_FIELDS))
+                relations.append((mal_id, genres, studios))
+                activity.append(('add_anime', mal_id, values['title'], None, values['status']))
+                counts['added'] += 1
+                continue
+            
+            # Ediciones locales pendientes: conservar los campos de lista locales
+            if current['synced'] == 0:
+                for field in _LIST_FIELDS:
+                    values[field] = current[field]
+            
+            changed = [field for field in _LIST_FIELDS + _METADATA_FIELDS if values[field] != current[field]]
+            if not changed:
+                counts['unchanged'] += 1
+                continue
+            
+            updates.append(tuple(values[field] for field in _LIST_FIELDS + _METADATA_FIELDS) + (mal_id,))
+            if 'genres' in changed or 'studios' in changed:
+                relations.append((mal_id, genres, studios))
+            if 'status' in changed:
+                activity.append(('update_status', mal_id, values['title'], current['status'], values['status']))
+            if 'episodes_watched' in changed:
+                activity.append(('update_episodes', mal_id, values['title'], str(current['episodes_watched']), str(values['episodes_watched'])))
+            if 'score' in changed:
+                activity.append(('update_score', mal_id, values['title'], str(current['score']), str(values['score'])))
+            counts['updated'] += 1
+        
+        columns = _LIST_FIELDS + _METADATA_FIELDS
+        cursor.executemany(f'''
+            INSERT INTO anime_list (mal_id, {', '.join(columns)}, synced)
+            VALUES ({', '.join('?' * (len(columns) + 1))}, 1)
+        ''', inserts)
+        
+        # Las filas con ediciones locales pendientes siguen sin sincronizar
+        cursor.executemany(f'''
+            UPDATE anime_list
+            SET {', '.join(f'{field} = ?' for field in columns)},
+                updated_date = CURRENT_TIMESTAMP
+            WHERE mal_id = ?
+        ''', updates)
+        
+        for mal_id, genres, studios in relations:
+            _store_relations(cursor, mal_id, genres, studios)
+        
+        cursor.executemany('''
+            INSERT INTO activity_log (action, anime_id, anime_title, old_value, new_value)
+            VALUES (?, ?, ?, ?, ?)
+        ''', activity)
+    
+    return counts
+
+# Columnas que devuelve get_local_anime_list (por nombre, no por posición)
+_ANIME_COLUMNS = ('mal_id', 'title', 'status', 'episodes_watched', 'total_episodes', 'score',
+                  'image_url', 'synopsis', 'genres', 'studios', 'year', 'rating', 'synced')
+
+def _row_to_anime(row):
+    """Convertir una fila de _ANIME_COLUMNS a formato compatible"""
+    anime = dict(zip(_ANIME_COLUMNS, row))
+    anime['genres'] = json.loads(anime['genres']) if anime['genres'] else []
+    anime['studios'] = json.loads(anime['studios']) if anime['studios'] else []
+    return anime
+
 def get_local_anime_list(status=None):
     """Obtener lista local de anime"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        if status:
-            cursor.execute('SELECT * FROM anime_list WHERE status = ? ORDER BY updated_date DESC', (status,))
-        else:
-            cursor.execute('SELECT * FROM anime_list ORDER BY updated_date DESC')
-            
-        results = cursor.fetchall()
-        conn.close()
+        columns = ', '.join(_ANIME_COLUMNS)
+        with transaction() as cursor:
+            if status:
+                cursor.execute(f'SELECT {columns} FROM anime_list WHERE status = ? ORDER BY updated_date DESC', (status,))
+            else:
+                cursor.execute(f'SELECT {columns} FROM anime_list ORDER BY updated_date DESC')
+                
+            results = cursor.fetchall()
         
         # Convertir a formato compatible
-        anime_list = []
-        for row in results:
-            anime_list.append({
-                'mal_id': row[1],
-                'title': row[2],
-                'status': row[3],
-                'episodes_watched': row[4],
-                'total_episodes': row[5],
-                'score': row[6],
-                'image_url': row[9],
-                'synopsis': row[10],
-                'genres': json.loads(row[11]) if row[11] else [],
-                'studios': json.loads(row[12]) if row[12] else [],
-                'year': row[13],
-                'rating': row[15],
-                'synced': row[20]
-            })
-            
-        return anime_list
+        return [_row_to_anime(row) for row in results]
         
     except Exception as e:
         xbmc.log(f'MAL Tracker: Get list error - {str(e)}', xbmc.LOGERROR)
         return []
 
-def get_local_stats():
-    """Obtener estadísticas locales"""
+def get_local_anime(mal_id):
+    """Obtener un anime de la lista local por mal_id"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Estadísticas básicas
-        cursor.execute('SELECT COUNT(*) FROM anime_list')
-        total_anime = cursor.fetchone()[0]
+        columns = ', '.join(_ANIME_COLUMNS)
+        with transaction() as cursor:
+            cursor.execute(f'SELECT {columns} FROM anime_list WHERE mal_id = ?', (mal_id,))
+            row = cursor.fetchone()
         
-        cursor.execute('SELECT COUNT(*) FROM anime_list WHERE status = "completed"')
-        completed = cursor.fetchone()[0]
+        return _row_to_anime(row) if row else None
         
-        cursor.execute('SELECT COUNT(*) FROM anime_list WHERE status = "watching"')
-        watching = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT AVG(score) FROM anime_list WHERE score > 0')
-        avg_score = cursor.fetchone()[0] or 0
+    except Exception as e:
+        xbmc.log(f'MAL Tracker: Get anime error - {str(e)}', xbmc.LOGERROR)
+        return None
+
+def get_data_version():
+    """Marca barata de cambios en toda la base, sin recorrer tablas
+    
+    PRAGMA data_version cambia con los commits de otras conexiones y
+    total_changes con las escrituras de esta; las dos son por conexión.
+    """
+    with transaction() as cursor:
+        cursor.execute('PRAGMA data_version')
+        return id(cursor.connection), cursor.fetchone()[0], cursor.connection.total_changes
+
+def get_library_signature():
+    """Firma de la lista local: cambia al añadir, borrar o modificar filas"""
+    try:
+        with transaction() as cursor:
+            cursor.execute('SELECT COUNT(*), MAX(updated_date), MAX(id) FROM anime_list')
+            return cursor.fetchone()
+    except Exception as e:
+        xbmc.log(f'MAL Tracker: Get signature error - {str(e)}', xbmc.LOGERROR)
+        return None
+
+def get_title_aliases():
+    """Títulos y títulos alternativos de la lista local como (mal_id, título)"""
+    try:
+        with transaction() as cursor:
+            cursor.execute('SELECT mal_id, title, alternative_titles FROM anime_list')
+            rows = cursor.fetchall()
+        
+        aliases = []
+        for mal_id, title, alternative_titles in rows:
+            if title:
+                aliases.append((mal_id, title))
+            for alias in (alternative_titles or '').split('; '):
+                if alias:
+                    aliases.append((mal_id, alias))
+        return aliases
         
-        cursor.execute('SELECT SUM(episodes_watched) FROM anime_list')
-        total_episodes = cursor.fetchone()[0] or 0
+    except Exception as e:
+        xbmc.log(f'MAL Tracker: Get aliases error - {str(e)}', xbmc.LOGERROR)
+        return []
+
+def _build_search_query(text):
+    """Consulta FTS5 de prefijos: cada palabra se busca como "palabra"*"""
+    words = re.findall(r'\w+', text.lower())
+    return ' '.join(f'"{word}"*' for word in words)
+
+def search_local_anime(text, limit=50):
+    """Buscar en la lista local por título, títulos alternativos, sinopsis,
+    géneros y estudios
+    
+    Resultados ordenados por relevancia (bm25), por prefijo de palabra y sin
+    distinguir acentos. Sin FTS5 recurre a LIKE sobre títulos.
+    """
+    match = _build_search_query(text or '')
+    if not match:
+        return []
+    
+    columns = ', '.join(f'a.{column}' for column in _ANIME_COLUMNS)
+    weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+    try:
+        with transaction() as cursor:
+            try:
+                cursor.execute(f'''
+                    SELECT {columns}
+                    FROM anime_search s
+                    JOIN anime_list a ON a.id = s.rowid
+                    WHERE anime_search MATCH ?
+                    ORDER BY bm25(anime_search, {weights})
+                    LIMIT ?
+                ''', (match, limit))
+            except sqlite3.OperationalError:
+                pattern = f'%{text}%'
+                cursor.execute(f'''
+                    SELECT {columns} FROM anime_list a
+                    WHERE a.title LIKE ? OR a.alternative_titles LIKE ?
+                    ORDER BY a.title
+                    LIMIT ?
+                ''', (pattern, pattern, limit))
+            results = cursor.fetchall()
+        
+        return [_row_to_anime(row) for row in results]
         
-        conn.close()
+    except Exception as e:
+        xbmc.log(f'MAL Tracker: Local search error - {str(e)}', xbmc.LOGERROR)
+        return []
+
+def get_local_stats():
+    """Obtener estadísticas locales"""
+    try:
+        with transaction() as cursor:
+            # Estadísticas básicas
+            cursor.execute('SELECT COUNT(*) FROM anime_list')
+            total_anime = cursor.fetchone()[0]
+            
+            cursor.execute('SELECT COUNT(*) FROM anime_list WHERE status = "completed"')
+            completed = cursor.fetchone()[0]
+            
+            cursor.execute('SELECT COUNT(*) FROM anime_list WHERE status = "watching"')
+            watching = cursor.fetchone()[0]
+            
+            cursor.execute('SELECT AVG(score) FROM anime_list WHERE score > 0')
+            avg_score = cursor.fetchone()[0] or 0
+            
+            cursor.execute('SELECT SUM(episodes_watched) FROM anime_list')
+            total_episodes = cursor.fetchone()[0] or 0
         
         return {
             'total_anime': total_anime,
@@ -260,16 +791,11 @@ def get_local_stats():
 def log_activity(action, anime_id, anime_title, old_value, new_value):
     """Registrar actividad local"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO activity_log (action, anime_id, anime_title, old_value, new_value)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (action, anime_id, anime_title, old_value, new_value))
-        
-        conn.commit()
-        conn.close()
+        with transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO activity_log (action, anime_id, anime_title, old_value, new_value)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (action, anime_id, anime_title, old_value, new_value))
         
     except Exception as e:
         xbmc.log(f'MAL Tracker: Log activity error - {str(e)}', xbmc.LOGERROR)
@@ -277,43 +803,60 @@ def log_activity(action, anime_id, anime_title, old_value, new_value):
 def get_activity_log(limit=50):
     """Obtener historial de actividad"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT action, anime_title, old_value, new_value, timestamp 
-            FROM activity_log 
-            ORDER BY timestamp DESC 
-            LIMIT ?
-        ''', (limit,))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        return results
+        with transaction() as cursor:
+            cursor.execute('''
+                SELECT action, anime_title, old_value, new_value, timestamp 
+                FROM activity_log 
+                ORDER BY timestamp DESC 
+                LIMIT ?
+            ''', (limit,))
+            
+            return cursor.fetchall()
         
     except Exception as e:
         xbmc.log(f'MAL Tracker: Get activity error - {str(e)}', xbmc.LOGERROR)
         return []
 
-def remove_anime_from_list(mal_id):
-    """Eliminar anime de lista local"""
+def get_config_value(key, default=None):
+    """Leer un valor de local_config"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        with transaction() as cursor:
+            cursor.execute('SELECT value FROM local_config WHERE key = ?', (key,))
+            result = cursor.fetchone()
+        return result[0] if result else default
         
-        cursor.execute('SELECT title FROM anime_list WHERE mal_id = ?', (mal_id,))
-        result = cursor.fetchone()
+    except Exception as e:
+        xbmc.log(f'MAL Tracker: Get config error - {str(e)}', xbmc.LOGERROR)
+        return default
+
+def set_config_value(key, value):
+    """Guardar un valor en local_config"""
+    try:
+        with transaction() as cursor:
+            cursor.execute('''
+                INSERT OR REPLACE INTO local_config (key, value, updated_date)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+            ''', (key, str(value)))
+        return True
         
-        if result:
-            title = result[0]
-            cursor.execute('DELETE FROM anime_list WHERE mal_id = ?', (mal_id,))
-            log_activity('remove_anime', mal_id, title, 'in_list', 'removed')
+    except Exception as e:
+        xbmc.log(f'MAL Tracker: Set config error - {str(e)}', xbmc.LOGERROR)
+        return False
+
+def remove_anime_from_list(mal_id):
+    """Eliminar anime de lista local"""
+    try:
+        with transaction() as cursor:
+            cursor.execute('SELECT title FROM anime_list WHERE mal_id = ?', (mal_id,))
+            result = cursor.fetchone()
             
-        conn.commit()
-        conn.close()
+            if result:
+                title = result[0]
+                cursor.execute('DELETE FROM anime_list WHERE mal_id = ?', (mal_id,))
+                log_activity('remove_anime', mal_id, title, 'in_list', 'removed')
+        
         return True
         
     except Exception as e:
         xbmc.log(f'MAL Tracker: Remove anime error - {str(e)}', xbmc.LOGERROR)
-        return False
\ No newline at end of file
+        return False
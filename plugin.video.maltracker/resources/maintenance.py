@@ -1,5 +1,4 @@
 import os
-import sqlite3
 import json
 import time
 import xbmc
@@ -42,36 +41,31 @@ def repair_database():
         progress = xbmcgui.DialogProgress()
         progress.create('Reparando Base de Datos', 'Verificando estructura...')
         
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
+        with local_database.transaction() as cursor:
+            # Verificar y reparar estructura
+            progress.update(25, 'Verificando tablas...')
         
-        # Verificar y reparar estructura
-        progress.update(25, 'Verificando tablas...')
+            # Verificar tabla principal
+            cursor.execute("PRAGMA table_info(anime_list)")
+            columns = [col[1] for col in cursor.fetchall()]
         
-        # Verificar tabla principal
-        cursor.execute("PRAGMA table_info(anime_list)")
-        columns = [col[1] for col in cursor.fetchall()]
+            required_columns = ['mal_id', 'title', 'status', 'episodes_watched', 'synced']
+            missing_columns = [col for col in required_columns if col not in columns]
         
-        required_columns = ['mal_id', 'title', 'status', 'episodes_watched', 'synced']
-        missing_columns = [col for col in required_columns if col not in columns]
+            if missing_columns:
+                progress.update(50, 'Agregando columnas faltantes...')
+                for col in missing_columns:
+                    if col == 'synced':
+                        cursor.execute('ALTER TABLE anime_list ADD COLUMN synced INTEGER DEFAULT 0')
         
-        if missing_columns:
-            progress.update(50, 'Agregando columnas faltantes...')
-            for col in missing_columns:
-                if col == 'synced':
-                    cursor.execute('ALTER TABLE anime_list ADD COLUMN synced INTEGER DEFAULT 0')
+            # Limpiar datos corruptos
+            progress.update(75, 'Limpiando datos corruptos...')
+            cursor.execute('DELETE FROM anime_list WHERE mal_id IS NULL OR title IS NULL')
         
-        # Limpiar datos corruptos
-        progress.update(75, 'Limpiando datos corruptos...')
-        cursor.execute('DELETE FROM anime_list WHERE mal_id IS NULL OR title IS NULL')
-        
-        # Verificar integridad
-        progress.update(90, 'Verificando integridad...')
-        cursor.execute('PRAGMA integrity_check')
-        integrity_result = cursor.fetchone()[0]
-        
-        conn.commit()
-        conn.close()
+            # Verificar integridad
+            progress.update(90, 'Verificando integridad...')
+            cursor.execute('PRAGMA integrity_check')
+            integrity_result = cursor.fetchone()[0]
         
         progress.update(100, 'Reparación completada')
         progress.close()
@@ -90,29 +84,24 @@ def repair_database():
 def clean_orphaned_data():
     """Limpiar datos huérfanos"""
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        # Limpiar registros duplicados
-        cursor.execute('''
-            DELETE FROM anime_list 
-            WHERE rowid NOT IN (
-                SELECT MIN(rowid) 
-                FROM anime_list 
-                GROUP BY mal_id
-            )
-        ''')
-        duplicates_removed = cursor.rowcount
-        
-        # Limpiar registros con datos inválidos
-        cursor.execute('DELETE FROM anime_list WHERE episodes_watched < 0')
-        invalid_episodes = cursor.rowcount
-        
-        cursor.execute('DELETE FROM anime_list WHERE score < 0 OR score > 10')
-        invalid_scores = cursor.rowcount
-        
-        conn.commit()
-        conn.close()
+        with local_database.transaction() as cursor:
+            # Limpiar registros duplicados
+            cursor.execute('''
+                DELETE FROM anime_list 
+                WHERE rowid NOT IN (
+                    SELECT MIN(rowid) 
+                    FROM anime_list 
+                    GROUP BY mal_id
+                )
+            ''')
+            duplicates_removed = cursor.rowcount
+        
+            # Limpiar registros con datos inválidos
+            cursor.execute('DELETE FROM anime_list WHERE episodes_watched < 0')
+            invalid_episodes = cursor.rowcount
+        
+            cursor.execute('DELETE FROM anime_list WHERE score < 0 OR score > 10')
+            invalid_scores = cursor.rowcount
         
         message = f'Limpieza completada:\n'
         message += f'• Duplicados: {duplicates_removed}\n'
@@ -128,30 +117,26 @@ def clean_orphaned_data():
 def verify_integrity():
     """Verificar integridad de datos"""
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        issues = []
-        
-        # Verificar IDs únicos
-        cursor.execute('SELECT mal_id, COUNT(*) FROM anime_list GROUP BY mal_id HAVING COUNT(*) > 1')
-        duplicates = cursor.fetchall()
-        if duplicates:
-            issues.append(f'IDs duplicados: {len(duplicates)}')
-        
-        # Verificar datos faltantes
-        cursor.execute('SELECT COUNT(*) FROM anime_list WHERE title IS NULL OR title = ""')
-        missing_titles = cursor.fetchone()[0]
-        if missing_titles:
-            issues.append(f'Títulos faltantes: {missing_titles}')
-        
-        # Verificar rangos válidos
-        cursor.execute('SELECT COUNT(*) FROM anime_list WHERE score < 0 OR score > 10')
-        invalid_scores = cursor.fetchone()[0]
-        if invalid_scores:
-            issues.append(f'Puntuaciones inválidas: {invalid_scores}')
-        
-        conn.close()
+        with local_database.transaction() as cursor:
+            issues = []
+        
+            # Verificar IDs únicos
+            cursor.execute('SELECT mal_id, COUNT(*) FROM anime_list GROUP BY mal_id HAVING COUNT(*) > 1')
+            duplicates = cursor.fetchall()
+            if duplicates:
+                issues.append(f'IDs duplicados: {len(duplicates)}')
+        
+            # Verificar datos faltantes
+            cursor.execute('SELECT COUNT(*) FROM anime_list WHERE title IS NULL OR title = ""')
+            missing_titles = cursor.fetchone()[0]
+            if missing_titles:
+                issues.append(f'Títulos faltantes: {missing_titles}')
+        
+            # Verificar rangos válidos
+            cursor.execute('SELECT COUNT(*) FROM anime_list WHERE score < 0 OR score > 10')
+            invalid_scores = cursor.fetchone()[0]
+            if invalid_scores:
+                issues.append(f'Puntuaciones inválidas: {invalid_scores}')
         
         if issues:
             message = 'Problemas encontrados:\n' + '\n'.join(f'• {issue}' for issue in issues)
@@ -178,6 +163,11 @@ def clean_cache():
                 os.remove(cache_path)
                 cleaned += 1
         
+        # Caché de respuestas HTTP
+        from . import response_cache
+        if response_cache.clear_cache():
+            cleaned += 1
+        
         xbmcgui.Dialog().notification('Mantenimiento', f'Caché limpiado: {cleaned} archivos')
         
     except Exception as e:
@@ -187,16 +177,12 @@ def clean_cache():
 def optimize_performance():
     """Optimizar rendimiento de la base de datos"""
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
+        with local_database.transaction() as cursor:
+            # VACUUM para compactar
+            cursor.execute('VACUUM')
         
-        # VACUUM para compactar
-        cursor.execute('VACUUM')
-        
-        # ANALYZE para optimizar consultas
-        cursor.execute('ANALYZE')
-        
-        conn.close()
+            # ANALYZE para optimizar consultas
+            cursor.execute('ANALYZE')
         
         xbmcgui.Dialog().notification('Mantenimiento', 'Rendimiento optimizado')
         
@@ -207,22 +193,10 @@ def optimize_performance():
 def rebuild_indexes():
     """Reconstruir índices de base de datos"""
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        # Crear índices para mejorar rendimiento
-        indexes = [
-            'CREATE INDEX IF NOT EXISTS idx_mal_id ON anime_list(mal_id)',
-            'CREATE INDEX IF NOT EXISTS idx_status ON anime_list(status)',
-            'CREATE INDEX IF NOT EXISTS idx_score ON anime_list(score)',
-            'CREATE INDEX IF NOT EXISTS idx_updated ON anime_list(updated_date)'
-        ]
-        
-        for index_sql in indexes:
-            cursor.execute(index_sql)
-        
-        conn.commit()
-        conn.close()
+        with local_database.transaction() as cursor:
+            # Asegurar migraciones (índices) y reconstruirlos
+            local_database.run_migrations(cursor)
+            cursor.execute('REINDEX')
         
         xbmcgui.Dialog().notification('Mantenimiento', 'Índices reconstruidos')
         
@@ -233,32 +207,28 @@ def rebuild_indexes():
 def generate_health_report():
     """Generar reporte de salud del sistema"""
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        # Estadísticas de la base de datos
-        cursor.execute('SELECT COUNT(*) FROM anime_list')
-        total_anime = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM anime_list WHERE synced = 1')
-        synced_anime = cursor.fetchone()[0]
+        with local_database.transaction() as cursor:
+            # Estadísticas de la base de datos
+            cursor.execute('SELECT COUNT(*) FROM anime_list')
+            total_anime = cursor.fetchone()[0]
         
-        cursor.execute('SELECT COUNT(DISTINCT status) FROM anime_list')
-        unique_statuses = cursor.fetchone()[0]
+            cursor.execute('SELECT COUNT(*) FROM anime_list WHERE synced = 1')
+            synced_anime = cursor.fetchone()[0]
         
-        # Tamaño de archivos
-        db_size = os.path.getsize(local_database.DB_PATH) / 1024  # KB
+            cursor.execute('SELECT COUNT(DISTINCT status) FROM anime_list')
+            unique_statuses = cursor.fetchone()[0]
         
-        # Archivos de configuración
-        config_files = ['token.json', 'notifications.json', 'themes.json']
-        config_status = []
+            # Tamaño de archivos
+            db_size = os.path.getsize(local_database.DB_PATH) / 1024  # KB
         
-        for config_file in config_files:
-            config_path = os.path.join(TOKEN_PATH, config_file)
-            exists = os.path.exists(config_path)
-            config_status.append(f"{config_file}: {'✓' if exists else '✗'}")
+            # Archivos de configuración
+            config_files = ['token.json']
+            config_status = []
         
-        conn.close()
+            for config_file in config_files:
+                config_path = os.path.join(TOKEN_PATH, config_file)
+                exists = os.path.exists(config_path)
+                config_status.append(f"{config_file}: {'✓' if exists else '✗'}")
         
         # Generar reporte
         report = "🏥 REPORTE DE SALUD DEL SISTEMA\n\n"
@@ -1,5 +1,7 @@
 import requests
-from .config import API_BASE_URL, USER_AGENT, rate_limit
+from .config import API_BASE_URL
+from . import config
+from . import http_client
 from .auth import load_access_token, refresh_access_token
 
 def _make_request(method, url, max_retries=3, **kwargs):
@@ -12,17 +14,16 @@ def _make_request(method, url, max_retries=3, **kwargs):
     headers = kwargs.get('headers', {})
     headers.update({
         'Authorization': f'Bearer {token}',
-        'User-Agent': USER_AGENT
+        'User-Agent': config.USER_AGENT
     })
     kwargs['headers'] = headers
     
     # Retry logic estilo MALSync
     for attempt in range(max_retries):
         try:
-            rate_limit()
             xbmc.log(f'MAL API: {method} {url} (attempt {attempt + 1})', xbmc.LOGDEBUG)
             
-            response = requests.request(method, url, timeout=10, **kwargs)
+            response = http_client.request(method, url, timeout=10, **kwargs)
             
             # Token expirado - intentar refresh
             if response.status_code == 401:
@@ -30,18 +31,14 @@ def _make_request(method, url, max_retries=3, **kwargs):
                 new_token = refresh_access_token()
                 if new_token:
                     headers['Authorization'] = f'Bearer {new_token}'
-                    rate_limit()
-                    response = requests.request(method, url, timeout=10, **kwargs)
+                    response = http_client.request(method, url, timeout=10, **kwargs)
                 else:
                     xbmc.log('MAL API: Token refresh failed', xbmc.LOGERROR)
                     return None
                     
-            # Rate limit - esperar y reintentar
+            # Rate limit - el limitador del host aplica Retry-After/backoff antes del reintento
             if response.status_code == 429:
-                wait_time = 2 ** attempt
-                xbmc.log(f'MAL API: Rate limited, waiting {wait_time}s', xbmc.LOGWARNING)
-                import time
-                time.sleep(wait_time)
+                xbmc.log('MAL API: Rate limited, retrying after backoff', xbmc.LOGWARNING)
                 continue
                 
             response.raise_for_status()
@@ -58,16 +55,50 @@ def _make_request(method, url, max_retries=3, **kwargs):
             
     return None
 
-def get_user_anime_list(limit=100):
-    params = {'limit': limit, 'fields': 'list_status,num_episodes,status,mean'}
+LIST_FIELDS = 'list_status,num_episodes,status,mean,main_picture,alternative_titles,synopsis,genres,studios,rank,popularity,start_season'
+
+def iter_user_anime_pages(page_size=1000, sort=None):
+    """Recorrer la lista del usuario página a página siguiendo paging.next
+    
+    Cada página se entrega en cuanto llega, así el consumidor puede ir
+    procesándola sin esperar a la descarga completa. Si una página falla
+    se lanza http_client.IncompleteDownloadError: una lista a medias no se
+    puede confundir con la lista completa.
+    sort='list_updated_at' entrega primero lo modificado recientemente.
+    """
     url = f"{API_BASE_URL}/users/@me/animelist"
-    response = _make_request('GET', url, params=params)
-    return response.json() if response else None
+    params = {'limit': page_size, 'fields': LIST_FIELDS}
+    if sort:
+        params['sort'] = sort
+    
+    while url:
+        response = _make_request('GET', url, params=params)
+        if not response:
+            raise http_client.IncompleteDownloadError(f'MAL list download interrupted at {url}')
+        
+        page = response.json()
+        yield page.get('data', [])
+        
+        # La URL de paging.next ya incluye limit, offset y fields
+        url = page.get('paging', {}).get('next')
+        params = None
+
+def get_user_anime_list(limit=100):
+    """Lista completa del usuario, o None si alguna página falla"""
+    import xbmc
+    try:
+        pages = list(iter_user_anime_pages(page_size=limit))
+    except http_client.IncompleteDownloadError as e:
+        xbmc.log(f'MAL API: {str(e)}', xbmc.LOGWARNING)
+        return None
+    return {'data': [entry for page in pages for entry in page]}
 
-def update_anime_status(anime_id, status, num_watched_episodes=None):
+def update_anime_status(anime_id, status, num_watched_episodes=None, score=None):
     data = {'status': status}
     if num_watched_episodes is not None:
         data['num_watched_episodes'] = num_watched_episodes
+    if score is not None:
+        data['score'] = score
     url = f"{API_BASE_URL}/anime/{anime_id}/my_list_status"
     response = _make_request('PUT', url, data=data)
     return response is not None
@@ -1,6 +1,8 @@
 import requests
-from .config import API_BASE_URL, USER_AGENT, rate_limit
+from .config import API_BASE_URL
+from . import config
 from .auth import load_access_token, refresh_access_token
+from . import http_client
 
 def _make_request(method, url, **kwargs):
     token = load_access_token()
@@ -9,18 +11,16 @@ def _make_request(method, url, **kwargs):
     headers = kwargs.get('headers', {})
     headers.update({
         'Authorization': f'Bearer {token}',
-        'User-Agent': USER_AGENT
+        'User-Agent': config.USER_AGENT
     })
     kwargs['headers'] = headers
-    rate_limit()
     try:
-        response = requests.request(method, url, timeout=10, **kwargs)
+        response = http_client.request(method, url, timeout=10, **kwargs)
         if response.status_code == 401:
             new_token = refresh_access_token()
             if new_token:
                 headers['Authorization'] = f'Bearer {new_token}'
-                rate_limit()
-                response = requests.request(method, url, timeout=10, **kwargs)
+                response = http_client.request(method, url, timeout=10, **kwargs)
         response.raise_for_status()
         return response
     except requests.RequestException:
@@ -11,13 +11,14 @@ import hashlib
 import secrets
 import urllib.parse
 import xbmcgui
-from .config import CLIENT_ID, CLIENT_SECRET, REDIRECT_URI, AUTH_URL, TOKEN_URL, TOKEN_FILE, USER_AGENT, rate_limit
+from .config import AUTH_URL, TOKEN_URL, TOKEN_FILE, rate_limit
+from . import config
 
 def manual_oauth_flow():
     """Flujo OAuth manual sin servidor local"""
     import xbmc
     
-    if not CLIENT_ID or CLIENT_ID.strip() == '':
+    if not config.CLIENT_ID or config.CLIENT_ID.strip() == '':
         xbmcgui.Dialog().ok('MAL Tracker', 
             'Client ID no configurado.\n\n'
             'Ve a Configuración → Addons → MAL Tracker\n'
@@ -33,8 +34,8 @@ def manual_oauth_flow():
     # Construir URL
     params = {
         'response_type': 'code',
-        'client_id': CLIENT_ID.strip(),
-        'redirect_uri': REDIRECT_URI,
+        'client_id': config.CLIENT_ID.strip(),
+        'redirect_uri': config.REDIRECT_URI,
         'code_challenge': code_challenge,
         'code_challenge_method': 'S256'
     }
@@ -65,22 +66,22 @@ def manual_oauth_flow():
     # Intercambiar por token
     data = {
         'grant_type': 'authorization_code',
-        'client_id': CLIENT_ID.strip(),
+        'client_id': config.CLIENT_ID.strip(),
         'code': auth_code,
-        'redirect_uri': REDIRECT_URI,
+        'redirect_uri': config.REDIRECT_URI,
         'code_verifier': code_verifier
     }
     
-    if CLIENT_SECRET and CLIENT_SECRET.strip():
-        data['client_secret'] = CLIENT_SECRET.strip()
+    if config.CLIENT_SECRET and config.CLIENT_SECRET.strip():
+        data['client_secret'] = config.CLIENT_SECRET.strip()
     
     headers = {
-        'User-Agent': USER_AGENT,
+        'User-Agent': config.USER_AGENT,
         'Content-Type': 'application/x-www-form-urlencoded'
     }
     
     try:
-        rate_limit()
+        rate_limit(TOKEN_URL)
         response = requests.post(TOKEN_URL, data=data, headers=headers, timeout=30)
         
         if response.status_code != 200:
@@ -19,6 +19,7 @@ class MilitaryGradeSecurity:
         self.session_token = None
         self.failed_attempts = 0
         self.lockout_time = 0
+        self.system_fingerprint = None
         
     def generate_master_key(self, password):
         """Generar clave maestra con PBKDF2"""
@@ -99,7 +100,10 @@ class MilitaryGradeSecurity:
             return None
     
     def get_system_fingerprint(self):
-        """Crear huella digital del sistema"""
+        """Crear huella digital del sistema (se calcula una vez por proceso)"""
+        if self.system_fingerprint:
+            return self.system_fingerprint
+        
         try:
             import platform
             
@@ -115,6 +119,7 @@ class MilitaryGradeSecurity:
             fingerprint_data = json.dumps(system_info, sort_keys=True)
             fingerprint_hash = hashlib.sha256(fingerprint_data.encode()).hexdigest()
             
+            self.system_fingerprint = fingerprint_hash
             return fingerprint_hash
             
         except Exception as e:
@@ -122,40 +127,13 @@ class MilitaryGradeSecurity:
             return "unknown"
     
     def implement_rate_limiting(self, action, max_attempts=5, window=300):
-        """Rate limiting avanzado"""
+        """Rate limiting avanzado (ventana deslizante compartida entre procesos)"""
         try:
-            from .config import TOKEN_PATH
-            
-            rate_limit_file = os.path.join(TOKEN_PATH, 'rate_limits.json')
-            current_time = int(time.time())
+            from . import action_limiter
             
-            # Cargar límites existentes
-            limits = {}
-            if os.path.exists(rate_limit_file):
-                with open(rate_limit_file, 'r') as f:
-                    limits = json.load(f)
-            
-            # Verificar límite para esta acción
-            if action in limits:
-                attempts = limits[action]['attempts']
-                first_attempt = limits[action]['first_attempt']
-                
-                # Si está dentro de la ventana de tiempo
-                if current_time - first_attempt < window:
-                    if attempts >= max_attempts:
-                        return False, f"Rate limit exceeded. Try again in {window - (current_time - first_attempt)} seconds"
-                    else:
-                        limits[action]['attempts'] += 1
-                else:
-                    # Resetear contador
-                    limits[action] = {'attempts': 1, 'first_attempt': current_time}
-            else:
-                # Primera vez
-                limits[action] = {'attempts': 1, 'first_attempt': current_time}
-            
-            # Guardar límites actualizados
-            with open(rate_limit_file, 'w') as f:
-                json.dump(limits, f)
+            allowed, retry_after = action_limiter.check(action, max_attempts, window)
+            if not allowed:
+                return False, f"Rate limit exceeded. Try again in {retry_after} seconds"
             
             return True, "OK"
             
@@ -285,11 +263,9 @@ class MilitaryGradeSecurity:
             return None
     
     def implement_audit_logging(self, action, user_id, details):
-        """Logging de auditoría completo"""
+        """Logging de auditoría completo (anexado a audit_log, sin reescribir el log)"""
         try:
-            from .config import TOKEN_PATH
-            
-            audit_file = os.path.join(TOKEN_PATH, 'audit_log.json')
+            from . import audit_log
             
             audit_entry = {
                 'timestamp': int(time.time()),
@@ -302,23 +278,7 @@ class MilitaryGradeSecurity:
                 'ip_hash': hashlib.sha256(b'localhost').hexdigest()  # Placeholder
             }
             
-            # Cargar log existente
-            audit_log = []
-            if os.path.exists(audit_file):
-                with open(audit_file, 'r') as f:
-                    audit_log = json.load(f)
-            
-            # Agregar nueva entrada
             audit_log.append(audit_entry)
-            
-            # Mantener solo últimas 1000 entradas
-            if len(audit_log) > 1000:
-                audit_log = audit_log[-1000:]
-            
-            # Guardar log actualizado
-            with open(audit_file, 'w') as f:
-                json.dump(audit_log, f, indent=2)
-            
             return True
             
         except Exception as e:
@@ -411,6 +371,22 @@ def setup_restrictive_permissions():
         xbmc.log(f'Military Security: Permissions setup error - {str(e)}', xbmc.LOGERROR)
         return False
 
+def show_audit_log():
+    """Mostrar las entradas más recientes del log de auditoría"""
+    try:
+        from . import audit_log
+        
+        entries = audit_log.get_recent(100)
+        if not entries:
+            xbmcgui.Dialog().ok('Log de Auditoría', 'No hay entradas registradas')
+            return
+        
+        lines = [f"{entry['iso_timestamp']}  {entry['action']}  ({entry['user_id']})  {entry['details'] or ''}" for entry in entries]
+        xbmcgui.Dialog().textviewer(f'Log de Auditoría ({audit_log.count()} entradas)', '\n'.join(lines))
+        
+    except Exception as e:
+        xbmc.log(f'Military Security: Show audit log error - {str(e)}', xbmc.LOGERROR)
+
 def show_military_security_menu():
     """Mostrar menú de seguridad militar"""
     options = [
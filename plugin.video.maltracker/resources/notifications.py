@@ -1,24 +1,23 @@
 import xbmc
 import xbmcgui
 import time
-import json
-import os
-from . import local_database, public_api
-from .config import TOKEN_PATH
+from . import local_database, public_api, state_store
 
-NOTIFICATIONS_FILE = os.path.join(TOKEN_PATH, 'notifications.json')
+DEFAULT_NOTIFICATIONS_CONFIG = {
+    'new_episodes': True,
+    'season_reminders': True,
+    'completion_reminders': True,
+    'check_interval': 3600,  # 1 hora
+    'last_check': 0
+}
+
+NOTIFICATIONS = state_store.namespace('notifications', DEFAULT_NOTIFICATIONS_CONFIG, 'notifications.json')
 
 def init_notifications():
     """Inicializar sistema de notificaciones"""
     try:
-        if not os.path.exists(NOTIFICATIONS_FILE):
-            save_notifications_config({
-                'new_episodes': True,
-                'season_reminders': True,
-                'completion_reminders': True,
-                'check_interval': 3600,  # 1 hora
-                'last_check': 0
-            })
+        if not NOTIFICATIONS.exists():
+            save_notifications_config(DEFAULT_NOTIFICATIONS_CONFIG)
         return True
     except Exception as e:
         xbmc.log(f'Notifications: Init error - {str(e)}', xbmc.LOGERROR)
@@ -26,25 +25,11 @@ def init_notifications():
 
 def save_notifications_config(config):
     """Guardar configuración de notificaciones"""
-    try:
-        with open(NOTIFICATIONS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2)
-    except Exception as e:
-        xbmc.log(f'Notifications: Save config error - {str(e)}', xbmc.LOGERROR)
+    NOTIFICATIONS.save(config)
 
 def load_notifications_config():
     """Cargar configuración de notificaciones"""
-    try:
-        with open(NOTIFICATIONS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return {
-            'new_episodes': True,
-            'season_reminders': True,
-            'completion_reminders': True,
-            'check_interval': 3600,
-            'last_check': 0
-        }
+    return NOTIFICATIONS.load()
 
 def check_for_notifications():
     """Verificar y mostrar notificaciones pendientes"""
@@ -1,11 +1,9 @@
-import json
-import os
 import xbmc
 import xbmcgui
-from .config import TOKEN_PATH
+from . import state_store
 
-THEMES_FILE = os.path.join(TOKEN_PATH, 'themes.json')
-LAYOUT_FILE = os.path.join(TOKEN_PATH, 'layout.json')
+THEMES = state_store.namespace('themes', {'current_theme': 'default', 'custom_settings': {}}, 'themes.json')
+LAYOUT = state_store.namespace('layout', {'current_layout': 'list', 'custom_settings': {}}, 'layout.json')
 
 # Temas disponibles
 AVAILABLE_THEMES = {
@@ -74,11 +72,11 @@ AVAILABLE_LAYOUTS = {
 def init_personalization():
     """Inicializar sistema de personalización"""
     try:
-        # Crear archivos de configuración si no existen
-        if not os.path.exists(THEMES_FILE):
+        # Crear configuración inicial si no existe
+        if not THEMES.exists():
             save_theme_config('default')
         
-        if not os.path.exists(LAYOUT_FILE):
+        if not LAYOUT.exists():
             save_layout_config('list')
         
         return True
@@ -96,19 +94,14 @@ def save_theme_config(theme_id):
             'last_updated': int(time.time()) if 'time' in globals() else 0
         }
         
-        with open(THEMES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2)
+        THEMES.save(config)
             
     except Exception as e:
         xbmc.log(f'Personalization: Save theme error - {str(e)}', xbmc.LOGERROR)
 
 def load_theme_config():
     """Cargar configuración de tema"""
-    try:
-        with open(THEMES_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return {'current_theme': 'default', 'custom_settings': {}}
+    return THEMES.load()
 
 def save_layout_config(layout_id):
     """Guardar configuración de layout"""
@@ -119,19 +112,14 @@ def save_layout_config(layout_id):
             'last_updated': int(time.time()) if 'time' in globals() else 0
         }
         
-        with open(LAYOUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2)
+        LAYOUT.save(config)
             
     except Exception as e:
         xbmc.log(f'Personalization: Save layout error - {str(e)}', xbmc.LOGERROR)
 
 def load_layout_config():
     """Cargar configuración de layout"""
-    try:
-        with open(LAYOUT_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return {'current_layout': 'list', 'custom_settings': {}}
+    return LAYOUT.load()
 
 def show_personalization_menu():
     """Mostrar menú de personalización"""
@@ -224,8 +212,7 @@ def configure_backgrounds():
         theme_config = load_theme_config()
         theme_config['custom_settings']['background'] = selected_bg
         
-        with open(THEMES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(theme_config, f, indent=2)
+        THEMES.save(theme_config)
         
         xbmcgui.Dialog().notification('MAL Tracker', f'Fondo configurado: {bg_options[selected]}')
 
@@ -263,8 +250,7 @@ def advanced_settings():
         current_settings[setting_key] = new_value
         theme_config['custom_settings'] = current_settings
         
-        with open(THEMES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(theme_config, f, indent=2)
+        THEMES.save(theme_config)
         
         state_text = 'Activado' if new_value else 'Desactivado'
         xbmcgui.Dialog().notification('MAL Tracker', f'{options[selected]}: {state_text}')
@@ -1,13 +1,12 @@
-import requests
 import json
-from .config import USER_AGENT, rate_limit
+from . import config
+from . import response_cache
 
 # APIs públicas sin autenticación (solo lectura)
 
 def search_anime_public(query, limit=20):
     """Búsqueda pública usando Jikan API (MyAnimeList scraper)"""
     try:
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime"
         params = {
             'q': query,
@@ -15,12 +14,9 @@ def search_anime_public(query, limit=20):
             'order_by': 'popularity',
             'sort': 'desc'
         }
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        return response.json()
+        return response_cache.get_json(url, params=params, headers=headers)
         
     except Exception as e:
         import xbmc
@@ -30,14 +26,16 @@ def search_anime_public(query, limit=20):
 def get_anime_details_public(anime_id):
     """Detalles públicos usando Jikan API"""
     try:
-        rate_limit()
         url = f"https://api.jikan.moe/v4/anime/{anime_id}/full"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
+        
+        data = response_cache.get_json(url, headers=headers)
         
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        # Cada ficha consultada amplía el catálogo local de recomendaciones
+        from . import anime_catalog
+        anime_catalog.add_response(data, 'detail')
         
-        return response.json().get('data')
+        return data.get('data')
         
     except Exception as e:
         import xbmc
@@ -47,15 +45,11 @@ def get_anime_details_public(anime_id):
 def get_top_anime_public(limit=50):
     """Top anime público"""
     try:
-        rate_limit()
         url = f"https://api.jikan.moe/v4/top/anime"
         params = {'limit': limit}
-        headers = {'User-Agent': USER_AGENT}
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
+        headers = {'User-Agent': config.USER_AGENT}
         
-        return response.json()
+        return response_cache.get_json(url, params=params, headers=headers)
         
     except Exception as e:
         import xbmc
@@ -65,34 +59,26 @@ def get_top_anime_public(limit=50):
 def get_seasonal_anime_public():
     """Anime de temporada actual"""
     try:
-        rate_limit()
         url = f"https://api.jikan.moe/v4/seasons/now"
-        headers = {'User-Agent': USER_AGENT}
+        headers = {'User-Agent': config.USER_AGENT}
         
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        return response.json()
+        return response_cache.get_json(url, headers=headers)
         
     except Exception as e:
         import xbmc
         xbmc.log(f'Public API Error: {str(e)}', xbmc.LOGERROR)
         return None
 
-def get_schedule_public(day=None):
+def get_schedule_public(day=None, stale_ok=False):
     """Calendario de emisiones de anime"""
     try:
-        rate_limit()
         if day and day != 'all':
             url = f"https://api.jikan.moe/v4/schedules/{day.lower()}"
         else:
             url = f"https://api.jikan.moe/v4/schedules"
-        headers = {'User-Agent': USER_AGENT}
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        headers = {'User-Agent': config.USER_AGENT}
         
-        data = response.json()
+        data = response_cache.get_json(url, headers=headers, stale_ok=stale_ok)
         
         # Validar estructura de respuesta
         if isinstance(data, dict) and 'data' in data:
@@ -107,17 +93,13 @@ def get_schedule_public(day=None):
         xbmc.log(f'Public API Error: {str(e)}', xbmc.LOGERROR)
         return {'data': []}
 
-def get_upcoming_anime_public():
+def get_upcoming_anime_public(stale_ok=False):
     """Próximos estrenos de anime"""
     try:
-        rate_limit()
         url = f"https://api.jikan.moe/v4/seasons/upcoming"
-        headers = {'User-Agent': USER_AGENT}
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        headers = {'User-Agent': config.USER_AGENT}
         
-        return response.json()
+        return response_cache.get_json(url, headers=headers, stale_ok=stale_ok)
         
     except Exception as e:
         import xbmc
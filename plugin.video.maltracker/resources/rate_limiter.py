@@ -0,0 +1,145 @@
+"""
+Limitador de peticiones por host (token bucket)
+Permite ráfagas cortas y solo frena el tráfico sostenido
+"""
+
+import collections
+import threading
+import time
+import urllib.parse
+import email.utils
+
+# Políticas por host: (capacidad de ráfaga, tokens por segundo)
+HOST_POLICIES = {
+    'api.myanimelist.net': (3, 1.0),
+    'myanimelist.net': (2, 0.5),
+    'api.jikan.moe': (3, 3.0),      # Jikan: 3 req/s (+ 60 req/min en HOST_WINDOWS)
+    'graphql.anilist.co': (5, 1.0), # AniList: 90 req/min
+    'anilist.co': (2, 0.5)
+}
+DEFAULT_POLICY = (2, 1.0)
+
+# Límites adicionales por ventana deslizante: (peticiones, segundos)
+HOST_WINDOWS = {
+    'api.jikan.moe': (60, 60.0)
+}
+
+# Backoff máximo ante 429 sin Retry-After
+MAX_BACKOFF = 60.0
+
+class TokenBucket:
+
+    def __init__(self, capacity, rate, clock=time.monotonic, sleep=time.sleep, window=None):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.tokens = float(capacity)
+        # window: (peticiones, segundos) que no se pueden superar en ningún tramo
+        self.window = window
+        self.history = collections.deque(maxlen=window[0] if window else 1)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.blocked_until = 0.0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        """Recargar tokens según el tiempo transcurrido"""
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def reserve(self):
+        """Consumir un token y devolver los segundos que hay que esperar"""
+        with self.lock:
+            now = self.clock()
+            self._refill(now)
+
+            wait = max(0.0, self.blocked_until - now)
+            self.tokens -= 1
+            if self.tokens < 0:
+                wait = max(wait, -self.tokens / self.rate)
+
+            if self.window:
+                # Las peticiones salen en orden; la nueva debe quedar a más de
+                # una ventana de la que está limit puestos por detrás
+                limit, seconds = self.window
+                start = now + wait
+                if self.history:
+                    start = max(start, self.history[-1])
+                if len(self.history) == limit:
+                    start = max(start, self.history[0] + seconds)
+                self.history.append(start)
+                wait = start - now
+            return wait
+
+    def acquire(self):
+        """Esperar (si hace falta) hasta poder hacer una petición"""
+        wait = self.reserve()
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    def penalize(self, retry_after=None):
+        """Bloquear el host tras un 429 (Retry-After o backoff exponencial)"""
+        with self.lock:
+            self.failures += 1
+            if retry_after is None:
+                retry_after = min(MAX_BACKOFF, 2 ** (self.failures - 1))
+            self.blocked_until = max(self.blocked_until, self.clock() + retry_after)
+            return retry_after
+
+    def record_success(self):
+        """Reiniciar el backoff tras una respuesta correcta"""
+        with self.lock:
+            self.failures = 0
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def _host(url_or_host):
+    if '://' in url_or_host:
+        return urllib.parse.urlsplit(url_or_host).netloc.lower()
+    return url_or_host.lower()
+
+def get_bucket(url_or_host):
+    """Obtener el bucket compartido del host"""
+    host = _host(url_or_host)
+
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            capacity, rate = HOST_POLICIES.get(host, DEFAULT_POLICY)
+            bucket = TokenBucket(capacity, rate, window=HOST_WINDOWS.get(host))
+            _buckets[host] = bucket
+        return bucket
+
+def acquire(url_or_host):
+    """Esperar turno para el host de la URL"""
+    return get_bucket(url_or_host).acquire()
+
+def parse_retry_after(value):
+    """Convertir cabecera Retry-After (segundos o fecha HTTP) a segundos"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_date = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_date.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def record_response(url, response):
+    """Actualizar el estado del host según la respuesta recibida"""
+    bucket = get_bucket(url)
+
+    if response.status_code == 429:
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        return bucket.penalize(retry_after)
+
+    bucket.record_success()
+    return 0
@@ -0,0 +1,326 @@
+"""
+Motor de puntuación de recomendaciones
+Vectores dispersos TF-IDF de géneros, estudios y época; todos los candidatos
+se puntúan de una vez (NumPy si está disponible, Python puro si no).
+El servicio compila la matriz del catálogo y la guarda en la base de datos;
+el plugin solo la carga y puntúa.
+"""
+
+import array
+import heapq
+import json
+import math
+import threading
+import time
+import xbmc
+from . import anime_catalog, local_database
+
+try:
+    import numpy
+    NUMPY_ENABLED = True
+except ImportError:
+    numpy = None
+    NUMPY_ENABLED = False
+
+# Pesos de cada tipo de característica dentro del vector
+FEATURE_WEIGHTS = {'g': 1.0, 's': 0.8, 'y': 0.4}
+# Años agrupados por lustros
+YEAR_BUCKET = 5
+
+# Peso del parecido con el perfil frente a la nota y la popularidad
+SIMILARITY_WEIGHT = 10.0
+QUALITY_WEIGHT = 0.3
+POPULARITY_WEIGHT = 2.0
+POPULARITY_SCALE = 10000
+
+# Peso de cada anime de la biblioteca en el perfil según su estado
+STATUS_WEIGHTS = {'completed': 0.5, 'watching': 0.5, 'on_hold': 0.2, 'dropped': -0.5}
+
+_cache_lock = threading.Lock()
+_cached_matrix = None
+_catalog_matrix = None
+
+def _names(values):
+    """Nombres de géneros/estudios (dicts de Jikan o cadenas de la base local)"""
+    return [value.get('name', '') if isinstance(value, dict) else value for value in values or []]
+
+def _year(anime):
+    year = anime.get('year')
+    if not year:
+        year = (((anime.get('aired') or {}).get('prop') or {}).get('from') or {}).get('year')
+    return year
+
+def item_features(anime):
+    """Claves de características de un anime: g:género, s:estudio, y:lustro"""
+    features = set()
+    for genre in _names(anime.get('genres')) + _names(anime.get('themes')) + _names(anime.get('demographics')):
+        if genre:
+            features.add(f'g:{genre}')
+    for studio in _names(anime.get('studios')):
+        if studio:
+            features.add(f's:{studio}')
+    year = _year(anime)
+    if year:
+        features.add(f'y:{int(year) // YEAR_BUCKET * YEAR_BUCKET}')
+    return features
+
+def library_weight(anime):
+    """Peso de un anime de la biblioteca en el perfil del usuario"""
+    score = anime.get('score') or 0
+    if score:
+        return (score - 5) / 5.0
+    return STATUS_WEIGHTS.get(anime.get('status'), 0.0)
+
+def _to_blob(values, typecode):
+    """Vector (lista, array o NumPy) como bytes: 'i' enteros de 32 bits, 'd' dobles"""
+    if NUMPY_ENABLED:
+        return numpy.asarray(values, dtype=numpy.int32 if typecode == 'i' else numpy.float64).tobytes()
+    return array.array(typecode, values).tobytes()
+
+def _from_blob(blob, typecode):
+    if NUMPY_ENABLED:
+        if typecode == 'i':
+            return numpy.frombuffer(blob, dtype=numpy.int32).astype(numpy.int64)
+        return numpy.frombuffer(blob, dtype=numpy.float64)
+    values = array.array(typecode)
+    values.frombytes(blob)
+    return values
+
+def _quality(anime):
+    """Componente de nota y popularidad (independiente del perfil)"""
+    quality = (anime.get('score') or 0) * QUALITY_WEIGHT
+    popularity = anime.get('popularity') or 0
+    if popularity:
+        quality += max(0.0, 1 - popularity / POPULARITY_SCALE) * POPULARITY_WEIGHT
+    return quality
+
+class CandidateMatrix:
+    """Candidatos compilados a una matriz dispersa (formato coordenadas)
+    
+    rows/cols/values: entradas no nulas ya ponderadas por TF-IDF
+    norms: norma de cada fila; quality: nota + popularidad por candidato
+    """
+    
+    def __init__(self, candidates):
+        self.items = []
+        seen = set()
+        item_features_list = []
+        for anime in candidates:
+            mal_id = anime.get('mal_id')
+            if mal_id in seen:
+                continue
+            seen.add(mal_id)
+            self.items.append(anime)
+            item_features_list.append(item_features(anime))
+        
+        self.ids = [anime.get('mal_id') for anime in self.items]
+        self.vocabulary = {}
+        document_frequency = {}
+        for features in item_features_list:
+            for feature in features:
+                if feature not in self.vocabulary:
+                    self.vocabulary[feature] = len(self.vocabulary)
+                document_frequency[feature] = document_frequency.get(feature, 0) + 1
+        
+        total = len(self.items)
+        self.idf = {
+            feature: math.log((1 + total) / (1 + count)) + 1.0
+            for feature, count in document_frequency.items()
+        }
+        
+        self.rows, self.cols, self.values = [], [], []
+        self.norms = []
+        for row, features in enumerate(item_features_list):
+            squared = 0.0
+            for feature in features:
+                value = FEATURE_WEIGHTS[feature[0]] * self.idf[feature]
+                self.rows.append(row)
+                self.cols.append(self.vocabulary[feature])
+                self.values.append(value)
+                squared += value * value
+            self.norms.append(math.sqrt(squared))
+        self.quality = [_quality(anime) for anime in self.items]
+        
+        if NUMPY_ENABLED:
+            self.rows = numpy.asarray(self.rows, dtype=numpy.int64)
+            self.cols = numpy.asarray(self.cols, dtype=numpy.int64)
+            self.values = numpy.asarray(self.values, dtype=numpy.float64)
+            self.norms = numpy.asarray(self.norms, dtype=numpy.float64)
+            self.quality = numpy.asarray(self.quality, dtype=numpy.float64)
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def to_row(self):
+        """Columnas de catalog_matrix (vectores como bloques binarios)"""
+        return (
+            json.dumps({'vocabulary': self.vocabulary, 'idf': self.idf}),
+            _to_blob(self.ids, 'i'), _to_blob(self.rows, 'i'), _to_blob(self.cols, 'i'),
+            _to_blob(self.values, 'd'), _to_blob(self.norms, 'd'), _to_blob(self.quality, 'd')
+        )
+    
+    @classmethod
+    def from_row(cls, row):
+        """Matriz guardada con to_row; las fichas se leen del catálogo al elegir"""
+        data, ids, rows, cols, values, norms, quality = row
+        matrix = cls.__new__(cls)
+        features = json.loads(data)
+        matrix.vocabulary = features['vocabulary']
+        matrix.idf = features['idf']
+        matrix.items = None
+        matrix.ids = [int(mal_id) for mal_id in _from_blob(ids, 'i')]
+        matrix.rows = _from_blob(rows, 'i')
+        matrix.cols = _from_blob(cols, 'i')
+        matrix.values = _from_blob(values, 'd')
+        matrix.norms = _from_blob(norms, 'd')
+        matrix.quality = _from_blob(quality, 'd')
+        return matrix
+    
+    def _pick(self, ranked):
+        """[(fila, puntuación)] -> [(anime, puntuación)]"""
+        if self.items is not None:
+            return [(self.items[row], score) for row, score in ranked]
+        
+        entries = anime_catalog.get_entries([self.ids[row] for row, _ in ranked])
+        # Las fichas borradas del catálogo desde que se compiló la matriz se omiten
+        return [(entries[self.ids[row]], score) for row, score in ranked if self.ids[row] in entries]
+    
+    def vectorize(self, weighted_items):
+        """Vector de consulta en el espacio de la matriz
+        
+        weighted_items: [(anime, peso)]; las características que no aparecen
+        en los candidatos se descartan (no pueden coincidir con ninguno).
+        """
+        vector = {}
+        for anime, weight in weighted_items:
+            if not weight:
+                continue
+            for feature in item_features(anime):
+                column = self.vocabulary.get(feature)
+                if column is not None:
+                    value = weight * FEATURE_WEIGHTS[feature[0]] * self.idf[feature]
+                    vector[column] = vector.get(column, 0.0) + value
+        return vector
+    
+    def cosine(self, vector):
+        """Similitud coseno de cada candidato con el vector de consulta"""
+        query_norm = math.sqrt(sum(value * value for value in vector.values()))
+        if not query_norm or not len(self):
+            return numpy.zeros(len(self)) if NUMPY_ENABLED else [0.0] * len(self)
+        
+        if NUMPY_ENABLED:
+            dense = numpy.zeros(len(self.vocabulary))
+            dense[list(vector.keys())] = list(vector.values())
+            dots = numpy.bincount(self.rows, weights=self.values * dense[self.cols], minlength=len(self))
+            norms = self.norms * query_norm
+            return numpy.divide(dots, norms, out=numpy.zeros_like(dots), where=norms > 0)
+        
+        dots = [0.0] * len(self)
+        for row, column, value in zip(self.rows, self.cols, self.values):
+            weight = vector.get(column)
+            if weight:
+                dots[row] += value * weight
+        return [dot / (norm * query_norm) if norm else 0.0 for dot, norm in zip(dots, self.norms)]
+    
+    def top_k(self, scores, limit, exclude_ids=()):
+        """Los limit mejores (anime, puntuación), sin los excluidos"""
+        exclude_ids = set(exclude_ids)
+        
+        if NUMPY_ENABLED:
+            scores = numpy.asarray(scores, dtype=numpy.float64)
+            if exclude_ids:
+                mask = numpy.fromiter((mal_id in exclude_ids for mal_id in self.ids), dtype=bool, count=len(self.ids))
+                scores = numpy.where(mask, -numpy.inf, scores)
+            count = min(limit, int(numpy.isfinite(scores).sum()))
+            if count <= 0:
+                return []
+            best = numpy.argpartition(-scores, count - 1)[:count]
+            best = best[numpy.argsort(-scores[best], kind='stable')]
+            return self._pick([(int(row), round(float(scores[row]), 2)) for row in best])
+        
+        candidates = (
+            (score, row) for row, score in enumerate(scores)
+            if self.ids[row] not in exclude_ids
+        )
+        return self._pick([(row, round(score, 2)) for score, row in heapq.nlargest(limit, candidates)])
+    
+    def recommend(self, library, limit=20, exclude_ids=()):
+        """Puntuar todos los candidatos contra el perfil de la biblioteca"""
+        profile = self.vectorize((anime, library_weight(anime)) for anime in library)
+        similarity = self.cosine(profile)
+        
+        if NUMPY_ENABLED:
+            scores = similarity * SIMILARITY_WEIGHT + self.quality
+        else:
+            scores = [value * SIMILARITY_WEIGHT + quality for value, quality in zip(similarity, self.quality)]
+        return self.top_k(scores, limit, exclude_ids)
+    
+    def similar(self, base_anime, limit=10, exclude_ids=()):
+        """Candidatos más parecidos a un anime concreto"""
+        similarity = self.cosine(self.vectorize([(base_anime, 1.0)]))
+        return self.top_k(similarity, limit, set(exclude_ids) | {base_anime.get('mal_id')})
+
+def get_matrix(candidates):
+    """Matriz compilada de los candidatos, reutilizada mientras no cambien"""
+    global _cached_matrix
+    
+    key = tuple(anime.get('mal_id') for anime in candidates)
+    with _cache_lock:
+        if _cached_matrix is None or _cached_matrix[0] != key:
+            _cached_matrix = (key, CandidateMatrix(candidates))
+        return _cached_matrix[1]
+
+def store_catalog_matrix():
+    """Tarea del servicio: compilar y guardar la matriz del catálogo si ha cambiado
+    
+    Devuelve True si se ha recompilado
+    """
+    signature = json.dumps(anime_catalog.signature())
+    with local_database.transaction() as cursor:
+        cursor.execute('SELECT signature FROM catalog_matrix WHERE id = 1')
+        stored = cursor.fetchone()
+    if stored and stored[0] == signature:
+        return False
+    
+    _compile_catalog_matrix(signature)
+    return True
+
+def _compile_catalog_matrix(signature):
+    started = time.time()
+    matrix = CandidateMatrix(anime_catalog.get_candidates())
+    with local_database.transaction() as cursor:
+        cursor.execute('''
+            INSERT OR REPLACE INTO catalog_matrix
+            (id, signature, data, item_ids, entry_rows, entry_cols, entry_values, norms, quality, built_at)
+            VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (signature,) + matrix.to_row() + (time.time(),))
+    xbmc.log(f'Recommendation Engine: Compiled {len(matrix)} candidates in {time.time() - started:.2f}s', xbmc.LOGINFO)
+    return matrix
+
+def get_catalog_matrix():
+    """Matriz del catálogo guardada por el servicio
+    
+    Se usa aunque el catálogo haya cambiado desde entonces (el servicio la
+    recompila en su siguiente pasada); solo se compila aquí si no hay ninguna.
+    """
+    global _catalog_matrix
+    
+    with _cache_lock:
+        if _catalog_matrix is not None:
+            return _catalog_matrix
+    
+    with local_database.transaction() as cursor:
+        cursor.execute('''
+            SELECT data, item_ids, entry_rows, entry_cols, entry_values, norms, quality
+            FROM catalog_matrix WHERE id = 1
+        ''')
+        row = cursor.fetchone()
+    
+    if row:
+        matrix = CandidateMatrix.from_row(row)
+    else:
+        matrix = _compile_catalog_matrix(json.dumps(anime_catalog.signature()))
+    
+    with _cache_lock:
+        _catalog_matrix = matrix
+    return matrix
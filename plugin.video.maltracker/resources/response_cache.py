@@ -0,0 +1,249 @@
+"""
+Caché persistente de respuestas HTTP (SQLite en el perfil del addon)
+TTL por endpoint, revalidación con ETag/Last-Modified y expulsión LRU
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+import urllib.parse
+import requests
+import xbmc
+from .config import TOKEN_PATH
+from . import http_client
+
+CACHE_DB_PATH = os.path.join(TOKEN_PATH, 'http_cache.db')
+
+# Tamaño máximo de la caché en disco
+MAX_CACHE_BYTES = 20 * 1024 * 1024
+
+# Política de TTL (segundos) por ruta; la primera coincidencia gana, 0 = no cachear
+TTL_POLICY = [
+    (r'/random/', 0),
+    (r'/users/', 10 * 60),
+    (r'/schedules', 60 * 60),
+    (r'/seasons/(now|upcoming)', 60 * 60),
+    (r'/seasons/\d+/', 24 * 60 * 60),
+    (r'/top/', 3 * 60 * 60),
+    (r'/watch/', 30 * 60),
+    (r'/(anime|manga)/\d+/full$', 24 * 60 * 60),
+    (r'/(anime|manga)/\d+/(news|forum|userupdates|reviews)', 3 * 60 * 60),
+    (r'/(anime|manga|characters|people|producers)/\d+', 12 * 60 * 60),
+    (r'/genres/', 7 * 24 * 60 * 60),
+]
+DEFAULT_TTL = 60 * 60
+
+_TTL_RULES = [(re.compile(pattern), ttl) for pattern, ttl in TTL_POLICY]
+
+_connection = None
+_lock = threading.Lock()
+_refreshing = set()
+
+def _get_connection():
+    """Conexión única por proceso a la base de datos de caché"""
+    global _connection
+
+    if _connection is None:
+        _connection = sqlite3.connect(CACHE_DB_PATH, timeout=5, check_same_thread=False)
+        _connection.execute('PRAGMA journal_mode=WAL')
+        _connection.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                cache_key TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        _connection.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)')
+        _connection.commit()
+    return _connection
+
+def make_key(method, url, params=None):
+    """Clave de caché: método + URL + parámetros ordenados"""
+    query = urllib.parse.urlencode(sorted((params or {}).items()), doseq=True)
+    return f"{method.upper()} {url}?{query}"
+
+def get_ttl(url):
+    """TTL aplicable a la URL según la política por endpoint"""
+    path = urllib.parse.urlsplit(url).path
+    for pattern, ttl in _TTL_RULES:
+        if pattern.search(path):
+            return ttl
+    return DEFAULT_TTL
+
+def _load(key):
+    with _lock:
+        conn = _get_connection()
+        row = conn.execute(
+            'SELECT body, etag, last_modified, expires_at, fetched_at FROM responses WHERE cache_key = ?',
+            (key,)
+        ).fetchone()
+        if row:
+            conn.execute('UPDATE responses SET accessed_at = ? WHERE cache_key = ?', (time.time(), key))
+            conn.commit()
+        return row
+
+def _store(key, body, etag, last_modified, ttl):
+    now = time.time()
+    size = len(body.encode('utf-8'))
+
+    with _lock:
+        conn = _get_connection()
+        conn.execute('''
+            INSERT OR REPLACE INTO responses
+            (cache_key, body, etag, last_modified, fetched_at, expires_at, accessed_at, size)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (key, body, etag, last_modified, now, now + ttl, now, size))
+        conn.commit()
+        _evict(conn)
+
+def _touch(key, ttl):
+    now = time.time()
+    with _lock:
+        conn = _get_connection()
+        conn.execute(
+            'UPDATE responses SET fetched_at = ?, expires_at = ?, accessed_at = ? WHERE cache_key = ?',
+            (now, now + ttl, now, key)
+        )
+        conn.commit()
+
+def _evict(conn):
+    """Expulsar las entradas menos usadas si se supera el tamaño máximo"""
+    total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+    if total <= MAX_CACHE_BYTES:
+        return
+
+    target = MAX_CACHE_BYTES * 0.8
+    rows = conn.execute('SELECT cache_key, size FROM responses ORDER BY accessed_at ASC').fetchall()
+    evicted = []
+    for cache_key, size in rows:
+        if total <= target:
+            break
+        evicted.append((cache_key,))
+        total -= size
+
+    conn.executemany('DELETE FROM responses WHERE cache_key = ?', evicted)
+    conn.commit()
+    xbmc.log(f'Response Cache: Evicted {len(evicted)} entries', xbmc.LOGDEBUG)
+
+def _with_meta(data, fetched_at, stale):
+    """Adjuntar metadatos de frescura (clave _cache) a la respuesta"""
+    if isinstance(data, dict):
+        data['_cache'] = {'fetched_at': fetched_at, 'stale': stale}
+    return data
+
+def _revalidate(key, url, params, headers, ttl, timeout, cached):
+    """Descargar (o revalidar con ETag/Last-Modified) y guardar en caché"""
+    request_headers = dict(headers) if headers else {}
+    if cached:
+        if cached[1]:
+            request_headers['If-None-Match'] = cached[1]
+        if cached[2]:
+            request_headers['If-Modified-Since'] = cached[2]
+
+    response = http_client.get(url, params=params, headers=request_headers, timeout=timeout)
+
+    if response.status_code == 304 and cached:
+        _touch(key, ttl)
+        return json.loads(cached[0])
+
+    response.raise_for_status()
+    body = response.text
+    data = json.loads(body)
+    try:
+        _store(key, body, response.headers.get('ETag'), response.headers.get('Last-Modified'), ttl)
+    except sqlite3.Error as e:
+        xbmc.log(f'Response Cache: Write error - {str(e)}', xbmc.LOGWARNING)
+    return data
+
+def _refresh_in_background(key, url, params, headers, ttl, timeout, cached):
+    """Revalidar una entrada caducada en un hilo aparte (una sola vez por clave)"""
+    with _lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def refresh():
+        try:
+            _revalidate(key, url, params, headers, ttl, timeout, cached)
+        except (requests.RequestException, ValueError) as e:
+            xbmc.log(f'Response Cache: Background refresh failed for {url} - {str(e)}', xbmc.LOGINFO)
+        finally:
+            with _lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=refresh, name='MALTracker-CacheRefresh', daemon=True).start()
+
+def get_json(url, params=None, headers=None, ttl=None, timeout=10, stale_ok=False):
+    """GET con caché en disco; devuelve el JSON decodificado
+
+    Las entradas vigentes se sirven sin red. Las caducadas se revalidan con
+    If-None-Match/If-Modified-Since y, si la red falla, se devuelve la copia
+    caducada. Lanza requests.RequestException (o ValueError si el cuerpo no
+    es JSON) si no hay copia disponible.
+
+    stale_ok=True (stale-while-revalidate): una copia caducada se devuelve
+    al momento y se revalida en segundo plano. En ese modo la respuesta
+    lleva la clave _cache con fetched_at y stale.
+    """
+    if ttl is None:
+        ttl = get_ttl(url)
+    if ttl <= 0:
+        response = http_client.get(url, params=params, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    key = make_key('GET', url, params)
+    try:
+        cached = _load(key)
+    except sqlite3.Error as e:
+        xbmc.log(f'Response Cache: Read error - {str(e)}', xbmc.LOGWARNING)
+        cached = None
+
+    if cached and cached[3] > time.time():
+        data = json.loads(cached[0])
+        return _with_meta(data, cached[4], False) if stale_ok else data
+
+    if cached and stale_ok:
+        _refresh_in_background(key, url, params, headers, ttl, timeout, cached)
+        return _with_meta(json.loads(cached[0]), cached[4], True)
+
+    try:
+        data = _revalidate(key, url, params, headers, ttl, timeout, cached)
+        return _with_meta(data, time.time(), False) if stale_ok else data
+
+    except (requests.RequestException, ValueError):
+        # ValueError: respuesta 200 con un cuerpo que no es JSON
+        if cached:
+            xbmc.log(f'Response Cache: Network or decode error, serving stale copy of {url}', xbmc.LOGINFO)
+            data = json.loads(cached[0])
+            return _with_meta(data, cached[4], True) if stale_ok else data
+        raise
+
+def iter_bodies(url_prefix):
+    """Recorrer (clave, cuerpo) de las respuestas GET guardadas bajo un prefijo de URL"""
+    with _lock:
+        rows = _get_connection().execute(
+            'SELECT cache_key, body FROM responses WHERE cache_key >= ? AND cache_key < ?',
+            (f'GET {url_prefix}', f'GET {url_prefix}\uffff')
+        ).fetchall()
+    return iter(rows)
+
+def clear_cache():
+    """Vaciar la caché de respuestas"""
+    try:
+        with _lock:
+            conn = _get_connection()
+            conn.execute('DELETE FROM responses')
+            conn.commit()
+        return True
+    except sqlite3.Error as e:
+        xbmc.log(f'Response Cache: Clear error - {str(e)}', xbmc.LOGERROR)
+        return False
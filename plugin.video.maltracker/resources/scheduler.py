@@ -0,0 +1,58 @@
+"""
+Planificador de tareas periódicas para el servicio en segundo plano
+Se apoya en xbmc.Monitor: las esperas se cortan en cuanto Kodi pide cerrar
+"""
+
+import time
+import xbmc
+
+class Scheduler:
+    
+    def __init__(self, monitor=None, clock=time.time):
+        self.monitor = monitor or xbmc.Monitor()
+        self.clock = clock
+        self.tasks = []
+    
+    def add_task(self, name, interval, func, initial_delay=0):
+        """Registrar una tarea que se ejecuta cada interval segundos"""
+        self.tasks.append({
+            'name': name,
+            'interval': interval,
+            'func': func,
+            'next_run': self.clock() + initial_delay,
+            'runs': 0,
+            'errors': 0
+        })
+    
+    def run_pending(self):
+        """Ejecutar las tareas vencidas y devolver los segundos hasta la siguiente"""
+        for task in self.tasks:
+            if self.monitor.abortRequested():
+                return 0
+            if self.clock() < task['next_run']:
+                continue
+            
+            try:
+                task['func']()
+            except Exception as e:
+                task['errors'] += 1
+                xbmc.log(f"Scheduler: Task {task['name']} error - {str(e)}", xbmc.LOGERROR)
+            
+            task['runs'] += 1
+            task['next_run'] = self.clock() + task['interval']
+        
+        if not self.tasks:
+            return 60
+        return max(0, min(task['next_run'] for task in self.tasks) - self.clock())
+    
+    def run(self):
+        """Bucle principal hasta que Kodi solicite cerrar"""
+        xbmc.log(f'Scheduler: Started with {len(self.tasks)} tasks', xbmc.LOGINFO)
+        
+        while not self.monitor.abortRequested():
+            wait = self.run_pending()
+            # waitForAbort devuelve True si hay que salir
+            if self.monitor.waitForAbort(max(1, wait)):
+                break
+        
+        xbmc.log('Scheduler: Stopped', xbmc.LOGINFO)
@@ -40,8 +40,7 @@ class SecurityAudit:
         sensitive_files = [
             'token.json',
             'mal_tracker.db',
-            'external_apis.json',
-            'social_data.json'
+            'external_apis.json'
         ]
         
         for filename in sensitive_files:
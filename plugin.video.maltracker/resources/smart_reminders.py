@@ -1,17 +1,14 @@
-import json
 import time
-import os
-from . import local_database, public_api
-from .config import TOKEN_PATH
+from . import local_database, public_api, state_store
 import xbmc
 import xbmcgui
 
-REMINDERS_FILE = os.path.join(TOKEN_PATH, 'smart_reminders.json')
+REMINDERS = state_store.namespace('smart_reminders', legacy_file='smart_reminders.json')
 
 def init_smart_reminders():
     """Inicializar recordatorios inteligentes"""
     try:
-        if not os.path.exists(REMINDERS_FILE):
+        if not REMINDERS.exists():
             default_config = {
                 'episode_reminders': True,
                 'completion_reminders': True,
@@ -28,19 +25,11 @@ def init_smart_reminders():
 
 def save_reminders_config(config):
     """Guardar configuración de recordatorios"""
-    try:
-        with open(REMINDERS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2)
-    except Exception as e:
-        xbmc.log(f'Smart Reminders: Save config error - {str(e)}', xbmc.LOGERROR)
+    REMINDERS.save(config)
 
 def load_reminders_config():
     """Cargar configuración de recordatorios"""
-    try:
-        with open(REMINDERS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return {}
+    return REMINDERS.load()
 
 def check_smart_reminders():
     """Verificar y mostrar recordatorios inteligentes"""
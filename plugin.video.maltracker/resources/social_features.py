@@ -1,17 +1,14 @@
-import json
-import os
 import time
 import xbmc
 import xbmcgui
-from . import local_database
-from .config import TOKEN_PATH
+from . import local_database, state_store
 
-SOCIAL_FILE = os.path.join(TOKEN_PATH, 'social_data.json')
+SOCIAL = state_store.namespace('social', {'friends': [], 'groups': [], 'reviews': []}, 'social_data.json')
 
 def init_social_features():
     """Inicializar características sociales"""
     try:
-        if not os.path.exists(SOCIAL_FILE):
+        if not SOCIAL.exists():
             default_data = {
                 'friends': [],
                 'groups': [],
@@ -28,19 +25,11 @@ def init_social_features():
 
 def save_social_data(data):
     """Guardar datos sociales"""
-    try:
-        with open(SOCIAL_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        xbmc.log(f'Social Features: Save error - {str(e)}', xbmc.LOGERROR)
+    SOCIAL.save(data)
 
 def load_social_data():
     """Cargar datos sociales"""
-    try:
-        with open(SOCIAL_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return {'friends': [], 'groups': [], 'reviews': []}
+    return SOCIAL.load()
 
 def show_social_menu():
     """Mostrar menú social"""
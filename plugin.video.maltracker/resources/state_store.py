@@ -0,0 +1,200 @@
+"""
+Almacén de estado compartido (tabla state de mal_tracker.db)
+Sustituye a los JSON por funcionalidad: espacios de nombres con valores por
+defecto, escrituras atómicas por transacción y caché en memoria que se
+descarta cuando otro proceso modifica la base de datos
+"""
+
+import os
+import copy
+import contextlib
+import json
+import time
+import threading
+import xbmc
+from . import local_database
+from .config import TOKEN_PATH
+
+_lock = threading.RLock()
+_cache = {}
+_data_version = None
+_namespaces = {}
+
+def _check_version(cursor):
+    """Vaciar la caché si otra conexión ha confirmado cambios (PRAGMA data_version)
+    
+    data_version solo es comparable dentro de la misma conexión, así que
+    también se descarta la caché cuando la conexión compartida se reabre
+    """
+    global _data_version
+    
+    cursor.execute('PRAGMA data_version')
+    version = (id(cursor.connection), cursor.fetchone()[0])
+    if version != _data_version:
+        _cache.clear()
+        _data_version = version
+
+class Namespace:
+    """Documento de estado de una funcionalidad (un valor JSON por clave)
+    
+    defaults: valores usados para las claves que no existen
+    legacy_file: JSON antiguo que se importa en el primer acceso y se
+    elimina una vez confirmada la transacción que lo importó
+    """
+    
+    def __init__(self, name, defaults=None, legacy_file=None):
+        self.name = name
+        self.defaults = defaults or {}
+        self.legacy_file = os.path.join(TOKEN_PATH, legacy_file) if legacy_file else None
+        self.legacy_checked = False
+        self.imported_file = None
+    
+    def _import_legacy(self, cursor):
+        self.legacy_checked = True
+        if not self.legacy_file or not os.path.exists(self.legacy_file):
+            return
+        
+        try:
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+            if not isinstance(document, dict):
+                document = {'data': document}
+            self._write(cursor, document, replace=True)
+            # Se borra en _transaction, cuando los datos ya están confirmados
+            self.imported_file = self.legacy_file
+        except (OSError, ValueError) as e:
+            xbmc.log(f'State Store: Legacy import error for {self.name} - {str(e)}', xbmc.LOGWARNING)
+    
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Transacción que elimina el JSON importado solo tras el commit
+        
+        Si la transacción falla, la importación se deshace con ella y se
+        repite en el siguiente acceso.
+        """
+        with _lock:
+            try:
+                with local_database.transaction() as cursor:
+                    yield cursor
+            except Exception:
+                _cache.pop(self.name, None)
+                if self.imported_file:
+                    self.imported_file = None
+                    self.legacy_checked = False
+                raise
+            
+            if self.imported_file:
+                path, self.imported_file = self.imported_file, None
+                try:
+                    os.remove(path)
+                    xbmc.log(f'State Store: Imported {os.path.basename(path)} into "{self.name}"', xbmc.LOGINFO)
+                except OSError as e:
+                    xbmc.log(f'State Store: Could not remove {os.path.basename(path)} - {str(e)}', xbmc.LOGWARNING)
+    
+    def _read(self, cursor):
+        """Documento en caché como {clave: (valor, json)}"""
+        _check_version(cursor)
+        # Dentro de una transacción ajena el commit no depende de nosotros:
+        # la importación espera a un acceso de primer nivel
+        if not self.legacy_checked and local_database.transaction_depth() == 1:
+            self._import_legacy(cursor)
+        
+        entries = _cache.get(self.name)
+        if entries is None:
+            cursor.execute('SELECT key, value FROM state WHERE namespace = ?', (self.name,))
+            entries = {key: (json.loads(text), text) for key, text in cursor.fetchall()}
+            _cache[self.name] = entries
+        return entries
+    
+    def _write(self, cursor, document, replace=False):
+        """Guardar solo las claves que cambian; replace=True elimina las ausentes"""
+        entries = _cache.get(self.name)
+        if entries is None:
+            cursor.execute('SELECT key, value FROM state WHERE namespace = ?', (self.name,))
+            entries = {key: (json.loads(text), text) for key, text in cursor.fetchall()}
+        
+        now = time.time()
+        for key, value in document.items():
+            text = json.dumps(value, ensure_ascii=False)
+            if key in entries and entries[key][1] == text:
+                continue
+            cursor.execute('''
+                INSERT INTO state (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+            ''', (self.name, key, text, now))
+            entries[key] = (copy.deepcopy(value), text)
+        
+        if replace:
+            for key in [key for key in entries if key not in document]:
+                cursor.execute('DELETE FROM state WHERE namespace = ? AND key = ?', (self.name, key))
+                del entries[key]
+        
+        _cache[self.name] = entries
+    
+    def exists(self):
+        """Comprobar si el espacio de nombres tiene algún valor guardado"""
+        with self._transaction() as cursor:
+            return bool(self._read(cursor))
+    
+    def load(self):
+        """Documento completo (copia: se puede modificar y volver a guardar)"""
+        try:
+            with self._transaction() as cursor:
+                document = copy.deepcopy(self.defaults)
+                document.update((key, copy.deepcopy(value)) for key, (value, _) in self._read(cursor).items())
+                return document
+        except Exception as e:
+            xbmc.log(f'State Store: Load error for {self.name} - {str(e)}', xbmc.LOGERROR)
+            return copy.deepcopy(self.defaults)
+    
+    def save(self, document):
+        """Reemplazar el documento de forma atómica"""
+        try:
+            with self._transaction() as cursor:
+                self._read(cursor)
+                self._write(cursor, document, replace=True)
+            return True
+        except Exception as e:
+            xbmc.log(f'State Store: Save error for {self.name} - {str(e)}', xbmc.LOGERROR)
+            return False
+    
+    def get(self, key, default=None):
+        """Valor de una clave (sin copiar el resto del documento)"""
+        try:
+            with self._transaction() as cursor:
+                entry = self._read(cursor).get(key)
+            if entry is not None:
+                return copy.deepcopy(entry[0])
+        except Exception as e:
+            xbmc.log(f'State Store: Get error for {self.name}.{key} - {str(e)}', xbmc.LOGERROR)
+        return copy.deepcopy(self.defaults.get(key, default))
+    
+    def update(self, values):
+        """Actualizar solo las claves indicadas"""
+        try:
+            with self._transaction() as cursor:
+                self._read(cursor)
+                self._write(cursor, values)
+            return True
+        except Exception as e:
+            xbmc.log(f'State Store: Update error for {self.name} - {str(e)}', xbmc.LOGERROR)
+            return False
+    
+    def set(self, key, value):
+        return self.update({key: value})
+
+def reload():
+    """Olvidar la caché y volver a buscar JSON antiguos (p. ej. tras restaurar un backup)"""
+    with _lock:
+        _cache.clear()
+        for ns in _namespaces.values():
+            ns.legacy_checked = False
+
+def namespace(name, defaults=None, legacy_file=None):
+    """Espacio de nombres registrado (uno por funcionalidad y proceso)"""
+    with _lock:
+        ns = _namespaces.get(name)
+        if ns is None:
+            ns = Namespace(name, defaults, legacy_file)
+            _namespaces[name] = ns
+        return ns
@@ -1,92 +1,148 @@
 import xbmc
 import time
-from . import local_database, mal_api, auth
+import datetime
+from . import local_database, mal_api, auth, sync_queue, anime_catalog, http_client
 
-def sync_with_mal():
-    """Sincronizar datos locales con MyAnimeList"""
+# Reconciliación completa periódica aunque exista marca de agua
+FULL_SYNC_INTERVAL = 24 * 60 * 60
+# En modo delta suelen cambiar pocas entradas: páginas pequeñas
+DELTA_PAGE_SIZE = 100
+
+def sync_with_mal(full=False):
+    """Sincronizar datos locales con MyAnimeList
+    
+    Por defecto solo se descargan las entradas modificadas desde la última
+    sincronización; full=True fuerza la descarga completa
+    """
     if not auth.load_access_token():
         xbmc.log('MAL Tracker: No authentication for sync', xbmc.LOGWARNING)
         return False
     
     try:
-        xbmc.log('MAL Tracker: Starting sync with MAL', xbmc.LOGINFO)
-        
-        # 1. Descargar lista remota
-        remote_list = mal_api.get_user_anime_list(limit=1000)
-        if not remote_list or 'data' not in remote_list:
-            xbmc.log('MAL Tracker: Failed to get remote list', xbmc.LOGERROR)
-            return False
-        
-        # 2. Sincronizar cada anime remoto
-        for entry in remote_list['data']:
-            anime = entry['node']
-            list_status = entry.get('list_status', {})
-            
-            # Actualizar en base local
-            local_database.add_anime_to_list({
-                'mal_id': anime.get('id'),
-                'title': anime.get('title'),
-                'episodes': anime.get('num_episodes'),
-                'images': anime.get('main_picture', {}),
-                'synopsis': anime.get('synopsis'),
-                'genres': anime.get('genres', []),
-                'studios': anime.get('studios', []),
-                'score': anime.get('mean'),
-                'rank': anime.get('rank'),
-                'popularity': anime.get('popularity')
-            }, list_status.get('status', 'plan_to_watch'))
-            
-            # Actualizar progreso
-            local_database.update_anime_status(
-                anime.get('id'),
-                list_status.get('status'),
-                list_status.get('num_episodes_watched'),
-                list_status.get('score')
-            )
+        watermark, full = begin_delta_sync('mal', full)
+        xbmc.log(f"MAL Tracker: Starting {'full' if full else 'delta'} sync with MAL", xbmc.LOGINFO)
+        
+        # 1-2. Descargar la lista remota por páginas e ingerir cada una en bloque
+        # (una página fallida lanza IncompleteDownloadError y la marca de agua no se mueve)
+        pages = 0
+        newest = watermark
+        counts = {'added': 0, 'updated': 0, 'unchanged': 0}
+        for page in iter_mal_pages(watermark, full):
+            pages += 1
+            newest = max([newest] + [entry_updated_at(entry) for entry in page])
+            page_counts = local_database.bulk_upsert_anime([normalize_mal_entry(entry) for entry in page])
+            anime_catalog.add_entries(page, 'sync')
+            for key in counts:
+                counts[key] += page_counts[key]
+        
+        finish_delta_sync('mal', newest, full)
+        xbmc.log(f"MAL Tracker: Remote list applied ({pages} pages) - {counts['added']} added, {counts['updated']} updated, {counts['unchanged']} unchanged", xbmc.LOGINFO)
         
         # 3. Subir cambios locales no sincronizados
         sync_local_changes()
         
         xbmc.log('MAL Tracker: Sync completed successfully', xbmc.LOGINFO)
         return True
+    
+    except http_client.IncompleteDownloadError as e:
+        xbmc.log(f'MAL Tracker: Failed to get remote list - {str(e)}', xbmc.LOGERROR)
+        return False
         
     except Exception as e:
         xbmc.log(f'MAL Tracker: Sync error - {str(e)}', xbmc.LOGERROR)
         return False
 
-def sync_local_changes():
-    """Subir cambios locales no sincronizados"""
+def entry_updated_at(entry):
+    """Fecha de modificación (epoch) de una entrada de lista
+    
+    Acepta el updated_at ISO 8601 de MAL y el updatedAt en segundos de AniList
+    """
+    value = entry.get('list_status', {}).get('updated_at')
+    if not value:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
     try:
-        local_list = local_database.get_local_anime_list()
-        
-        for anime in local_list:
-            if anime['synced'] == 0:  # No sincronizado
-                # Intentar actualizar en MAL
-                success = mal_api.update_anime_status(
-                    anime['mal_id'],
-                    anime['status'],
-                    anime['episodes_watched']
-                )
-                
-                if success:
-                    # Marcar como sincronizado
-                    mark_as_synced(anime['mal_id'])
-                    xbmc.log(f'MAL Tracker: Synced {anime["title"]}', xbmc.LOGDEBUG)
-                    
-    except Exception as e:
-        xbmc.log(f'MAL Tracker: Sync local changes error - {str(e)}', xbmc.LOGERROR)
+        return datetime.datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return 0.0
+
+def begin_delta_sync(service, full=False):
+    """Decidir el modo de sincronización; devuelve (marca de agua, completa)"""
+    watermark = float(local_database.get_config_value(f'sync_watermark_{service}', 0))
+    last_full = float(local_database.get_config_value(f'last_full_sync_{service}', 0))
+    
+    if full or not watermark or time.time() - last_full > FULL_SYNC_INTERVAL:
+        return watermark, True
+    return watermark, False
+
+def finish_delta_sync(service, newest, full):
+    """Guardar la marca de agua tras una sincronización correcta
+    
+    Solo se debe llamar después de ingerir todas las páginas sin errores: las
+    entradas de una página perdida más antiguas que la nueva marca de agua
+    no volverían a descargarse en modo delta
+    """
+    local_database.set_config_value(f'sync_watermark_{service}', newest)
+    if full:
+        local_database.set_config_value(f'last_full_sync_{service}', time.time())
+
+def iter_changed_pages(pages, watermark):
+    """Recortar páginas ordenadas por modificación descendente en la marca de agua
+    
+    La primera página se entrega siempre (aunque quede vacía) para distinguir
+    "sin cambios" de "descarga fallida"; al llegar a entradas ya ingeridas
+    se dejan de pedir páginas.
+    """
+    for page in pages:
+        changed = [entry for entry in page if entry_updated_at(entry) > watermark]
+        yield changed
+        if len(changed) < len(page):
+            return
+
+def iter_mal_pages(watermark, full):
+    """Páginas de MAL a ingerir: la lista completa o solo los cambios"""
+    if full:
+        return mal_api.iter_user_anime_pages()
+    return iter_changed_pages(
+        mal_api.iter_user_anime_pages(page_size=DELTA_PAGE_SIZE, sort='list_updated_at'),
+        watermark
+    )
+
+def normalize_mal_entry(entry):
+    """Convertir una entrada de lista de MAL al formato de bulk_upsert_anime"""
+    anime = entry.get('node', {})
+    list_status = entry.get('list_status', {})
+    alternative = anime.get('alternative_titles') or {}
+    alternative_titles = [alternative.get('en'), alternative.get('ja')] + alternative.get('synonyms', [])
+    
+    return {
+        'mal_id': anime.get('id'),
+        'title': anime.get('title'),
+        'alternative_titles': '; '.join(title for title in alternative_titles if title) or None,
+        'status': list_status.get('status', 'plan_to_watch'),
+        'episodes_watched': list_status.get('num_episodes_watched', 0),
+        'score': list_status.get('score', 0),
+        'total_episodes': anime.get('num_episodes', 0),
+        'image_url': (anime.get('main_picture') or {}).get('medium'),
+        'synopsis': anime.get('synopsis'),
+        'genres': [g.get('name') for g in anime.get('genres', [])],
+        'studios': [s.get('name') for s in anime.get('studios', [])],
+        'year': (anime.get('start_season') or {}).get('year'),
+        'rating': anime.get('mean'),
+        'rank': anime.get('rank'),
+        'popularity': anime.get('popularity')
+    }
+
+def sync_local_changes():
+    """Subir cambios locales no sincronizados (cola de subida)"""
+    return sync_queue.drain()
 
 def mark_as_synced(mal_id):
     """Marcar anime como sincronizado"""
-    import sqlite3
     try:
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('UPDATE anime_list SET synced = 1 WHERE mal_id = ?', (mal_id,))
-        
-        conn.commit()
-        conn.close()
+        with local_database.transaction() as cursor:
+            cursor.execute('UPDATE anime_list SET synced = 1 WHERE mal_id = ?', (mal_id,))
         
     except Exception as e:
         xbmc.log(f'MAL Tracker: Mark synced error - {str(e)}', xbmc.LOGERROR)
@@ -105,14 +161,9 @@ def auto_sync_if_authenticated():
 def get_last_sync_time():
     """Obtener timestamp de última sincronización"""
     try:
-        import sqlite3
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT value FROM local_config WHERE key = "last_sync"')
-        result = cursor.fetchone()
-        
-        conn.close()
+        with local_database.transaction() as cursor:
+            cursor.execute('SELECT value FROM local_config WHERE key = "last_sync"')
+            result = cursor.fetchone()
         
         return float(result[0]) if result else 0
         
@@ -122,17 +173,11 @@ def get_last_sync_time():
 def set_last_sync_time(timestamp):
     """Guardar timestamp de sincronización"""
     try:
-        import sqlite3
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO local_config (key, value) 
-            VALUES ("last_sync", ?)
-        ''', (str(timestamp),))
-        
-        conn.commit()
-        conn.close()
+        with local_database.transaction() as cursor:
+            cursor.execute('''
+                INSERT OR REPLACE INTO local_config (key, value) 
+                VALUES ("last_sync", ?)
+            ''', (str(timestamp),))
         
     except Exception as e:
         xbmc.log(f'MAL Tracker: Set sync time error - {str(e)}', xbmc.LOGERROR)
@@ -144,14 +189,9 @@ def get_sync_status():
         is_authenticated = auth.load_access_token() is not None
         
         # Contar elementos no sincronizados
-        import sqlite3
-        conn = sqlite3.connect(local_database.DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM anime_list WHERE synced = 0')
-        unsynced_count = cursor.fetchone()[0]
-        
-        conn.close()
+        with local_database.transaction() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM anime_list WHERE synced = 0')
+            unsynced_count = cursor.fetchone()[0]
         
         return {
             'last_sync': last_sync,
@@ -0,0 +1,94 @@
+"""
+Cola de subida de cambios locales a MAL
+Agrupa las ediciones por anime y reintenta con backoff. Solo la vacía el
+servicio (background_service.QUEUE_INTERVAL) o una sincronización manual: el plugin nunca
+deja hilos de red vivos al terminar
+"""
+
+import time
+import threading
+import xbmc
+from . import local_database, mal_api, auth
+
+# Backoff de reintentos: RETRY_BASE * 2^intentos, hasta MAX_RETRY_DELAY
+RETRY_BASE = 30
+MAX_RETRY_DELAY = 6 * 60 * 60
+
+_drain_lock = threading.Lock()
+
+def pending_count():
+    """Número de anime con cambios pendientes de subir"""
+    try:
+        with local_database.transaction() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM sync_queue')
+            return cursor.fetchone()[0]
+    except Exception as e:
+        xbmc.log(f'Sync Queue: Count error - {str(e)}', xbmc.LOGERROR)
+        return 0
+
+def _complete(mal_id, revision, synced):
+    """Retirar la entrada si no ha cambiado mientras se subía"""
+    with local_database.transaction() as cursor:
+        cursor.execute('DELETE FROM sync_queue WHERE mal_id = ? AND revision = ?', (mal_id, revision))
+        if cursor.rowcount and synced:
+            cursor.execute('UPDATE anime_list SET synced = 1 WHERE mal_id = ?', (mal_id,))
+
+def _retry(mal_id, attempts, error):
+    """Programar el siguiente intento con backoff exponencial"""
+    delay = min(MAX_RETRY_DELAY, RETRY_BASE * 2 ** attempts)
+    with local_database.transaction() as cursor:
+        cursor.execute('''
+            UPDATE sync_queue
+            SET attempts = attempts + 1, next_attempt = ?, last_error = ?
+            WHERE mal_id = ?
+        ''', (time.time() + delay, error, mal_id))
+
+def drain(limit=None):
+    """Subir el estado final de cada anime pendiente cuyo reintento ya toca
+    
+    Devuelve (subidos, fallidos). Si otro hilo ya está vaciando la cola no
+    hace nada. Las peticiones salen fuera de la transacción para no
+    bloquear la base de datos mientras se espera a la red.
+    """
+    from .hybrid_sync import MAL_COMPATIBLE_STATUSES
+    
+    if not auth.load_access_token():
+        return 0, 0
+    if not _drain_lock.acquire(blocking=False):
+        return 0, 0
+    
+    uploaded = failed = 0
+    try:
+        with local_database.transaction() as cursor:
+            cursor.execute('''
+                SELECT q.mal_id, q.revision, q.attempts, a.status, a.episodes_watched, a.score
+                FROM sync_queue q
+                JOIN anime_list a ON a.mal_id = q.mal_id
+                WHERE q.next_attempt <= ?
+                ORDER BY q.queued_at
+                LIMIT ?
+            ''', (time.time(), limit or -1))
+            pending = cursor.fetchall()
+        
+        for mal_id, revision, attempts, status, episodes_watched, score in pending:
+            # Estados solo locales: no existen en MAL
+            if status not in MAL_COMPATIBLE_STATUSES:
+                _complete(mal_id, revision, False)
+                continue
+            
+            if mal_api.update_anime_status(mal_id, status, episodes_watched, score):
+                _complete(mal_id, revision, True)
+                uploaded += 1
+            else:
+                _retry(mal_id, attempts, 'upload failed')
+                failed += 1
+        
+        if pending:
+            xbmc.log(f'Sync Queue: Uploaded {uploaded}, failed {failed}', xbmc.LOGINFO)
+        
+    except Exception as e:
+        xbmc.log(f'Sync Queue: Drain error - {str(e)}', xbmc.LOGERROR)
+    finally:
+        _drain_lock.release()
+    
+    return uploaded, failed
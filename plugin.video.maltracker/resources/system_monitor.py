@@ -2,7 +2,6 @@ import threading
 import time
 import psutil
 import os
-import json
 import xbmc
 import xbmcgui
 from .config import TOKEN_PATH
@@ -31,18 +30,22 @@ class SystemMonitor:
         
         return True, "Monitoreo iniciado"
     
+    def run_cycle(self):
+        """Un ciclo de monitoreo (lo ejecuta el servicio en segundo plano)"""
+        # Recopilar métricas del sistema
+        metrics = self.collect_system_metrics()
+        
+        # Analizar métricas
+        self.analyze_metrics(metrics)
+        
+        # Guardar datos de rendimiento
+        self.save_performance_data(metrics)
+    
     def monitor_loop(self):
         """Bucle principal de monitoreo"""
         while self.monitoring:
             try:
-                # Recopilar métricas del sistema
-                metrics = self.collect_system_metrics()
-                
-                # Analizar métricas
-                self.analyze_metrics(metrics)
-                
-                # Guardar datos de rendimiento
-                self.save_performance_data(metrics)
+                self.run_cycle()
                 
                 # Esperar antes del siguiente ciclo
                 time.sleep(30)  # Monitorear cada 30 segundos
@@ -263,13 +266,12 @@ class SystemMonitor:
     def persist_performance_data(self):
         """Persistir datos de rendimiento"""
         try:
-            perf_file = os.path.join(TOKEN_PATH, 'performance_data.json')
+            from . import state_store
             
             # Guardar solo últimos 100 puntos para no llenar el disco
             recent_data = self.performance_data[-100:]
             
-            with open(perf_file, 'w') as f:
-                json.dump(recent_data, f, indent=2)
+            state_store.namespace('performance', legacy_file='performance_data.json').set('data', recent_data)
                 
         except Exception as e:
             xbmc.log(f'System Monitor: Persist data error - {str(e)}', xbmc.LOGERROR)
@@ -349,11 +351,14 @@ def show_system_monitor_menu():
     selected = xbmcgui.Dialog().select('Monitor del Sistema:', options)
     
     if selected == 0:
-        success, message = system_monitor.start_monitoring()
-        xbmcgui.Dialog().notification('Monitor', message)
+        # El monitoreo continuo lo ejecuta el servicio en segundo plano
+        from .background_service import set_task_enabled
+        set_task_enabled('system_monitor', True)
+        xbmcgui.Dialog().notification('Monitor', 'Monitoreo iniciado')
     elif selected == 1:
-        success, message = system_monitor.stop_monitoring()
-        xbmcgui.Dialog().notification('Monitor', message)
+        from .background_service import set_task_enabled
+        set_task_enabled('system_monitor', False)
+        xbmcgui.Dialog().notification('Monitor', 'Monitoreo detenido')
     elif selected == 2:
         report = system_monitor.get_system_report()
         xbmcgui.Dialog().textviewer('Reporte del Sistema', report)
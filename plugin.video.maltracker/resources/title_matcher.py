@@ -0,0 +1,204 @@
+"""
+Emparejamiento aproximado de títulos para la auto-detección
+Índice de trigramas sobre títulos normalizados (y alias de MAL/AniList)
+que tolera variantes de romanización y nombres de release groups
+"""
+
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from . import local_database
+
+# Puntuación mínima (coeficiente de Dice sobre trigramas) para aceptar un match
+MIN_SCORE = 0.55
+# Candidatos que se puntúan con exactitud tras el filtrado por trigramas
+MAX_CANDIDATES = 20
+# Trigramas presentes en más de esta fracción de alias no sirven para filtrar
+COMMON_GRAM_RATIO = 0.05
+
+VIDEO_EXTENSIONS = ('.mkv', '.mp4', '.avi', '.m4v', '.webm', '.ts', '.wmv', '.flv', '.ogm')
+
+# Variantes de romanización que se unifican (ō/ou/oo -> o, uu -> u, wo -> o...)
+_ROMANIZATION = [
+    (re.compile(r'ou|oo|oh(?![aeiou])'), 'o'),
+    (re.compile(r'uu'), 'u'),
+    (re.compile(r'\bwo\b'), 'o'),
+    (re.compile(r'\bwa\b'), 'ha'),
+    (re.compile(r'tsu'), 'tu'),
+    (re.compile(r'shi'), 'si'),
+    (re.compile(r'chi'), 'ti'),
+]
+
+# Etiquetas técnicas de releases (resolución, códec, fuente, idioma...)
+_RELEASE_TAGS = re.compile(
+    r'\b(\d{3,4}p|\d{3,4}x\d{3,4}|[xh]\.?26[45]|hevc|avc|aac\d?|flac|opus|ac3|dts|'
+    r'10bits?|8bits?|hi10p?|bd(rip)?|blu-?ray|web(-?dl|-?rip)?|hdtv|dvd(rip)?|'
+    r'multi|dual[ -]?audio|vostfr|eng?|subs?|raw|uncensored|batch|v\d)\b',
+    re.IGNORECASE
+)
+
+# Marcadores de episodio: a partir de aquí el nombre deja de ser título
+_EPISODE_MARKERS = re.compile(
+    r'(\s-\s*\d{1,4}(v\d)?\b|\bS\d{1,2}E\d{1,4}\b|\b(EP?|Episod(e|io)|Cap(itulo)?)\s*\.?\s*\d{1,4}\b|'
+    r'\s#?\d{1,4}(v\d)?(\s|$))',
+    re.IGNORECASE
+)
+
+# Número de episodio, de la marca más explícita a la menos; el último patrón
+# (número suelto) solo se usa si no hay ninguna otra
+_EPISODE_NUMBERS = [
+    re.compile(r'\bS\d{1,2}E(\d{1,4})\b', re.IGNORECASE),
+    re.compile(r'\s-\s*(\d{1,4})(?:v\d)?\b'),
+    re.compile(r'\b(?:EP?|Episod(?:e|io)|Cap(?:itulo)?)\s*\.?\s*(\d{1,4})\b', re.IGNORECASE),
+    re.compile(r'\s#?(\d{1,4})(?:v\d)?(?=\s|$)'),
+]
+
+def normalize(title):
+    """Normalizar un título: sin acentos, minúsculas, romanización unificada"""
+    text = unicodedata.normalize('NFKD', title)
+    text = ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+    text = re.sub(r'[^\w]+', ' ', text).replace('_', ' ')
+    for pattern, replacement in _ROMANIZATION:
+        text = pattern.sub(replacement, text)
+    return ' '.join(text.split())
+
+def trigrams(normalized):
+    """Conjunto de trigramas de un título normalizado (con bordes de palabra)"""
+    padded = f'  {normalized} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _strip_tags(filename):
+    """Nombre del archivo (sin carpetas ni extensión) sin grupos, hashes CRC
+    ni etiquetas técnicas"""
+    name = os.path.basename(filename.replace('\\', '/'))
+    if name.lower().endswith(VIDEO_EXTENSIONS):
+        name = os.path.splitext(name)[0]
+    
+    # Grupos, hashes y etiquetas entre corchetes/paréntesis
+    name = re.sub(r'\[[^\]]*\]|\([^)]*\)|\{[^}]*\}', ' ', name)
+    if ' ' not in name.strip():
+        name = name.replace('.', ' ')
+    name = name.replace('_', ' ')
+    return _RELEASE_TAGS.sub(' ', name)
+
+def clean_filename(filename):
+    """Extraer la parte de título de un nombre de archivo de anime
+    
+    '[Grupo] Sousou no Frieren - 05 (1080p) [ABCD1234].mkv' -> 'Sousou no Frieren'
+    """
+    name = _strip_tags(filename)
+    
+    marker = _EPISODE_MARKERS.search(f' {name} ')
+    if marker and marker.start() > 1:
+        name = name[:marker.start() - 1]
+    
+    return ' '.join(name.strip(' -.').split())
+
+def extract_episode(filename):
+    """Número de episodio de un nombre de archivo, o None
+    
+    Solo se mira el nombre del archivo (nunca las carpetas) y ya sin grupos,
+    hashes CRC ni etiquetas técnicas. Un número suelto que parece un año no
+    cuenta como episodio.
+    """
+    name = f' {_strip_tags(filename)} '
+    for pattern in _EPISODE_NUMBERS[:-1]:
+        match = pattern.search(name)
+        if match:
+            return int(match.group(1)) or None
+    
+    for number in reversed(_EPISODE_NUMBERS[-1].findall(name)):
+        if not 1900 <= int(number) < 2100:
+            return int(number) or None
+    return None
+
+class TitleIndex:
+    
+    def __init__(self, aliases):
+        """aliases: lista de (mal_id, título)"""
+        self.exact = {}
+        self.entries = []
+        self.postings = {}
+        
+        for mal_id, title in aliases:
+            normalized = normalize(title)
+            if not normalized:
+                continue
+            self.exact.setdefault(normalized, mal_id)
+            
+            grams = trigrams(normalized)
+            position = len(self.entries)
+            self.entries.append((mal_id, grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(position)
+        
+        self.common_limit = max(MAX_CANDIDATES, int(len(self.entries) * COMMON_GRAM_RATIO))
+    
+    def match(self, title):
+        """Devolver (mal_id, puntuación) del mejor título o (None, 0.0)"""
+        normalized = normalize(title or '')
+        if not normalized:
+            return None, 0.0
+        
+        mal_id = self.exact.get(normalized)
+        if mal_id is not None:
+            return mal_id, 1.0
+        
+        grams = trigrams(normalized)
+        
+        # Filtrado: solo cuentan los trigramas poco frecuentes
+        counts = Counter()
+        for gram in grams:
+            positions = self.postings.get(gram)
+            if positions and len(positions) <= self.common_limit:
+                counts.update(positions)
+        
+        best_id, best_score = None, 0.0
+        for position, _ in counts.most_common(MAX_CANDIDATES):
+            mal_id, entry_grams = self.entries[position]
+            score = 2.0 * len(grams & entry_grams) / (len(grams) + len(entry_grams))
+            if score > best_score:
+                best_id, best_score = mal_id, score
+        
+        if best_score < MIN_SCORE:
+            return None, best_score
+        return best_id, best_score
+    
+    def match_filename(self, filename):
+        """Emparejar un nombre de archivo completo"""
+        return self.match(clean_filename(filename))
+
+_index = None
+_signature = None
+_data_version = None
+_lock = threading.Lock()
+
+def get_index():
+    """Índice de la lista local, reconstruido solo cuando la lista cambia
+    
+    La firma de la lista recorre anime_list (~1 ms con 10k filas, más que
+    el propio emparejamiento); solo se calcula si la base ha cambiado
+    desde la última comprobación.
+    """
+    global _index, _signature, _data_version
+    
+    data_version = local_database.get_data_version()
+    with _lock:
+        if _index is not None and data_version == _data_version:
+            return _index
+    
+    signature = local_database.get_library_signature()
+    with _lock:
+        if _index is None or signature != _signature:
+            _index = TitleIndex(local_database.get_title_aliases())
+            _signature = signature
+        _data_version = data_version
+        return _index
+
+def invalidate():
+    """Forzar la reconstrucción del índice en el próximo uso"""
+    global _index
+    with _lock:
+        _index = None
@@ -1,4 +1,5 @@
 import re
+import functools
 
 class SimpleTranslator:
     # Diccionario de traducciones comunes
@@ -139,22 +140,50 @@ class SimpleTranslator:
         'Other': 'Otro'
     }
     
+    # Tamaño de la caché de traducciones (LRU)
+    CACHE_SIZE = 4096
+    
+    # Campos de texto y listas de nombres que se traducen en lote
+    RECORD_FIELDS = ('status', 'type', 'rating', 'source')
+    RECORD_LISTS = ('genres', 'themes', 'demographics')
+    
+    _pattern = None
+    _lookup = None
+    
     @staticmethod
-    def translate_text(text):
-        """Traducir texto usando el diccionario"""
-        if not text or not isinstance(text, str):
-            return text
-            
+    def _compile():
+        """Compilar una sola alternancia con todas las claves
+        
+        Las claves más largas van primero para que 'Slice of Life' gane a
+        'Life' y las frases se traduzcan en una única pasada.
+        """
+        if SimpleTranslator._pattern is None:
+            keys = sorted(SimpleTranslator.TRANSLATIONS, key=len, reverse=True)
+            SimpleTranslator._lookup = {key.lower(): value for key, value in SimpleTranslator.TRANSLATIONS.items()}
+            SimpleTranslator._pattern = re.compile(
+                r'\b(?:' + '|'.join(re.escape(key) for key in keys) + r')\b',
+                re.IGNORECASE
+            )
+        return SimpleTranslator._pattern
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=CACHE_SIZE)
+    def _translate_cached(text):
         # Traducción directa
         if text in SimpleTranslator.TRANSLATIONS:
             return SimpleTranslator.TRANSLATIONS[text]
         
         # Traducción parcial para frases
-        translated = text
-        for english, spanish in SimpleTranslator.TRANSLATIONS.items():
-            translated = re.sub(r'\b' + re.escape(english) + r'\b', spanish, translated, flags=re.IGNORECASE)
-        
-        return translated
+        pattern = SimpleTranslator._compile()
+        lookup = SimpleTranslator._lookup
+        return pattern.sub(lambda match: lookup[match.group(0).lower()], text)
+    
+    @staticmethod
+    def translate_text(text):
+        """Traducir texto usando el diccionario"""
+        if not text or not isinstance(text, str):
+            return text
+        return SimpleTranslator._translate_cached(text)
     
     @staticmethod
     def translate_list(items):
@@ -210,4 +239,24 @@ class SimpleTranslator:
         if 'demographics' in translated:
             translated['demographics_es'] = SimpleTranslator.translate_genres(translated['demographics'])
         
-        return translated
\ No newline at end of file
+        return translated
+    
+    @staticmethod
+    def translate_records(records, suffix='_es'):
+        """Traducir una página de resultados de Jikan in situ
+        
+        Añade <campo>_es para estado, tipo, clasificación y fuente, y
+        <lista>_es para géneros, temas y demografías
+        """
+        if not records:
+            return records
+        
+        translate = SimpleTranslator.translate_text
+        for record in records:
+            for field in SimpleTranslator.RECORD_FIELDS:
+                if field in record:
+                    record[field + suffix] = translate(record[field] or '')
+            for field in SimpleTranslator.RECORD_LISTS:
+                if field in record:
+                    record[field + suffix] = SimpleTranslator.translate_genres(record[field])
+        return records
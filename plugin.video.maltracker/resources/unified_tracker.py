@@ -1,12 +1,9 @@
-import xbmcaddon
-from . import auth, mal_api, anilist_auth, anilist_api
-
-addon = xbmcaddon.Addon()
+from . import config, auth, mal_api, anilist_auth, anilist_api
 
 def get_active_service():
     """Determina qué servicio usar basado en configuración"""
-    mal_configured = bool(addon.getSetting('client_id'))
-    anilist_configured = bool(addon.getSetting('anilist_client_id'))
+    mal_configured = bool(config.CLIENT_ID)
+    anilist_configured = bool(config.ANILIST_CLIENT_ID)
     
     if mal_configured and anilist_configured:
         if auth.load_access_token():
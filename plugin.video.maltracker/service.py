@@ -0,0 +1,4 @@
+from resources import background_service
+
+if __name__ == '__main__':
+    background_service.run()
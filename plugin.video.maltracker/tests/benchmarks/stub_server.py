@@ -0,0 +1,83 @@
+"""Servidor HTTP local para los benchmarks (keep-alive, latencia inyectada)"""
+
+import json
+import time
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubServer:
+    """Responde JSON en localhost y cuenta conexiones TCP y peticiones
+    
+    routes(path, query, headers) devuelve (estado, cuerpo, cabeceras) o None
+    para 404; delay(path) da la latencia en segundos de cada respuesta.
+    """
+    
+    def __init__(self, routes, delay=None):
+        self.routes = routes
+        self.delay = delay or (lambda path: 0)
+        self.connections = 0
+        self.requests = []
+        self.lock = threading.Lock()
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Cabeceras y cuerpo en un solo envío (sin esperas de Nagle/ACK retardado)
+            disable_nagle_algorithm = True
+            wbufsize = -1
+            
+            def setup(self):
+                super().setup()
+                with stub.lock:
+                    stub.connections += 1
+            
+            def do_GET(self):
+                stub.handle(self)
+            
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                stub.handle(self)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+    
+    def handle(self, handler):
+        url = urllib.parse.urlsplit(handler.path)
+        with self.lock:
+            self.requests.append(url.path)
+        
+        time.sleep(self.delay(url.path))
+        result = self.routes(url.path, dict(urllib.parse.parse_qsl(url.query)), handler.headers)
+        status, body, headers = result if result else (404, {'error': 'not found'}, {})
+        
+        data = b'' if status == 304 else json.dumps(body).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+    
+    def reset_counters(self):
+        with self.lock:
+            self.connections = 0
+            self.requests = []
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def report(title, rows):
+    """Imprimir una tabla de resultados"""
+    print(f'\n{title}')
+    width = max(len(str(row[0])) for row in rows)
+    for label, *values in rows:
+        print(f'  {str(label).ljust(width)}  ' + '  '.join(str(value).rjust(12) for value in values))
@@ -0,0 +1,69 @@
+"""Benchmark user-021: 100k acciones auditadas, INSERT en SQLite vs reescritura de audit_log.json"""
+
+import hashlib
+import json
+import os
+import time
+from stub_server import report
+from resources import audit_log
+
+APPENDS = 100000
+BATCH = 10000
+LEGACY_APPENDS = 2000
+
+def make_entry(n):
+    """Entrada con los campos de implement_audit_logging"""
+    return {
+        'timestamp': int(time.time()),
+        'iso_timestamp': time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime()),
+        'action': 'data_access',
+        'user_id': 'user',
+        'details': f'Accessed anime {n}',
+        'system_fingerprint': hashlib.sha256(b'fingerprint').hexdigest(),
+        'session_token': None,
+        'ip_hash': hashlib.sha256(b'localhost').hexdigest()
+    }
+
+def legacy_append(audit_file, entry):
+    """implement_audit_logging anterior: cargar, anexar, recortar a 1000 y reescribir"""
+    entries = []
+    if os.path.exists(audit_file):
+        with open(audit_file, 'r') as f:
+            entries = json.load(f)
+    entries.append(entry)
+    if len(entries) > 1000:
+        entries = entries[-1000:]
+    with open(audit_file, 'w') as f:
+        json.dump(entries, f, indent=2)
+
+def per_append_us(func, start, count):
+    started = time.perf_counter()
+    for n in range(start, start + count):
+        func(make_entry(n))
+    return (time.perf_counter() - started) * 1e6 / count
+
+def test_audited_appends(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_log, 'AUDIT_DB_PATH', str(tmp_path / 'audit_log.db'))
+    monkeypatch.setattr(audit_log, 'LEGACY_AUDIT_FILE', str(tmp_path / 'audit_log.json'))
+    monkeypatch.setattr(audit_log, '_connection', None)
+    
+    legacy_file = str(tmp_path / 'legacy_audit_log.json')
+    legacy = [per_append_us(lambda entry: legacy_append(legacy_file, entry), start, 1000)
+              for start in range(0, LEGACY_APPENDS, 1000)]
+    
+    batches = [per_append_us(audit_log.append, start, BATCH) for start in range(0, APPENDS, BATCH)]
+    try:
+        stored = audit_log.count()
+        last_minute = sum(1 for _ in audit_log.iter_entries(since=time.time() - 60))
+    finally:
+        audit_log._connection.close()
+    
+    rows = [('', 'µs/anexado')]
+    rows += [(f'antes: JSON, anexados {start + 1}-{start + 1000}', round(us)) for start, us in zip(range(0, LEGACY_APPENDS, 1000), legacy)]
+    rows += [(f'después: SQLite, anexados {start + 1}-{start + BATCH}', round(us)) for start, us in zip(range(0, APPENDS, BATCH), batches)]
+    report(f'Registro de auditoría ({APPENDS} anexados; el JSON anterior solo guardaba 1000)', rows)
+    
+    assert stored == APPENDS and last_minute == APPENDS
+    # Coste constante: el último lote no es más caro que el primero
+    assert batches[-1] < batches[0] * 2
+    assert max(batches) < legacy[-1] / 5
@@ -0,0 +1,91 @@
+"""Benchmark user-007: sincronización completa de 5000 entradas, anime a anime vs en bloque"""
+
+import time
+from stub_server import report
+from resources import local_database, sync_manager
+
+COUNT = 5000
+
+def remote_list(count=COUNT, changed=()):
+    """Entradas sintéticas con el formato de la lista de MAL"""
+    entries = []
+    for mal_id in range(1, count + 1):
+        status = 'completed' if mal_id in changed else ('watching', 'plan_to_watch', 'on_hold')[mal_id % 3]
+        entries.append({
+            'node': {'id': mal_id, 'title': f'Anime {mal_id}', 'num_episodes': 12 + mal_id % 40,
+                     'synopsis': 'x' * 300, 'mean': 7.5, 'rank': mal_id, 'popularity': mal_id,
+                     'main_picture': {'medium': f'https://cdn.example/{mal_id}.jpg'},
+                     'genres': [{'name': 'Action'}, {'name': 'Drama'}], 'studios': [{'name': f'Studio {mal_id % 50}'}],
+                     'start_season': {'year': 2000 + mal_id % 25}},
+            'list_status': {'status': status, 'num_episodes_watched': mal_id % 12, 'score': mal_id % 10}
+        })
+    return entries
+
+def per_entry_sync(entries):
+    """Bucle anterior de sync_with_mal: add_anime_to_list + update_anime_status por anime"""
+    for entry in entries:
+        anime, list_status = entry['node'], entry['list_status']
+        local_database.add_anime_to_list({
+            'mal_id': anime['id'], 'title': anime['title'], 'episodes': anime['num_episodes'],
+            'images': anime['main_picture'], 'synopsis': anime['synopsis'], 'genres': anime['genres'],
+            'studios': anime['studios'], 'score': anime['mean'], 'rank': anime['rank'],
+            'popularity': anime['popularity']
+        }, list_status['status'])
+        local_database.update_anime_status(anime['id'], list_status['status'],
+                                           list_status['num_episodes_watched'], list_status['score'])
+
+def bulk_sync(entries):
+    return local_database.bulk_upsert_anime([sync_manager.normalize_mal_entry(entry) for entry in entries])
+
+def fresh_database(monkeypatch, path, legacy_durability=False):
+    local_database.close_connection()
+    monkeypatch.setattr(local_database, 'DB_PATH', str(path))
+    assert local_database.init_database()
+    if legacy_durability:
+        # Antes cada conexión usaba el diario clásico con synchronous=FULL
+        conn = local_database.get_connection()
+        conn.execute('PRAGMA journal_mode=DELETE')
+        conn.execute('PRAGMA synchronous=FULL')
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+def activity_rows():
+    with local_database.transaction() as cursor:
+        cursor.execute('SELECT COUNT(*) FROM activity_log')
+        return cursor.fetchone()[0]
+
+def test_full_list_sync(tmp_path, monkeypatch):
+    entries = remote_list()
+    changed = remote_list(changed=set(range(1, COUNT + 1, 100)))
+    
+    try:
+        fresh_database(monkeypatch, tmp_path / 'legacy.db', legacy_durability=True)
+        legacy, _ = timed(per_entry_sync, entries)
+        legacy_log = activity_rows()
+        
+        fresh_database(monkeypatch, tmp_path / 'per_entry.db')
+        per_entry, _ = timed(per_entry_sync, entries)
+        
+        fresh_database(monkeypatch, tmp_path / 'bulk.db')
+        bulk, counts = timed(bulk_sync, entries)
+        resync, unchanged = timed(bulk_sync, entries)
+        delta, updated = timed(bulk_sync, changed)
+        bulk_log = activity_rows()
+    finally:
+        local_database.close_connection()
+    
+    report(f'Sincronización completa de {COUNT} entradas', [
+        ('', 'tiempo (s)', 'activity_log'),
+        ('antes: por anime (diario + FULL)', round(legacy, 2), legacy_log),
+        ('antes: por anime (WAL + NORMAL)', round(per_entry, 2), ''),
+        ('después: en bloque, primera vez', round(bulk, 2), ''),
+        ('después: en bloque, sin cambios', round(resync, 2), ''),
+        ('después: en bloque, 50 cambios', round(delta, 2), bulk_log)
+    ])
+    assert counts['added'] == COUNT
+    assert unchanged['unchanged'] == COUNT
+    assert updated['updated'] == 50
+    assert bulk < per_entry / 3
@@ -0,0 +1,77 @@
+"""Benchmark user-004: ficha de anime con sub-endpoints secuenciales vs concurrentes"""
+
+import time
+import urllib.parse
+import pytest
+
+pytest.importorskip('requests')
+
+from stub_server import StubServer, report
+from resources import rate_limiter, response_cache
+from resources.jikan_complete import JikanComplete
+
+# Latencias inyectadas por sección (segundos)
+DELAYS = {'full': 0.30, 'characters': 0.25, 'staff': 0.20, 'episodes': 0.40, 'news': 0.15,
+          'pictures': 0.10, 'statistics': 0.15, 'recommendations': 0.20, 'relations': 0.10}
+SLOWEST = max(DELAYS.values())
+
+def routes(path, query, headers):
+    return 200, {'data': {'path': path}}, {}
+
+def section_delay(path):
+    return DELAYS.get(path.rstrip('/').rsplit('/', 1)[-1], 0)
+
+def sequential_with_sleeps(anime_id):
+    """Comportamiento anterior: una sección tras otra con time.sleep(0.5) antes de cada una"""
+    result = {'mal_id': anime_id}
+    for name in JikanComplete.ANIME_DETAIL_SECTIONS:
+        time.sleep(0.5)
+        response = getattr(JikanComplete, f'get_anime_{name}')(anime_id)
+        result[name] = response.get('data') if isinstance(response, dict) else None
+    return result
+
+def timed(func, anime_id):
+    started = time.perf_counter()
+    result = func(anime_id)
+    assert all(result[name] for name in JikanComplete.ANIME_DETAIL_SECTIONS)
+    return time.perf_counter() - started
+
+def test_detail_page_latency(tmp_path, monkeypatch):
+    server = StubServer(routes, delay=section_delay)
+    host = urllib.parse.urlsplit(server.base_url).netloc
+    monkeypatch.setattr(JikanComplete, 'BASE_URL', f'{server.base_url}/v4')
+    monkeypatch.setattr(response_cache, 'CACHE_DB_PATH', str(tmp_path / 'http_cache.db'))
+    monkeypatch.setattr(response_cache, '_connection', None)
+    
+    def with_bucket(capacity, rate, window=None):
+        monkeypatch.setitem(rate_limiter._buckets, host, rate_limiter.TokenBucket(capacity, rate, window=window))
+    
+    try:
+        # Cada medición usa otro anime: nada sale de la caché de respuestas
+        with_bucket(100, 1000)
+        before = timed(sequential_with_sleeps, 1)
+        with_bucket(100, 1000)
+        unlimited = timed(JikanComplete.get_anime_aggregate, 2)
+        with_bucket(*rate_limiter.HOST_POLICIES['api.jikan.moe'], window=rate_limiter.HOST_WINDOWS['api.jikan.moe'])
+        limited = timed(JikanComplete.get_anime_aggregate, 3)
+        cached = timed(JikanComplete.get_anime_aggregate, 3)
+    finally:
+        server.close()
+    
+    sections = len(JikanComplete.ANIME_DETAIL_SECTIONS)
+    report(f'Ficha con {sections} secciones (sección más lenta: {SLOWEST * 1000:.0f} ms)', [
+        ('', 'tiempo (ms)'),
+        ('antes: secuencial + sleep(0.5)', round(before * 1000)),
+        ('después: 4 hilos, sin límite', round(unlimited * 1000)),
+        ('después: 4 hilos, límites de Jikan', round(limited * 1000)),
+        ('después: segunda visita (caché)', round(cached * 1000))
+    ])
+    assert before > sum(DELAYS.values()) + 0.5 * sections
+    # Cuatro hilos para nueve secciones: como mucho tres tandas
+    assert unlimited < 3 * SLOWEST
+    # Con los límites de Jikan (3 req/s y 60 req/min) la ráfaga inicial sale
+    # al momento y el resto a 3 peticiones/s
+    capacity, rate = rate_limiter.HOST_POLICIES['api.jikan.moe']
+    assert limited < (sections - capacity) / rate + 2 * SLOWEST
+    assert limited < before / 2
+    assert cached < 0.1
@@ -0,0 +1,60 @@
+"""Benchmark user-001: sesión de navegación con conexiones nuevas vs sesiones persistentes
+
+Reproduce una sesión de menús (MAL, AniList y Jikan) contra tres servidores
+locales y cuenta las conexiones TCP abiertas en cada caso
+"""
+
+import time
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from stub_server import StubServer, report
+from resources import http_client, rate_limiter
+
+def routes(path, query, headers):
+    return 200, {'data': [{'id': n} for n in range(20)], 'path': path}, {}
+
+def browsing_session(mal, anilist, jikan):
+    """Peticiones de: menú principal, top, temporada, tres fichas, búsqueda y lista"""
+    session = [f'{jikan}/v4/top/anime', f'{jikan}/v4/seasons/now', f'{jikan}/v4/schedules/monday']
+    for mal_id in (1, 5, 20):
+        session += [f'{jikan}/v4/anime/{mal_id}/{part}' for part in
+                    ('full', 'characters', 'staff', 'episodes', 'videos', 'pictures', 'statistics', 'recommendations')]
+    session += [f'{mal}/v2/anime?q=naruto', f'{mal}/v2/users/@me', f'{mal}/v2/users/@me/animelist']
+    session += [f'{anilist}/graphql'] * 3
+    return session
+
+def replay(urls, get):
+    started = time.perf_counter()
+    for url in urls:
+        get(url).raise_for_status()
+    return time.perf_counter() - started
+
+def test_pooled_sessions_reuse_connections(monkeypatch):
+    monkeypatch.setattr(rate_limiter, 'acquire', lambda url: 0)
+    servers = [StubServer(routes) for _ in range(3)]
+    urls = browsing_session(*(server.base_url for server in servers))
+    
+    try:
+        # Antes: requests.get sin sesión (una conexión por petición)
+        before = replay(urls, lambda url: requests.get(url, timeout=10))
+        before_connections = sum(server.connections for server in servers)
+        
+        for server in servers:
+            server.reset_counters()
+        http_client.close_all()
+        after = replay(urls, lambda url: http_client.get(url))
+        after_connections = sum(server.connections for server in servers)
+    finally:
+        http_client.close_all()
+        for server in servers:
+            server.close()
+    
+    report(f'{len(urls)} peticiones en 3 hosts', [
+        ('', 'conexiones', 'tiempo (ms)'),
+        ('antes (requests.get)', before_connections, round(before * 1000, 1)),
+        ('después (http_client)', after_connections, round(after * 1000, 1))
+    ])
+    assert before_connections == len(urls)
+    assert after_connections == 3
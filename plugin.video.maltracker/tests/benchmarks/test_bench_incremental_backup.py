@@ -0,0 +1,97 @@
+"""Benchmark user-025: 30 backups diarios de una base de datos de 50 MB, incrementales vs zip completo"""
+
+import os
+import random
+import sqlite3
+import time
+from stub_server import report
+from resources import backup_system, incremental_backup
+
+TARGET_SIZE = 50 * 1024 * 1024
+DAYS = 30
+CHANGES_PER_DAY = 350
+WORDS = ('the a of and to in is was his her their after before world city school war love power secret '
+         'young girl boy hero demon king magic sword ship space team friends family dream journey battle '
+         'village academy island kingdom empire robot pilot detective idol band club summer winter').split()
+STATUSES = ['watching', 'completed', 'on_hold', 'dropped', 'plan_to_watch']
+
+def populate(database, rng):
+    """Lista local con sinopsis de ~1 KB hasta llegar a TARGET_SIZE"""
+    mal_id = 0
+    while os.path.getsize(database.DB_PATH) < TARGET_SIZE:
+        database.bulk_upsert_anime([{
+            'mal_id': mal_id + n,
+            'title': ' '.join(rng.choice(WORDS) for _ in range(3)).title(),
+            'status': rng.choice(STATUSES),
+            'episodes_watched': 0, 'total_episodes': rng.randint(1, 64), 'score': rng.randint(0, 10),
+            'synopsis': ' '.join(rng.choice(WORDS) for _ in range(180)),
+            'genres': ['Action', 'Drama'], 'studios': ['Studio'], 'year': rng.randint(1980, 2025)
+        } for n in range(1, 5001)])
+        mal_id += 5000
+    return mal_id
+
+def daily_changes(database, rng, count):
+    """Cambios dispersos de un día: progreso de episodios en filas al azar"""
+    for mal_id in rng.sample(range(1, count + 1), CHANGES_PER_DAY):
+        database.update_anime_status(mal_id, 'watching', episodes_watched=rng.randint(1, 64))
+
+def episodes(database, mal_ids):
+    with database.transaction() as cursor:
+        cursor.execute(f'SELECT mal_id, episodes_watched FROM anime_list WHERE mal_id IN ({",".join("?" * len(mal_ids))})', mal_ids)
+        return dict(cursor.fetchall())
+
+def test_daily_backups(database, tmp_path, monkeypatch):
+    incremental_dir = str(tmp_path / 'incremental')
+    monkeypatch.setattr(backup_system, 'BACKUP_DIR', str(tmp_path / 'full'))
+    monkeypatch.setattr(incremental_backup, 'INCREMENTAL_DIR', incremental_dir)
+    monkeypatch.setattr(incremental_backup, 'CHUNK_DIR', os.path.join(incremental_dir, 'chunks'))
+    monkeypatch.setattr(incremental_backup, 'MANIFEST_DIR', os.path.join(incremental_dir, 'manifests'))
+    os.makedirs(backup_system.BACKUP_DIR)
+    
+    rng = random.Random(25)
+    count = populate(database, rng)
+    db_size = os.path.getsize(database.DB_PATH)
+    probe = rng.sample(range(1, count + 1), 2000)
+    
+    full_bytes = 0
+    full_per_day, incremental_per_day, snapshots = [], [], []
+    for day in range(DAYS):
+        if day:
+            daily_changes(database, rng, count)
+        
+        started = time.perf_counter()
+        backup_path = backup_system.create_full_backup()
+        full_per_day.append(time.perf_counter() - started)
+        full_bytes += os.path.getsize(backup_path)
+        os.remove(backup_path)
+        
+        started = time.perf_counter()
+        manifest = backup_system.create_incremental_backup()
+        incremental_per_day.append(time.perf_counter() - started)
+        snapshots.append((manifest['id'], episodes(database, probe)))
+    
+    full_seconds, incremental_seconds = sum(full_per_day), sum(incremental_per_day)
+    incremental_bytes = incremental_backup.storage_size()
+    
+    # Restauración a mitad de la cadena
+    snapshot_id, expected = snapshots[DAYS // 2]
+    started = time.perf_counter()
+    incremental_backup.restore_snapshot(snapshot_id)
+    restore_seconds = time.perf_counter() - started
+    restored = episodes(database, probe)
+    with sqlite3.connect(database.DB_PATH) as conn:
+        integrity = conn.execute('PRAGMA integrity_check').fetchone()[0]
+    
+    mb = 1024 * 1024
+    report(f'{DAYS} backups diarios de {db_size / mb:.0f} MB ({CHANGES_PER_DAY} cambios por día)', [
+        ('', 'almacenado (MB)', 'total (s)', 'día 1 (s)', 'día 2+ (s)'),
+        ('antes: zip completo', round(full_bytes / mb, 1), round(full_seconds, 1),
+         round(full_per_day[0], 2), round(sum(full_per_day[1:]) / (DAYS - 1), 2)),
+        ('después: incremental', round(incremental_bytes / mb, 1), round(incremental_seconds, 1),
+         round(incremental_per_day[0], 2), round(sum(incremental_per_day[1:]) / (DAYS - 1), 2))
+    ])
+    print(f'  restauración del día {DAYS // 2 + 1}: {restore_seconds:.2f} s, integrity_check: {integrity}')
+    
+    assert restored == expected and integrity == 'ok'
+    assert incremental_bytes < full_bytes / 3
+    assert incremental_seconds < full_seconds
@@ -0,0 +1,55 @@
+"""Benchmark user-005: menú "Mi Lista Avanzada" con una conexión por consulta vs conexión compartida"""
+
+import contextlib
+import random
+import sqlite3
+import statistics
+import time
+from stub_server import report
+from resources import advanced_lists
+
+GENRES = ['Action', 'Comedy', 'Drama', 'Fantasy', 'Romance', 'Sci-Fi', 'Slice of Life']
+RUNS = 30
+
+def populate(database, count=2000):
+    rng = random.Random(5)
+    database.bulk_upsert_anime([{
+        'mal_id': mal_id, 'title': f'Anime {mal_id}',
+        'status': rng.choice(['watching', 'completed', 'on_hold', 'dropped', 'plan_to_watch']),
+        'episodes_watched': rng.randint(0, 24), 'total_episodes': rng.randint(1, 100),
+        'score': rng.randint(0, 10), 'genres': rng.sample(GENRES, 2), 'year': rng.randint(1990, 2025)
+    } for mal_id in range(1, count + 1)])
+
+def median_ms(func):
+    samples = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def test_advanced_list_menu_build(database, monkeypatch):
+    populate(database)
+    shared = median_ms(advanced_lists.get_advanced_list_menu)
+    
+    @contextlib.contextmanager
+    def connection_per_call():
+        # Patrón anterior: sqlite3.connect, consulta, commit y close en cada contador
+        conn = sqlite3.connect(database.DB_PATH)
+        try:
+            yield conn.cursor()
+            conn.commit()
+        finally:
+            conn.close()
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(database, 'transaction', connection_per_call)
+        per_call = median_ms(advanced_lists.get_advanced_list_menu)
+    
+    items = len(advanced_lists.get_advanced_list_menu())
+    report(f'Mi Lista Avanzada ({items} entradas, 2000 anime, mediana de {RUNS})', [
+        ('', 'tiempo (ms)'),
+        ('antes: una conexión por consulta', round(per_call, 2)),
+        ('después: conexión WAL compartida', round(shared, 2))
+    ])
+    assert shared < per_call
@@ -0,0 +1,96 @@
+"""Benchmark user-012: tiempo hasta el primer elemento de los listados públicos
+
+Cada visita es un proceso nuevo que ejecuta router() con xbmcplugin simulado;
+las peticiones a api.jikan.moe se redirigen a un servidor local lento
+"""
+
+import json
+import sqlite3
+import subprocess
+import sys
+import pytest
+
+pytest.importorskip('requests')
+
+from conftest import ADDON_DIR, subprocess_env
+from stub_server import StubServer, report
+
+LATENCY = 0.6
+LISTINGS = ['action=top_anime', 'action=seasonal', 'action=schedule_day&day=monday', 'action=upcoming']
+
+VISIT = '''
+import json, sys, threading, time
+stub_url, blocking, paramstrings = sys.argv[1], sys.argv[2] == '1', json.loads(sys.argv[3])
+sys.argv = ['plugin://plugin.video.maltracker/', '1', '']
+
+import xbmcplugin
+from resources import http_client, rate_limiter, response_cache
+rate_limiter.acquire = lambda url: 0
+request = http_client.request
+http_client.request = lambda method, url, **kwargs: request(method, url.replace('https://api.jikan.moe', stub_url), **kwargs)
+if blocking:
+    # Comportamiento anterior: una copia caducada se revalida antes de pintar
+    get_json = response_cache.get_json
+    response_cache.get_json = lambda url, stale_ok=False, **kwargs: get_json(url, **kwargs)
+
+import main
+first_item = []
+add_item = xbmcplugin.addDirectoryItem
+
+def timed_add(*args, **kwargs):
+    if not first_item:
+        first_item.append(time.perf_counter())
+    return add_item(*args, **kwargs)
+
+xbmcplugin.addDirectoryItem = timed_add
+results = []
+for paramstring in paramstrings:
+    del first_item[:]
+    started = time.perf_counter()
+    main.router(paramstring)
+    results.append((first_item[0] - started) * 1000)
+
+for thread in threading.enumerate():
+    if thread.name == 'MALTracker-CacheRefresh':
+        thread.join()
+print(json.dumps(results))
+'''
+
+def routes(path, query, headers):
+    anime = [{'mal_id': n, 'title': f'Anime {n}', 'score': 8.1, 'rank': n, 'episodes': 12,
+              'images': {'jpg': {'image_url': ''}}, 'synopsis': 'x' * 200} for n in range(1, 26)]
+    return 200, {'data': anime}, {}
+
+def visit(profile, server, blocking=False):
+    server.reset_counters()
+    result = subprocess.run([sys.executable, '-c', VISIT, server.base_url, '1' if blocking else '0', json.dumps(LISTINGS)],
+                            cwd=ADDON_DIR, env=subprocess_env(profile), capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1]), len(server.requests)
+
+def expire_all(profile):
+    with sqlite3.connect(profile / 'addon_data' / 'plugin.video.maltracker' / 'http_cache.db') as conn:
+        conn.execute('UPDATE responses SET expires_at = 0')
+
+def test_time_to_first_item(tmp_path):
+    server = StubServer(routes, delay=lambda path: LATENCY)
+    try:
+        cold = visit(tmp_path, server)
+        fresh = visit(tmp_path, server)
+        expire_all(tmp_path)
+        blocking = visit(tmp_path, server, blocking=True)
+        expire_all(tmp_path)
+        stale = visit(tmp_path, server)
+    finally:
+        server.close()
+    
+    rows = [('', *(listing.split('=', 1)[1].split('&')[0] for listing in LISTINGS), 'peticiones')]
+    for label, (times, requests) in (('sin caché', cold), ('caché vigente', fresh),
+                                     ('caducada, antes (revalida y pinta)', blocking),
+                                     ('caducada, después (pinta y revalida)', stale)):
+        rows.append((label, *(f'{ms:.1f} ms' for ms in times), requests))
+    report(f'Tiempo hasta el primer elemento ({LATENCY * 1000:.0f} ms de latencia)', rows)
+    
+    assert all(ms >= LATENCY * 1000 for ms in blocking[0])
+    assert max(stale[0]) < 100
+    # La copia caducada se refresca igualmente en segundo plano
+    assert stale[1] == len(LISTINGS)
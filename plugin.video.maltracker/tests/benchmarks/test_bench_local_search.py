@@ -0,0 +1,74 @@
+"""Benchmark user-016: búsqueda en la lista local de 20k anime, FTS5 vs LIKE vs recorrido en Python"""
+
+import random
+import statistics
+import time
+from stub_server import report
+
+COUNT = 20000
+RUNS = 5
+WORDS = ['shingeki', 'kyojin', 'sword', 'online', 'kimetsu', 'yaiba', 'boku', 'hero', 'academia', 'steins',
+         'gate', 'mahou', 'shoujo', 'kaguya', 'sama', 'tensei', 'slime', 'jujutsu', 'kaisen', 'spy', 'family']
+SYNOPSIS = ('In a world where humanity lives inside cities surrounded by enormous walls, a young boy swears '
+            'revenge after a tragedy. ') * 4
+QUERIES = ['kaisen', 'sword online', 'tensei slime', 'spy fam', 'kagu']
+
+def populate(database):
+    rng = random.Random(16)
+    database.bulk_upsert_anime([{
+        'mal_id': mal_id,
+        'title': ' '.join(rng.sample(WORDS, 3)).title() + f' {mal_id}',
+        'alternative_titles': ' '.join(rng.sample(WORDS, 2)),
+        'status': rng.choice(['watching', 'completed', 'plan_to_watch']),
+        'synopsis': SYNOPSIS, 'genres': ['Action', 'Drama'], 'studios': ['MAPPA'], 'year': 2020
+    } for mal_id in range(1, COUNT + 1)])
+
+def python_scan(database, query):
+    """Búsqueda anterior: cargar la lista entera y filtrar por subcadena del título"""
+    return [anime for anime in database.get_local_anime_list() if query.lower() in anime['title'].lower()]
+
+def like_scan(database, query):
+    """Recurso sin FTS5 de search_local_anime: LIKE sobre títulos, ordenado"""
+    columns = ', '.join(database._ANIME_COLUMNS)
+    with database.transaction() as cursor:
+        cursor.execute(f'''
+            SELECT {columns} FROM anime_list
+            WHERE title LIKE ? OR alternative_titles LIKE ?
+            ORDER BY title LIMIT 50
+        ''', (f'%{query}%', f'%{query}%'))
+        return cursor.fetchall()
+
+def median_ms(func):
+    samples = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        for query in QUERIES:
+            func(query)
+        samples.append((time.perf_counter() - started) * 1000 / len(QUERIES))
+    return statistics.median(samples)
+
+def test_local_search(database):
+    populate(database)
+    
+    with database.transaction() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name = 'anime_search'")
+        fts = cursor.fetchone() is not None
+    
+    scan = median_ms(lambda query: python_scan(database, query))
+    like = median_ms(lambda query: like_scan(database, query))
+    search = median_ms(database.search_local_anime)
+    
+    report(f'Búsqueda en mi lista ({COUNT} anime, media por consulta, mediana de {RUNS})', [
+        ('', 'tiempo (ms)'),
+        ('antes: lista completa + filtro en Python', round(scan, 2)),
+        ('LIKE sobre títulos (sin FTS5)', round(like, 2)),
+        ('después: FTS5 + bm25' if fts else 'después: recurso LIKE (sin FTS5)', round(search, 2))
+    ])
+    
+    # Palabras en cualquier orden: "family spy" también encuentra "Spy Yaiba Family"
+    found = {anime['mal_id'] for anime in database.search_local_anime('family spy', limit=COUNT)}
+    assert {anime['mal_id'] for anime in python_scan(database, 'family spy')} < found
+    assert all(set(map(str.lower, query.split())) <= set(result['title'].lower().split())
+               for query in ('kaisen', 'sword online') for result in database.search_local_anime(query)[:5])
+    if fts:
+        assert search < scan / 5
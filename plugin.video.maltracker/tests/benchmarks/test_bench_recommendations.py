@@ -0,0 +1,172 @@
+"""Benchmark user-019: puntuación de 50k candidatos, bucle por candidato vs matriz dispersa"""
+
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from conftest import ADDON_DIR, subprocess_env
+from stub_server import report
+from resources import ai_recommendations, recommendation_engine
+
+CANDIDATES = 50000
+LIBRARY = 300
+LIMIT = 20
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+GENRES = ['Action', 'Adventure', 'Comedy', 'Drama', 'Fantasy', 'Romance', 'Sci-Fi', 'Slice of Life', 'Sports',
+          'Mystery', 'Horror', 'Supernatural', 'Suspense', 'Award Winning', 'Ecchi', 'Gourmet']
+STUDIOS = [f'Studio {n}' for n in range(120)]
+
+def make_candidates(rng):
+    """Candidatos en formato Jikan"""
+    return [{
+        'mal_id': mal_id,
+        'title': f'Anime {mal_id}',
+        'score': round(rng.uniform(5, 9.2), 2),
+        'popularity': rng.randint(1, 20000),
+        'year': rng.randint(1985, 2025),
+        'genres': [{'name': name} for name in rng.sample(GENRES, rng.randint(1, 4))],
+        'studios': [{'name': rng.choice(STUDIOS)}]
+    } for mal_id in range(1, CANDIDATES + 1)]
+
+def make_library(rng):
+    """Biblioteca en formato de la base local (nombres como cadenas)"""
+    return [{
+        'mal_id': 1000000 + n,
+        'status': rng.choice(['completed', 'completed', 'watching', 'dropped']),
+        'score': rng.choice([0, 6, 7, 8, 9, 10]),
+        'year': rng.randint(2000, 2025),
+        'genres': rng.sample(GENRES[:8], 2),
+        'studios': [rng.choice(STUDIOS[:20])]
+    } for n in range(LIBRARY)]
+
+def legacy_score(anime, preferences):
+    """calculate_recommendation_score anterior"""
+    score = 0.0
+    base_score = anime.get('score', 0)
+    if base_score:
+        score += base_score * 0.3
+    anime_genres = [g.get('name', '') for g in anime.get('genres', [])]
+    score += len(set(anime_genres) & set(preferences['favorite_genres'])) * 2.0
+    anime_studios = [s.get('name', '') for s in anime.get('studios', [])]
+    score += len(set(anime_studios) & set(preferences['favorite_studios'])) * 1.5
+    popularity = anime.get('popularity', 0)
+    if popularity:
+        score += (10000 - popularity) / 1000
+    anime_year = anime.get('year', 0)
+    if anime_year and preferences['favorite_years']:
+        score -= min(abs(anime_year - year) for year in preferences['favorite_years']) * 0.1
+    return round(score, 2)
+
+def legacy_recommend(candidates, library):
+    """Bucle anterior: puntuar uno a uno, ordenar todo y quitar duplicados"""
+    preferences = ai_recommendations.get_user_preferences(library)
+    scored = sorted(((anime, legacy_score(anime, preferences)) for anime in candidates), key=lambda x: x[1], reverse=True)
+    unique, seen = [], set()
+    for anime, score in scored:
+        if anime['mal_id'] not in seen:
+            unique.append((anime, score))
+            seen.add(anime['mal_id'])
+            if len(unique) >= LIMIT:
+                break
+    return unique
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+def test_score_50k_candidates(monkeypatch):
+    rng = random.Random(19)
+    candidates = make_candidates(rng)
+    library = make_library(rng)
+    
+    _, legacy = timed(lambda: legacy_recommend(candidates, library))
+    
+    rows = [('', 'compilar (ms)', 'puntuar (ms)'), ('antes: bucle por candidato', '-', round(legacy, 1))]
+    results = {}
+    for label, numpy_enabled in (('después: Python puro', False), ('después: NumPy', True)):
+        if numpy_enabled and recommendation_engine.numpy is None:
+            rows.append((label, 'sin NumPy', '-'))
+            continue
+        monkeypatch.setattr(recommendation_engine, 'NUMPY_ENABLED', numpy_enabled)
+        matrix, build = timed(lambda: recommendation_engine.CandidateMatrix(candidates))
+        results[label], scoring = timed(lambda: matrix.recommend(library, LIMIT))
+        rows.append((label, round(build, 1), round(scoring, 1)))
+    
+    report(f'Recomendaciones: {CANDIDATES} candidatos, biblioteca de {LIBRARY}, top {LIMIT}', rows)
+    
+    pure = results['después: Python puro']
+    assert len(pure) == LIMIT
+    if 'después: NumPy' in results:
+        assert [anime['mal_id'] for anime, _ in results['después: NumPy']] == [anime['mal_id'] for anime, _ in pure]
+        assert rows[-1][2] < legacy / 10
+
+# Cada visita a "Recomendaciones" es un intérprete nuevo: se mide desde los
+# imports hasta tener el top 20 en un proceso recién arrancado
+SETUP = '''
+import os, random, sys, time
+sys.path[:0] = [sys.argv[1], os.path.dirname(sys.argv[1])]
+import test_bench_recommendations as bench
+from resources import anime_catalog, local_database, recommendation_engine
+
+local_database.init_database()
+rng = random.Random(19)
+anime_catalog.add_entries(bench.make_candidates(rng), 'import')
+local_database.bulk_upsert_anime([dict(anime, title=f'Mine {anime["mal_id"]}') for anime in bench.make_library(rng)])
+started = time.perf_counter()
+recommendation_engine.store_catalog_matrix()
+print((time.perf_counter() - started) * 1000)
+'''
+
+VISIT = '''
+import json, os, sys, time
+bench_dir, mode = sys.argv[1], sys.argv[2]
+if mode in ('legacy', 'stored_pure'):
+    sys.modules['numpy'] = None
+if mode == 'legacy':
+    # El bucle antiguo vive en este módulo, que arrastra pytest: se importa
+    # fuera del cronómetro (lo que favorece al "antes")
+    sys.path[:0] = [bench_dir, os.path.dirname(bench_dir)]
+    import test_bench_recommendations as bench
+started = time.perf_counter()
+from resources import ai_recommendations, anime_catalog, local_database, recommendation_engine
+
+if mode == 'legacy':
+    library = local_database.get_local_anime_list()
+    mine = {anime['mal_id'] for anime in library}
+    candidates = [anime for anime in anime_catalog.get_candidates() if anime['mal_id'] not in mine]
+    ids = [anime['mal_id'] for anime, _ in bench.legacy_recommend(candidates, library)]
+else:
+    if mode == 'compile':
+        # Comportamiento anterior de este cambio: compilar en cada proceso
+        recommendation_engine.get_catalog_matrix = lambda: recommendation_engine.get_matrix(anime_catalog.get_candidates())
+    ids = [anime['mal_id'] for anime in ai_recommendations.generate_recommendations(LIMIT)]
+print(json.dumps([(time.perf_counter() - started) * 1000, ids]))
+'''.replace('LIMIT', str(LIMIT))
+
+def run_script(script, profile, *args):
+    result = subprocess.run([sys.executable, '-c', script, BENCH_DIR, *args], cwd=ADDON_DIR,
+                            env=subprocess_env(profile), capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+def test_cold_process_recommendations(tmp_path):
+    build = run_script(SETUP, tmp_path)
+    visits = {mode: [run_script(VISIT, tmp_path, mode) for _ in range(3)]
+              for mode in ('legacy', 'compile', 'stored_pure', 'stored')}
+    timings = {mode: statistics.median(ms for ms, _ in runs) for mode, runs in visits.items()}
+    
+    numpy_available = recommendation_engine.numpy is not None
+    report(f'Recomendaciones en un proceso nuevo ({CANDIDATES} candidatos, mediana de 3, imports incluidos)', [
+        ('', 'tiempo (ms)'),
+        ('antes: bucle por candidato', round(timings['legacy'])),
+        ('compilar la matriz en cada proceso', round(timings['compile'])),
+        ('después: matriz guardada, Python puro', round(timings['stored_pure'])),
+        ('después: matriz guardada' + (', NumPy' if numpy_available else ''), round(timings['stored'])),
+        ('servicio: compilar y guardar (una vez)', round(build))
+    ])
+    
+    assert visits['stored'][0][1] == visits['compile'][0][1]
+    assert timings['stored'] < timings['legacy'] and timings['stored'] < timings['compile']
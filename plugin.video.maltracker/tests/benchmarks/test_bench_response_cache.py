@@ -0,0 +1,77 @@
+"""Benchmark user-003: navegación repetida servida desde la caché en disco
+
+Cada "lanzamiento del plugin" es un proceso nuevo, como en Kodi; la caché
+debe sobrevivir entre procesos
+"""
+
+import json
+import sqlite3
+import subprocess
+import sys
+import pytest
+
+pytest.importorskip('requests')
+
+from conftest import ADDON_DIR, subprocess_env
+from stub_server import StubServer, report
+
+# Latencia típica de api.jikan.moe desde Europa
+LATENCY = 0.12
+PATHS = ['/v4/top/anime', '/v4/seasons/now', '/v4/seasons/upcoming', '/v4/schedules',
+         '/v4/anime/1/full', '/v4/anime/1/characters', '/v4/anime/5/full', '/v4/anime/5/characters',
+         '/v4/anime/20/full', '/v4/genres/anime']
+
+LAUNCH = '''
+import json, sys, time
+from resources import rate_limiter, response_cache
+rate_limiter.acquire = lambda url: 0
+base_url, use_cache = sys.argv[1], sys.argv[2] == '1'
+paths = json.loads(sys.argv[3])
+
+started = time.perf_counter()
+for path in paths:
+    if use_cache:
+        response_cache.get_json(base_url + path)
+    else:
+        response_cache.http_client.get(base_url + path).json()
+print((time.perf_counter() - started) * 1000)
+'''
+
+def routes(path, query, headers):
+    etag = f'"{hash(path) & 0xffffffff:x}"'
+    if headers.get('If-None-Match') == etag:
+        return 304, None, {'ETag': etag}
+    return 200, {'data': [{'mal_id': n, 'title': f'Anime {n}', 'synopsis': 'x' * 400} for n in range(25)]}, {'ETag': etag}
+
+def launch(profile, server, use_cache):
+    server.reset_counters()
+    result = subprocess.run([sys.executable, '-c', LAUNCH, server.base_url, '1' if use_cache else '0', json.dumps(PATHS)],
+                            cwd=ADDON_DIR, env=subprocess_env(profile), capture_output=True, text=True, check=True)
+    return float(result.stdout.split()[-1]), len(server.requests)
+
+def expire_all(profile):
+    db_path = profile / 'addon_data' / 'plugin.video.maltracker' / 'http_cache.db'
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('UPDATE responses SET expires_at = 0')
+
+def test_repeat_navigation_is_served_from_disk(tmp_path):
+    server = StubServer(routes, delay=lambda path: LATENCY)
+    try:
+        uncached = launch(tmp_path, server, use_cache=False)
+        cold = launch(tmp_path, server, use_cache=True)
+        warm = launch(tmp_path, server, use_cache=True)
+        expire_all(tmp_path)
+        revalidated = launch(tmp_path, server, use_cache=True)
+    finally:
+        server.close()
+    
+    report(f'{len(PATHS)} vistas de Jikan por lanzamiento ({LATENCY * 1000:.0f} ms de latencia)', [
+        ('', 'tiempo (ms)', 'peticiones'),
+        ('sin caché (cada lanzamiento)', round(uncached[0], 1), uncached[1]),
+        ('con caché, primer lanzamiento', round(cold[0], 1), cold[1]),
+        ('con caché, lanzamiento siguiente', round(warm[0], 1), warm[1]),
+        ('con caché, caducada (304)', round(revalidated[0], 1), revalidated[1])
+    ])
+    assert warm[1] == 0
+    assert warm[0] < uncached[0] / 10
+    assert revalidated[1] == len(PATHS)
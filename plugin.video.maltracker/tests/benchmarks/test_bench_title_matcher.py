@@ -0,0 +1,176 @@
+"""Benchmark user-017: auto-detección de títulos sobre una lista de 10k anime
+
+Corpus etiquetado de nombres de archivo reales; se compara el emparejamiento
+anterior (regex + subcadena sobre la lista completa) con el índice de trigramas
+"""
+
+import random
+import re
+import time
+from stub_server import report
+from resources import auto_detection, title_matcher
+
+DISTRACTORS = 10000
+
+# mal_id: (título, títulos alternativos)
+LIBRARY = {
+    1: ('Cowboy Bebop', ['カウボーイビバップ']),
+    20: ('Naruto', ['ナルト']),
+    21: ('One Piece', ['ワンピース']),
+    1735: ('Naruto: Shippuuden', ['Naruto Shippuden']),
+    5114: ('Fullmetal Alchemist: Brotherhood', ['Hagane no Renkinjutsushi: Fullmetal Alchemist']),
+    9253: ('Steins;Gate', ['シュタインズ・ゲート']),
+    9756: ('Mahou Shoujo Madoka★Magica', ['Puella Magi Madoka Magica']),
+    14813: ('Yahari Ore no Seishun Love Comedy wa Machigatteiru.', ['My Teen Romantic Comedy SNAFU', 'Oregairu']),
+    16498: ('Shingeki no Kyojin', ['Attack on Titan']),
+    30831: ('Kono Subarashii Sekai ni Shukufuku wo!', ['KonoSuba: God\'s Blessing on This Wonderful World!', 'KonoSuba']),
+    31240: ('Re:Zero kara Hajimeru Isekai Seikatsu', ['Re:ZERO -Starting Life in Another World-']),
+    31964: ('Boku no Hero Academia', ['My Hero Academia']),
+    32182: ('Mob Psycho 100', ['モブサイコ100']),
+    37430: ('Tensei shitara Slime Datta Ken', ['That Time I Got Reincarnated as a Slime']),
+    37521: ('Vinland Saga', ['ヴィンランド・サガ']),
+    37999: ('Kaguya-sama wa Kokurasetai: Tensai-tachi no Renai Zunousen', ['Kaguya-sama: Love is War']),
+    38000: ('Kimetsu no Yaiba', ['Demon Slayer: Kimetsu no Yaiba']),
+    40748: ('Jujutsu Kaisen', ['呪術廻戦']),
+    44511: ('Chainsaw Man', ['チェンソーマン']),
+    47917: ('Bocchi the Rock!', ['ぼっち・ざ・ろっく!']),
+    50265: ('Spy x Family', ['SPY×FAMILY']),
+    52034: ('Oshi no Ko', ['[Oshi no Ko]']),
+    52701: ('Dungeon Meshi', ['Delicious in Dungeon']),
+    52991: ('Sousou no Frieren', ['Frieren: Beyond Journey\'s End']),
+    54492: ('Kusuriya no Hitorigoto', ['The Apothecary Diaries']),
+}
+
+# Nombre de archivo -> mal_id esperado (None: no está en la lista)
+CORPUS = [
+    ('[SubsPlease] Sousou no Frieren - 05 (1080p) [ABCD1234].mkv', 52991),
+    ('Frieren Beyond Journeys End - 12 [WEB 1080p].mkv', 52991),
+    ('Attack.on.Titan.S01E05.1080p.BluRay.x264.mkv', 16498),
+    ('[HorribleSubs] Shingeki no Kyojin - 19 [720p].mkv', 16498),
+    ('[HorribleSubs] Kimetsu no Yaiba - 19 [720p].mkv', 38000),
+    ('[Judas] Boku no Hero Academia - S05E01.mkv', 31964),
+    ('My Hero Academia Episode 12.mp4', 31964),
+    ('[SubsPlease] Jujutsu Kaisen - 24 (1080p) [7A2B9C1D].mkv', 40748),
+    ('Spy x Family - 07 [1080p].mkv', 50265),
+    ('[Coalgirls]_Steins;Gate_05_(1280x720_Blu-ray_FLAC)_[2F4F71D3].mkv', 9253),
+    ('Kaguya-sama Love is War - 03 [1080p].mkv', 37999),
+    ('Tensei Shitara Slime Datta Ken - 12.mkv', 37430),
+    ('[Doki] Mahou Shoujo Madoka Magica - 03 (1920x1080 Hi10P BD FLAC).mkv', 9756),
+    ('KonoSuba - 05.mkv', 30831),
+    ('Re Zero kara Hajimeru Isekai Seikatsu - 18 [BD 1080p].mkv', 31240),
+    ('[Commie] Yahari Ore no Seishun Love Comedy wa Machigatteiru - 04 [ABC12345].mkv', 14813),
+    ('Mob.Psycho.100.S02E03.1080p.WEB.x264.mkv', 32182),
+    ('One Piece - 1071 (1080p).mkv', 21),
+    ('[SubsPlease] Naruto Shippuden - 200.mkv', 1735),
+    ('Naruto - 135 [DVD].avi', 20),
+    ('Fullmetal Alchemist Brotherhood - 64 [BD].mkv', 5114),
+    ('Chainsaw.Man.S01E08.1080p.mkv', 44511),
+    ('[SubsPlease] Bocchi the Rock! - 06 (1080p).mkv', 47917),
+    ('[SubsPlease] Oshi no Ko - 11 (1080p).mkv', 52034),
+    ('The Apothecary Diaries - 05.mkv', 54492),
+    ('[SubsPlease] Kusuriya no Hitorigoto - 14 (720p).mkv', 54492),
+    ('Delicious in Dungeon - 02 [1080p].mkv', 52701),
+    ('Vinland_Saga_-_05_[1080p].mkv', 37521),
+    ('Cowboy Bebop - 05.mkv', 1),
+    ('[SubsPlease] Mushoku Tensei - 05 (1080p).mkv', None),
+    ('Violet Evergarden - 03.mkv', None),
+    ('Family.Guy.S20E05.1080p.WEB.x264.mkv', None),
+    ('[Erai-raws] Sousou no Frieren Recap - 01 [1080p].mkv', None),
+    ('Home Video 2023.mp4', None),
+]
+
+SYLLABLES = ['ka', 'ki', 'ku', 'ko', 'sa', 'shi', 'su', 'ta', 'to', 'na', 'no', 'ha', 'ma', 'mi', 'ra', 'ri', 'ya', 'yo', 'to', 'ga']
+PARTICLES = ['no', 'wa', 'to', 'ga', 'ni']
+
+def populate(database):
+    rng = random.Random(17)
+    
+    def word():
+        return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+    
+    entries = [{'mal_id': mal_id, 'title': title, 'alternative_titles': '; '.join(aliases), 'status': 'watching'}
+               for mal_id, (title, aliases) in LIBRARY.items()]
+    for mal_id in range(100000, 100000 + DISTRACTORS):
+        title = f'{word()} {rng.choice(PARTICLES)} {word()}'
+        if rng.random() < 0.3:
+            title += f' {word()}'
+        entries.append({'mal_id': mal_id, 'title': title, 'alternative_titles': word(), 'status': 'plan_to_watch'})
+    database.bulk_upsert_anime(entries)
+
+def legacy_extract_title(filename):
+    """extract_title_from_filename anterior"""
+    patterns = [
+        r'\[.*?\]\s*(.+?)\s*-\s*\d+',
+        r'(.+?)\s*-\s*\d+',
+        r'(.+?)\s*EP?\d+',
+        r'(.+?)\s*Episode\s*\d+',
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, filename, re.IGNORECASE)
+        if match:
+            return re.sub(r'[^\w\s-]', '', match.group(1).strip()).strip()
+    return None
+
+def legacy_find(database, title):
+    """find_anime_in_database anterior: lista completa, exacto y luego subcadena"""
+    anime_list = database.get_local_anime_list()
+    for anime in anime_list:
+        if anime['title'].lower() == title.lower():
+            return anime
+    for anime in anime_list:
+        if title.lower() in anime['title'].lower() or anime['title'].lower() in title.lower():
+            return anime
+    return None
+
+def legacy_match(database, filename):
+    title = legacy_extract_title(filename)
+    anime = legacy_find(database, title) if title else None
+    return anime['mal_id'] if anime else None
+
+def indexed_match(filename):
+    title = auto_detection.extract_title_from_filename(filename)
+    anime = auto_detection.find_anime_in_database(title) if title else None
+    return anime['mal_id'] if anime else None
+
+def evaluate(match):
+    started = time.perf_counter()
+    found = [match(filename) for filename, _ in CORPUS]
+    latency = (time.perf_counter() - started) * 1000 / len(CORPUS)
+    
+    matched = sum(1 for mal_id in found if mal_id is not None)
+    correct = sum(1 for mal_id, (_, expected) in zip(found, CORPUS) if mal_id is not None and mal_id == expected)
+    positives = sum(1 for _, expected in CORPUS if expected is not None)
+    errors = [filename for mal_id, (filename, expected) in zip(found, CORPUS) if mal_id != expected]
+    return {
+        'precision': correct / matched if matched else 0.0,
+        'recall': correct / positives,
+        'latency': latency,
+        'errors': errors
+    }
+
+def test_title_matching_on_labeled_corpus(database):
+    populate(database)
+    title_matcher.invalidate()
+    
+    before = evaluate(lambda filename: legacy_match(database, filename))
+    started = time.perf_counter()
+    title_matcher.get_index()
+    build = (time.perf_counter() - started) * 1000
+    after = evaluate(indexed_match)
+    
+    report(f'Auto-detección: {len(CORPUS)} archivos etiquetados, {len(LIBRARY) + DISTRACTORS} títulos', [
+        ('', 'precisión', 'exhaustividad', 'ms/archivo', 'errores'),
+        ('antes: regex + subcadena', f'{before["precision"]:.0%}', f'{before["recall"]:.0%}',
+         round(before['latency'], 2), len(before['errors'])),
+        ('después: índice de trigramas', f'{after["precision"]:.0%}', f'{after["recall"]:.0%}',
+         round(after['latency'], 2), len(after['errors']))
+    ])
+    print(f'  construcción del índice: {build:.0f} ms')
+    for filename in after['errors']:
+        print(f'  fallo después: {filename}')
+    
+    assert after['precision'] >= 0.95 and after['recall'] >= 0.9
+    assert after['precision'] > before['precision'] and after['recall'] > before['recall']
+    assert after['latency'] < before['latency']
+    # Objetivo de la petición: menos de 1 ms por archivo
+    assert after['latency'] < 1.0
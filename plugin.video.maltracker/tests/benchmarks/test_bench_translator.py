@@ -0,0 +1,85 @@
+"""Benchmark user-015: traducción de 10k registros de Jikan, un re.sub por clave vs la alternancia precompilada"""
+
+import copy
+import random
+import re
+import time
+from stub_server import report
+from resources.translator import SimpleTranslator
+
+COUNT = 10000
+STATUSES = ['Finished Airing', 'Currently Airing', 'Not yet aired']
+TYPES = ['TV', 'Movie', 'OVA', 'ONA', 'Special', 'TV Special']
+RATINGS = ['PG-13 - Teens 13 or older', 'R - 17+ (violence & profanity)', 'G - All Ages', 'R+ - Mild Nudity']
+SOURCES = ['Manga', 'Light novel', 'Original', 'Web manga', 'Visual novel', 'Game']
+GENRES = ['Action', 'Adventure', 'Comedy', 'Drama', 'Fantasy', 'Romance', 'Sci-Fi', 'Slice of Life', 'Sports', 'Mystery']
+THEMES = ['School', 'Military', 'Music', 'Historical', 'Isekai', 'Mecha', 'Psychological']
+
+def legacy_translate_text(text):
+    """translate_text anterior: un re.sub por clave del diccionario"""
+    if not text or not isinstance(text, str):
+        return text
+    if text in SimpleTranslator.TRANSLATIONS:
+        return SimpleTranslator.TRANSLATIONS[text]
+    translated = text
+    for english, spanish in SimpleTranslator.TRANSLATIONS.items():
+        translated = re.sub(r'\b' + re.escape(english) + r'\b', spanish, translated, flags=re.IGNORECASE)
+    return translated
+
+def legacy_translate_records(records):
+    for record in records:
+        for field in SimpleTranslator.RECORD_FIELDS:
+            if field in record:
+                record[field + '_es'] = legacy_translate_text(record[field] or '')
+        for field in SimpleTranslator.RECORD_LISTS:
+            if field in record:
+                record[field + '_es'] = [legacy_translate_text(item['name']) for item in record[field]]
+    return records
+
+def make_records():
+    """Registros con valores repetidos y frases compuestas sin traducción exacta"""
+    rng = random.Random(15)
+    records = []
+    for mal_id in range(1, COUNT + 1):
+        records.append({
+            'mal_id': mal_id,
+            'status': rng.choice(STATUSES),
+            'type': rng.choice(TYPES),
+            'rating': rng.choice(RATINGS),
+            # Fuente compuesta (p. ej. "Manga / Web manga, Original"): nunca coincide entera
+            'source': ' / '.join(rng.sample(SOURCES, rng.randint(1, 3))),
+            'genres': [{'name': name} for name in rng.sample(GENRES, 3)],
+            'themes': [{'name': name} for name in rng.sample(THEMES, 2)],
+            'demographics': [{'name': rng.choice(['Shounen', 'Seinen', 'Shoujo', 'Josei'])}]
+        })
+    return records
+
+def timed(func, records):
+    started = time.perf_counter()
+    func(records)
+    return time.perf_counter() - started
+
+def test_translate_10k_records(monkeypatch):
+    records = make_records()
+    legacy = copy.deepcopy(records)
+    cold = copy.deepcopy(records)
+    uncached = copy.deepcopy(records)
+    
+    before = timed(legacy_translate_records, legacy)
+    SimpleTranslator._translate_cached.cache_clear()
+    after_cold = timed(SimpleTranslator.translate_records, cold)
+    with monkeypatch.context() as patch:
+        # Solo la alternancia, sin la memoización LRU
+        patch.setattr(SimpleTranslator, '_translate_cached', staticmethod(SimpleTranslator._translate_cached.__wrapped__))
+        regex_only = timed(SimpleTranslator.translate_records, uncached)
+    
+    distinct = len({record['source'] for record in records})
+    report(f'Traducción de {COUNT} registros de Jikan ({distinct} fuentes compuestas distintas)', [
+        ('', 'tiempo (ms)'),
+        ('antes: re.sub por clave', round(before * 1000, 1)),
+        ('después: alternancia sin LRU', round(regex_only * 1000, 1)),
+        ('después: alternancia + LRU (caché vacía)', round(after_cold * 1000, 1))
+    ])
+    
+    assert cold == legacy and uncached == legacy
+    assert after_cold < before / 10
@@ -0,0 +1,52 @@
+"""
+Entorno de pruebas fuera de Kodi
+Los módulos xbmc* se sustituyen por los de tests/kodi_stubs y el perfil del
+addon apunta a un directorio temporal
+
+Los benchmarks de tests/benchmarks solo se ejecutan con --benchmarks:
+    python -m pytest tests/benchmarks --benchmarks -s
+"""
+
+import os
+import sys
+import tempfile
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(TESTS_DIR)
+STUBS_DIR = os.path.join(TESTS_DIR, 'kodi_stubs')
+
+os.environ.setdefault('MALTRACKER_TEST_PROFILE', tempfile.mkdtemp(prefix='maltracker_profile_'))
+sys.path[:0] = [STUBS_DIR, ADDON_DIR]
+
+def pytest_addoption(parser):
+    parser.addoption('--benchmarks', action='store_true', help='ejecutar tests/benchmarks (lentos)')
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--benchmarks'):
+        return
+    skip = pytest.mark.skip(reason='benchmark: usar --benchmarks')
+    benchmarks_dir = os.path.join(TESTS_DIR, 'benchmarks')
+    for item in items:
+        if str(item.fspath).startswith(benchmarks_dir):
+            item.add_marker(skip)
+
+def subprocess_env(profile):
+    """Entorno para lanzar otro intérprete con los mismos módulos de prueba"""
+    env = dict(os.environ)
+    env['MALTRACKER_TEST_PROFILE'] = str(profile)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [STUBS_DIR, ADDON_DIR, env.get('PYTHONPATH')]))
+    return env
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Base de datos local vacía y con el esquema actual en un directorio temporal"""
+    from resources import local_database, state_store
+    
+    local_database.close_connection()
+    monkeypatch.setattr(local_database, 'DB_PATH', str(tmp_path / 'mal_tracker.db'))
+    state_store.reload()
+    assert local_database.init_database()
+    yield local_database
+    local_database.close_connection()
+    state_store.reload()
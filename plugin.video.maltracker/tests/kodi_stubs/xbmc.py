@@ -0,0 +1,46 @@
+"""Módulo xbmc mínimo para ejecutar el addon fuera de Kodi"""
+
+LOGDEBUG, LOGINFO, LOGWARNING, LOGERROR, LOGFATAL = 0, 1, 2, 3, 4
+LOGNOTICE = LOGINFO
+
+logs = []
+
+def log(msg, level=LOGDEBUG):
+    logs.append((level, msg))
+
+def sleep(ms):
+    pass
+
+def executebuiltin(function, wait=False):
+    pass
+
+def getCondVisibility(condition):
+    return False
+
+def getInfoLabel(label):
+    return ''
+
+class Monitor:
+    
+    def abortRequested(self):
+        return False
+    
+    def waitForAbort(self, timeout=None):
+        return False
+
+class Player:
+    
+    def isPlaying(self):
+        return False
+    
+    def isPlayingVideo(self):
+        return False
+    
+    def getPlayingFile(self):
+        return ''
+    
+    def getTime(self):
+        return 0
+    
+    def getTotalTime(self):
+        return 0
@@ -0,0 +1,34 @@
+"""Módulo xbmcaddon mínimo; cuenta las instancias de Addon creadas"""
+
+import os
+
+calls = []
+
+class Addon:
+    
+    def __init__(self, id=None):
+        calls.append(id)
+        self.settings = {}
+    
+    def getSetting(self, key):
+        return self.settings.get(key, '')
+    
+    def setSetting(self, key, value):
+        self.settings[key] = value
+    
+    def getAddonInfo(self, key):
+        return {
+            'id': 'plugin.video.maltracker',
+            'name': 'MAL Tracker',
+            'version': '0.0.0',
+            'icon': '',
+            'fanart': '',
+            'path': os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            'profile': os.environ['MALTRACKER_TEST_PROFILE']
+        }.get(key, '')
+    
+    def getLocalizedString(self, string_id):
+        return ''
+    
+    def openSettings(self):
+        pass
@@ -0,0 +1,33 @@
+"""Módulo xbmcgui mínimo: los diálogos no muestran nada y devuelven None"""
+
+NOTIFICATION_INFO = 'info'
+NOTIFICATION_WARNING = 'warning'
+NOTIFICATION_ERROR = 'error'
+INPUT_ALPHANUM = 0
+INPUT_NUMERIC = 1
+ALPHANUM_HIDE_INPUT = 2
+
+class Dialog:
+    
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+class DialogProgress(Dialog):
+    pass
+
+class DialogProgressBG(Dialog):
+    pass
+
+class Window(Dialog):
+    
+    def __init__(self, window_id=None):
+        pass
+
+class ListItem:
+    
+    def __init__(self, label='', label2='', path='', offscreen=False):
+        self.label = label
+        self.path = path
+    
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
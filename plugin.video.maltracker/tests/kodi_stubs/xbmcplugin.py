@@ -0,0 +1,34 @@
+"""Módulo xbmcplugin mínimo; guarda los elementos añadidos a cada directorio"""
+
+SORT_METHOD_NONE = 0
+SORT_METHOD_TITLE = 1
+SORT_METHOD_VIDEO_RATING = 2
+SORT_METHOD_LABEL = 3
+SORT_METHOD_DATE = 4
+SORT_METHOD_PLAYCOUNT = 5
+
+items = []
+directories = []
+
+def addDirectoryItem(handle, url, listitem, isFolder=False, totalItems=0):
+    items.append((url, listitem, isFolder))
+    return True
+
+def addDirectoryItems(handle, entries, totalItems=0):
+    items.extend(entries)
+    return True
+
+def endOfDirectory(handle, succeeded=True, updateListing=False, cacheToDisc=True):
+    directories.append(succeeded)
+
+def setContent(handle, content):
+    pass
+
+def setPluginCategory(handle, category):
+    pass
+
+def addSortMethod(handle, sortMethod, label2Mask=''):
+    pass
+
+def setResolvedUrl(handle, succeeded, listitem):
+    pass
@@ -0,0 +1,19 @@
+"""Módulo xbmcvfs mínimo: special://profile apunta a MALTRACKER_TEST_PROFILE"""
+
+import os
+
+def translatePath(path):
+    if path.startswith('special://profile/'):
+        return os.path.join(os.environ['MALTRACKER_TEST_PROFILE'], path[len('special://profile/'):])
+    return path
+
+def exists(path):
+    return os.path.exists(path)
+
+def mkdirs(path):
+    os.makedirs(path, exist_ok=True)
+    return True
+
+def delete(path):
+    os.remove(path)
+    return True
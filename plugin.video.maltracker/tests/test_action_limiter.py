@@ -0,0 +1,85 @@
+"""Límite de intentos compartido entre varios procesos"""
+
+import json
+import subprocess
+import sys
+from conftest import subprocess_env
+from resources import action_limiter
+
+WORKER = '''
+import json, sys
+from resources import local_database, action_limiter
+
+action, attempts, limit, window = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4])
+if attempts == 0:
+    sys.exit(0 if local_database.init_database() else 1)
+
+sys.stdin.readline()
+results = [action_limiter.check(action, max_attempts=limit, window=window) for _ in range(attempts)]
+print(json.dumps(results))
+'''
+
+# Ventana muy larga: ningún tramo cambia durante la prueba
+WINDOW = 10 ** 9
+
+def run_workers(profile, action, processes, attempts, limit):
+    env = subprocess_env(profile)
+    subprocess.run([sys.executable, '-c', WORKER, action, '0', '0', '0'], env=env, check=True)
+    
+    workers = [subprocess.Popen([sys.executable, '-c', WORKER, action, str(attempts), str(limit), str(WINDOW)],
+                                env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+               for _ in range(processes)]
+    # Arrancar todos a la vez, ya importados
+    for worker in workers:
+        worker.stdin.write('go\n')
+        worker.stdin.flush()
+    
+    results = []
+    for worker in workers:
+        output, _ = worker.communicate(timeout=120)
+        assert worker.returncode == 0
+        results.extend(json.loads(output))
+    return results
+
+def test_limit_holds_across_processes(tmp_path):
+    results = run_workers(tmp_path, 'login', processes=8, attempts=60, limit=100)
+    
+    assert len(results) == 480
+    assert sum(allowed for allowed, _ in results) == 100
+    assert all(retry_after >= 1 for allowed, retry_after in results if not allowed)
+
+def test_denied_attempts_do_not_count(database):
+    for _ in range(3):
+        assert action_limiter.check('pin', max_attempts=3, window=WINDOW) == (True, 0)
+    
+    for _ in range(10):
+        allowed, retry_after = action_limiter.check('pin', max_attempts=3, window=WINDOW)
+        assert not allowed and retry_after > 0
+    
+    with database.transaction() as cursor:
+        cursor.execute('SELECT SUM(count) FROM action_limits WHERE action = ?', ('pin',))
+        assert cursor.fetchone()[0] == 3
+
+def test_reset_and_actions_are_independent(database):
+    for _ in range(2):
+        action_limiter.check('pin', max_attempts=2, window=WINDOW)
+    
+    assert not action_limiter.check('pin', max_attempts=2, window=WINDOW)[0]
+    assert action_limiter.check('backup', max_attempts=2, window=WINDOW)[0]
+    
+    action_limiter.reset('pin')
+    assert action_limiter.check('pin', max_attempts=2, window=WINDOW)[0]
+
+def test_previous_window_weight_decays(database, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(action_limiter.time, 'time', lambda: now[0])
+    
+    for _ in range(4):
+        assert action_limiter.check('login', max_attempts=4, window=100)[0]
+    assert action_limiter.check('login', max_attempts=4, window=100) == (False, 100)
+    
+    # A mitad del tramo siguiente el anterior pesa la mitad: caben dos intentos más
+    now[0] = 1150.0
+    assert action_limiter.check('login', max_attempts=4, window=100)[0]
+    assert action_limiter.check('login', max_attempts=4, window=100)[0]
+    assert not action_limiter.check('login', max_attempts=4, window=100)[0]
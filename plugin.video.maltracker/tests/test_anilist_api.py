@@ -0,0 +1,44 @@
+"""Conversión de la lista de AniList al formato de MAL"""
+
+import pytest
+
+pytest.importorskip('requests')
+
+from resources import anilist_api, anilist_auth
+from resources.hybrid_api import HybridAPI
+
+def media_entry(anilist_id, id_mal, status='CURRENT'):
+    return {
+        'status': status,
+        'progress': 3,
+        'score': 8,
+        'updatedAt': 1_700_000_000,
+        'media': {
+            'id': anilist_id,
+            'idMal': id_mal,
+            'title': {'romaji': f'Anime {anilist_id}', 'english': None, 'native': None},
+            'episodes': 12,
+            'averageScore': 81,
+            'coverImage': {'medium': None}
+        }
+    }
+
+def test_to_mal_entry_uses_the_mal_id():
+    entry = anilist_api.to_mal_entry(media_entry(154587, 52991))
+    
+    assert entry['node']['id'] == 52991
+    assert entry['node']['mean'] == 8.1
+    assert entry['list_status'] == {'status': 'watching', 'num_episodes_watched': 3, 'score': 8,
+                                    'updated_at': 1_700_000_000}
+
+def test_to_mal_entry_skips_anime_missing_from_mal():
+    # Sin idMal el id de AniList podría coincidir con un mal_id de otro anime
+    assert anilist_api.to_mal_entry(media_entry(52991, None)) is None
+
+def test_anilist_list_leaves_out_entries_without_mal_id(monkeypatch):
+    pages = [[media_entry(1, 100), media_entry(2, None)], [media_entry(3, 300)]]
+    monkeypatch.setattr(anilist_auth, 'load_access_token', lambda: 'token')
+    monkeypatch.setattr(anilist_api, 'iter_user_anime_pages', lambda: iter(pages))
+    
+    result = HybridAPI._get_anilist_list()
+    assert [entry['node']['id'] for entry in result['data']] == [100, 300]
@@ -0,0 +1,206 @@
+"""Catálogo local: fuentes de fichas, importación de volcados, poda y refresco"""
+
+import json
+import time
+import pytest
+
+pytest.importorskip('requests')
+
+from resources import anime_catalog, response_cache
+
+JIKAN = anime_catalog.JIKAN_BASE
+
+def jikan_anime(mal_id, **fields):
+    anime = {
+        'mal_id': mal_id,
+        'title': f'Anime {mal_id}',
+        'images': {'jpg': {'image_url': f'https://cdn.myanimelist.net/{mal_id}.jpg'}},
+        'genres': [{'mal_id': 1, 'name': 'Action'}],
+        'studios': [{'mal_id': 2, 'name': 'Madhouse'}],
+        'aired': {'prop': {'from': {'year': 2020}}},
+        'score': 7.5,
+        'popularity': mal_id
+    }
+    anime.update(fields)
+    return anime
+
+def mal_entry(mal_id, **fields):
+    node = {
+        'id': mal_id,
+        'title': f'Anime {mal_id}',
+        'alternative_titles': {'en': f'English {mal_id}'},
+        'main_picture': {'medium': f'https://cdn.myanimelist.net/{mal_id}.jpg'},
+        'genres': [{'id': 1, 'name': 'Drama'}],
+        'start_season': {'year': 2011, 'season': 'spring'},
+        'mean': 8.1
+    }
+    node.update(fields)
+    return {'node': node, 'list_status': {'status': 'watching'}}
+
+@pytest.fixture
+def catalog(database, tmp_path, monkeypatch):
+    monkeypatch.setattr(response_cache, 'CACHE_DB_PATH', str(tmp_path / 'http_cache.db'))
+    monkeypatch.setattr(response_cache, '_connection', None)
+    monkeypatch.setattr(anime_catalog, '_cached', None)
+    yield anime_catalog
+    if response_cache._connection:
+        response_cache._connection.close()
+
+def rows(database):
+    with database.transaction() as cursor:
+        cursor.execute('SELECT mal_id, title, source FROM anime_catalog ORDER BY mal_id')
+        return cursor.fetchall()
+
+def cache_response(url, body, params=None):
+    text = body if isinstance(body, str) else json.dumps(body)
+    response_cache._store(response_cache.make_key('GET', url, params), text, None, None, 3600)
+
+def test_seed_from_cached_jikan_responses(catalog, database):
+    cache_response(f'{JIKAN}/top/anime', {'data': [jikan_anime(1), jikan_anime(2)]}, {'page': 1})
+    cache_response(f'{JIKAN}/anime/3/full', {'data': jikan_anime(3)})
+    cache_response(f'{JIKAN}/anime', {'data': [jikan_anime(4)]}, {'q': 'frieren'})
+    # Respuestas que no son fichas de anime, o que no se pueden leer
+    cache_response(f'{JIKAN}/anime/3/characters', {'data': [{'mal_id': 99, 'title': 'Personaje'}]})
+    cache_response(f'{JIKAN}/seasons/now', '{"data": [')
+    
+    assert catalog.seed_from_response_cache() == 4
+    assert rows(database) == [(1, 'Anime 1', 'cache'), (2, 'Anime 2', 'cache'),
+                              (3, 'Anime 3', 'cache'), (4, 'Anime 4', 'cache')]
+
+def test_sync_and_detail_entries_share_one_format(catalog):
+    assert catalog.add_entries([mal_entry(10)], 'sync') == 1
+    assert catalog.add_response({'data': jikan_anime(20, year=2023)}, 'detail') == 1
+    
+    entries = catalog.get_entries([10, 20])
+    assert entries[10]['title_english'] == 'English 10'
+    assert entries[10]['year'] == 2011
+    assert entries[10]['score'] == 8.1
+    assert entries[10]['genres'] == [{'name': 'Drama'}]
+    assert entries[20]['year'] == 2023
+    assert entries[20]['studios'] == [{'name': 'Madhouse'}]
+    assert set(entries[10]) == set(entries[20])
+
+def test_repeated_entries_are_upserted(catalog, database):
+    catalog.add_entries([jikan_anime(1), jikan_anime(2)], 'cache')
+    catalog.add_entries([jikan_anime(1, title='Sousou no Frieren', score=9.3)], 'detail')
+    
+    assert catalog.size() == 2
+    assert rows(database)[0] == (1, 'Sousou no Frieren', 'detail')
+    assert catalog.get_entries([1])[1]['score'] == 9.3
+
+def test_entries_without_id_or_title_are_skipped(catalog):
+    added = catalog.add_entries([
+        jikan_anime(1), jikan_anime(None), jikan_anime(2, title=None), 'not an anime',
+        jikan_anime('abc'), jikan_anime(3, genres='Action'), jikan_anime('4')
+    ], 'import')
+    
+    assert added == 2
+    assert sorted(catalog.get_entries([1, 2, 3, 4])) == [1, 4]
+
+def test_candidates_are_memoized_until_the_catalog_changes(catalog):
+    catalog.add_entries([jikan_anime(1)], 'cache')
+    first = catalog.get_candidates()
+    assert catalog.get_candidates() is first
+    
+    time.sleep(0.01)
+    catalog.add_entries([jikan_anime(2)], 'cache')
+    assert [anime['mal_id'] for anime in catalog.get_candidates()] == [1, 2]
+
+@pytest.mark.parametrize('content', [
+    json.dumps([jikan_anime(n) for n in range(1, 4)]),
+    json.dumps({'data': [jikan_anime(n) for n in range(1, 4)]}),
+    '\n'.join(json.dumps(jikan_anime(n)) for n in range(1, 4)) + '\n'
+])
+def test_import_dump_formats(catalog, tmp_path, content):
+    path = tmp_path / 'dump.json'
+    path.write_text(content, encoding='utf-8')
+    
+    assert catalog.import_dump(str(path)) == 3
+    assert catalog.size() == 3
+
+def test_import_dump_skips_malformed_lines(catalog, tmp_path):
+    path = tmp_path / 'dump.jsonl'
+    lines = [json.dumps(jikan_anime(1)), '{"mal_id": 2, "title": "cortado', json.dumps(jikan_anime(3)),
+             json.dumps({'mal_id': 'x', 'title': 'Sin id'})]
+    path.write_text('\n'.join(lines), encoding='utf-8')
+    
+    assert catalog.import_dump(str(path)) == 2
+    assert sorted(catalog.get_entries([1, 2, 3])) == [1, 3]
+
+def test_import_dump_rejects_a_broken_file(catalog, tmp_path):
+    path = tmp_path / 'dump.json'
+    path.write_text(json.dumps([jikan_anime(n) for n in range(1, 4)], indent=2)[:-20], encoding='utf-8')
+    
+    with pytest.raises(ValueError):
+        catalog.import_dump(str(path))
+    assert catalog.size() == 0
+
+def test_import_dump_prunes_to_the_size_limit(catalog, tmp_path, monkeypatch):
+    monkeypatch.setattr(anime_catalog, 'MAX_CATALOG_SIZE', 50)
+    monkeypatch.setattr(anime_catalog, 'IMPORT_BATCH', 40)
+    catalog.add_entries([jikan_anime(n) for n in range(1000, 1030)], 'cache')
+    
+    path = tmp_path / 'dump.jsonl'
+    path.write_text('\n'.join(json.dumps(jikan_anime(n)) for n in range(1, 101)), encoding='utf-8')
+    time.sleep(0.01)
+    assert catalog.import_dump(str(path)) == 100
+    
+    # Sobreviven las 50 fichas más recientes: las antiguas de la caché se descartan
+    assert catalog.size() == 50
+    assert not catalog.get_entries(range(1000, 1030))
+
+def test_prune_keeps_the_most_recently_updated(catalog, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(anime_catalog.time, 'time', lambda: clock[0])
+    for mal_id in range(1, 11):
+        clock[0] += 1
+        catalog.add_entries([jikan_anime(mal_id)], 'cache')
+    clock[0] += 1
+    catalog.add_entries([jikan_anime(2)], 'detail')
+    
+    assert catalog.prune(max_size=4) == 6
+    assert sorted(catalog.get_entries(range(1, 11))) == [2, 8, 9, 10]
+    assert catalog.prune(max_size=4) == 0
+
+@pytest.fixture
+def jikan(catalog, monkeypatch):
+    """response_cache.get_json simulado para las páginas que pide refresh"""
+    requested = []
+    
+    def get_json(url, params=None, **kwargs):
+        requested.append((url, params))
+        page = (params or {}).get('page', 0)
+        return {'data': [jikan_anime(page * 100 + n) for n in range(1, 3)]}
+    
+    monkeypatch.setattr(response_cache, 'get_json', get_json)
+    return requested
+
+def test_refresh_if_due(catalog, database, jikan):
+    catalog.refresh_if_due()
+    assert len(jikan) == catalog.REFRESH_TOP_PAGES + 2
+    assert catalog.size() == (catalog.REFRESH_TOP_PAGES + 1) * 2
+    last_refresh = float(database.get_config_value('catalog_last_refresh'))
+    assert time.time() - last_refresh < 60
+    
+    # Dentro del intervalo no se vuelve a pedir nada
+    jikan.clear()
+    catalog.refresh_if_due()
+    assert jikan == []
+    
+    database.set_config_value('catalog_last_refresh', last_refresh - catalog.REFRESH_INTERVAL)
+    catalog.refresh_if_due()
+    assert len(jikan) == catalog.REFRESH_TOP_PAGES + 2
+
+def test_refresh_stops_at_the_first_failed_request(catalog, database, monkeypatch):
+    requested = []
+    
+    def get_json(url, params=None, **kwargs):
+        requested.append(url)
+        if len(requested) == 3:
+            raise ConnectionError('Jikan no disponible')
+        return {'data': [jikan_anime(len(requested))]}
+    
+    monkeypatch.setattr(response_cache, 'get_json', get_json)
+    assert catalog.refresh() == 2
+    assert len(requested) == 3
+    assert database.get_config_value('catalog_last_refresh') is not None
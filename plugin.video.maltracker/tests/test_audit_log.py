@@ -0,0 +1,50 @@
+"""Retención del registro de auditoría con procesos de vida corta"""
+
+import sqlite3
+import subprocess
+import sys
+import time
+import pytest
+from conftest import subprocess_env
+from resources import audit_log
+
+# Un proceso del plugin: anexa unas pocas entradas y termina
+WORKER = '''
+import sys
+from resources import audit_log
+
+audit_log.MAX_ENTRIES, audit_log.PRUNE_EVERY = 20, 10
+for n in range(int(sys.argv[1])):
+    audit_log.append({'action': 'data_access', 'user_id': 'user', 'details': f'entry {n}'})
+'''
+
+def test_retention_runs_across_short_lived_processes(tmp_path):
+    env = subprocess_env(tmp_path)
+    for _ in range(12):
+        subprocess.run([sys.executable, '-c', WORKER, '5'], env=env, check=True)
+    
+    database_path, = tmp_path.rglob('audit_log.db')
+    with sqlite3.connect(database_path) as conn:
+        count, first_id, last_id = conn.execute('SELECT COUNT(*), MIN(id), MAX(id) FROM audit_log').fetchone()
+    
+    # 60 anexados en procesos de 5: la poda del id 60 deja las 20 últimas
+    assert (count, first_id, last_id) == (20, 41, 60)
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_log, 'AUDIT_DB_PATH', str(tmp_path / 'audit_log.db'))
+    monkeypatch.setattr(audit_log, 'LEGACY_AUDIT_FILE', str(tmp_path / 'audit_log.json'))
+    monkeypatch.setattr(audit_log, '_connection', None)
+    monkeypatch.setattr(audit_log, 'PRUNE_EVERY', 10)
+    yield audit_log
+    audit_log._connection.close()
+
+def test_retention_drops_entries_older_than_max_age(log):
+    old = time.time() - log.MAX_AGE - 60
+    for n in range(5):
+        log.append({'timestamp': old, 'action': 'old', 'details': str(n)})
+    for n in range(5):
+        log.append({'action': 'recent', 'details': str(n)})
+    
+    assert {entry['action'] for entry in log.iter_entries()} == {'recent'}
+    assert log.count() == 5
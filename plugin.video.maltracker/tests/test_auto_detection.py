@@ -0,0 +1,134 @@
+"""Auto-detección: número de episodio del nombre de archivo y seguimiento de reproducción"""
+
+import types
+import pytest
+from resources import auto_detection, title_matcher
+from resources.auto_detection import PlaybackTracker
+
+FRIEREN = 52991
+
+@pytest.mark.parametrize('path, episode', [
+    ('/media/Anime 2023/[SubsPlease] Sousou no Frieren - 05 (1080p) [E3A1B2C4].mkv', 5),
+    ('D:\\Anime\\2024\\Sousou no Frieren EP07.mkv', 7),
+    ('[Erai-raws] Sousou no Frieren - 12 [1080p][5E2B1C9A].mkv', 12),
+    ('[Coalgirls]_Steins;Gate_05_(1280x720_Blu-ray_FLAC)_[2F4F71D3].mkv', 5),
+    ('Mob.Psycho.100.S02E03.1080p.WEB.x264.mkv', 3),
+    ('One Piece - 1071v2 (1080p).mkv', 1071),
+    ('Sousou no Frieren 2023 08.mkv', 8),
+    ('/media/Anime 2023/Kimi no Na wa (2016).mkv', None),
+    ('Sousou no Frieren 2023.mkv', None),
+])
+def test_episode_comes_from_the_file_name_only(path, episode):
+    assert auto_detection.extract_episode_number(path) == episode
+
+class RecordingWriter:
+    
+    def __init__(self):
+        self.submits = []
+    
+    def submit(self, mal_id, episode_num):
+        self.submits.append((mal_id, episode_num))
+
+class FakeTracker(PlaybackTracker):
+    """Reproductor simulado: el test mueve la posición y lanza los eventos"""
+    
+    def __init__(self):
+        super().__init__(writer=RecordingWriter())
+        self.path = None
+        self.position = 0
+        self.total = 1440
+    
+    def play(self, path, position=0):
+        self.path, self.position = path, position
+        self.onAVStarted()
+    
+    def isPlayingVideo(self):
+        return self.path is not None
+    
+    def getPlayingFile(self):
+        return self.path
+    
+    def getVideoInfoTag(self):
+        return types.SimpleNamespace(getTitle=lambda: '')
+    
+    def getTime(self):
+        return self.position
+    
+    def getTotalTime(self):
+        return self.total
+
+@pytest.fixture
+def library(database):
+    database.bulk_upsert_anime([{
+        'mal_id': FRIEREN, 'title': 'Sousou no Frieren', 'alternative_titles': "Frieren: Beyond Journey's End",
+        'status': 'watching', 'episodes_watched': 4, 'total_episodes': 28
+    }])
+    title_matcher.invalidate()
+    yield database
+    title_matcher.invalidate()
+
+def test_index_is_rebuilt_only_when_the_library_changes(library, monkeypatch):
+    builds = []
+    monkeypatch.setattr(title_matcher, 'TitleIndex', lambda aliases: builds.append(aliases) or object())
+    
+    index = title_matcher.get_index()
+    assert title_matcher.get_index() is index
+    
+    # Otras escrituras en la base no tocan la lista: se compara la firma y se reutiliza
+    library.set_config_value('unrelated', 1)
+    assert title_matcher.get_index() is index
+    assert len(builds) == 1
+    
+    library.bulk_upsert_anime([{'mal_id': 5114, 'title': 'Fullmetal Alchemist: Brotherhood', 'status': 'watching'}])
+    assert title_matcher.get_index() is not index
+    assert len(builds) == 2
+    assert (5114, 'Fullmetal Alchemist: Brotherhood') in builds[-1]
+
+def test_tracker_ignores_folder_years_and_crc_tags(library):
+    tracker = FakeTracker()
+    
+    assert tracker.resolve('/media/Anime 2023/[SubsPlease] Sousou no Frieren - 05 (1080p) [E3A1B2C4].mkv') == (FRIEREN, 5)
+    assert tracker.resolve('/media/Anime/[Erai-raws] Sousou no Frieren - 06 [5E2B1C9A].mkv') == (FRIEREN, 6)
+
+def test_episode_is_counted_once_across_resume_seek_and_stop(library):
+    tracker = FakeTracker()
+    path = '/media/Anime 2023/[SubsPlease] Sousou no Frieren - 05 (1080p) [E3A1B2C4].mkv'
+    
+    # Parar a la mitad no cuenta
+    tracker.play(path, position=100)
+    tracker.position = 700
+    tracker.sample()
+    tracker.onPlayBackStopped()
+    assert tracker.writer.submits == []
+    
+    # Reanudar, saltar casi al final y parar: cuenta una vez
+    tracker.play(path, position=700)
+    tracker.position = 1300
+    tracker.sample()
+    tracker.onPlayBackStopped()
+    assert tracker.writer.submits == [(FRIEREN, 5)]
+    
+    # Volver a verlo entero (y eventos repetidos) no vuelve a contar
+    tracker.play(path)
+    tracker.position = 1440
+    tracker.sample()
+    tracker.onPlayBackEnded()
+    tracker.onPlayBackStopped()
+    assert tracker.writer.submits == [(FRIEREN, 5)]
+
+def test_seek_back_before_stopping_does_not_count(library):
+    tracker = FakeTracker()
+    tracker.play('Sousou no Frieren - 06.mkv')
+    tracker.position = 1400
+    tracker.position = 200
+    tracker.sample()
+    tracker.onPlayBackStopped()
+    assert tracker.writer.submits == []
+
+def test_progress_rejects_episodes_beyond_the_series(library):
+    auto_detection.auto_update_progress(FRIEREN, 2023)
+    assert library.get_local_anime(FRIEREN)['episodes_watched'] == 4
+    
+    auto_detection.auto_update_progress(FRIEREN, 6)
+    auto_detection.auto_update_progress(FRIEREN, 5)
+    assert library.get_local_anime(FRIEREN)['episodes_watched'] == 6
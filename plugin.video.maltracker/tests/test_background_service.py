@@ -0,0 +1,146 @@
+"""Servicio residente sin Kodi: el planificador real bajo un xbmc.Monitor simulado"""
+
+import types
+import pytest
+
+pytest.importorskip('requests')
+
+from resources import background_service, config, http_client, local_database
+from resources.scheduler import Scheduler
+
+class FakeClock:
+    
+    def __init__(self, now=0.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+class FakeMonitor(background_service.ServiceMonitor):
+    """Monitor de Kodi simulado: cada espera avanza el reloj y Kodi pide
+    cerrar al llegar a abort_at (o cuando se llame a request_abort)"""
+    
+    def __init__(self, clock, abort_at):
+        self.clock = clock
+        self.abort_at = abort_at
+        self.waits = []
+    
+    def abortRequested(self):
+        return self.clock.now >= self.abort_at
+    
+    def waitForAbort(self, timeout=None):
+        self.waits.append(timeout)
+        self.clock.now = min(self.clock.now + timeout, self.abort_at)
+        return self.abortRequested()
+    
+    def request_abort(self):
+        self.abort_at = self.clock.now
+
+@pytest.fixture
+def service(database, monkeypatch):
+    """Servicio con reloj simulado, sin red y con las tareas instrumentadas"""
+    clock = FakeClock()
+    runs = {}
+    schedulers = []
+    
+    def make_scheduler(monitor):
+        scheduler = Scheduler(monitor, clock=clock)
+        schedulers.append(scheduler)
+        return scheduler
+    
+    def offline(*args, **kwargs):
+        raise AssertionError('network access from the service harness')
+    
+    monkeypatch.setattr(background_service, 'Scheduler', make_scheduler)
+    monkeypatch.setattr(background_service, '_tracker', None)
+    monkeypatch.setattr(background_service, '_ids', None)
+    monkeypatch.setattr(http_client, 'request', offline)
+    
+    # Tareas de red: solo se registran; el resto se ejecutan de verdad
+    for name in ('sync_task', 'notifications_task', 'warm_cache_task', 'catalog_task'):
+        monkeypatch.setattr(background_service, name, lambda name=name: runs.setdefault(name, []).append(clock.now))
+    for name in ('queue_task', 'health_task', 'playback_task', 'system_monitor_task', 'ids_task'):
+        original = getattr(background_service, name)
+        
+        def recorded(name=name, original=original):
+            runs.setdefault(name, []).append(clock.now)
+            original()
+        
+        monkeypatch.setattr(background_service, name, recorded)
+    
+    return types.SimpleNamespace(clock=clock, runs=runs, schedulers=schedulers,
+                                 monitor=lambda abort_at: FakeMonitor(clock, abort_at))
+
+def test_service_runs_every_task_on_schedule(service):
+    background_service.run(service.monitor(abort_at=3600))
+    
+    runs = service.runs
+    assert runs['queue_task'] == [10 + 60 * n for n in range(60)]
+    assert runs['sync_task'] == [30 + 300 * n for n in range(12)]
+    assert runs['notifications_task'] == [60 + 600 * n for n in range(6)]
+    assert runs['warm_cache_task'] == [90 + 1200 * n for n in range(3)]
+    assert runs['catalog_task'] == [120]
+    assert len(runs['playback_task']) == 359
+    assert all(task['errors'] == 0 for task in service.schedulers[0].tasks)
+
+def test_service_shuts_down_cleanly(service, monkeypatch):
+    closed = []
+    monkeypatch.setattr(http_client, 'close_all', lambda: closed.append(True))
+    
+    background_service.run(service.monitor(abort_at=120))
+    
+    assert closed == [True]
+    assert local_database._connection is None
+
+def test_abort_stops_the_service_during_a_task(service, monkeypatch):
+    monitor = service.monitor(abort_at=10 ** 9)
+    monkeypatch.setattr(background_service, 'sync_task', monitor.request_abort)
+    
+    background_service.run(monitor)
+    
+    # sync (t=30) pide cerrar: las tareas vencidas detrás de ella no se ejecutan
+    assert service.clock.now == 30
+    assert service.runs['queue_task'] == [10]
+    assert service.runs['playback_task'] == [10, 20]
+    assert 'ids_task' not in service.runs
+
+def test_failing_task_does_not_stop_the_service(service, monkeypatch):
+    def broken():
+        raise RuntimeError('boom')
+    
+    monkeypatch.setattr(background_service, 'notifications_task', broken)
+    background_service.run(service.monitor(abort_at=1800))
+    
+    tasks = {task['name']: task for task in service.schedulers[0].tasks}
+    assert (tasks['notifications']['runs'], tasks['notifications']['errors']) == (3, 3)
+    assert len(service.runs['sync_task']) == 6
+
+def test_optional_monitors_follow_their_setting(service, monkeypatch):
+    cycles = []
+    
+    class FakeIDS:
+        baseline_hashes = {'mal_tracker.db': {}}
+        
+        def run_cycle(self):
+            cycles.append(service.clock.now)
+    
+    monkeypatch.setattr(background_service, '_ids', FakeIDS())
+    
+    background_service.run(service.monitor(abort_at=300))
+    assert len(service.runs['ids_task']) == 9
+    assert cycles == []
+    
+    background_service.set_task_enabled('ids', True)
+    background_service.run(service.monitor(abort_at=600))
+    assert len(cycles) == 9
+
+def test_settings_change_reloads_credentials(service, monkeypatch):
+    import xbmcaddon
+    monkeypatch.setattr(xbmcaddon, 'calls', [])
+    config.settings.invalidate()
+    
+    config.CLIENT_ID
+    config.CLIENT_ID
+    service.monitor(abort_at=0).onSettingsChanged()
+    config.CLIENT_ID
+    assert len(xbmcaddon.calls) == 2
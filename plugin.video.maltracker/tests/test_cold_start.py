@@ -0,0 +1,61 @@
+"""Arranque en frío del plugin: importar main.py y pintar el menú principal
+
+Kodi lanza un intérprete nuevo en cada clic, así que cada prueba mide en
+un proceso aparte
+"""
+
+import subprocess
+import sys
+from conftest import ADDON_DIR, subprocess_env
+
+# Presupuestos (ms): importar main.py con todos los módulos costaba ~170 ms
+MAIN_IMPORT_BUDGET_MS = 50
+MAIN_MENU_BUDGET_MS = 1000
+
+# Módulos pesados que el menú principal no necesita
+NOT_ON_MAIN_MENU = ('resources.mal_api', 'resources.jikan_api', 'resources.jikan_functions',
+                    'resources.translator', 'resources.settings_menu', 'resources.ai_recommendations',
+                    'resources.advanced_search', 'resources.multimedia')
+
+PLUGIN_ARGV = "import sys; sys.argv = ['plugin://plugin.video.maltracker/', '1', '']"
+
+MAIN_MENU = PLUGIN_ARGV + '''
+import time
+started = time.perf_counter()
+import main
+main.router('')
+elapsed = (time.perf_counter() - started) * 1000
+import xbmcplugin
+assert xbmcplugin.directories == [True], xbmcplugin.directories
+print(elapsed)
+print(' '.join(sorted(name for name in sys.modules if name.startswith('resources.'))))
+'''
+
+def run_python(args, profile):
+    return subprocess.run([sys.executable] + args, cwd=ADDON_DIR, env=subprocess_env(profile),
+                          capture_output=True, text=True, check=True)
+
+def parse_importtime(stderr):
+    """{módulo: tiempo acumulado en µs} de la salida de -X importtime"""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+def test_importing_main_is_cheap(tmp_path):
+    result = run_python(['-X', 'importtime', '-c', f'{PLUGIN_ARGV}; import main'], tmp_path)
+    times = parse_importtime(result.stderr)
+    
+    assert [name for name in times if name.startswith('resources')] == []
+    assert times['main'] / 1000 < MAIN_IMPORT_BUDGET_MS
+
+def test_main_menu_cold_start(tmp_path):
+    elapsed, modules = run_python(['-c', MAIN_MENU], tmp_path).stdout.splitlines()[-2:]
+    modules = modules.split()
+    
+    assert float(elapsed) < MAIN_MENU_BUDGET_MS
+    assert 'resources.local_database' in modules
+    assert [name for name in NOT_ON_MAIN_MENU if name in modules] == []
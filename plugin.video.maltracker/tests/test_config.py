@@ -0,0 +1,79 @@
+"""Configuración perezosa: nada de xbmcaddon al importar ni en el menú principal"""
+
+import os
+import subprocess
+import sys
+import xbmcaddon
+from conftest import ADDON_DIR, subprocess_env
+from resources import config
+
+IMPORT_ALL = '''
+import os, pkgutil, importlib, xbmcaddon
+
+class Unavailable:
+    def __init__(self, *args, **kwargs):
+        raise RuntimeError('xbmcaddon.Addon() called')
+
+xbmcaddon.Addon = Unavailable
+
+from resources import config, local_database
+assert os.path.isdir(config.TOKEN_PATH)
+assert local_database.init_database()
+
+for module in pkgutil.iter_modules(['resources']):
+    try:
+        importlib.import_module(f'resources.{module.name}')
+    except ModuleNotFoundError as e:
+        # Dependencias opcionales que no están instaladas (no son de Kodi)
+        assert not e.name.startswith('xbmc'), e
+'''
+
+MAIN_MENU_CALLERS = '''
+import sys, traceback, xbmcaddon
+sys.argv = ['plugin://plugin.video.maltracker/', '1', '']
+init = xbmcaddon.Addon.__init__
+
+def traced_init(self, id=None):
+    print(traceback.extract_stack()[-2].filename)
+    init(self, id)
+
+xbmcaddon.Addon.__init__ = traced_init
+import main
+main.router('')
+'''
+
+def run_python(code, profile):
+    return subprocess.run([sys.executable, '-c', code], cwd=ADDON_DIR, env=subprocess_env(profile),
+                          capture_output=True, text=True, check=True)
+
+def test_resources_import_without_xbmcaddon(tmp_path):
+    run_python(IMPORT_ALL, tmp_path)
+
+def test_main_menu_reads_no_settings(tmp_path):
+    callers = run_python(MAIN_MENU_CALLERS, tmp_path).stdout.split()
+    
+    # Solo main.py (nombre e icono) y las comprobaciones de addons de streaming
+    assert os.path.join(ADDON_DIR, 'resources', 'config.py') not in callers
+    assert os.path.join(ADDON_DIR, 'main.py') in callers
+
+def test_paths_do_not_touch_xbmcaddon(monkeypatch):
+    monkeypatch.setattr(xbmcaddon, 'calls', [])
+    
+    assert config.TOKEN_PATH.startswith(os.environ['MALTRACKER_TEST_PROFILE'])
+    assert config.TOKEN_FILE == os.path.join(config.TOKEN_PATH, 'token.json')
+    assert xbmcaddon.calls == []
+
+def test_credentials_are_memoized_until_invalidated(monkeypatch):
+    config.settings.invalidate()
+    monkeypatch.setattr(xbmcaddon, 'calls', [])
+    
+    config.CLIENT_ID, config.REDIRECT_URI, config.USER_AGENT
+    config.USER_AGENT
+    assert len(xbmcaddon.calls) == 1
+    assert config.REDIRECT_URI == config.DEFAULT_REDIRECT_URI
+    
+    config.settings.invalidate()
+    assert config.TOKEN_PATH
+    assert len(xbmcaddon.calls) == 1
+    config.CLIENT_SECRET
+    assert len(xbmcaddon.calls) == 2
@@ -0,0 +1,224 @@
+"""Sincronización delta contra un servidor MAL falso en localhost"""
+
+import json
+import time
+import datetime
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+pytest.importorskip('requests')
+
+from resources import auth, http_client, mal_api, rate_limiter, sync_manager
+
+def iso(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat()
+
+class FakeMAL:
+    """Endpoint /v2/users/@me/animelist con paginación limit/offset y paging.next"""
+    
+    def __init__(self, count, max_limit=1000):
+        self.max_limit = max_limit
+        self.fail_offsets = set()
+        self.requests = []
+        self.entries = {}
+        for mal_id in range(1, count + 1):
+            self.entries[mal_id] = {
+                'node': {'id': mal_id, 'title': f'Anime {mal_id}', 'num_episodes': 12},
+                'list_status': {'status': 'plan_to_watch', 'num_episodes_watched': 0, 'score': 0,
+                                'updated_at': iso(1_600_000_000 + mal_id)}
+            }
+        
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            
+            def do_GET(self):
+                fake.handle(self)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}/v2'
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+    
+    def update(self, mal_id, status, updated_at):
+        list_status = self.entries[mal_id]['list_status']
+        list_status['status'] = status
+        list_status['updated_at'] = iso(updated_at)
+    
+    def handle(self, handler):
+        url = urllib.parse.urlsplit(handler.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        self.requests.append(query)
+        
+        limit = min(int(query.get('limit', 100)), self.max_limit)
+        offset = int(query.get('offset', 0))
+        if offset in self.fail_offsets:
+            handler.send_response(500)
+            handler.end_headers()
+            return
+        
+        entries = sorted(self.entries.values(), key=lambda entry: entry['node']['id'])
+        if query.get('sort') == 'list_updated_at':
+            entries.sort(key=sync_manager.entry_updated_at, reverse=True)
+        
+        page = {'data': entries[offset:offset + limit], 'paging': {}}
+        if offset + limit < len(entries):
+            next_query = dict(query, limit=limit, offset=offset + limit)
+            page['paging']['next'] = f'{self.base_url}/users/@me/animelist?{urllib.parse.urlencode(next_query)}'
+        
+        body = json.dumps(page).encode('utf-8')
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def fake_mal(database, monkeypatch):
+    server = FakeMAL(count=250, max_limit=50)
+    monkeypatch.setattr(mal_api, 'API_BASE_URL', server.base_url)
+    monkeypatch.setattr(mal_api, 'load_access_token', lambda: 'token')
+    monkeypatch.setattr(auth, 'load_access_token', lambda: 'token')
+    monkeypatch.setattr(rate_limiter, 'acquire', lambda url: 0)
+    # Reintentos de _make_request sin esperas reales
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    yield server
+    server.close()
+
+def watermark(database):
+    return float(database.get_config_value('sync_watermark_mal', 0))
+
+def local_statuses(database):
+    return {anime['mal_id']: anime['status'] for anime in database.get_local_anime_list()}
+
+def test_iter_user_anime_pages_follows_paging_next(fake_mal):
+    pages = list(mal_api.iter_user_anime_pages(page_size=100, sort='list_updated_at'))
+    
+    # El servidor recorta limit a 50: se siguen sus URLs, no un offset calculado
+    assert [len(page) for page in pages] == [50] * 5
+    assert [query.get('offset') for query in fake_mal.requests] == [None, '50', '100', '150', '200']
+    assert all(query['fields'] == mal_api.LIST_FIELDS for query in fake_mal.requests)
+    assert all(query['sort'] == 'list_updated_at' for query in fake_mal.requests)
+    assert pages[0][0]['list_status']['updated_at'] == iso(1_600_000_250)
+
+def test_iter_user_anime_pages_raises_on_failed_middle_page(fake_mal):
+    fake_mal.fail_offsets.add(100)
+    
+    received = []
+    with pytest.raises(http_client.IncompleteDownloadError):
+        for page in mal_api.iter_user_anime_pages(page_size=50):
+            received.append(page)
+    
+    # Las páginas previas se entregaron; nada de después del fallo
+    assert [len(page) for page in received] == [50, 50]
+    assert max(int(query.get('offset', 0)) for query in fake_mal.requests) == 100
+    assert mal_api.get_user_anime_list(limit=50) is None
+
+def test_first_sync_is_full_and_sets_watermark(fake_mal, database):
+    assert sync_manager.sync_with_mal()
+    
+    assert len(fake_mal.requests) == 5
+    assert all('sort' not in query for query in fake_mal.requests)
+    assert len(local_statuses(database)) == 250
+    assert watermark(database) == 1_600_000_250
+    assert database.get_config_value('last_full_sync_mal') is not None
+
+def test_delta_sync_only_fetches_changes(fake_mal, database, monkeypatch):
+    monkeypatch.setattr(sync_manager, 'DELTA_PAGE_SIZE', 2)
+    assert sync_manager.sync_with_mal()
+    fake_mal.requests.clear()
+    
+    for mal_id in (7, 120, 200):
+        fake_mal.update(mal_id, 'watching', 1_700_000_000 + mal_id)
+    assert sync_manager.sync_with_mal()
+    
+    # Página 1: dos cambios; página 2: un cambio y una entrada ya ingerida -> fin
+    assert len(fake_mal.requests) == 2
+    assert fake_mal.requests[0]['sort'] == 'list_updated_at'
+    statuses = local_statuses(database)
+    assert sorted(mal_id for mal_id, status in statuses.items() if status == 'watching') == [7, 120, 200]
+    assert watermark(database) == 1_700_000_200
+
+def test_delta_sync_without_changes_costs_one_request(fake_mal, database):
+    assert sync_manager.sync_with_mal()
+    fake_mal.requests.clear()
+    
+    assert sync_manager.sync_with_mal()
+    assert len(fake_mal.requests) == 1
+    assert watermark(database) == 1_600_000_250
+
+def test_full_reconcile_after_interval(fake_mal, database):
+    assert sync_manager.sync_with_mal()
+    database.set_config_value('last_full_sync_mal', time.time() - sync_manager.FULL_SYNC_INTERVAL - 1)
+    fake_mal.requests.clear()
+    
+    assert sync_manager.begin_delta_sync('mal') == (1_600_000_250, True)
+    assert sync_manager.sync_with_mal()
+    assert len(fake_mal.requests) == 5
+    assert all('sort' not in query for query in fake_mal.requests)
+    assert sync_manager.begin_delta_sync('mal') == (1_600_000_250, False)
+
+def test_begin_delta_sync_modes(database):
+    assert sync_manager.begin_delta_sync('mal') == (0.0, True)
+    
+    sync_manager.finish_delta_sync('mal', 1234.0, full=True)
+    assert sync_manager.begin_delta_sync('mal') == (1234.0, False)
+    assert sync_manager.begin_delta_sync('mal', full=True) == (1234.0, True)
+
+def test_failure_mid_pagination_keeps_watermark(fake_mal, database):
+    fake_mal.fail_offsets.add(100)
+    
+    assert not sync_manager.sync_with_mal()
+    # Las dos primeras páginas sí se ingirieron, pero la marca de agua no se mueve
+    assert len(local_statuses(database)) == 100
+    assert database.get_config_value('sync_watermark_mal') is None
+    assert database.get_config_value('last_full_sync_mal') is None
+    
+    fake_mal.fail_offsets.clear()
+    assert sync_manager.sync_with_mal()
+    assert len(local_statuses(database)) == 250
+
+def test_delta_failure_refetches_lost_changes(fake_mal, database, monkeypatch):
+    monkeypatch.setattr(sync_manager, 'DELTA_PAGE_SIZE', 2)
+    assert sync_manager.sync_with_mal()
+    for mal_id in (10, 20, 30):
+        fake_mal.update(mal_id, 'completed', 1_700_000_000 + mal_id)
+    
+    fake_mal.fail_offsets.add(2)
+    assert not sync_manager.sync_with_mal()
+    # La primera página (30 y 20) quedó ingerida; la marca de agua sigue en la anterior
+    statuses = local_statuses(database)
+    assert sorted(mal_id for mal_id, status in statuses.items() if status == 'completed') == [20, 30]
+    assert watermark(database) == 1_600_000_250
+    
+    # La entrada de la página perdida (10) se recupera en la siguiente delta
+    fake_mal.fail_offsets.clear()
+    assert sync_manager.sync_with_mal()
+    statuses = local_statuses(database)
+    assert sorted(mal_id for mal_id, status in statuses.items() if status == 'completed') == [10, 20, 30]
+    assert watermark(database) == 1_700_000_030
+
+def test_iter_changed_pages_stops_at_watermark():
+    consumed = []
+    
+    def pages():
+        for number, page in enumerate([[{'list_status': {'updated_at': t}} for t in times]
+                                       for times in ([50, 40], [30, 20], [10, 5])]):
+            consumed.append(number)
+            yield page
+    
+    changed = list(sync_manager.iter_changed_pages(pages(), watermark=25))
+    assert [[entry['list_status']['updated_at'] for entry in page] for page in changed] == [[50, 40], [30]]
+    assert consumed == [0, 1]
+    
+    # Sin cambios se entrega la primera página vacía
+    assert list(sync_manager.iter_changed_pages(pages(), watermark=100)) == [[]]
@@ -0,0 +1,137 @@
+"""Huellas incrementales de IntegrityChecker.check"""
+
+import os
+import sqlite3
+import pytest
+
+from resources import file_integrity
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Contar las lecturas completas de archivo (hash o sumas de página)"""
+    calls = []
+    for name in ('hash_file', 'sqlite_page_checksums'):
+        original = getattr(file_integrity, name)
+        
+        def counted(path, original=original, name=name):
+            calls.append((name, os.path.basename(path)))
+            return original(path)
+        
+        monkeypatch.setattr(file_integrity, name, counted)
+    return calls
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def bump_mtime(path, reference):
+    """Avanzar mtime 1 ns respecto a la huella de referencia (sistemas de archivos rápidos)"""
+    mtime_ns = reference['stat'][1] + 1
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_unchanged_file_is_not_read(tmp_path, reads):
+    path = str(tmp_path / 'token.json')
+    write(path, b'{"access_token": "abc"}')
+    baseline = file_integrity.fingerprint(path)
+    reads.clear()
+    
+    checker = file_integrity.IntegrityChecker()
+    for _ in range(3):
+        assert checker.check(path, baseline) is baseline
+    assert reads == []
+
+def test_changed_file_is_hashed_once(tmp_path, reads):
+    path = str(tmp_path / 'token.json')
+    write(path, b'{"access_token": "abc"}')
+    baseline = file_integrity.fingerprint(path)
+    write(path, b'{"access_token": "abcdef"}')
+    reads.clear()
+    
+    checker = file_integrity.IntegrityChecker()
+    first = checker.check(path, baseline)
+    assert first['hash'] != baseline['hash']
+    # Mientras no vuelva a cambiar se reutiliza la huella observada
+    assert checker.check(path, baseline) is first
+    assert reads == [('hash_file', 'token.json')]
+
+def test_same_size_in_place_edit_is_detected(tmp_path):
+    path = str(tmp_path / 'token.json')
+    write(path, b'{"access_token": "abc"}')
+    baseline = file_integrity.fingerprint(path)
+    
+    with open(path, 'r+b') as f:
+        f.seek(18)
+        f.write(b'xyz')
+    bump_mtime(path, baseline)
+    
+    current = file_integrity.IntegrityChecker().check(path, baseline)
+    assert current['stat'][0] == baseline['stat'][0] and current['stat'][2] == baseline['stat'][2]
+    assert current['size'] == baseline['size']
+    assert current['hash'] != baseline['hash']
+
+def test_sqlite_change_reports_the_changed_pages(tmp_path):
+    path = str(tmp_path / 'mal_tracker.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE anime (mal_id INTEGER PRIMARY KEY, title TEXT)')
+    conn.executemany('INSERT INTO anime VALUES (?, ?)', [(n, f'Anime {n} ' + 'x' * 200) for n in range(2000)])
+    conn.commit()
+    baseline = file_integrity.fingerprint(path)
+    
+    conn.execute("UPDATE anime SET title = 'Sousou no Frieren' WHERE mal_id = 1500")
+    conn.commit()
+    conn.close()
+    
+    current = file_integrity.IntegrityChecker().check(path, baseline)
+    changed = file_integrity.changed_pages(baseline['pages'], current['pages'])
+    
+    assert current['hash'] != baseline['hash']
+    assert len(current['pages']) == len(baseline['pages']) > 50
+    # Cabecera (contador de cambios) y la hoja del registro, no el archivo entero
+    assert 0 in changed
+    assert 2 <= len(changed) <= 3
+
+def test_changed_pages_counts_growth_and_truncation():
+    assert file_integrity.changed_pages([1, 2, 3], [1, 9, 3, 4, 5]) == [1, 3, 4]
+    assert file_integrity.changed_pages([1, 2, 3], [1]) == [1, 2]
+
+def test_file_deleted_between_scans(tmp_path):
+    path = str(tmp_path / 'token.json')
+    write(path, b'{"access_token": "abc"}')
+    baseline = file_integrity.fingerprint(path)
+    checker = file_integrity.IntegrityChecker()
+    write(path, b'{"access_token": "changed"}')
+    assert checker.check(path, baseline)['hash'] != baseline['hash']
+    
+    os.remove(path)
+    assert checker.check(path, baseline) is None
+    assert path not in checker.observed
+
+def test_file_deleted_while_reading(tmp_path, monkeypatch):
+    path = str(tmp_path / 'token.json')
+    write(path, b'{"access_token": "abc"}')
+    baseline = file_integrity.fingerprint(path)
+    write(path, b'{"access_token": "changed"}')
+    
+    def vanish(path):
+        os.remove(path)
+        raise FileNotFoundError(path)
+    
+    monkeypatch.setattr(file_integrity, 'hash_file', vanish)
+    assert file_integrity.IntegrityChecker().check(path, baseline) is None
+
+def test_file_replaced_between_scans(tmp_path):
+    path = str(tmp_path / 'token.json')
+    write(path, b'{"access_token": "abc"}')
+    baseline = file_integrity.fingerprint(path)
+    checker = file_integrity.IntegrityChecker()
+    assert checker.check(path, baseline) is baseline
+    
+    # Reemplazo atómico con el mismo tamaño y el mismo mtime: cambia el inodo
+    replacement = str(tmp_path / 'token.json.tmp')
+    write(replacement, b'{"access_token": "xyz"}')
+    os.utime(replacement, ns=(baseline['stat'][1], baseline['stat'][1]))
+    os.replace(replacement, path)
+    
+    current = checker.check(path, baseline)
+    assert current['stat'][2] != baseline['stat'][2]
+    assert current['hash'] != baseline['hash']
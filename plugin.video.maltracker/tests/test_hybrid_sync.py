@@ -0,0 +1,72 @@
+"""Sincronización híbrida: ingesta en bloque sin pisar cambios locales"""
+
+import pytest
+
+pytest.importorskip('requests')
+
+from resources import auth, hybrid_sync, sync_manager, sync_queue
+
+def mal_entry(mal_id, status='watching', episodes=0, score=0):
+    return {
+        'node': {'id': mal_id, 'title': f'Anime {mal_id}', 'num_episodes': 12,
+                 'genres': [{'id': 1, 'name': 'Drama'}]},
+        'list_status': {'status': status, 'num_episodes_watched': episodes, 'score': score,
+                        'updated_at': '2024-01-01T00:00:00+00:00'}
+    }
+
+def list_fields(database, mal_id):
+    anime = database.get_local_anime(mal_id)
+    return anime['status'], anime['episodes_watched'], anime['score'], anime['synced']
+
+@pytest.fixture
+def synced_library(database):
+    hybrid_sync.sync_compatible_data([mal_entry(mal_id) for mal_id in range(1, 6)])
+    return database
+
+def test_new_anime_are_added_as_synced(synced_library):
+    assert list_fields(synced_library, 1) == ('watching', 0, 0, 1)
+    assert synced_library.get_local_anime(1)['genres'] == ['Drama']
+
+def test_remote_changes_update_synced_rows(synced_library):
+    counts = hybrid_sync.sync_compatible_data([mal_entry(1, 'completed', 12, 9), mal_entry(2)])
+    
+    assert counts == {'added': 0, 'updated': 1, 'unchanged': 1}
+    assert list_fields(synced_library, 1) == ('completed', 12, 9, 1)
+
+def test_pending_local_edits_are_not_overwritten(synced_library):
+    synced_library.update_anime_status(1, 'watching', 7, 8)
+    
+    hybrid_sync.sync_compatible_data([mal_entry(1, 'watching', 5, 0)])
+    
+    # La edición local sigue pendiente de subir y conserva sus valores
+    assert list_fields(synced_library, 1) == ('watching', 7, 8, 0)
+    assert sync_queue.pending_count() == 1
+
+def test_local_only_statuses_survive_a_hybrid_sync(synced_library, monkeypatch):
+    local_status = hybrid_sync.LOCAL_ONLY_STATUSES[0]
+    synced_library.update_anime_status(2, local_status)
+    # Fila antigua marcada como sincronizada por versiones anteriores
+    with synced_library.transaction() as cursor:
+        cursor.execute('UPDATE anime_list SET synced = 1 WHERE mal_id = 2')
+    
+    pages = [[mal_entry(2, 'completed', 12, 7), mal_entry(6)]]
+    monkeypatch.setattr(auth, 'load_access_token', lambda: 'token')
+    monkeypatch.setattr(sync_manager, 'iter_mal_pages', lambda watermark, full: iter(pages))
+    monkeypatch.setattr(hybrid_sync, 'upload_compatible_changes', lambda: (0, 0))
+    
+    assert hybrid_sync.hybrid_sync_with_mal()
+    assert list_fields(synced_library, 2)[:2] == (local_status, 0)
+    assert list_fields(synced_library, 2)[3] == 0
+    assert list_fields(synced_library, 6) == ('watching', 0, 0, 1)
+
+def test_a_page_costs_one_lookup(synced_library):
+    statements = []
+    synced_library.get_connection().set_trace_callback(statements.append)
+    try:
+        hybrid_sync.sync_compatible_data([mal_entry(mal_id, 'completed') for mal_id in range(1, 101)])
+    finally:
+        synced_library.get_connection().set_trace_callback(None)
+    
+    lookups = [sql for sql in statements if sql.lstrip().startswith('SELECT') and 'anime_list' in sql]
+    assert len(lookups) == 1
+    assert synced_library.get_local_anime(100)['status'] == 'completed'
@@ -0,0 +1,75 @@
+"""Regresión de planes de consulta: advanced_lists y analytics deben usar índices"""
+
+import random
+import pytest
+from resources import advanced_lists, analytics
+
+GENRES = ['Action', 'Comedy', 'Drama', 'Fantasy', 'Romance', 'Sci-Fi', 'Slice of Life']
+STATUSES = ['watching', 'completed', 'on_hold', 'dropped', 'plan_to_watch']
+
+def populate(database, count=3000):
+    rng = random.Random(6)
+    database.bulk_upsert_anime([{
+        'mal_id': mal_id,
+        'title': f'Anime {mal_id}',
+        'status': rng.choice(STATUSES),
+        'episodes_watched': rng.randint(0, 24),
+        'total_episodes': rng.randint(1, 100),
+        'score': rng.randint(0, 10),
+        'synopsis': 'x' * 200,
+        'genres': rng.sample(GENRES, 2),
+        'studios': [f'Studio {mal_id % 40}'],
+        'year': rng.randint(1985, 2025)
+    } for mal_id in range(1, count + 1)])
+
+def run_all_queries():
+    """Llamar a todas las consultas de los dos módulos"""
+    advanced_lists.get_advanced_list_menu()
+    for filter_id in advanced_lists.SMART_FILTERS:
+        advanced_lists.get_anime_by_smart_filter(filter_id)
+    for genre in advanced_lists.GENRE_LISTS:
+        advanced_lists.get_anime_by_genre(genre)
+    advanced_lists.get_list_statistics()
+    analytics.get_viewing_analytics()
+
+def traced_selects(connection):
+    statements = []
+    connection.set_trace_callback(statements.append)
+    try:
+        run_all_queries()
+    finally:
+        connection.set_trace_callback(None)
+    return list(dict.fromkeys(sql for sql in statements if sql.lstrip().upper().startswith('SELECT')))
+
+def without_rowid_tables(connection):
+    """Tablas WITHOUT ROWID: recorrerlas es recorrer su índice de clave primaria"""
+    rows = connection.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'").fetchall()
+    return {name for name, sql in rows if sql and 'WITHOUT ROWID' in sql.upper()}
+
+def unindexed_steps(connection, sql, clustered):
+    plan = [row[3] for row in connection.execute(f'EXPLAIN QUERY PLAN {sql}')]
+    problems = []
+    for step in plan:
+        if not step.startswith('SCAN '):
+            continue
+        if 'INDEX' in step or step.split()[1] in clustered:
+            continue
+        problems.append(step)
+    return problems
+
+@pytest.mark.parametrize('analyzed', [False, True], ids=['fresh', 'analyzed'])
+def test_every_query_uses_an_index(database, analyzed):
+    populate(database)
+    connection = database.get_connection()
+    if analyzed:
+        # maintenance.optimize_performance ejecuta ANALYZE
+        connection.execute('ANALYZE')
+    
+    statements = traced_selects(connection)
+    # Estados + filtros + géneros (contadores y listados) + estadísticas + analytics
+    assert len(statements) >= 40
+    
+    clustered = without_rowid_tables(connection)
+    failures = {sql: steps for sql in statements
+                if (steps := unindexed_steps(connection, sql, clustered))}
+    assert failures == {}
@@ -0,0 +1,149 @@
+"""Token bucket por host con reloj simulado"""
+
+import email.utils
+import pytest
+from resources import rate_limiter
+from resources.rate_limiter import TokenBucket
+
+class FakeClock:
+    """Reloj manual: sleep() avanza el tiempo en lugar de esperar"""
+    
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+    
+    def __call__(self):
+        return self.now
+    
+    def advance(self, seconds):
+        self.now += seconds
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class FakeResponse:
+    
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def make_bucket(clock, capacity=3, rate=1.0):
+    return TokenBucket(capacity, rate, clock=clock, sleep=clock.sleep)
+
+def test_burst_goes_out_without_waiting(clock):
+    bucket = make_bucket(clock, capacity=3, rate=1.0)
+    
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    # Agotada la ráfaga, cada petición espera un token más que la anterior
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(2.0)
+
+def test_refill_follows_elapsed_time(clock):
+    bucket = make_bucket(clock, capacity=3, rate=2.0)
+    for _ in range(3):
+        bucket.reserve()
+    
+    clock.advance(1.0)
+    assert bucket.tokens == 0  # la recarga se calcula en la siguiente petición
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = make_bucket(clock, capacity=3, rate=1.0)
+    bucket.reserve()
+    
+    clock.advance(3600)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() == pytest.approx(1.0)
+
+def test_acquire_sleeps_only_for_sustained_traffic(clock):
+    bucket = make_bucket(clock, capacity=2, rate=0.5)
+    
+    for _ in range(6):
+        bucket.acquire()
+    
+    # Dos peticiones inmediatas y después una cada 1/rate segundos
+    assert clock.sleeps == [pytest.approx(2.0)] * 4
+    assert clock.now == pytest.approx(1008.0)
+
+def test_retry_after_blocks_the_host(clock):
+    bucket = make_bucket(clock, capacity=3, rate=1.0)
+    
+    assert bucket.penalize(retry_after=5) == 5
+    assert bucket.reserve() == pytest.approx(5.0)
+    
+    clock.advance(5)
+    assert bucket.reserve() == 0
+
+def test_backoff_without_retry_after_is_exponential_and_capped(clock):
+    bucket = make_bucket(clock)
+    
+    waits = [bucket.penalize() for _ in range(8)]
+    assert waits == [1, 2, 4, 8, 16, 32, rate_limiter.MAX_BACKOFF, rate_limiter.MAX_BACKOFF]
+    
+    bucket.record_success()
+    assert bucket.penalize() == 1
+
+def test_parse_retry_after():
+    assert rate_limiter.parse_retry_after('7') == 7.0
+    assert rate_limiter.parse_retry_after('-3') == 0.0
+    assert rate_limiter.parse_retry_after('') is None
+    assert rate_limiter.parse_retry_after('soon') is None
+    
+    http_date = email.utils.formatdate(0, usegmt=True)
+    assert rate_limiter.parse_retry_after(http_date) == 0.0
+
+def test_record_response_penalizes_429(clock, monkeypatch):
+    bucket = make_bucket(clock)
+    monkeypatch.setitem(rate_limiter._buckets, 'api.example.test', bucket)
+    url = 'https://api.example.test/v2/anime'
+    
+    assert rate_limiter.record_response(url, FakeResponse(429, {'Retry-After': '12'})) == 12.0
+    assert bucket.reserve() == pytest.approx(12.0)
+    
+    assert rate_limiter.record_response(url, FakeResponse(200)) == 0
+    assert bucket.failures == 0
+
+def test_buckets_are_shared_per_host():
+    first = rate_limiter.get_bucket('https://api.jikan.moe/v4/anime/1')
+    second = rate_limiter.get_bucket('https://API.jikan.moe/v4/top/anime')
+    
+    assert first is second
+    assert (first.capacity, first.rate) == rate_limiter.HOST_POLICIES['api.jikan.moe']
+    assert first.window == rate_limiter.HOST_WINDOWS['api.jikan.moe']
+
+def jikan_bucket(clock):
+    capacity, rate = rate_limiter.HOST_POLICIES['api.jikan.moe']
+    return TokenBucket(capacity, rate, clock=clock, sleep=clock.sleep, window=rate_limiter.HOST_WINDOWS['api.jikan.moe'])
+
+def test_jikan_detail_fanout_fits_in_three_seconds(clock):
+    bucket = jikan_bucket(clock)
+    
+    # Nueve secciones de una ficha: ráfaga de 3 y luego 3 por segundo
+    waits = [bucket.reserve() for _ in range(9)]
+    assert waits[:3] == [0, 0, 0]
+    assert max(waits) == pytest.approx(2.0)
+
+def test_jikan_window_caps_sustained_traffic_at_60_per_minute(clock):
+    bucket = jikan_bucket(clock)
+    
+    starts = [clock.now + bucket.reserve() for _ in range(200)]
+    assert starts == sorted(starts)
+    # Ningún tramo de 60 s contiene más de 60 peticiones
+    assert all(later - earlier >= 60 - 1e-9 for earlier, later in zip(starts, starts[60:]))
+    # Agotada la primera ventana se sale a 1 petición/s, no a 3
+    assert starts[120] - starts[60] == pytest.approx(60.0)
+
+def test_window_forgets_requests_older_than_the_window(clock):
+    bucket = jikan_bucket(clock)
+    for _ in range(60):
+        clock.advance(bucket.reserve())
+    
+    clock.advance(120)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
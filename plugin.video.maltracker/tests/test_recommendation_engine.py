@@ -0,0 +1,72 @@
+"""Matriz de recomendaciones del catálogo: compilada por el servicio y cargada por el plugin"""
+
+import random
+import pytest
+from resources import anime_catalog, recommendation_engine
+from resources.recommendation_engine import CandidateMatrix
+
+GENRES = ['Action', 'Comedy', 'Drama', 'Fantasy', 'Romance', 'Sci-Fi', 'Slice of Life', 'Mystery']
+
+def jikan_anime(mal_id, rng):
+    return {
+        'mal_id': mal_id, 'title': f'Anime {mal_id}', 'score': round(rng.uniform(5, 9), 2),
+        'popularity': rng.randint(1, 20000), 'year': rng.randint(1990, 2025),
+        'genres': [{'name': name} for name in rng.sample(GENRES, 2)],
+        'studios': [{'name': f'Studio {rng.randint(1, 15)}'}]
+    }
+
+LIBRARY = [
+    {'mal_id': 900001, 'status': 'completed', 'score': 9, 'year': 2015, 'genres': ['Action', 'Fantasy'], 'studios': ['Studio 3']},
+    {'mal_id': 900002, 'status': 'dropped', 'score': 0, 'year': 2001, 'genres': ['Romance'], 'studios': ['Studio 7']},
+]
+
+@pytest.fixture
+def catalog(database, monkeypatch):
+    monkeypatch.setattr(recommendation_engine, '_catalog_matrix', None)
+    monkeypatch.setattr(anime_catalog, '_cached', None)
+    rng = random.Random(7)
+    anime_catalog.add_entries([jikan_anime(mal_id, rng) for mal_id in range(1, 301)], 'import')
+    return database
+
+def ranking(results):
+    return [(anime['mal_id'], score) for anime, score in results]
+
+@pytest.mark.parametrize('numpy_enabled', [False, True])
+def test_stored_matrix_ranks_like_a_fresh_compile(catalog, monkeypatch, numpy_enabled):
+    if numpy_enabled and recommendation_engine.numpy is None:
+        pytest.skip('NumPy no disponible')
+    monkeypatch.setattr(recommendation_engine, 'NUMPY_ENABLED', numpy_enabled)
+    
+    fresh = CandidateMatrix(anime_catalog.get_candidates())
+    assert recommendation_engine.store_catalog_matrix()
+    stored = recommendation_engine.get_catalog_matrix()
+    
+    assert stored.items is None and len(stored) == 300
+    assert ranking(stored.recommend(LIBRARY, 20, {5})) == ranking(fresh.recommend(LIBRARY, 20, {5}))
+    base = anime_catalog.get_entries([42])[42]
+    assert ranking(stored.similar(base, 10)) == ranking(fresh.similar(base, 10))
+
+def test_plugin_loads_the_stored_matrix_without_compiling(catalog, monkeypatch):
+    recommendation_engine.store_catalog_matrix()
+    
+    def compile_forbidden(self, candidates):
+        raise AssertionError('the plugin compiled the matrix')
+    
+    monkeypatch.setattr(CandidateMatrix, '__init__', compile_forbidden)
+    assert len(recommendation_engine.get_catalog_matrix().recommend(LIBRARY, 5)) == 5
+
+def test_service_recompiles_only_when_the_catalog_changes(catalog):
+    assert recommendation_engine.store_catalog_matrix()
+    assert not recommendation_engine.store_catalog_matrix()
+    
+    anime_catalog.add_entries([jikan_anime(301, random.Random(1))], 'detail')
+    assert recommendation_engine.store_catalog_matrix()
+
+def test_entries_pruned_after_compiling_are_skipped(catalog):
+    recommendation_engine.store_catalog_matrix()
+    matrix = recommendation_engine.get_catalog_matrix()
+    best = [anime['mal_id'] for anime, _ in matrix.recommend(LIBRARY, 3)]
+    
+    with catalog.transaction() as cursor:
+        cursor.execute('DELETE FROM anime_catalog WHERE mal_id = ?', (best[0],))
+    assert [anime['mal_id'] for anime, _ in matrix.recommend(LIBRARY, 3)] == best[1:]
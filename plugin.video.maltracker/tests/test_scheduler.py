@@ -0,0 +1,97 @@
+"""Planificador del servicio con reloj y xbmc.Monitor simulados"""
+
+from resources.scheduler import Scheduler
+
+class FakeClock:
+    
+    def __init__(self, now=0.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+class FakeMonitor:
+    """Monitor cuyas esperas avanzan el reloj; pide cerrar tras max_waits esperas"""
+    
+    def __init__(self, clock, max_waits):
+        self.clock = clock
+        self.max_waits = max_waits
+        self.waits = []
+    
+    def abortRequested(self):
+        return len(self.waits) >= self.max_waits
+    
+    def waitForAbort(self, timeout=None):
+        self.waits.append(timeout)
+        self.clock.now += timeout
+        return self.abortRequested()
+
+def test_tasks_run_after_initial_delay_and_then_every_interval():
+    clock = FakeClock()
+    scheduler = Scheduler(FakeMonitor(clock, 100), clock=clock)
+    runs = []
+    scheduler.add_task('fast', 10, lambda: runs.append(('fast', clock.now)), initial_delay=5)
+    scheduler.add_task('slow', 30, lambda: runs.append(('slow', clock.now)))
+    
+    assert scheduler.run_pending() == 5
+    assert runs == [('slow', 0)]
+    
+    clock.now = 5
+    assert scheduler.run_pending() == 10
+    clock.now = 15
+    scheduler.run_pending()
+    clock.now = 30
+    scheduler.run_pending()
+    assert runs == [('slow', 0), ('fast', 5), ('fast', 15), ('fast', 30), ('slow', 30)]
+
+def test_failing_task_does_not_stop_the_others():
+    clock = FakeClock()
+    scheduler = Scheduler(FakeMonitor(clock, 100), clock=clock)
+    runs = []
+    
+    def broken():
+        raise RuntimeError('boom')
+    
+    scheduler.add_task('broken', 10, broken)
+    scheduler.add_task('healthy', 10, lambda: runs.append(clock.now))
+    scheduler.run_pending()
+    
+    broken_task, healthy_task = scheduler.tasks
+    assert (broken_task['runs'], broken_task['errors']) == (1, 1)
+    assert (healthy_task['runs'], healthy_task['errors']) == (1, 0)
+    assert broken_task['next_run'] == 10
+
+def test_run_sleeps_until_next_task_and_stops_on_abort():
+    clock = FakeClock()
+    monitor = FakeMonitor(clock, max_waits=4)
+    scheduler = Scheduler(monitor, clock=clock)
+    runs = []
+    scheduler.add_task('sync', 60, lambda: runs.append(clock.now), initial_delay=30)
+    
+    scheduler.run()
+    
+    assert monitor.waits == [30, 60, 60, 60]
+    assert runs == [30, 90, 150]
+
+def test_run_never_busy_loops():
+    clock = FakeClock()
+    monitor = FakeMonitor(clock, max_waits=3)
+    scheduler = Scheduler(monitor, clock=clock)
+    scheduler.add_task('instant', 0, lambda: None)
+    
+    scheduler.run()
+    
+    # Aunque una tarea siempre esté vencida, cada vuelta espera al menos 1 s
+    assert monitor.waits == [1, 1, 1]
+
+def test_abort_requested_skips_remaining_tasks():
+    clock = FakeClock()
+    monitor = FakeMonitor(clock, max_waits=0)
+    scheduler = Scheduler(monitor, clock=clock)
+    runs = []
+    scheduler.add_task('sync', 60, lambda: runs.append('sync'))
+    
+    assert scheduler.run_pending() == 0
+    scheduler.run()
+    assert runs == []
+    assert monitor.waits == []
@@ -0,0 +1,136 @@
+"""Almacén de estado: caché entre procesos, importación de JSON antiguos y escrituras atómicas"""
+
+import json
+import subprocess
+import sys
+import pytest
+from conftest import subprocess_env
+from resources import state_store
+
+# Otro proceso (el servicio o un plugin) que escribe en la misma base de datos
+WRITER = '''
+import json, sys
+from resources import local_database, state_store
+
+local_database.DB_PATH = sys.argv[1]
+state_store.namespace(sys.argv[2]).update(json.loads(sys.argv[3]))
+'''
+
+@pytest.fixture
+def store(database):
+    """Espacio de nombres sin registrar (no comparte estado con el addon)"""
+    return state_store.Namespace('test_state', {'theme': 'default', 'custom': {'font': 'sans'}})
+
+@pytest.fixture
+def legacy(store, tmp_path):
+    path = tmp_path / 'legacy_state.json'
+    path.write_text(json.dumps({'theme': 'dark', 'friends': ['a', 'b']}), encoding='utf-8')
+    store.legacy_file = str(path)
+    return path
+
+def write_from_other_process(tmp_path, database, name, values):
+    subprocess.run([sys.executable, '-c', WRITER, database.DB_PATH, name, json.dumps(values)],
+                   env=subprocess_env(tmp_path), check=True)
+
+def stored_rows(database, name):
+    with database.transaction() as cursor:
+        cursor.execute('SELECT key, value FROM state WHERE namespace = ?', (name,))
+        return {key: json.loads(value) for key, value in cursor.fetchall()}
+
+def test_cache_is_dropped_when_another_process_writes(store, database, tmp_path):
+    assert store.update({'theme': 'light'})
+    assert store.get('theme') == 'light'
+    
+    write_from_other_process(tmp_path, database, 'test_state', {'theme': 'dark'})
+    
+    # PRAGMA data_version cambia: se vuelve a leer en vez de servir la caché
+    assert store.get('theme') == 'dark'
+    assert store.load()['theme'] == 'dark'
+
+def test_cache_is_kept_without_outside_writes(store):
+    assert store.update({'theme': 'light'})
+    store.get('theme')
+    
+    # Sin escrituras de otros procesos no se vuelve a consultar la tabla
+    state_store._cache[store.name]['theme'] = ('cached', '"cached"')
+    assert store.get('theme') == 'cached'
+
+def test_defaults_are_merged_and_copied(store):
+    assert store.load() == {'theme': 'default', 'custom': {'font': 'sans'}}
+    assert store.get('missing', 5) == 5
+    
+    assert store.update({'custom': {'font': 'serif'}, 'extra': [1]})
+    document = store.load()
+    assert document == {'theme': 'default', 'custom': {'font': 'serif'}, 'extra': [1]}
+    
+    # Modificar lo devuelto no toca ni los valores por defecto ni la caché
+    document['extra'].append(2)
+    store.load()['custom']['font'] = 'mono'
+    assert store.get('extra') == [1]
+    assert store.get('custom') == {'font': 'serif'}
+    assert store.defaults['custom'] == {'font': 'sans'}
+
+def test_save_replaces_and_update_merges(store, database):
+    assert store.save({'theme': 'dark', 'extra': 1})
+    assert store.update({'extra': 2})
+    assert stored_rows(database, 'test_state') == {'theme': 'dark', 'extra': 2}
+    
+    assert store.save({'theme': 'light'})
+    assert stored_rows(database, 'test_state') == {'theme': 'light'}
+    assert store.load() == {'theme': 'light', 'custom': {'font': 'sans'}}
+
+def test_failed_update_writes_nothing(store, database):
+    assert store.update({'theme': 'dark'})
+    
+    # El segundo valor no se puede serializar: la primera clave tampoco se guarda
+    assert not store.update({'theme': 'light', 'broken': object()})
+    assert stored_rows(database, 'test_state') == {'theme': 'dark'}
+    assert store.get('theme') == 'dark'
+    assert store.get('broken') is None
+
+def test_legacy_file_is_imported_once(store, legacy, database):
+    assert store.load()['theme'] == 'dark'
+    assert stored_rows(database, 'test_state') == {'theme': 'dark', 'friends': ['a', 'b']}
+    assert not legacy.exists()
+    
+    assert store.update({'theme': 'light'})
+    state_store._cache.clear()
+    store.legacy_checked = False
+    assert store.get('theme') == 'light'
+
+def test_legacy_file_survives_a_failed_import(store, legacy, database):
+    # La transacción que importa falla después de la importación: se deshace todo
+    assert not store.update({'broken': object()})
+    assert legacy.exists()
+    assert stored_rows(database, 'test_state') == {}
+    
+    assert store.get('friends') == ['a', 'b']
+    assert not legacy.exists()
+
+def test_legacy_file_is_removed_after_commit(store, legacy, database, monkeypatch):
+    connection = database.get_connection()
+    seen = []
+    
+    class Connection:
+        """Conexión que anota si el JSON seguía en disco al confirmar"""
+        
+        def __getattr__(self, name):
+            return getattr(connection, name)
+        
+        def commit(self):
+            seen.append(legacy.exists())
+            connection.commit()
+    
+    monkeypatch.setattr(database, 'get_connection', Connection)
+    
+    assert store.get('theme') == 'dark'
+    assert seen == [True]
+    assert not legacy.exists()
+
+def test_legacy_import_waits_for_a_top_level_access(store, legacy, database):
+    with database.transaction():
+        assert store.get('theme') == 'default'
+    assert legacy.exists()
+    
+    assert store.get('theme') == 'dark'
+    assert not legacy.exists()
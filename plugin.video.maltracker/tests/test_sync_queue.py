@@ -0,0 +1,122 @@
+"""Cola de subida a MAL: agrupación de ediciones, revisiones y backoff"""
+
+import pytest
+
+pytest.importorskip('requests')
+
+from resources import auth, mal_api, sync_queue
+
+class FakeUploads:
+    """mal_api.update_anime_status simulado; on_upload permite editar a mitad de subida"""
+    
+    def __init__(self, ok=True):
+        self.ok = ok
+        self.calls = []
+        self.on_upload = None
+    
+    def __call__(self, mal_id, status, episodes_watched=None, score=None):
+        self.calls.append((mal_id, status, episodes_watched, score))
+        if self.on_upload:
+            self.on_upload(mal_id)
+        return self.ok
+
+@pytest.fixture
+def uploads(database, monkeypatch):
+    fake = FakeUploads()
+    monkeypatch.setattr(auth, 'load_access_token', lambda: 'token')
+    monkeypatch.setattr(mal_api, 'update_anime_status', fake)
+    for mal_id in (1, 2):
+        assert database.add_anime_to_list({'mal_id': mal_id, 'title': f'Anime {mal_id}', 'episodes': 12}, 'watching')
+    return fake
+
+def queue_rows(database):
+    with database.transaction() as cursor:
+        cursor.execute('SELECT mal_id, revision, attempts, next_attempt, last_error FROM sync_queue ORDER BY mal_id')
+        return cursor.fetchall()
+
+def synced(database, mal_id):
+    return database.get_local_anime(mal_id)['synced']
+
+def test_repeated_edits_upload_the_final_state_once(database, uploads):
+    for episode in range(1, 6):
+        database.update_anime_status(1, 'watching', episode)
+    database.update_anime_status(1, None, None, 8)
+    
+    assert sync_queue.pending_count() == 1
+    assert queue_rows(database)[0][:2] == (1, 6)
+    
+    assert sync_queue.drain() == (1, 0)
+    assert uploads.calls == [(1, 'watching', 5, 8)]
+    assert sync_queue.pending_count() == 0
+    assert synced(database, 1) == 1
+
+def test_edit_during_upload_stays_queued(database, uploads):
+    database.update_anime_status(1, 'watching', 3)
+    uploads.on_upload = lambda mal_id: database.update_anime_status(mal_id, 'watching', 4)
+    
+    assert sync_queue.drain() == (1, 0)
+    
+    # La subida llevaba el episodio 3: la revisión 2 no se retira ni se marca como sincronizada
+    assert [row[:2] for row in queue_rows(database)] == [(1, 2)]
+    assert synced(database, 1) == 0
+    
+    uploads.on_upload = None
+    assert sync_queue.drain() == (1, 0)
+    assert uploads.calls[-1] == (1, 'watching', 4, 0)
+    assert sync_queue.pending_count() == 0
+    assert synced(database, 1) == 1
+
+def test_failed_uploads_back_off_exponentially(database, uploads, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(sync_queue.time, 'time', lambda: now[0])
+    uploads.ok = False
+    database.update_anime_status(1, 'completed', 12)
+    
+    delays = []
+    for _ in range(4):
+        assert sync_queue.drain() == (0, 1)
+        next_attempt = queue_rows(database)[0][3]
+        delays.append(next_attempt - now[0])
+        
+        # Antes de que toque el reintento no se vuelve a pedir nada
+        calls = len(uploads.calls)
+        assert sync_queue.drain() == (0, 0)
+        assert len(uploads.calls) == calls
+        now[0] = next_attempt
+    
+    base = sync_queue.RETRY_BASE
+    assert delays == [base, base * 2, base * 4, base * 8]
+    assert queue_rows(database)[0][2:] == (4, now[0], 'upload failed')
+
+def test_backoff_is_capped(database, uploads, monkeypatch):
+    monkeypatch.setattr(sync_queue.time, 'time', lambda: 1000.0)
+    uploads.ok = False
+    database.update_anime_status(1, 'completed', 12)
+    with database.transaction() as cursor:
+        cursor.execute('UPDATE sync_queue SET attempts = 30')
+    
+    sync_queue.drain()
+    assert queue_rows(database)[0][3] == 1000.0 + sync_queue.MAX_RETRY_DELAY
+
+def test_new_edit_resets_the_backoff(database, uploads):
+    uploads.ok = False
+    database.update_anime_status(1, 'completed', 12)
+    sync_queue.drain()
+    assert queue_rows(database)[0][2] == 1
+    
+    database.update_anime_status(1, 'completed', 12, 9)
+    assert queue_rows(database)[0][2:] == (0, 0, None)
+    
+    uploads.ok = True
+    assert sync_queue.drain() == (1, 0)
+    assert sync_queue.pending_count() == 0
+
+def test_local_only_status_leaves_the_queue_without_uploading(database, uploads):
+    from resources import hybrid_sync
+    
+    database.update_anime_status(2, hybrid_sync.LOCAL_ONLY_STATUSES[0])
+    
+    assert sync_queue.drain() == (0, 0)
+    assert uploads.calls == []
+    assert sync_queue.pending_count() == 0
+    assert synced(database, 2) == 0